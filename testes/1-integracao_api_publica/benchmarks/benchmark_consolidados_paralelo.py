@@ -0,0 +1,87 @@
+"""Benchmark: gerar_multiplos_consolidados_paralelo com threads x processos.
+
+Gera de 1 a N consolidados sintéticos (mesmo formato das demonstrações
+contábeis) e mede o tempo de cada modo, sem cache.
+
+Uso (a partir de testes/1-integracao_api_publica):
+    python -m benchmarks.benchmark_consolidados_paralelo --linhas 200000 --max-saidas 4
+"""
+
+import argparse
+import os
+import shutil
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from domain.servicos.gerador_consolidados import GeradorConsolidados
+
+
+def gerar_dataframe(linhas: int, semente: int) -> pd.DataFrame:
+    """DataFrame sintético com as colunas de uma demonstração contábil."""
+    rng = np.random.default_rng(semente)
+    return pd.DataFrame({
+        'ano': rng.integers(2020, 2026, linhas),
+        'trimestre': rng.choice(['1T', '2T', '3T', '4T'], linhas),
+        'reg_ans': rng.integers(300000, 400000, linhas),
+        'cd_conta_contabil': rng.integers(400000000, 499999999, linhas).astype(str),
+        'descricao': rng.choice(
+            ['Despesas com Eventos / Sinistros', '(-) Glosas', 'Outras despesas operacionais'],
+            linhas
+        ),
+        'vl_saldo_inicial': rng.normal(0, 1e6, linhas).round(2),
+        'vl_saldo_final': rng.normal(0, 1e6, linhas).round(2),
+    })
+
+
+def medir(consolidados: dict, modo: str, max_workers: int, repeticoes: int) -> float:
+    """Melhor tempo (s) entre as repetições."""
+    tempos = []
+    for _ in range(repeticoes):
+        diretorio = tempfile.mkdtemp(prefix=f"bench_{modo}_")
+        try:
+            inicio = time.perf_counter()
+            resultados = GeradorConsolidados.gerar_multiplos_consolidados_paralelo(
+                consolidados,
+                diretorio,
+                usar_cache=False,
+                max_workers=max_workers,
+                modo=modo
+            )
+            tempos.append(time.perf_counter() - inicio)
+            if not all(resultados.values()):
+                raise RuntimeError(f"Falha ao gerar consolidados no modo {modo}: {resultados}")
+        finally:
+            shutil.rmtree(diretorio, ignore_errors=True)
+    return min(tempos)
+
+
+def principal():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--linhas', type=int, default=200000, help='Linhas por consolidado')
+    parser.add_argument('--max-saidas', type=int, default=4, help='Maior número de consolidados (1..N)')
+    parser.add_argument('--workers', type=int, default=None, help='Threads/processos (padrão: nº de saídas)')
+    parser.add_argument('--repeticoes', type=int, default=3, help='Repetições por medição (vale o melhor tempo)')
+    args = parser.parse_args()
+
+    print(f"CPUs: {os.cpu_count()} | linhas por consolidado: {args.linhas:,}")
+    print(f"{'saídas':>7} {'threads (s)':>12} {'processos (s)':>14} {'speedup':>8}")
+
+    for quantidade in range(1, args.max_saidas + 1):
+        consolidados = {
+            f"consolidado_{i}": gerar_dataframe(args.linhas, semente=i)
+            for i in range(quantidade)
+        }
+        max_workers = args.workers or quantidade
+        tempo_threads = medir(consolidados, 'threads', max_workers, args.repeticoes)
+        tempo_processos = medir(consolidados, 'processos', max_workers, args.repeticoes)
+        print(
+            f"{quantidade:>7} {tempo_threads:>12.2f} {tempo_processos:>14.2f} "
+            f"{tempo_threads / tempo_processos:>7.2f}x"
+        )
+
+
+if __name__ == '__main__':
+    principal()
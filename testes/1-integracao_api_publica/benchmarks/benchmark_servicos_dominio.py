@@ -0,0 +1,233 @@
+"""Micro-benchmarks das funções de domínio mais quentes do estágio 1.
+
+Para cada escala, gera um conjunto sintético (benchmarks.dados_sinteticos),
+carrega-o com os mesmos passos da consolidação e mede isoladamente:
+- ProcessadorDemonstracoes: filtrar_*, agregar_operadoras,
+  aplicar_regras_duplicidade e agregar_sinistros_sem_deducoes
+- GeradorConsolidadosPandas: _fazer_join e _formatar_valores_brasileiros
+
+Vale o melhor tempo entre as repetições (as entradas que a função altera são
+copiadas antes de cada repetição, fora da medição). Os resultados vão para um
+JSON (--saida) e são comparados com a linha de base
+(linha_de_base_servicos_dominio.json, versionada): o script termina com código
+1 se alguma medição ficar mais lenta que a tolerância. --atualizar-linha-de-base
+grava a execução atual como nova linha de base (medir na mesma máquina em que
+será comparada).
+
+Uso (a partir de testes/1-integracao_api_publica):
+    python -m benchmarks.benchmark_servicos_dominio --escalas 0.25 1 4
+    python -m benchmarks.benchmark_servicos_dominio --linha-de-base benchmarks/resultados/anterior.json
+    python -m benchmarks.benchmark_servicos_dominio --atualizar-linha-de-base
+"""
+
+import argparse
+import contextlib
+import glob
+import io
+import json
+import logging
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime
+from typing import Callable, Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.dados_sinteticos import ParametrosDadosSinteticos, gerar_dados_sinteticos
+from domain.servicos.gerador_consolidados_pandas import GeradorConsolidadosPandas
+from domain.servicos.processador_demonstracoes import ProcessadorDemonstracoes
+
+DIRETORIO_RESULTADOS = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'resultados')
+LINHA_DE_BASE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'linha_de_base_servicos_dominio.json')
+# Variações absolutas abaixo desta não contam como regressão (ruído em medições curtas)
+FOLGA_SEGUNDOS = 0.01
+COLUNAS_AGRUPAMENTO = ['reg_ans', 'cnpj', 'razao_social_operadora', 'trimestre', 'ano']
+
+
+def _cadastro_bruto(diretorio: str) -> pd.DataFrame:
+    """Relatorio_cadop* como agregar_operadoras recebe (colunas em maiúsculas + STATUS)."""
+    partes = []
+    for caminho in sorted(glob.glob(os.path.join(diretorio, 'arquivos_trimestres', 'Relatorio_cadop*.csv'))):
+        df = pd.read_csv(caminho, sep=';', encoding='utf-8-sig', dtype=str)
+        df.columns = df.columns.str.upper().str.strip()
+        df = df.rename(columns={'REGISTRO_OPERADORA': 'REG_ANS'})
+        df['STATUS'] = 'Cancelada' if 'canceladas' in caminho else 'Ativa'
+        partes.append(df)
+    return pd.concat(partes, ignore_index=True)
+
+
+def montar_entradas(diretorio: str) -> Dict[str, pd.DataFrame]:
+    """Entradas de cada função, obtidas pelos mesmos passos da consolidação."""
+    gerador = GeradorConsolidadosPandas()
+    operadoras = gerador.carregar_dimensao_operadoras(diretorio)
+    despesas = pd.concat(
+        [gerador._carregar_despesas_do_caminho(csv) for csv in sorted(gerador._listar_csvs_extraidos(diretorio))],
+        ignore_index=True
+    )
+    normalizado = gerador._normalizar_colunas_para_processador(gerador._fazer_join(despesas, operadoras))
+
+    com_deducoes = ProcessadorDemonstracoes.remover_valores_zero(
+        ProcessadorDemonstracoes.filtrar_sinistros_com_deducoes(normalizado)
+    )
+    sem_deducoes = ProcessadorDemonstracoes.remover_valores_zero(
+        ProcessadorDemonstracoes.filtrar_sinistros_sem_deducoes(normalizado)
+    )
+    cadastro = _cadastro_bruto(diretorio)
+    agregadas = ProcessadorDemonstracoes.agregar_operadoras(cadastro.copy())
+    return {
+        'gerador': gerador,
+        'operadoras': operadoras,
+        'despesas': despesas,
+        'normalizado': normalizado,
+        'sem_deducoes': sem_deducoes,
+        'csv_com_deducoes': ProcessadorDemonstracoes.preparar_csv_sinistros_com_deducoes(com_deducoes),
+        'cadastro': cadastro,
+        'merged': despesas.merge(agregadas, on='REG_ANS', how='left'),
+    }
+
+
+def casos(entradas: Dict) -> List[Tuple[str, Callable, Callable[[], tuple]]]:
+    """(nome, função, preparar) de cada medição; preparar devolve os argumentos."""
+    P = ProcessadorDemonstracoes
+    gerador = entradas['gerador']
+    normalizado = entradas['normalizado']
+    return [
+        ('ProcessadorDemonstracoes.filtrar_sinistros_com_deducoes', P.filtrar_sinistros_com_deducoes,
+         lambda: (normalizado,)),
+        ('ProcessadorDemonstracoes.filtrar_sinistros_com_deducoes_particao', P.filtrar_sinistros_com_deducoes_particao,
+         lambda: (normalizado,)),
+        ('ProcessadorDemonstracoes.filtrar_sinistros_sem_deducoes', P.filtrar_sinistros_sem_deducoes,
+         lambda: (normalizado,)),
+        ('ProcessadorDemonstracoes.filtrar_despesas', P.filtrar_despesas,
+         lambda: (normalizado,)),
+        ('ProcessadorDemonstracoes.agregar_operadoras', P.agregar_operadoras,
+         lambda: (entradas['cadastro'].copy(),)),
+        ('ProcessadorDemonstracoes.aplicar_regras_duplicidade', P.aplicar_regras_duplicidade,
+         lambda: (entradas['merged'].copy(),)),
+        ('ProcessadorDemonstracoes.agregar_sinistros_sem_deducoes', P.agregar_sinistros_sem_deducoes,
+         lambda: (entradas['sem_deducoes'], COLUNAS_AGRUPAMENTO)),
+        ('GeradorConsolidadosPandas._fazer_join', gerador._fazer_join,
+         lambda: (entradas['despesas'], entradas['operadoras'])),
+        ('GeradorConsolidadosPandas._formatar_valores_brasileiros', gerador._formatar_valores_brasileiros,
+         lambda: (entradas['csv_com_deducoes'],)),
+    ]
+
+
+def medir(funcao: Callable, preparar: Callable[[], tuple], repeticoes: int) -> float:
+    """Melhor tempo (s) entre as repetições."""
+    tempos = []
+    for _ in range(repeticoes):
+        argumentos = preparar()
+        inicio = time.perf_counter()
+        funcao(*argumentos)
+        tempos.append(time.perf_counter() - inicio)
+    return min(tempos)
+
+
+def comparar(resultados: List[Dict], linha_de_base: Dict, tolerancia: float) -> List[str]:
+    """Medições mais lentas que (1 + tolerancia) x a da linha de base (e além da folga absoluta)."""
+    anteriores = {(r['funcao'], r['escala']): r['segundos'] for r in linha_de_base['resultados']}
+
+    regressoes = []
+    for resultado in resultados:
+        anterior = anteriores.get((resultado['funcao'], resultado['escala']))
+        if (anterior and resultado['segundos'] > anterior * (1 + tolerancia)
+                and resultado['segundos'] - anterior > FOLGA_SEGUNDOS):
+            regressoes.append(
+                f"{resultado['funcao']} (escala {resultado['escala']}): "
+                f"{anterior:.4f}s -> {resultado['segundos']:.4f}s ({resultado['segundos'] / anterior:.2f}x)"
+            )
+    return regressoes
+
+
+def principal():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--escalas', type=float, nargs='+', default=[0.25, 1, 4],
+                        help='Escalas do conjunto sintético (1 = 1000 operadoras)')
+    parser.add_argument('--repeticoes', type=int, default=5, help='Repetições por medição (vale o melhor tempo)')
+    parser.add_argument('--filtro', default=None, help='Só as funções cujo nome contém este texto')
+    parser.add_argument('--saida', default=None, help='JSON de resultados (padrão: benchmarks/resultados/...)')
+    parser.add_argument('--linha-de-base', default=LINHA_DE_BASE, help='JSON de referência')
+    parser.add_argument('--atualizar-linha-de-base', action='store_true',
+                        help='Gravar esta execução como linha de base em vez de comparar')
+    # Medições de décimos de segundo variam mais entre execuções que as etapas do pipeline
+    parser.add_argument('--tolerancia', type=float, default=0.5, help='Aumento de tempo aceito (0.5 = 50%%)')
+    args = parser.parse_args()
+
+    # Logs/prints das funções medidas não entram na saída nem na medição
+    logging.disable(logging.INFO)
+    print(f"CPUs: {os.cpu_count()} | pandas {pd.__version__} | numpy {np.__version__}")
+    print(f"{'função':<64} {'escala':>6} {'linhas':>10} {'melhor (s)':>11} {'linhas/s':>12}")
+
+    resultados = []
+    for escala in args.escalas:
+        diretorio = tempfile.mkdtemp(prefix=f"bench_dominio_{escala}x_")
+        try:
+            with contextlib.redirect_stdout(io.StringIO()):
+                gerar_dados_sinteticos(diretorio, ParametrosDadosSinteticos.na_escala(escala), extrair=True)
+                entradas = montar_entradas(diretorio)
+
+            for nome, funcao, preparar in casos(entradas):
+                if args.filtro and args.filtro not in nome:
+                    continue
+                linhas = len(preparar()[0])
+                with contextlib.redirect_stdout(io.StringIO()):
+                    segundos = medir(funcao, preparar, args.repeticoes)
+                resultados.append({
+                    'funcao': nome,
+                    'escala': escala,
+                    'linhas_entrada': linhas,
+                    'segundos': round(segundos, 6),
+                    'linhas_por_s': round(linhas / segundos) if segundos else None,
+                })
+                print(f"{nome:<64} {escala:>6g} {linhas:>10,} {segundos:>11.4f} {linhas / segundos:>12,.0f}")
+        finally:
+            shutil.rmtree(diretorio, ignore_errors=True)
+
+    execucao = {
+        'data': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'numpy': np.__version__,
+        'cpus': os.cpu_count(),
+        'repeticoes': args.repeticoes,
+        'resultados': resultados,
+    }
+
+    if args.atualizar_linha_de_base:
+        with open(args.linha_de_base, 'w', encoding='utf-8') as f:
+            json.dump(execucao, f, ensure_ascii=False, indent=2)
+            f.write('\n')
+        print(f"\nLinha de base atualizada: {args.linha_de_base}")
+        return
+
+    saida = args.saida or os.path.join(
+        DIRETORIO_RESULTADOS, f"servicos_dominio_{datetime.now():%Y%m%d_%H%M%S}.json"
+    )
+    os.makedirs(os.path.dirname(saida) or '.', exist_ok=True)
+    with open(saida, 'w', encoding='utf-8') as f:
+        json.dump(execucao, f, ensure_ascii=False, indent=2)
+    print(f"\nResultados gravados em: {saida}")
+
+    if not os.path.exists(args.linha_de_base):
+        print(f"Sem linha de base em {args.linha_de_base} (use --atualizar-linha-de-base)")
+        return
+    with open(args.linha_de_base, 'r', encoding='utf-8') as f:
+        linha_de_base = json.load(f)
+    regressoes = comparar(resultados, linha_de_base, args.tolerancia)
+    if regressoes:
+        print(f"\nRegressões acima de {args.tolerancia:.0%} em relação a {args.linha_de_base}:")
+        for regressao in regressoes:
+            print(f"  {regressao}")
+        sys.exit(1)
+    print(f"Sem regressões acima de {args.tolerancia:.0%} em relação a {args.linha_de_base} "
+          f"({linha_de_base['data']}, {linha_de_base['cpus']} CPUs)")
+
+
+if __name__ == '__main__':
+    principal()
@@ -0,0 +1,360 @@
+"""Gerador de dados sintéticos da ANS para testes de escala.
+
+Produz, sem baixar nada, as demonstrações contábeis trimestrais e os
+cadastros de operadoras (Relatorio_cadop / Relatorio_cadop_canceladas) no
+mesmo leiaute em que o estágio 1 os deixa após o download:
+
+    <destino>/arquivos_trimestres/1T2025.zip  (contém 1T2025.csv)
+    <destino>/arquivos_trimestres/Relatorio_cadop.csv
+    <destino>/arquivos_trimestres/Relatorio_cadop_canceladas.csv
+
+Com --extrair, roda também a extração do estágio 1 (GerenciadorArquivos),
+criando arquivos_trimestres/extracted e arquivos_trimestres/operadoras;
+<destino> pode então ser passado direto a gerar_consolidados_com_join.
+
+--encoding grava todos os CSVs no encoding pedido (a ANS já publicou os
+arquivos em latin-1/cp1252), para exercitar a leitura com outros encodings.
+
+A geração é determinística (mesma semente e parâmetros = mesmos bytes) e o
+volume cresce linearmente com --escala (1x = OPERADORAS_POR_ESCALA operadoras):
+
+    python -m benchmarks.dados_sinteticos --destino /tmp/ans_1x --escala 1 --extrair
+    python -m benchmarks.dados_sinteticos --destino /tmp/ans_10x --escala 10
+"""
+
+import argparse
+import csv
+import io
+import os
+import time
+import zipfile
+from dataclasses import dataclass
+from typing import Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+OPERADORAS_POR_ESCALA = 1000
+# Operadoras por bloco gravado (limita a memória nas escalas grandes)
+OPERADORAS_POR_BLOCO = 5000
+
+COLUNAS_CADOP = [
+    'REGISTRO_OPERADORA', 'CNPJ', 'Razao_Social', 'Nome_Fantasia', 'Modalidade', 'Logradouro',
+    'Numero', 'Complemento', 'Bairro', 'Cidade', 'UF', 'CEP', 'DDD', 'Telefone', 'Fax',
+    'Endereco_eletronico', 'Representante', 'Cargo_Representante', 'Regiao_de_Comercializacao',
+    'Data_Registro_ANS',
+]
+COLUNAS_CADOP_CANCELADAS = COLUNAS_CADOP + ['Data_Descredenciamento', 'Motivo_do_Descredenciamento']
+
+MODALIDADES = [
+    'Medicina de Grupo', 'Cooperativa Médica', 'Autogestão', 'Odontologia de Grupo',
+    'Cooperativa Odontológica', 'Filantropia', 'Seguradora Especializada em Saúde',
+]
+UFS = [
+    'AC', 'AL', 'AM', 'AP', 'BA', 'CE', 'DF', 'ES', 'GO', 'MA', 'MG', 'MS', 'MT', 'PA',
+    'PB', 'PE', 'PI', 'PR', 'RJ', 'RN', 'RO', 'RR', 'RS', 'SC', 'SE', 'SP', 'TO',
+]
+MOTIVOS_CANCELAMENTO = ['Cancelamento a pedido', 'Incorporação', 'Liquidação extrajudicial', 'Cisão']
+
+# Contas que não entram nos consolidados (outros grupos e níveis sintéticos)
+CONTAS_OUTRAS = [
+    ('1', 'ATIVO'),
+    ('12', 'ATIVO CIRCULANTE'),
+    ('121111111', 'Aplicações Financeiras Vinculadas a Provisões Técnicas'),
+    ('2', 'PASSIVO'),
+    ('211111111', 'Provisão de Eventos/Sinistros a Liquidar'),
+    ('311111111', 'Contraprestações Efetivas de Plano de Assistência à Saúde'),
+    ('4', 'DESPESAS'),
+    ('41', 'EVENTOS INDENIZÁVEIS LÍQUIDOS / SINISTROS RETIDOS'),
+    ('4111', 'Despesas com Eventos / Sinistros'),
+    ('441111111', 'Outras Despesas Operacionais'),
+    ('461111111', 'Despesas Administrativas'),
+]
+DESCRICOES_SINISTROS = [
+    'Despesas com Eventos / Sinistros',
+    'Despesas com Eventos / Sinistros - Consultas Médicas',
+    'Despesas com Eventos / Sinistros - Exames',
+    'Despesas com Eventos / Sinistros - Terapias',
+    'Despesas com Eventos / Sinistros - Internações',
+    'Despesas com Eventos / Sinistros - Odontologia',
+]
+DESCRICOES_DEDUCOES = [
+    '(-) Glosas',
+    '(-) Recuperação por Co-Participação',
+    '- Recuperação de Eventos',
+]
+
+
+@dataclass
+class ParametrosDadosSinteticos:
+    """Volume e composição do conjunto sintético (frações entre 0 e 1)."""
+    operadoras: int = OPERADORAS_POR_ESCALA  # operadoras ativas
+    trimestres: int = 3                      # trimestres até ano_final/trimestre_final
+    ano_final: int = 2025
+    trimestre_final: int = 1
+    contas_por_operadora: int = 40           # linhas por operadora e trimestre (antes das ausências)
+    fracao_sinistros: float = 0.25           # contas principais de sinistros (9 dígitos, começam com 4)
+    fracao_deducoes: float = 0.5             # contas de sinistros seguidas de 1 a 3 linhas de dedução
+    fracao_canceladas: float = 0.2           # operadoras só no cadastro de canceladas (relativo às ativas)
+    fracao_duplicadas: float = 0.02          # registros repetidos entre ativas e canceladas
+    fracao_sem_cadastro: float = 0.01        # REG_ANS das demonstrações sem cadastro
+    fracao_cnpj_invalido: float = 0.01       # CNPJs com dígito verificador errado
+    fracao_ausentes: float = 0.1             # linhas omitidas (cada operadora tem um plano de contas diferente)
+    encoding: str = 'utf-8-sig'              # encoding de todos os CSVs
+    semente: int = 42
+
+    @staticmethod
+    def na_escala(escala: float, **kwargs) -> 'ParametrosDadosSinteticos':
+        """Parâmetros padrão com escala x OPERADORAS_POR_ESCALA operadoras."""
+        kwargs.setdefault('operadoras', max(1, int(round(OPERADORAS_POR_ESCALA * escala))))
+        return ParametrosDadosSinteticos(**kwargs)
+
+
+def _trimestres(parametros: ParametrosDadosSinteticos) -> List[Tuple[int, int]]:
+    """(ano, trimestre) dos trimestres gerados, do mais antigo ao final."""
+    indice_final = parametros.ano_final * 4 + parametros.trimestre_final - 1
+    return [
+        (indice // 4, indice % 4 + 1)
+        for indice in range(indice_final - parametros.trimestres + 1, indice_final + 1)
+    ]
+
+
+def _cnpjs(rng: np.random.Generator, quantidade: int, fracao_invalidos: float) -> np.ndarray:
+    """CNPJs de 14 dígitos com dígitos verificadores válidos (exceto a fração pedida)."""
+    base = np.column_stack([
+        rng.integers(0, 10, size=(quantidade, 8)),
+        np.tile([0, 0, 0, 1], (quantidade, 1)),
+    ])
+    for pesos in ([5, 4, 3, 2, 9, 8, 7, 6, 5, 4, 3, 2], [6, 5, 4, 3, 2, 9, 8, 7, 6, 5, 4, 3, 2]):
+        resto = (base * pesos).sum(axis=1) % 11
+        base = np.column_stack([base, np.where(resto < 2, 0, 11 - resto)])
+    invalidos = rng.random(quantidade) < fracao_invalidos
+    base[invalidos, -1] = (base[invalidos, -1] + 1) % 10
+    return np.array([''.join(map(str, linha)) for linha in base])
+
+
+def _cadastro(rng: np.random.Generator, registros: np.ndarray, parametros: ParametrosDadosSinteticos,
+              prefixo: str, canceladas: bool) -> pd.DataFrame:
+    """Linhas de Relatorio_cadop(_canceladas) para os registros informados."""
+    quantidade = len(registros)
+    indices = np.arange(quantidade)
+    ufs = rng.choice(UFS, quantidade)
+    df = pd.DataFrame({
+        'REGISTRO_OPERADORA': registros,
+        'CNPJ': _cnpjs(rng, quantidade, parametros.fracao_cnpj_invalido),
+        'Razao_Social': [f"{prefixo} {registro} LTDA" for registro in registros],
+        'Nome_Fantasia': np.where(rng.random(quantidade) < 0.3, '', [f"SAÚDE {registro}" for registro in registros]),
+        'Modalidade': rng.choice(MODALIDADES, quantidade),
+        'Logradouro': [f"RUA {i % 500 + 1}" for i in indices],
+        'Numero': rng.integers(1, 3000, quantidade).astype(str),
+        'Complemento': '',
+        'Bairro': 'CENTRO',
+        'Cidade': [f"CIDADE {uf}" for uf in ufs],
+        'UF': ufs,
+        'CEP': rng.integers(1000000, 99999999, quantidade).astype(str),
+        'DDD': rng.integers(11, 99, quantidade).astype(str),
+        'Telefone': rng.integers(30000000, 39999999, quantidade).astype(str),
+        'Fax': '',
+        'Endereco_eletronico': [f"contato{registro}@exemplo.com.br" for registro in registros],
+        'Representante': [f"REPRESENTANTE {registro}" for registro in registros],
+        'Cargo_Representante': 'DIRETOR',
+        'Regiao_de_Comercializacao': rng.integers(1, 7, quantidade).astype(str),
+        'Data_Registro_ANS': pd.to_datetime(
+            rng.integers(0, 9000, quantidade), unit='D', origin='1999-01-01'
+        ).strftime('%Y-%m-%d'),
+    })
+    if canceladas:
+        df['Data_Descredenciamento'] = pd.to_datetime(
+            rng.integers(9000, 9500, quantidade), unit='D', origin='1999-01-01'
+        ).strftime('%Y-%m-%d')
+        df['Motivo_do_Descredenciamento'] = rng.choice(MOTIVOS_CANCELAMENTO, quantidade)
+        return df[COLUNAS_CADOP_CANCELADAS]
+    return df[COLUNAS_CADOP]
+
+
+def _plano_de_contas(parametros: ParametrosDadosSinteticos) -> pd.DataFrame:
+    """Contas de cada operadora: principais de sinistros, deduções logo após e outras contas."""
+    total = max(1, parametros.contas_por_operadora)
+    principais = max(1, int(round(total * parametros.fracao_sinistros)))
+    com_deducoes = int(round(principais * parametros.fracao_deducoes))
+
+    contas = []
+    for i in range(principais):
+        codigo = 411000000 + (i + 1) * 100
+        contas.append((str(codigo), DESCRICOES_SINISTROS[i % len(DESCRICOES_SINISTROS)], 'sinistro'))
+        if i < com_deducoes:
+            for k in range(1 + i % 3):
+                contas.append((str(codigo + k + 1), DESCRICOES_DEDUCOES[k], 'deducao'))
+    contas = contas[:total]
+    for j in range(total - len(contas)):
+        if j < len(CONTAS_OUTRAS):
+            codigo, descricao = CONTAS_OUTRAS[j]
+        else:
+            codigo, descricao = str(311200000 + j), 'Outras Receitas Operacionais'
+        contas.append((codigo, descricao, 'outra'))
+    return pd.DataFrame(contas, columns=['conta', 'descricao', 'tipo'])
+
+
+def _valores_br(valores: np.ndarray) -> pd.Series:
+    """Valores no formato das demonstrações da ANS (vírgula decimal, sem milhar)."""
+    return pd.Series(valores).map('{:.2f}'.format).str.replace('.', ',', regex=False)
+
+
+def _escrever_demonstracoes(destino_csv: io.TextIOBase, rng: np.random.Generator, registros: np.ndarray,
+                            plano: pd.DataFrame, ano: int, trimestre: int,
+                            parametros: ParametrosDadosSinteticos) -> int:
+    """Grava as linhas de um trimestre em blocos de operadoras; devolve o total de linhas."""
+    data = f"01/{(trimestre - 1) * 3 + 1:02d}/{ano}"
+    contas = plano['conta'].to_numpy()
+    descricoes = plano['descricao'].to_numpy()
+    deducao = (plano['tipo'] == 'deducao').to_numpy()
+    linhas = 0
+    for inicio in range(0, len(registros), OPERADORAS_POR_BLOCO):
+        bloco = registros[inicio:inicio + OPERADORAS_POR_BLOCO]
+        quantidade = len(bloco) * len(plano)
+        presentes = rng.random(quantidade) >= parametros.fracao_ausentes
+        indice_conta = np.tile(np.arange(len(plano)), len(bloco))[presentes]
+
+        saldo_inicial = rng.lognormal(11, 2, quantidade)[presentes].round(2)
+        saldo_final = (saldo_inicial * rng.uniform(0.8, 1.6, len(saldo_inicial))).round(2)
+        saldo_final[rng.random(len(saldo_final)) < 0.05] = 0
+        sinal = np.where(deducao[indice_conta], -1, 1)
+
+        df = pd.DataFrame({
+            'DATA': data,
+            'REG_ANS': np.repeat(bloco, len(plano))[presentes],
+            'CD_CONTA_CONTABIL': contas[indice_conta],
+            'DESCRICAO': descricoes[indice_conta],
+            'VL_SALDO_INICIAL': _valores_br(saldo_inicial * sinal).to_numpy(),
+            'VL_SALDO_FINAL': _valores_br(saldo_final * sinal).to_numpy(),
+        })
+        df.to_csv(destino_csv, sep=';', index=False, header=inicio == 0,
+                  quoting=csv.QUOTE_ALL, lineterminator='\n')
+        linhas += len(df)
+    return linhas
+
+
+def gerar_dados_sinteticos(destino: str, parametros: ParametrosDadosSinteticos, extrair: bool = False) -> Dict:
+    """Gera o conjunto sintético em destino (ver docstring do módulo).
+
+    Args:
+        destino: Diretório raiz (equivalente a DIRETORIO_DOWNLOADS)
+        parametros: Volume e composição dos dados
+        extrair: Também extrair os ZIPs e copiar os cadastros como o estágio 1 faz
+
+    Returns:
+        Dict com arquivos gerados, linhas por trimestre e contagens do cadastro
+    """
+    rng = np.random.default_rng(parametros.semente)
+    diretorio_zips = os.path.join(destino, 'arquivos_trimestres')
+    os.makedirs(diretorio_zips, exist_ok=True)
+
+    # REG_ANS únicos de 6 dígitos: ativas, só canceladas e sem cadastro
+    canceladas = int(round(parametros.operadoras * parametros.fracao_canceladas))
+    sem_cadastro = int(round(parametros.operadoras * parametros.fracao_sem_cadastro))
+    total_registros = parametros.operadoras + canceladas + sem_cadastro
+    if total_registros > 700000:
+        raise ValueError(f"Escala grande demais para REG_ANS de 6 dígitos: {total_registros} registros")
+    registros = rng.choice(np.arange(300000, 1000000), total_registros, replace=False)
+    ativas = np.sort(registros[:parametros.operadoras])
+    so_canceladas = np.sort(registros[parametros.operadoras:parametros.operadoras + canceladas])
+    duplicadas = np.sort(rng.choice(
+        ativas, int(round(parametros.operadoras * parametros.fracao_duplicadas)), replace=False
+    ))
+
+    # Cadastros: duplicadas reaparecem nas canceladas (registro antigo com outro CNPJ)
+    df_ativas = _cadastro(rng, ativas, parametros, 'OPERADORA SINTETICA', canceladas=False)
+    df_canceladas = _cadastro(
+        rng, np.concatenate([so_canceladas, duplicadas]), parametros, 'OPERADORA CANCELADA', canceladas=True
+    )
+    arquivos = []
+    for nome, df in (('Relatorio_cadop.csv', df_ativas), ('Relatorio_cadop_canceladas.csv', df_canceladas)):
+        caminho = os.path.join(diretorio_zips, nome)
+        df.to_csv(caminho, sep=';', index=False, encoding=parametros.encoding,
+                  quoting=csv.QUOTE_ALL, lineterminator='\n')
+        arquivos.append(caminho)
+
+    # Demonstrações: ativas, canceladas (histórico) e registros sem cadastro, um ZIP por trimestre
+    plano = _plano_de_contas(parametros)
+    registros_demonstracoes = np.sort(registros)
+    linhas_por_trimestre = {}
+    for ano, trimestre in _trimestres(parametros):
+        nome = f"{trimestre}T{ano}"
+        caminho_zip = os.path.join(diretorio_zips, f"{nome}.zip")
+        caminho_tmp = f"{caminho_zip}.tmp"
+        with zipfile.ZipFile(caminho_tmp, 'w', zipfile.ZIP_DEFLATED) as zipf:
+            with zipf.open(f"{nome}.csv", 'w', force_zip64=True) as bruto, \
+                    io.TextIOWrapper(bruto, encoding=parametros.encoding, newline='') as destino_csv:
+                linhas_por_trimestre[nome] = _escrever_demonstracoes(
+                    destino_csv, rng, registros_demonstracoes, plano, ano, trimestre, parametros
+                )
+        os.replace(caminho_tmp, caminho_zip)
+        arquivos.append(caminho_zip)
+
+    if extrair:
+        from infraestrutura.gerenciador_arquivos import GerenciadorArquivos
+        GerenciadorArquivos().extrair_zips(diretorio_zips)
+
+    return {
+        'arquivos': arquivos,
+        'linhas_por_trimestre': linhas_por_trimestre,
+        'operadoras_ativas': len(df_ativas),
+        'operadoras_canceladas': len(df_canceladas),
+        'registros_duplicados': len(duplicadas),
+        'registros_sem_cadastro': sem_cadastro,
+        'bytes': sum(os.path.getsize(caminho) for caminho in arquivos),
+    }
+
+
+def principal():
+    padrao = ParametrosDadosSinteticos()
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--destino', required=True, help='Diretório raiz (como DIRETORIO_DOWNLOADS)')
+    parser.add_argument('--escala', type=float, default=1, help=f'Múltiplo de {OPERADORAS_POR_ESCALA} operadoras')
+    parser.add_argument('--operadoras', type=int, default=None, help='Operadoras ativas (sobrepõe --escala)')
+    parser.add_argument('--trimestres', type=int, default=padrao.trimestres)
+    parser.add_argument('--ano-final', type=int, default=padrao.ano_final)
+    parser.add_argument('--trimestre-final', type=int, default=padrao.trimestre_final, choices=[1, 2, 3, 4])
+    parser.add_argument('--contas', type=int, default=padrao.contas_por_operadora, help='Contas por operadora')
+    parser.add_argument('--fracao-sinistros', type=float, default=padrao.fracao_sinistros)
+    parser.add_argument('--fracao-deducoes', type=float, default=padrao.fracao_deducoes)
+    parser.add_argument('--fracao-canceladas', type=float, default=padrao.fracao_canceladas)
+    parser.add_argument('--fracao-duplicadas', type=float, default=padrao.fracao_duplicadas)
+    parser.add_argument('--fracao-sem-cadastro', type=float, default=padrao.fracao_sem_cadastro)
+    parser.add_argument('--fracao-cnpj-invalido', type=float, default=padrao.fracao_cnpj_invalido)
+    parser.add_argument('--encoding', default=padrao.encoding, help='utf-8-sig, utf-8, latin-1, cp1252...')
+    parser.add_argument('--semente', type=int, default=padrao.semente)
+    parser.add_argument('--extrair', action='store_true', help='Extrair os ZIPs como o estágio 1')
+    args = parser.parse_args()
+
+    kwargs = dict(
+        trimestres=args.trimestres,
+        ano_final=args.ano_final,
+        trimestre_final=args.trimestre_final,
+        contas_por_operadora=args.contas,
+        fracao_sinistros=args.fracao_sinistros,
+        fracao_deducoes=args.fracao_deducoes,
+        fracao_canceladas=args.fracao_canceladas,
+        fracao_duplicadas=args.fracao_duplicadas,
+        fracao_sem_cadastro=args.fracao_sem_cadastro,
+        fracao_cnpj_invalido=args.fracao_cnpj_invalido,
+        encoding=args.encoding,
+        semente=args.semente,
+    )
+    if args.operadoras is not None:
+        kwargs['operadoras'] = args.operadoras
+    parametros = ParametrosDadosSinteticos.na_escala(args.escala, **kwargs)
+
+    inicio = time.perf_counter()
+    resultado = gerar_dados_sinteticos(args.destino, parametros, extrair=args.extrair)
+    print(f"Dados sintéticos em {args.destino} ({time.perf_counter() - inicio:.1f}s, {resultado['bytes'] / 1024 / 1024:.1f} MB)")
+    print(
+        f"  operadoras: {resultado['operadoras_ativas']:,} ativas, {resultado['operadoras_canceladas']:,} canceladas "
+        f"({resultado['registros_duplicados']:,} duplicadas), {resultado['registros_sem_cadastro']:,} sem cadastro"
+    )
+    for nome, linhas in resultado['linhas_por_trimestre'].items():
+        print(f"  {nome}: {linhas:,} linhas")
+
+
+if __name__ == '__main__':
+    principal()
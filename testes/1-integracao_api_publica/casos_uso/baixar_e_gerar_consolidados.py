@@ -5,18 +5,37 @@ Orquestra todo o fluxo de integração:
 2. Baixar arquivos ZIP dos trimestres
 3. Extrair arquivos CSV dos ZIPs
 4. Gerar CSVs consolidados com JOIN pandas (sem banco de dados)
+
+Com PIPELINE_TRIMESTRES (padrão), os passos 2 e 3 e a leitura+JOIN dos
+trimestres rodam sobrepostos (ProcessarTrimestresEmPipeline); a consolidação
+final é a mesma nos dois modos.
+
+Com RASTREAMENTO, cada passo é medido e a execução grava um trace (formato
+Chrome trace) ao lado do log da sessão: sessao_<data>.trace.json.
+Com PERFIL_MEMORIA, o log da sessão recebe o pico de memória de cada passo e
+um resumo antes da gravação do ZIP (PerfilMemoria).
 """
 
 import os
+from datetime import datetime
 from typing import Dict
 
-from config import DIRETORIO_DOWNLOADS, DIRETORIO_CONSOLIDADO, DIRETORIO_ZIPS, API_BASE_URL
+from config import (
+    DIRETORIO_DOWNLOADS, DIRETORIO_CONSOLIDADO, DIRETORIO_ZIPS, API_BASE_URL,
+    ZIP_COMPRESSAO, ZIP_NIVEL, ZIP_THREADS, FORMATO_INTERMEDIARIO, PIPELINE_TRIMESTRES, RASTREAMENTO,
+    PERFIL_MEMORIA
+)
 from casos_uso.buscar_trimestres_disponiveis import BuscarTrimestresDisponiveis
 from casos_uso.baixar_arquivos_trimestres import BaixarArquivosTrimestres
+from casos_uso.processar_trimestres_em_pipeline import ProcessarTrimestresEmPipeline
 from infraestrutura.gerenciador_arquivos import GerenciadorArquivos
 from infraestrutura.cliente_api_ans import ClienteAPIANS
+from infraestrutura.indice_cobertura import IndiceCobertura
+from domain.entidades import PoliticaCompressao, Trimestre
 from domain.servicos.gerador_consolidados_pandas import GeradorConsolidadosPandas
-from infraestrutura.logger import get_logger
+from infraestrutura.logger import get_logger, obter_arquivo_log_sessao
+from infraestrutura.perfil_memoria import PerfilMemoria
+from infraestrutura.rastreador import Rastreador, trecho
 
 logger = get_logger("BaixarEGerarConsolidados")
 
@@ -24,6 +43,10 @@ logger = get_logger("BaixarEGerarConsolidados")
 class BaixarEGerarConsolidados:
     """Orquestra o fluxo completo de integração de dados da API ANS."""
     
+    def __init__(self):
+        # Cobertura trimestral dos CSVs em disco, atualizada a cada extração
+        self.indice_cobertura = IndiceCobertura(DIRETORIO_DOWNLOADS)
+    
     def executar(self) -> Dict:
         """Executa todo o pipeline de integração.
         
@@ -41,6 +64,29 @@ class BaixarEGerarConsolidados:
                 - sem_operadora: int
                 - arquivos_gerados: List[str]
         """
+        if RASTREAMENTO:
+            Rastreador.iniciar(self._caminho_rastreamento())
+        if PERFIL_MEMORIA:
+            PerfilMemoria.iniciar()
+        try:
+            with trecho("BaixarEGerarConsolidados.executar") as args:
+                resultado = self._executar()
+                args["sucesso"] = resultado.get("sucesso")
+                args["total_registros"] = resultado.get("total_registros", resultado.get("registros"))
+                return resultado
+        finally:
+            PerfilMemoria.encerrar()
+            Rastreador.gravar()
+
+    def _caminho_rastreamento(self) -> str:
+        """Trace ao lado do log da sessão (sessao_<data>.log -> sessao_<data>.trace.json)."""
+        arquivo_log = obter_arquivo_log_sessao()
+        if arquivo_log:
+            return os.path.splitext(arquivo_log)[0] + ".trace.json"
+        return os.path.join(DIRETORIO_DOWNLOADS, "logs", f"rastreamento_{datetime.now():%Y%m%d_%H%M%S}.json")
+
+    def _executar(self) -> Dict:
+        """Passos de executar (medidos um a um no rastreamento)."""
         logger.info("=" * 60)
         logger.info("INICIANDO INTEGRAÇÃO API ANS")
         logger.info("=" * 60)
@@ -51,8 +97,10 @@ class BaixarEGerarConsolidados:
 
         # PASSO 1: Buscar trimestres disponíveis
         print("\n[1/4] Buscando trimestres disponíveis...")
-        buscar_trimestres = BuscarTrimestresDisponiveis()
-        trimestres = buscar_trimestres.executar()
+        with trecho("1/4 Buscar trimestres disponíveis") as args:
+            buscar_trimestres = BuscarTrimestresDisponiveis()
+            trimestres = buscar_trimestres.executar()
+            args["trimestres"] = len(trimestres or [])
         
         if not trimestres:
             print("⚠ Nenhum trimestre encontrado")
@@ -64,12 +112,19 @@ class BaixarEGerarConsolidados:
             print(f"  - {trimestre}")
         
         # Verificar se trimestres são consecutivos e tentar preencher lacunas
-        trimestres = self._verificar_e_preencher_trimestres(trimestres)
+        with trecho("Verificar e preencher lacunas") as args:
+            trimestres = self._verificar_e_preencher_trimestres(trimestres)
+            args["trimestres"] = len(trimestres)
+
+        if PIPELINE_TRIMESTRES:
+            return self._executar_em_pipeline(trimestres)
 
         # PASSO 2: Baixar arquivos ZIP
         print(f"\n[2/4] Baixando arquivos de {len(trimestres)} trimestres...")
-        baixar_arquivos = BaixarArquivosTrimestres()
-        arquivos_baixados = baixar_arquivos.executar(trimestres)
+        with trecho("2/4 Baixar arquivos dos trimestres", trimestres=len(trimestres)) as args:
+            baixar_arquivos = BaixarArquivosTrimestres()
+            arquivos_baixados = baixar_arquivos.executar(trimestres)
+            args["arquivos"] = len(arquivos_baixados)
         
         if not arquivos_baixados:
             print("[ERRO] Nenhum arquivo foi baixado")
@@ -81,7 +136,9 @@ class BaixarEGerarConsolidados:
         # PASSO 2.5: Baixar operadoras (ativas e canceladas)
         print("\n[2.5/4] Baixando arquivo de operadoras...")
         cliente_api = ClienteAPIANS(API_BASE_URL)
-        sucesso_operadoras = cliente_api.baixar_operadoras(DIRETORIO_ZIPS)
+        with trecho("2.5/4 Baixar operadoras") as args:
+            sucesso_operadoras = cliente_api.baixar_operadoras(DIRETORIO_ZIPS)
+            args["sucesso"] = bool(sucesso_operadoras)
         
         if not sucesso_operadoras:
             print("⚠ Aviso: Nenhum arquivo de operadoras foi baixado (continuando com os trimestres)")
@@ -93,26 +150,91 @@ class BaixarEGerarConsolidados:
 
         # PASSO 3: Extrair ZIPs
         print("\n[3/4] Extraindo arquivos CSV dos ZIPs...")
-        gerenciador_arquivos = GerenciadorArquivos()
-        gerenciador_arquivos.extrair_zips(DIRETORIO_ZIPS)
+        with trecho("3/4 Extrair ZIPs"):
+            gerenciador_arquivos = GerenciadorArquivos(self.indice_cobertura)
+            gerenciador_arquivos.extrair_zips(DIRETORIO_ZIPS)
         print("[OK] Arquivos extraidos")
 
         # PASSO 4: Gerar consolidados via pandas JOIN
         print("\n[4/4] Gerando arquivos consolidados...")
+        return self._gerar_consolidados()
+
+    def _executar_em_pipeline(self, trimestres: list) -> Dict:
+        """Passos 2 a 4 com download, extração e leitura+JOIN sobrepostos.
+        
+        As operadoras vêm primeiro (a leitura+JOIN de cada trimestre precisa da
+        dimensão); depois cada trimestre segue download -> extração -> JOIN
+        enquanto os seguintes ainda estão sendo baixados.
+        """
+        print("\n[2/4] Baixando arquivo de operadoras...")
+        cliente_api = ClienteAPIANS(API_BASE_URL)
+        try:
+            with trecho("2/4 Baixar operadoras") as args:
+                args["sucesso"] = bool(cliente_api.baixar_operadoras(DIRETORIO_ZIPS))
+            if args["sucesso"]:
+                print("[OK] Operadoras baixadas com sucesso")
+            else:
+                print("⚠ Aviso: Nenhum arquivo de operadoras foi baixado (continuando com os trimestres)")
+                logger.warning("Nenhum arquivo de operadoras foi baixado")
+        finally:
+            cliente_api.fechar()
+        
+        if os.path.exists(DIRETORIO_ZIPS):
+            GerenciadorArquivos().copiar_csvs_operadoras(DIRETORIO_ZIPS)
+        
+        gerador = GeradorConsolidadosPandas()
+        with trecho("Carregar dimensão de operadoras") as args:
+            operadoras_df = gerador.carregar_dimensao_operadoras(DIRETORIO_DOWNLOADS)
+            args["linhas"] = 0 if operadoras_df is None else len(operadoras_df)
+        if operadoras_df is None:
+            print("[ERRO] Nenhuma operadora encontrada")
+            logger.error("Nenhuma operadora encontrada")
+            return self._resultado_erro("Nenhuma operadora encontrada")
+        
+        print(f"\n[3/4] Baixando, extraindo e processando {len(trimestres)} trimestres em pipeline...")
+        diretorio_consolidados = os.path.join(DIRETORIO_DOWNLOADS, DIRETORIO_CONSOLIDADO)
+        pipeline = ProcessarTrimestresEmPipeline(indice_cobertura=self.indice_cobertura)
+        with trecho("3/4 Pipeline download + extração + JOIN", trimestres=len(trimestres)) as args:
+            processados = pipeline.executar(trimestres, operadoras_df, diretorio_consolidados)
+            args["arquivos"] = len(pipeline.arquivos_baixados)
+            args["linhas"] = sum(len(df) for df in processados.values())
+        
+        if not pipeline.arquivos_baixados:
+            print("[ERRO] Nenhum arquivo foi baixado")
+            logger.error("Falha ao baixar arquivos")
+            return self._resultado_erro("Nenhum arquivo foi baixado")
+        
+        print(f"[OK] {len(pipeline.arquivos_baixados)} arquivos baixados, {len(processados)} trimestres processados")
+        
+        print("\n[4/4] Gerando arquivos consolidados...")
+        return self._gerar_consolidados(operadoras_df, processados)
+
+    def _gerar_consolidados(self, operadoras_df=None, processados: Dict = None) -> Dict:
+        """Passo final: consolidação via pandas JOIN, ZIP de saída e resultado."""
         gerador = GeradorConsolidadosPandas()
         
         diretorio_consolidados = os.path.join(DIRETORIO_DOWNLOADS, DIRETORIO_CONSOLIDADO)
         os.makedirs(diretorio_consolidados, exist_ok=True)
         
         # Obter arquivo de log da sessão atual
-        from infraestrutura.logger import obter_arquivo_log_sessao
         arquivo_log = obter_arquivo_log_sessao()
         
-        resultado = gerador.gerar_consolidados_com_join(
-            diretorio_origem=DIRETORIO_DOWNLOADS,
-            diretorio_destino=diretorio_consolidados,
-            arquivo_log=arquivo_log
-        )
+        with trecho("4/4 Gerar consolidados") as args:
+            resultado = gerador.gerar_consolidados_com_join(
+                diretorio_origem=DIRETORIO_DOWNLOADS,
+                diretorio_destino=diretorio_consolidados,
+                arquivo_log=arquivo_log,
+                politica=PoliticaCompressao(
+                    metodo=ZIP_COMPRESSAO,
+                    nivel=ZIP_NIVEL,
+                    max_threads=ZIP_THREADS,
+                    formato_intermediario=FORMATO_INTERMEDIARIO
+                ),
+                operadoras_df=operadoras_df,
+                processados=processados
+            )
+            args["total_registros"] = resultado.get("total_registros")
+            args["com_operadora"] = resultado.get("com_operadora")
 
         # PASSO 5: Exibir resultado
         self._exibir_resultado(resultado)
@@ -324,12 +446,14 @@ class BaixarEGerarConsolidados:
         return trimestres
 
     def _tentar_preencher_lacunas(self, trimestres: list, trimestres_faltando: dict) -> list:
-        """Tenta preencher lacunas baixando trimestres do ano faltante.
+        """Tenta preencher lacunas consultando o índice de cobertura.
         
         Fluxo:
-        1. Para cada ano com lacunas, baixa TODOS os trimestres
-        2. Procura por arquivos com datas correspondentes ao trimestre faltante
-        3. Adiciona trimestre encontrado à lista
+        1. Trimestres faltantes já cobertos por CSVs em disco (coluna DATA) são
+           adicionados sem novo download
+        2. Para os demais, baixa e extrai só os arquivos do trimestre faltante
+           (a extração registra os CSVs no índice)
+        3. Consulta o índice de novo e adiciona os trimestres encontrados
         4. Se não encontrar, exibe aviso mas continua processamento
         
         Args:
@@ -339,60 +463,56 @@ class BaixarEGerarConsolidados:
         Returns:
             Lista de trimestres atualizada
         """
-        from datetime import datetime
-        
         for ano in sorted(trimestres_faltando.keys()):
             trims_faltando = sorted(trimestres_faltando[ano])
             
             print(f"\n  • Buscando dados de {ano}...")
+            trimestres_encontrados = self._procurar_trimestres_por_data(trims_faltando, ano)
             
-            # Tentar baixar TODOS os trimestres do ano faltante
-            buscar_trimestres = BuscarTrimestresDisponiveis()
-            
-            # Simular busca por trimestres do ano específico
-            # (Nota: BuscarTrimestresDisponiveis busca últimos 3, então é um fallback)
-            try:
-                # Baixar dados do ano inteiro
-                trimestres_ano = [f"{ano}/1T", f"{ano}/2T", f"{ano}/3T", f"{ano}/4T"]
-                
-                baixar_arquivos = BaixarArquivosTrimestres()
-                print(f"    Baixando dados de {ano}...")
-                arquivos_baixados = baixar_arquivos.executar(trimestres_ano)
-                
-                if not arquivos_baixados:
-                    print(f"    ⚠ Não foi possível baixar dados de {ano}")
-                    logger.warning(f"Não foi possível baixar dados de {ano}")
-                    continue
-                
-                # Procurar por arquivos com datas do trimestre faltante
-                from infraestrutura.gerenciador_arquivos import GerenciadorArquivos
-                gerenciador = GerenciadorArquivos()
-                
-                trimestres_encontrados = self._procurar_trimestres_por_data(
-                    trims_faltando, ano
-                )
+            a_baixar = [
+                Trimestre(ano=ano, numero=trim)
+                for trim in trims_faltando
+                if f"{ano}/{trim}T" not in trimestres_encontrados
+            ]
+            if a_baixar:
+                try:
+                    print(f"    Baixando {', '.join(str(t) for t in a_baixar)}...")
+                    arquivos_baixados = BaixarArquivosTrimestres().executar(a_baixar)
+                    
+                    gerenciador = GerenciadorArquivos(self.indice_cobertura)
+                    for arquivo in arquivos_baixados:
+                        if arquivo.nome_base.lower().endswith('.zip'):
+                            gerenciador.extrair_zip(os.path.join(DIRETORIO_ZIPS, arquivo.nome_base))
+                    
+                    if arquivos_baixados:
+                        trimestres_encontrados = self._procurar_trimestres_por_data(trims_faltando, ano)
+                    else:
+                        print(f"    ⚠ Não foi possível baixar dados de {ano}")
+                        logger.warning(f"Não foi possível baixar dados de {ano}")
                 
-                if trimestres_encontrados:
-                    for trim in trimestres_encontrados:
-                        if trim not in trimestres:
-                            trimestres.append(trim)
-                            print(f"    [OK] Adicionado: {trim} (encontrado por data)")
-                            logger.info(f"Trimestre {trim} adicionado (encontrado por data)")
-                else:
-                    print(f"    [AVISO] Nenhum arquivo com datas de {ano} encontrado")
-                    logger.warning(f"Nenhum arquivo com datas de {ano} encontrado para trimestres: {trims_faltando}")
+                except Exception as e:
+                    print(f"    [ERRO] Erro ao processar {ano}: {str(e)}")
+                    logger.error(f"Erro ao preencher lacuna de {ano}: {str(e)}")
             
-            except Exception as e:
-                print(f"    [ERRO] Erro ao processar {ano}: {str(e)}")
-                logger.error(f"Erro ao preencher lacuna de {ano}: {str(e)}")
+            if trimestres_encontrados:
+                presentes = {self._normalizar_trimestre(t) for t in trimestres}
+                for trim in trimestres_encontrados:
+                    if trim not in presentes:
+                        ano_trim, numero = trim.split('/')
+                        trimestres.append(Trimestre(ano=int(ano_trim), numero=int(numero[0])))
+                        print(f"    [OK] Adicionado: {trim} (encontrado por data)")
+                        logger.info(f"Trimestre {trim} adicionado (encontrado por data)")
+            else:
+                print(f"    [AVISO] Nenhum arquivo com datas de {ano} encontrado")
+                logger.warning(f"Nenhum arquivo com datas de {ano} encontrado para trimestres: {trims_faltando}")
         
         return trimestres
 
     def _procurar_trimestres_por_data(self, trims_faltando: list, ano: int) -> list:
-        """Procura por arquivos com datas do trimestre esperado.
+        """Procura, no índice de cobertura, CSVs com datas do trimestre esperado.
         
-        Analisa arquivos CSV no diretório de downloads e verifica
-        se a coluna DATA contém datas do trimestre faltante.
+        O índice é sincronizado com os CSVs em DIRETORIO_DOWNLOADS antes da
+        consulta: só arquivos novos ou alterados têm a coluna DATA lida.
         
         Args:
             trims_faltando: Lista de trimestres faltando [1, 2, 3, ou 4]
@@ -401,65 +521,16 @@ class BaixarEGerarConsolidados:
         Returns:
             Lista de trimestres encontrados no formato "YYYY/nT"
         """
-        import pandas as pd
+        self.indice_cobertura.atualizar(DIRETORIO_DOWNLOADS)
+        cobertos = self.indice_cobertura.trimestres_cobertos()
         
         trimestres_encontrados = []
-        
-        # Mapa de meses por trimestre
-        meses_por_trimestre = {
-            1: [1, 2, 3],      # 1T: Jan, Fev, Mar
-            2: [4, 5, 6],      # 2T: Abr, Mai, Jun
-            3: [7, 8, 9],      # 3T: Jul, Ago, Set
-            4: [10, 11, 12]    # 4T: Out, Nov, Dez
-        }
-        
-        # Procurar em arquivos extraídos
-        from config import DIRETORIO_DOWNLOADS, DIRETORIO_ZIPS
-        import glob
-        
-        # Procurar em diferentes locais possíveis
-        padroes = [
-            os.path.join(DIRETORIO_DOWNLOADS, "**", "*.csv"),
-            os.path.join(DIRETORIO_DOWNLOADS, DIRETORIO_ZIPS, "**", "*.csv"),
-        ]
-        
-        for padrao in padroes:
-            for arquivo_csv in glob.glob(padrao, recursive=True):
-                try:
-                    # Ler apenas as primeiras linhas por performance
-                    df = pd.read_csv(
-                        arquivo_csv, 
-                        sep=';',
-                        encoding='utf-8-sig',
-                        nrows=1000,
-                        usecols=['DATA'] if 'DATA' in pd.read_csv(arquivo_csv, sep=';', nrows=1, encoding='utf-8-sig').columns else None
-                    )
-                    
-                    if 'DATA' not in df.columns:
-                        continue
-                    
-                    # Converter datas e extrair mês/ano
-                    df['DATA'] = pd.to_datetime(df['DATA'], format='%d/%m/%Y', errors='coerce')
-                    df['MES'] = df['DATA'].dt.month
-                    df['ANO'] = df['DATA'].dt.year
-                    
-                    # Procurar por datas do trimestre faltante no ano especificado
-                    for trim in trims_faltando:
-                        meses = meses_por_trimestre[trim]
-                        
-                        # Verificar se há datas deste trimestre neste ano
-                        tem_dados = df[(df['ANO'] == ano) & (df['MES'].isin(meses))].shape[0] > 0
-                        
-                        if tem_dados:
-                            trimestre_str = f"{ano}/{trim}T"
-                            if trimestre_str not in trimestres_encontrados:
-                                trimestres_encontrados.append(trimestre_str)
-                                logger.debug(f"Trimestre {trimestre_str} encontrado em: {arquivo_csv}")
-                
-                except Exception as e:
-                    # Silenciosamente ignorar erros de leitura em arquivos específicos
-                    logger.debug(f"Erro ao ler {arquivo_csv}: {str(e)}")
-                    continue
+        for trim in trims_faltando:
+            if (ano, trim) in cobertos:
+                trimestre_str = f"{ano}/{trim}T"
+                trimestres_encontrados.append(trimestre_str)
+                for arquivo_csv in self.indice_cobertura.arquivos_do_trimestre(ano, trim):
+                    logger.debug(f"Trimestre {trimestre_str} encontrado em: {arquivo_csv}")
         
         return trimestres_encontrados
 
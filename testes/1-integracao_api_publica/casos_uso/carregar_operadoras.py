@@ -46,3 +46,14 @@ class CarregarOperadoras:
             Dict com dados da operadora
         """
         return self.repositorio.obter_operadora(registro)
+    
+    def obter_operadoras(self, registros) -> pd.DataFrame:
+        """Busca várias operadoras de uma vez (resolução vetorizada).
+        
+        Args:
+            registros: Series, array ou lista de registros
+        
+        Returns:
+            DataFrame com cnpj, razao_social, modalidade, uf e status por registro
+        """
+        return self.repositorio.obter_operadoras(registros)
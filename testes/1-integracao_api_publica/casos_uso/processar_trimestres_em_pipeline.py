@@ -0,0 +1,228 @@
+"""Caso de Uso: Baixar, extrair e processar os trimestres em pipeline.
+
+Em vez de baixar todos os trimestres, depois extrair todos e só então
+processar todos, cada etapa roda em paralelo com as outras:
+
+    download (thread) --fila--> extração (thread) --fila--> leitura + JOIN
+
+As filas são limitadas: um download muito à frente espera a extração (e a
+extração espera a leitura), então no máximo alguns ZIPs/CSVs ficam pendentes
+em disco/memória. Enquanto o trimestre N é lido, o N+1 ainda está sendo baixado.
+
+A consolidação final não muda: os trimestres lidos aqui são entregues a
+GeradorConsolidadosPandas.gerar_consolidados_com_join (parâmetro processados).
+"""
+
+import os
+import queue
+import threading
+from typing import Dict, Iterator, List, Optional
+
+import pandas as pd
+
+from config import API_BASE_URL, DIRETORIO_ZIPS, PIPELINE_TAMANHO_FILA
+from domain.entidades import Trimestre, Arquivo
+from domain.repositorios import RepositorioAPI
+from domain.servicos.gerador_consolidados_pandas import GeradorConsolidadosPandas
+from infraestrutura.cliente_api_ans import ClienteAPIANS
+from infraestrutura.gerenciador_arquivos import GerenciadorArquivos
+from infraestrutura.indice_cobertura import IndiceCobertura
+from infraestrutura.logger import get_logger
+from infraestrutura.rastreador import trecho
+
+logger = get_logger('ProcessarTrimestresEmPipeline')
+
+# Marca o fim de uma fila (a etapa anterior terminou)
+_FIM = object()
+
+
+class ProcessarTrimestresEmPipeline:
+    """Sobrepõe download, extração e leitura+JOIN dos trimestres."""
+
+    # Intervalo (s) para as threads reverem o cancelamento enquanto esperam uma fila
+    INTERVALO_ESPERA = 0.5
+
+    def __init__(
+        self,
+        repositorio: Optional[RepositorioAPI] = None,
+        diretorio_destino: str = None,
+        tamanho_fila: int = PIPELINE_TAMANHO_FILA,
+        max_workers: int = None,
+        indice_cobertura: Optional[IndiceCobertura] = None
+    ):
+        """Inicializa o pipeline.
+
+        Args:
+            repositorio: Cliente da API (opcional, cria um novo se None)
+            diretorio_destino: Diretório para salvar ZIPs (padrão: config.DIRETORIO_ZIPS)
+            tamanho_fila: Itens pendentes entre duas etapas (ZIPs baixados / CSVs extraídos)
+            max_workers: Processos para leitura+JOIN (padrão: os.cpu_count())
+            indice_cobertura: Índice atualizado com os CSVs extraídos (opcional)
+        """
+        if repositorio is None:
+            self.repositorio_api = ClienteAPIANS(API_BASE_URL)
+            self._repositorio_interno = True
+        else:
+            self.repositorio_api = repositorio
+            self._repositorio_interno = False
+
+        self.diretorio_destino = diretorio_destino or DIRETORIO_ZIPS
+        self.tamanho_fila = max(1, tamanho_fila)
+        self.max_workers = max_workers
+        self.indice_cobertura = indice_cobertura
+        self.arquivos_baixados: List[Arquivo] = []
+        self._cancelado = threading.Event()
+        self._erros: List[BaseException] = []
+
+    def executar(
+        self,
+        trimestres: List[Trimestre],
+        operadoras_df: pd.DataFrame,
+        diretorio_consolidados: str = None
+    ) -> Dict[str, pd.DataFrame]:
+        """Baixa, extrai e lê+JOIN os trimestres em pipeline.
+
+        Args:
+            trimestres: Trimestres a baixar
+            operadoras_df: Dimensão de operadoras já codificada
+                           (GeradorConsolidadosPandas.carregar_dimensao_operadoras)
+            diretorio_consolidados: Se informado, CSVs cuja partição incremental já
+                                    está atualizada não são lidos de novo
+
+        Returns:
+            {caminho do CSV: DataFrame resultante do JOIN}; os arquivos baixados
+            ficam em self.arquivos_baixados
+        """
+        self.arquivos_baixados = []
+        self._cancelado.clear()
+        self._erros = []
+
+        fila_zips = queue.Queue(maxsize=self.tamanho_fila)
+        fila_csvs = queue.Queue(maxsize=self.tamanho_fila)
+        threads = [
+            threading.Thread(target=self._etapa_download, args=(trimestres, fila_zips), name='pipeline-download', daemon=True),
+            threading.Thread(target=self._etapa_extracao, args=(fila_zips, fila_csvs), name='pipeline-extracao', daemon=True),
+        ]
+        for thread in threads:
+            thread.start()
+
+        gerador = GeradorConsolidadosPandas()
+        csvs = self._consumir(fila_csvs)
+        if diretorio_consolidados:
+            csvs = self._filtrar_pendentes(gerador, csvs, operadoras_df, diretorio_consolidados)
+
+        processados = {}
+        try:
+            for csv_path, df in gerador.processar_trimestres_em_fluxo(csvs, operadoras_df, self.max_workers):
+                processados[csv_path] = df
+        finally:
+            # Em caso de erro na leitura, liberar as threads bloqueadas nas filas
+            self._cancelado.set()
+            for thread in threads:
+                thread.join()
+            if self._repositorio_interno:
+                self.repositorio_api.fechar()
+
+        if self._erros:
+            raise self._erros[0]
+
+        logger.info(
+            f"Pipeline concluído: {len(self.arquivos_baixados)} arquivos baixados, "
+            f"{len(processados)} trimestres processados"
+        )
+        return processados
+
+    def _etapa_download(self, trimestres: List[Trimestre], fila_zips: queue.Queue) -> None:
+        """Baixa os arquivos de cada trimestre e entrega os ZIPs à extração."""
+        try:
+            for trimestre in trimestres:
+                if self._cancelado.is_set():
+                    break
+
+                print(f"\nTrimestre {trimestre}:")
+                caminhos_arquivos = self.repositorio_api.obter_arquivos_do_trimestre(trimestre)
+                if not caminhos_arquivos:
+                    print("   Nenhum arquivo encontrado")
+                    continue
+
+                print(f"  {len(caminhos_arquivos)} arquivo(s) encontrado(s)")
+                for caminho in caminhos_arquivos:
+                    arquivo = Arquivo(nome=caminho, caminho=caminho, trimestre=trimestre)
+                    with trecho(f"Baixar {arquivo.nome_base}", trimestre=str(trimestre)) as args:
+                        args["sucesso"] = self.repositorio_api.baixar_arquivo(arquivo, self.diretorio_destino)
+                    if not args["sucesso"]:
+                        print(f"    [ERRO] Falha ao baixar {arquivo.nome}")
+                        continue
+
+                    self.arquivos_baixados.append(arquivo)
+                    print(f"    [OK] {arquivo.nome}")
+                    if arquivo.nome_base.lower().endswith('.zip'):
+                        if not self._colocar(fila_zips, os.path.join(self.diretorio_destino, arquivo.nome_base)):
+                            return
+        except BaseException as e:
+            logger.error(f"Erro no download em pipeline: {e}")
+            self._erros.append(e)
+        finally:
+            self._colocar(fila_zips, _FIM)
+
+    def _etapa_extracao(self, fila_zips: queue.Queue, fila_csvs: queue.Queue) -> None:
+        """Extrai cada ZIP assim que baixado e entrega os CSVs à leitura."""
+        gerenciador = GerenciadorArquivos(self.indice_cobertura)
+        try:
+            for caminho_zip in self._consumir(fila_zips):
+                try:
+                    with trecho(f"Extrair {os.path.basename(caminho_zip)}") as args:
+                        csvs = gerenciador.extrair_zip(caminho_zip)
+                        args["csvs"] = len(csvs)
+                except Exception as e:
+                    print(f"    [ERRO] Erro ao extrair {os.path.basename(caminho_zip)}: {e}")
+                    continue
+
+                print(f"    [OK] {os.path.basename(caminho_zip)} extraído")
+                for csv in csvs:
+                    if not self._colocar(fila_csvs, csv):
+                        return
+        except BaseException as e:
+            logger.error(f"Erro na extração em pipeline: {e}")
+            self._erros.append(e)
+        finally:
+            self._colocar(fila_csvs, _FIM)
+
+    def _filtrar_pendentes(
+        self,
+        gerador: GeradorConsolidadosPandas,
+        csvs: Iterator[str],
+        operadoras_df: pd.DataFrame,
+        diretorio_consolidados: str
+    ) -> Iterator[str]:
+        """Descarta os CSVs cuja partição incremental já está atualizada."""
+        for csv in csvs:
+            if gerador.trimestre_pendente(csv, operadoras_df, diretorio_consolidados):
+                yield csv
+            else:
+                print(f"    [OK] {os.path.basename(csv)} (partição atualizada, não relido)")
+
+    def _colocar(self, fila: queue.Queue, item) -> bool:
+        """Put bloqueante que desiste se o pipeline foi cancelado.
+
+        Returns:
+            False se cancelado antes de haver espaço na fila
+        """
+        while not self._cancelado.is_set():
+            try:
+                fila.put(item, timeout=self.INTERVALO_ESPERA)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _consumir(self, fila: queue.Queue) -> Iterator:
+        """Itera a fila até o marcador de fim (ou o cancelamento)."""
+        while not self._cancelado.is_set():
+            try:
+                item = fila.get(timeout=self.INTERVALO_ESPERA)
+            except queue.Empty:
+                continue
+            if item is _FIM:
+                return
+            yield item
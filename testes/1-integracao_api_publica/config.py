@@ -16,3 +16,24 @@ DIRETORIO_CONSOLIDADO = os.path.join(DIRETORIO_DOWNLOADS, '1-trimestres_consolid
 DIRETORIO_ERROS = os.path.join(DIRETORIO_DOWNLOADS, 'erros')
 DIRETORIO_CHECKPOINTS = os.path.join(DIRETORIO_DOWNLOADS, 'checkpoints')
 DIRETORIO_OPERADORAS = os.path.join(DIRETORIO_DOWNLOADS, 'operadoras')
+
+# Compressão dos ZIPs de saída (ZIP_COMPRESSAO: deflated | stored | bzip2 | lzma)
+ZIP_COMPRESSAO = os.getenv('ZIP_COMPRESSAO', 'deflated')
+ZIP_NIVEL = int(os.getenv('ZIP_NIVEL')) if os.getenv('ZIP_NIVEL') else None
+ZIP_THREADS = int(os.getenv('ZIP_THREADS')) if os.getenv('ZIP_THREADS') else None
+# Cópia zstd/lz4 dos CSVs ao lado do ZIP para o próximo estágio (vazio = desativado)
+FORMATO_INTERMEDIARIO = os.getenv('FORMATO_INTERMEDIARIO') or None
+
+# Cache em disco dos CSVs gerados por GeradorConsolidados (limite total com remoção LRU)
+DIRETORIO_CACHE = os.getenv('DIRETORIO_CACHE', os.path.expanduser('~/.cache/teste_jessica'))
+CACHE_LIMITE_MB = int(os.getenv('CACHE_LIMITE_MB', '512'))
+
+# Download, extração e leitura+JOIN dos trimestres sobrepostos (PIPELINE_TRIMESTRES=False: etapas em sequência)
+PIPELINE_TRIMESTRES = os.getenv('PIPELINE_TRIMESTRES', 'True') == 'True'
+# ZIPs baixados / CSVs extraídos aguardando a próxima etapa
+PIPELINE_TAMANHO_FILA = int(os.getenv('PIPELINE_TAMANHO_FILA', '2'))
+
+# Trace por etapa (formato Chrome trace, abrir em ui.perfetto.dev) gravado ao lado do log da sessão
+RASTREAMENTO = os.getenv('RASTREAMENTO', 'True') == 'True'
+# Pico de memória por etapa (tracemalloc + RSS) no log da sessão; deixa a execução mais lenta
+PERFIL_MEMORIA = os.getenv('PERFIL_MEMORIA', 'False') == 'True'
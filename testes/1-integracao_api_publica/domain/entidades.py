@@ -1,5 +1,5 @@
 from dataclasses import dataclass
-from typing import List
+from typing import List, Optional
 
 @dataclass
 class Trimestre:
@@ -22,3 +22,12 @@ class Arquivo:
     def nome_base(self) -> str:
         import os
         return os.path.basename(self.nome)
+
+@dataclass
+class PoliticaCompressao:
+    """Como os ZIPs de saída são comprimidos (padrão: ZIP_DEFLATED, nível padrão do zlib)."""
+    metodo: str = 'deflated'                    # deflated | stored | bzip2 | lzma
+    nivel: Optional[int] = None                 # nível do método (None = padrão)
+    max_threads: Optional[int] = None           # threads que comprimem os membros (None = automático)
+    formato_intermediario: Optional[str] = None  # zstd | lz4: cópia dos CSVs para o próximo estágio
+    nivel_intermediario: Optional[int] = None
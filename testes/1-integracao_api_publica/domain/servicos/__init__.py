@@ -1,11 +1,21 @@
 """Inicializa módulo de serviços de domínio."""
 
+from .conversor_numero_br import ConversorNumeroBR
+from .compactador_zip import CompactadorZIP
+from .intercambio_parquet import IntercambioParquet
+from .particoes_consolidado import ParticoesConsolidado
+from .dimensao_operadoras import DimensaoOperadoras
 from .processador_arquivos import ProcessadorArquivos
 from .gerador_consolidados import GeradorConsolidados
 from .validador_normalizador import ValidadorNormalizador
 from .processador_demonstracoes import ProcessadorDemonstracoes
 
 __all__ = [
+    'ConversorNumeroBR',
+    'CompactadorZIP',
+    'IntercambioParquet',
+    'ParticoesConsolidado',
+    'DimensaoOperadoras',
     'ProcessadorArquivos',
     'GeradorConsolidados',
     'ValidadorNormalizador',
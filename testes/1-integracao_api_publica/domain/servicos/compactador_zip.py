@@ -0,0 +1,399 @@
+"""Serviço de Domínio: Compactação dos arquivos de saída.
+
+Aplica a PoliticaCompressao (método, nível, threads e formato intermediário) aos
+ZIPs gerados pelo estágio:
+1. Cada membro é gravado direto em uma entrada de ZIP (ZipFile.open em modo
+   'w'), sem arquivo temporário descomprimido
+2. Com uma thread, as entradas são as do ZIP final; com várias, cada membro é
+   comprimido na sua thread em um ZIP de um membro só (em memória até
+   LIMITE_MEMORIA_MEMBRO, depois em disco) e os bytes já comprimidos são
+   copiados na ordem para o ZIP final, que recebe o diretório central no fim
+3. Opcionalmente, cada CSV também é gravado em um arquivo intermediário
+   zstd/lz4 ao lado do ZIP, no mesmo passe, para o próximo estágio
+4. O ZIP é gravado em .tmp e publicado com os.replace (nunca fica um ZIP parcial)
+
+O estágio 2 usa uma cópia deste módulo (só o log difere); alterações valem
+para as duas (tests/test_modulos_espelhados.py compara).
+"""
+
+import io
+import os
+import shutil
+import struct
+import tempfile
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from typing import BinaryIO, Callable, List, Optional, Tuple, Union
+
+from domain.entidades import PoliticaCompressao
+from infraestrutura.logger import get_logger
+
+logger = get_logger('CompactadorZIP')
+
+# Fonte de um membro: caminho de arquivo ou função que escreve bytes no destino
+FonteMembro = Union[str, Callable[[BinaryIO], None]]
+
+
+class _EscritorMembro(io.RawIOBase):
+    """Destino binário que grava o membro (e o intermediário) enquanto recebe bytes.
+
+    Fechar o escritor fecha só a entrada do ZIP; o intermediário é publicado
+    (ou descartado) por quem o abriu, conforme a gravação termine ou falhe.
+    """
+
+    def __init__(self, arquivo: BinaryIO, intermediario=None):
+        self.arquivo = arquivo
+        self.intermediario = intermediario
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, dados) -> int:
+        dados = bytes(dados)
+        self.arquivo.write(dados)
+        if self.intermediario is not None:
+            self.intermediario.write(dados)
+        return len(dados)
+
+    def close(self) -> None:
+        if self.closed:
+            return
+        self.arquivo.close()
+        super().close()
+
+
+class _ArquivoIntermediario:
+    """Arquivo zstd/lz4 gravado em .tmp e publicado com os.replace ao fechar."""
+
+    def __init__(self, caminho: str, formato: str, nivel: Optional[int]):
+        self.caminho = caminho
+        self.caminho_tmp = f"{caminho}.tmp"
+        if formato == 'zstd':
+            import zstandard
+            self.compressor = zstandard.ZstdCompressor(level=nivel or 3).compressobj()
+            cabecalho = b''
+        else:
+            import lz4.frame
+            self.compressor = lz4.frame.LZ4FrameCompressor(compression_level=nivel or 0)
+            cabecalho = self.compressor.begin()
+
+        self.arquivo = open(self.caminho_tmp, 'wb')
+        self.arquivo.write(cabecalho)
+
+    def write(self, dados: bytes) -> None:
+        self.arquivo.write(self.compressor.compress(dados))
+
+    def close(self) -> None:
+        self.arquivo.write(self.compressor.flush())
+        self.arquivo.close()
+        os.replace(self.caminho_tmp, self.caminho)
+
+    def descartar(self) -> None:
+        self.arquivo.close()
+        os.remove(self.caminho_tmp)
+
+
+class _MontadorZIP:
+    """Monta o ZIP final a partir de ZIPs de um membro só, copiando os bytes já comprimidos.
+
+    Os cabeçalhos locais não guardam posições absolutas, então cada membro é
+    copiado como está; só o diretório central (com o deslocamento de cada
+    membro no ZIP final) é escrito aqui, com as extensões ZIP64 quando preciso,
+    como o zipfile faz.
+    """
+
+    # Mesmos limites do zipfile para passar a usar ZIP64
+    LIMITE_ZIP64 = (1 << 31) - 1
+    LIMITE_QUANTIDADE = (1 << 16) - 1
+
+    def __init__(self, arquivo: BinaryIO):
+        self.arquivo = arquivo
+        self.entradas = []
+
+    def copiar_membro(self, zip_membro: BinaryIO, info: zipfile.ZipInfo) -> None:
+        """Copia cabeçalho local e dados do único membro de um ZIP gravado em arquivo pesquisável."""
+        zip_membro.seek(0)
+        cabecalho = zip_membro.read(30)
+        tamanho_nome, tamanho_extra = struct.unpack('<2H', cabecalho[26:30])
+        # Em arquivo pesquisável o zipfile reescreve o cabeçalho local e não usa descritor de dados
+        restante = tamanho_nome + tamanho_extra + info.compress_size
+
+        self.entradas.append((info, self.arquivo.tell()))
+        self.arquivo.write(cabecalho)
+        while restante:
+            bloco = zip_membro.read(min(restante, CompactadorZIP.TAMANHO_BLOCO))
+            if not bloco:
+                raise ValueError(f"ZIP do membro {info.filename} truncado")
+            self.arquivo.write(bloco)
+            restante -= len(bloco)
+
+    def fechar(self) -> None:
+        """Escreve o diretório central e o registro de fim do ZIP."""
+        inicio_central = self.arquivo.tell()
+        for info, deslocamento in self.entradas:
+            self.arquivo.write(self._registro_central(info, deslocamento))
+        tamanho_central = self.arquivo.tell() - inicio_central
+        quantidade = len(self.entradas)
+
+        if (quantidade > self.LIMITE_QUANTIDADE or inicio_central > self.LIMITE_ZIP64
+                or tamanho_central > self.LIMITE_ZIP64):
+            inicio_fim64 = self.arquivo.tell()
+            self.arquivo.write(struct.pack(
+                '<4sQ2H2L4Q', b'PK\x06\x06', 44, 45, 45, 0, 0,
+                quantidade, quantidade, tamanho_central, inicio_central
+            ))
+            self.arquivo.write(struct.pack('<4sLQL', b'PK\x06\x07', 0, inicio_fim64, 1))
+            quantidade = min(quantidade, 0xFFFF)
+            tamanho_central = min(tamanho_central, 0xFFFFFFFF)
+            inicio_central = min(inicio_central, 0xFFFFFFFF)
+
+        self.arquivo.write(struct.pack(
+            '<4s4H2LH', b'PK\x05\x06', 0, 0, quantidade, quantidade, tamanho_central, inicio_central, 0
+        ))
+
+    @staticmethod
+    def _registro_central(info: zipfile.ZipInfo, deslocamento: int) -> bytes:
+        """Registro do diretório central de um membro copiado para a posição deslocamento."""
+        tamanho, comprimido = info.file_size, info.compress_size
+        extra64 = []
+        if tamanho > _MontadorZIP.LIMITE_ZIP64 or comprimido > _MontadorZIP.LIMITE_ZIP64:
+            extra64 += [tamanho, comprimido]
+            tamanho = comprimido = 0xFFFFFFFF
+        if deslocamento > _MontadorZIP.LIMITE_ZIP64:
+            extra64.append(deslocamento)
+            deslocamento = 0xFFFFFFFF
+
+        extra = info.extra
+        versao_minima = 0
+        if extra64:
+            extra = struct.pack(f'<2H{len(extra64)}Q', 1, 8 * len(extra64), *extra64) + extra
+            versao_minima = 45
+
+        # Mesma codificação do nome usada pelo zipfile no cabeçalho local
+        flags = info.flag_bits
+        try:
+            nome = info.filename.encode('ascii')
+        except UnicodeEncodeError:
+            nome = info.filename.encode('utf-8')
+            flags |= 0x800
+
+        ano, mes, dia, hora, minuto, segundo = info.date_time
+        data_dos = (ano - 1980) << 9 | mes << 5 | dia
+        hora_dos = hora << 11 | minuto << 5 | segundo // 2
+        return struct.pack(
+            '<4s4B4HL2L5H2L',
+            b'PK\x01\x02', max(versao_minima, info.create_version), info.create_system,
+            max(versao_minima, info.extract_version), info.reserved, flags, info.compress_type,
+            hora_dos, data_dos, info.CRC, comprimido, tamanho,
+            len(nome), len(extra), len(info.comment), 0, info.internal_attr, info.external_attr,
+            deslocamento
+        ) + nome + extra + info.comment
+
+
+class CompactadorZIP:
+    """Cria ZIPs comprimindo os membros em paralelo segundo a PoliticaCompressao."""
+
+    METODOS = {
+        'stored': zipfile.ZIP_STORED,
+        'deflated': zipfile.ZIP_DEFLATED,
+        'bzip2': zipfile.ZIP_BZIP2,
+        'lzma': zipfile.ZIP_LZMA,
+    }
+
+    # Formato intermediário (stage-to-stage) -> extensão do arquivo ao lado do ZIP
+    EXTENSOES_INTERMEDIARIO = {'zstd': '.zst', 'lz4': '.lz4'}
+
+    TAMANHO_BLOCO = 1024 * 1024
+
+    # ZIP de um membro comprimido em paralelo fica em memória até este tamanho
+    LIMITE_MEMORIA_MEMBRO = 64 * 1024 * 1024
+
+    @staticmethod
+    def criar_zip(
+        caminho_zip: str,
+        membros: List[Tuple[str, FonteMembro]],
+        politica: PoliticaCompressao = None
+    ) -> None:
+        """Cria o ZIP com os membros comprimidos em paralelo (atômico: .tmp + os.replace).
+
+        Args:
+            caminho_zip: Caminho do ZIP a criar
+            membros: Lista de (nome_no_zip, fonte); fonte é um caminho de arquivo
+                     ou uma função que escreve o conteúdo em um destino binário
+            politica: Política de compressão (padrão: deflated no nível padrão)
+        """
+        politica = politica or PoliticaCompressao()
+        tipo = CompactadorZIP._tipo_compressao(politica.metodo)
+        diretorio = os.path.dirname(caminho_zip)
+        max_threads = politica.max_threads or min(len(membros), os.cpu_count() or 1) or 1
+        caminho_tmp = f"{caminho_zip}.tmp"
+
+        try:
+            if max_threads == 1 or len(membros) <= 1:
+                # Sem paralelismo: cada membro vai direto para a sua entrada no ZIP final
+                with zipfile.ZipFile(caminho_tmp, 'w', tipo, compresslevel=politica.nivel) as zipf:
+                    for nome, fonte in membros:
+                        CompactadorZIP._gravar_membro(
+                            zipf,
+                            nome,
+                            fonte,
+                            politica,
+                            CompactadorZIP._caminho_intermediario(diretorio, nome, politica)
+                        )
+            else:
+                CompactadorZIP._criar_zip_paralelo(caminho_tmp, membros, politica, tipo, max_threads)
+            os.replace(caminho_tmp, caminho_zip)
+        finally:
+            # Se a gravação falhou, o ZIP parcial
+            if os.path.exists(caminho_tmp):
+                os.remove(caminho_tmp)
+
+    @staticmethod
+    def _criar_zip_paralelo(
+        caminho_tmp: str,
+        membros: List[Tuple[str, FonteMembro]],
+        politica: PoliticaCompressao,
+        tipo: int,
+        max_threads: int
+    ) -> None:
+        """Comprime cada membro na sua thread e copia os membros prontos, na ordem, para o ZIP."""
+        diretorio = os.path.dirname(caminho_tmp)
+        futuros = []
+        try:
+            with ThreadPoolExecutor(max_workers=max_threads) as executor:
+                futuros = [
+                    executor.submit(
+                        CompactadorZIP._comprimir_membro,
+                        nome,
+                        fonte,
+                        politica,
+                        tipo,
+                        diretorio,
+                        CompactadorZIP._caminho_intermediario(diretorio, nome, politica)
+                    )
+                    for nome, fonte in membros
+                ]
+
+                try:
+                    with open(caminho_tmp, 'wb') as arquivo:
+                        montador = _MontadorZIP(arquivo)
+                        for futuro in futuros:
+                            zip_membro, info = futuro.result()
+                            montador.copiar_membro(zip_membro, info)
+                            zip_membro.close()
+                        montador.fechar()
+                except BaseException:
+                    for futuro in futuros:
+                        futuro.cancel()
+                    raise
+        finally:
+            # ZIPs de membros que não chegaram a ser copiados (fechar um já fechado não faz nada)
+            for futuro in futuros:
+                if futuro.done() and not futuro.cancelled() and futuro.exception() is None:
+                    futuro.result()[0].close()
+
+    @staticmethod
+    def _comprimir_membro(
+        nome: str,
+        fonte: FonteMembro,
+        politica: PoliticaCompressao,
+        tipo: int,
+        diretorio: str,
+        caminho_intermediario: Optional[str]
+    ) -> Tuple[BinaryIO, zipfile.ZipInfo]:
+        """Comprime um membro (executado na thread) em um ZIP de um membro só.
+
+        Acima de LIMITE_MEMORIA_MEMBRO o ZIP do membro passa para um temporário
+        no diretório do ZIP final.
+
+        Returns:
+            (arquivo do ZIP do membro, ZipInfo do membro)
+        """
+        zip_membro = tempfile.SpooledTemporaryFile(
+            max_size=CompactadorZIP.LIMITE_MEMORIA_MEMBRO,
+            dir=diretorio or None
+        )
+        try:
+            with zipfile.ZipFile(zip_membro, 'w', tipo, compresslevel=politica.nivel) as zipf:
+                CompactadorZIP._gravar_membro(zipf, nome, fonte, politica, caminho_intermediario)
+            return zip_membro, zipf.getinfo(nome)
+        except BaseException:
+            zip_membro.close()
+            raise
+
+    @staticmethod
+    def _tipo_compressao(metodo: str) -> int:
+        """Converte o nome do método da política no tipo de compressão do zipfile."""
+        try:
+            return CompactadorZIP.METODOS[metodo]
+        except KeyError:
+            raise ValueError(
+                f"Método de compressão inválido: {metodo} (use {', '.join(CompactadorZIP.METODOS)})"
+            )
+
+    @staticmethod
+    def _caminho_intermediario(diretorio: str, nome: str, politica: PoliticaCompressao) -> Optional[str]:
+        """Caminho do arquivo intermediário de um CSV (remove os de outros formatos)."""
+        if not nome.endswith('.csv'):
+            return None
+
+        # Intermediários de execuções anteriores com outro formato ficariam desatualizados
+        for formato, extensao in CompactadorZIP.EXTENSOES_INTERMEDIARIO.items():
+            caminho = os.path.join(diretorio, nome + extensao)
+            if formato != politica.formato_intermediario and os.path.exists(caminho):
+                os.remove(caminho)
+
+        if not politica.formato_intermediario:
+            return None
+
+        extensao = CompactadorZIP.EXTENSOES_INTERMEDIARIO.get(politica.formato_intermediario)
+        if extensao is None:
+            raise ValueError(f"Formato intermediário inválido: {politica.formato_intermediario}")
+        return os.path.join(diretorio, nome + extensao)
+
+    @staticmethod
+    def _gravar_membro(
+        zipf: zipfile.ZipFile,
+        nome: str,
+        fonte: FonteMembro,
+        politica: PoliticaCompressao,
+        caminho_intermediario: Optional[str]
+    ) -> None:
+        """Grava um membro direto na sua entrada do ZIP (e no intermediário, se houver).
+
+        Arquivos existentes sem intermediário vão pelo ZipFile.write; os demais
+        são escritos em blocos no ZipFile.open, sem passar por arquivo temporário.
+        """
+        intermediario = None
+        if caminho_intermediario:
+            try:
+                intermediario = _ArquivoIntermediario(
+                    caminho_intermediario, politica.formato_intermediario, politica.nivel_intermediario
+                )
+            except ImportError as e:
+                logger.warning(f"Formato intermediário {politica.formato_intermediario} indisponível ({e}); gerando só o ZIP")
+
+        if isinstance(fonte, str) and intermediario is None:
+            zipf.write(fonte, nome)
+            return
+
+        # force_zip64: o tamanho do membro só é conhecido ao final
+        escritor = _EscritorMembro(zipf.open(nome, 'w', force_zip64=True), intermediario)
+        try:
+            if isinstance(fonte, str):
+                with open(fonte, 'rb') as origem:
+                    shutil.copyfileobj(origem, escritor, CompactadorZIP.TAMANHO_BLOCO)
+            else:
+                destino = io.BufferedWriter(escritor, CompactadorZIP.TAMANHO_BLOCO)
+                fonte(destino)
+                if not destino.closed:
+                    destino.flush()
+        except BaseException:
+            # Não publicar um intermediário parcial
+            if intermediario is not None:
+                intermediario.descartar()
+            escritor.close()
+            raise
+        escritor.close()
+        if intermediario is not None:
+            intermediario.close()
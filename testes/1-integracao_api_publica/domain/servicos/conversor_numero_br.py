@@ -0,0 +1,274 @@
+"""Serviço de Domínio: Conversão vetorizada de números no formato brasileiro.
+
+Centraliza o parse ("1.234,56" -> 1234.56) e a formatação (1234.56 -> "1.234,56")
+de colunas inteiras, substituindo os lambdas aplicados elemento a elemento.
+
+Os resultados são idênticos aos das versões escalares (formatar_valor/parse_valor):
+- formatação: aritmética de centavos inteiros e montagem dos textos em uma matriz
+  de caracteres; valores muito próximos de um empate de arredondamento (ou grandes
+  demais para centavos exatos em float64) são formatados pelo próprio Python;
+- parse: dígitos acumulados em uma mantissa inteira por coluna da matriz de
+  caracteres e divididos por 10**casas_decimais (corretamente arredondado, como
+  o float() do Python); textos fora do padrão usam o parse escalar.
+
+O estágio 2 usa uma cópia idêntica (o CSV que um grava é o que o outro lê):
+alterações valem para as duas (tests/test_modulos_espelhados.py compara).
+"""
+
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+
+class ConversorNumeroBR:
+    """Parse e formatação vetorizados de valores no padrão brasileiro (1.234,56)."""
+
+    # Acima disso os centavos deixam de ser inteiros exatos em float64
+    LIMITE_CENTAVOS_EXATOS = 2.0 ** 52
+
+    # Códigos UCS-4 dos caracteres usados na matriz de texto
+    CHAR_PONTO = ord('.')
+    CHAR_VIRGULA = ord(',')
+    CHAR_MENOS = ord('-')
+    CHAR_MAIS = ord('+')
+    CHAR_ZERO = ord('0')
+
+    # Mantissas de até 15 dígitos são inteiros exatos em float64 (< 2**53) e
+    # 10**k também é exato: mantissa / 10**k é corretamente arredondada
+    MAX_DIGITOS_EXATOS = 15
+    POTENCIAS_DEZ = 10.0 ** np.arange(MAX_DIGITOS_EXATOS + 1)
+    POTENCIAS_DEZ_INTEIRAS = 10 ** np.arange(19, dtype=np.int64)
+
+    # Os 1000 grupos de milhar "000".."999" como matriz (1000, 3)
+    GRUPOS_MILHAR = np.array(
+        [[ord(c) for c in f"{i:03d}"] for i in range(1000)], dtype=np.uint32
+    )
+
+    @staticmethod
+    def formatar_valor(valor) -> str:
+        """Formata um único valor: 1234567.89 -> '1.234.567,89'."""
+        return f"{valor:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.')
+
+    @staticmethod
+    def parse_valor(valor) -> Optional[float]:
+        """Converte um único valor no formato brasileiro para float (None se inválido)."""
+        if pd.isna(valor):
+            return None
+
+        try:
+            if isinstance(valor, str):
+                valor = valor.strip()
+                if valor == '':
+                    return None
+                return float(valor.replace('.', '').replace(',', '.'))
+            return float(valor)
+        except Exception:
+            return None
+
+    @staticmethod
+    def formatar_serie(serie: pd.Series, valor_nulo='') -> pd.Series:
+        """Formata uma coluna numérica para o padrão brasileiro.
+
+        Args:
+            serie: Série numérica (float, int ou object com números)
+            valor_nulo: Valor usado nas posições nulas ('' ou np.nan)
+
+        Returns:
+            Série object com os textos formatados
+        """
+        C = ConversorNumeroBR
+        valores = serie.to_numpy(dtype='float64', na_value=np.nan)
+        resultado = np.full(len(valores), valor_nulo, dtype=object)
+
+        nulos, exato, centavos = C._centavos_exatos(valores)
+        if exato.any():
+            resultado[exato] = C._montar_textos(centavos, np.signbit(valores[exato]))
+
+        for posicao in np.flatnonzero(~nulos & ~exato):
+            resultado[posicao] = C.formatar_valor(valores[posicao])
+
+        return pd.Series(resultado, index=serie.index, name=serie.name)
+
+    @staticmethod
+    def arredondar_centavos(serie: pd.Series) -> pd.Series:
+        """Arredonda uma coluna numérica para centavos sem passar por texto.
+
+        O resultado é idêntico a parse_serie(formatar_serie(serie)): o valor que
+        o próximo estágio obteria lendo o CSV formatado.
+
+        Args:
+            serie: Série numérica (float, int ou object com números)
+
+        Returns:
+            Série float64 (NaN nas posições nulas)
+        """
+        C = ConversorNumeroBR
+        valores = serie.to_numpy(dtype='float64', na_value=np.nan)
+        resultado = np.full(len(valores), np.nan)
+
+        nulos, exato, centavos = C._centavos_exatos(valores)
+        # centavos / 100 é o float mais próximo de "d,dd", como o parse do texto
+        resultado[exato] = np.copysign(centavos / 100, valores[exato])
+
+        for posicao in np.flatnonzero(~nulos & ~exato):
+            resultado[posicao] = float(f"{valores[posicao]:.2f}")
+
+        return pd.Series(resultado, index=serie.index, name=serie.name)
+
+    @staticmethod
+    def _centavos_exatos(valores: np.ndarray):
+        """Centavos inteiros (sem sinal) dos valores arredondáveis em float64.
+
+        Returns:
+            (nulos, exato, centavos): máscaras do array e os centavos das posições exatas
+        """
+        C = ConversorNumeroBR
+        nulos = np.isnan(valores)
+        with np.errstate(over='ignore', invalid='ignore'):
+            # Perto do máximo do float64 o produto estoura para inf (formatado pelo Python)
+            centavos_float = np.abs(valores) * 100
+            fracao = centavos_float - np.floor(centavos_float)
+            # Perto de meio centavo o produto em float pode ter caído do lado errado
+            # do empate: esses (e não finitos/enormes) vão para o format do Python
+            ambiguo = np.abs(fracao - 0.5) <= np.spacing(centavos_float)
+            exato = ~nulos & (centavos_float < C.LIMITE_CENTAVOS_EXATOS) & ~ambiguo
+
+        # np.rint arredonda empates para o par, como o format do Python
+        centavos = np.rint(centavos_float[exato]).astype(np.int64)
+        return nulos, exato, centavos
+
+    @staticmethod
+    def _montar_textos(centavos: np.ndarray, negativo: np.ndarray) -> np.ndarray:
+        """Monta os textos '-1.234,56' a partir de centavos não negativos e do sinal.
+
+        Cada linha é escrita alinhada à direita em uma matriz UCS-4, grupo de milhar
+        por grupo de milhar, depois alinhada à esquerda e lida como strings de
+        largura fixa.
+        """
+        C = ConversorNumeroBR
+        inteiros = centavos // 100
+        decimais = centavos % 100
+
+        qtd_grupos = max(1, (len(str(int(inteiros.max()))) + 2) // 3)
+        # sinal + grupos separados por '.' + ',dd'
+        largura = 1 + (4 * qtd_grupos - 1) + 3
+
+        matriz = np.zeros((len(centavos), largura), dtype=np.uint32)
+        matriz[:, -3] = C.CHAR_VIRGULA
+        matriz[:, -2:] = C.GRUPOS_MILHAR[decimais, 1:]
+
+        # Grupo j (a partir da direita) ocupa 3 colunas, precedidas de '.'
+        resto = inteiros
+        for j in range(qtd_grupos):
+            fim = largura - 3 - 4 * j
+            matriz[:, fim - 3:fim] = C.GRUPOS_MILHAR[resto % 1000]
+            matriz[:, fim - 4] = C.CHAR_PONTO
+            resto = resto // 1000
+
+        qtd_digitos = np.searchsorted(C.POTENCIAS_DEZ_INTEIRAS[1:], inteiros, side='right') + 1
+        comprimento = 3 + qtd_digitos + (qtd_digitos - 1) // 3 + negativo
+
+        inicio = largura - comprimento
+        matriz[np.flatnonzero(negativo), inicio[negativo]] = C.CHAR_MENOS
+
+        # Alinhar à esquerda: poucas larguras distintas, uma cópia de fatia por largura
+        textos = np.zeros_like(matriz)
+        for tamanho in np.unique(comprimento):
+            linhas = np.flatnonzero(comprimento == tamanho)
+            textos[linhas, :tamanho] = matriz[linhas, largura - tamanho:]
+
+        return textos.view(f"U{largura}").ravel().astype(object)
+
+    @staticmethod
+    def parse_serie(serie: pd.Series) -> pd.Series:
+        """Converte uma coluna no formato brasileiro para float.
+
+        Textos: remove o separador de milhar (.) e troca ',' por '.'.
+        Vazios, nulos e valores inválidos viram NaN; números são mantidos.
+
+        Args:
+            serie: Série com textos "1.234,56" e/ou números
+
+        Returns:
+            Série float64
+        """
+        C = ConversorNumeroBR
+        if pd.api.types.is_numeric_dtype(serie.dtype) and not pd.api.types.is_bool_dtype(serie.dtype):
+            return serie.astype('float64')
+
+        valores = serie.to_numpy(dtype=object)
+        nulos = pd.isna(valores)
+        tipo = pd.api.types.infer_dtype(valores, skipna=True)
+
+        numeros = np.full(len(valores), np.nan)
+        try:
+            if tipo == 'string':
+                numeros[~nulos] = C._parse_textos(valores[~nulos].astype(str))
+            elif tipo in ('floating', 'integer', 'mixed-integer-float', 'decimal', 'empty'):
+                numeros[~nulos] = valores[~nulos].astype('float64')
+            else:
+                raise ValueError(tipo)
+        except (ValueError, TypeError, OverflowError):
+            # Tipos misturados ou textos inválidos: conversão escalar
+            numeros = np.array([C.parse_valor(v) for v in valores], dtype='float64')
+
+        return pd.Series(numeros, index=serie.index, name=serie.name)
+
+    @staticmethod
+    def _parse_textos(textos: np.ndarray) -> np.ndarray:
+        """Converte um array de textos 'U' no formato brasileiro para float64.
+
+        Os dígitos de cada linha são acumulados coluna a coluna em uma mantissa
+        inteira e divididos por 10**casas_decimais: com até 15 dígitos a divisão
+        em float64 é corretamente arredondada, igual ao float() do texto. Textos
+        fora do padrão [+-]dígitos/pontos[,dígitos/pontos] (espaços, expoente,
+        mais de 15 dígitos...) vão para o parse escalar; vazios viram NaN.
+        """
+        C = ConversorNumeroBR
+        largura = textos.dtype.itemsize // 4
+        numeros = np.full(len(textos), np.nan)
+        if largura == 0:
+            return numeros
+
+        matriz = np.ascontiguousarray(textos).view(np.uint32).reshape(len(textos), largura)
+        # Uma coluna por caractere, contígua (não ASCII vira 255 e é rejeitado)
+        colunas = np.minimum(matriz, 255).astype(np.uint8).T.copy()
+
+        mantissa = np.zeros(len(textos), dtype=np.int64)
+        qtd_digitos = np.zeros(len(textos), dtype=np.int64)
+        casas_decimais = np.zeros(len(textos), dtype=np.int64)
+        qtd_virgulas = np.zeros(len(textos), dtype=np.int64)
+        terminou = np.zeros(len(textos), dtype=bool)
+        valido = np.ones(len(textos), dtype=bool)
+
+        for posicao, caracteres in enumerate(colunas):
+            digito = caracteres - np.uint8(C.CHAR_ZERO)
+            eh_digito = digito < 10
+            eh_virgula = caracteres == C.CHAR_VIRGULA
+            eh_nul = caracteres == 0
+
+            permitido = eh_digito | eh_virgula | eh_nul | (caracteres == C.CHAR_PONTO)
+            if posicao == 0:
+                permitido |= (caracteres == C.CHAR_MENOS) | (caracteres == C.CHAR_MAIS)
+            # NUL só como preenchimento à direita
+            valido &= permitido & (eh_nul | ~terminou)
+            terminou |= eh_nul
+
+            mantissa = np.where(eh_digito, mantissa * 10 + digito, mantissa)
+            qtd_digitos += eh_digito
+            casas_decimais += eh_digito & (qtd_virgulas > 0)
+            qtd_virgulas += eh_virgula
+
+        valido &= (qtd_virgulas <= 1) & (qtd_digitos >= 1) & (qtd_digitos <= C.MAX_DIGITOS_EXATOS)
+
+        valores = mantissa / C.POTENCIAS_DEZ[np.minimum(casas_decimais, C.MAX_DIGITOS_EXATOS)]
+        valores = np.where(colunas[0] == C.CHAR_MENOS, -valores, valores)
+        numeros[valido] = valores[valido]
+
+        preenchido = colunas[0] != 0
+        for posicao in np.flatnonzero(preenchido & ~valido):
+            valor = C.parse_valor(textos[posicao])
+            numeros[posicao] = np.nan if valor is None else valor
+
+        return numeros
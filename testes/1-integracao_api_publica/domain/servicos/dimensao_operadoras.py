@@ -0,0 +1,181 @@
+"""Serviço de Domínio: Dimensão de operadoras compartilhada entre os estágios.
+
+Construída uma vez a partir dos CSVs de operadoras (ativas + canceladas) e
+gravada em Arrow IPC (arquivo, sem compressão: pode ser lido com memory map)
+em <downloads>/operadoras/operadoras_dimensao.arrow, com as colunas que cada
+estágio derivava por conta própria:
+- cnpj_limpo: só os dígitos do CNPJ (None se não tiver 14 dígitos)
+- status_upper: status em maiúsculas, para comparações
+- qtd_ativas / qtd_canceladas: linhas ATIVA/CANCELADA com o mesmo reg_ans
+- duplicidade: reg_ans com mais de uma ativa (ou, sem ativa, mais de uma cancelada)
+- resolucao: ATIVO, CANCELADA, DUPLICIDADE ou N/L para o reg_ans
+- linha_resolvida: a linha que fornece os dados do reg_ans (ATIVO/CANCELADA)
+
+Nos metadados vão a versão do schema e duas impressões digitais (sha256 do
+conteúdo): a de todos os CSVs de origem (Relatorio_cadop* + consolidados),
+conferida aqui antes de reaproveitar a dimensão, e a só dos consolidados
+operadoras_ativas/canceladas.csv, conferida pelo estágio 2, que lê apenas esses.
+
+O leitor do estágio 2 (2-transformacao_validacao/domain/servicos/dimensao_operadoras.py)
+repete VERSAO_SCHEMA, as chaves dos metadados e fingerprint_fontes: mudar um
+lado exige mudar o outro.
+"""
+
+import hashlib
+import os
+from typing import Iterable, Optional
+
+import numpy as np
+import pandas as pd
+
+from infraestrutura.logger import get_logger
+
+logger = get_logger('DimensaoOperadoras')
+
+
+class DimensaoOperadoras:
+    """Constrói, grava e lê a dimensão versionada de operadoras."""
+
+    # Incrementar quando nomes/tipos/regras das colunas derivadas mudarem
+    VERSAO_SCHEMA = '1'
+    CHAVE_VERSAO = b'versao_schema'
+    CHAVE_FINGERPRINT = b'fingerprint_fontes'
+    CHAVE_FINGERPRINT_CSVS = b'fingerprint_csvs'
+    CSVS_OPERADORAS = ('operadoras_ativas.csv', 'operadoras_canceladas.csv')
+    NOME_ARQUIVO = 'operadoras_dimensao.arrow'
+    COLUNAS_DERIVADAS = [
+        'cnpj_limpo', 'status_upper', 'qtd_ativas', 'qtd_canceladas',
+        'duplicidade', 'resolucao', 'linha_resolvida',
+    ]
+    # Colunas de texto em que None significa "sem valor" (não NaN)
+    COLUNAS_COM_NONE = ('cnpj_limpo', 'resolucao')
+    TAMANHO_BLOCO_HASH = 1024 * 1024
+
+    @staticmethod
+    def caminho(diretorio_downloads: str) -> str:
+        return os.path.join(diretorio_downloads, 'operadoras', DimensaoOperadoras.NOME_ARQUIVO)
+
+    @staticmethod
+    def csvs_operadoras(diretorio_downloads: str) -> list:
+        """Consolidados de operadoras (os lidos pelo estágio 2) existentes."""
+        caminhos = [os.path.join(diretorio_downloads, 'operadoras', nome) for nome in DimensaoOperadoras.CSVS_OPERADORAS]
+        return [caminho for caminho in caminhos if os.path.exists(caminho)]
+
+    @staticmethod
+    def fingerprint_fontes(caminhos: Iterable[str]) -> str:
+        """sha256 do nome e do conteúdo dos CSVs de origem (ordem irrelevante)."""
+        sha = hashlib.sha256()
+        for caminho in sorted(caminhos):
+            sha.update(f"{os.path.basename(caminho)}\n".encode('utf-8'))
+            with open(caminho, 'rb') as f:
+                for bloco in iter(lambda: f.read(DimensaoOperadoras.TAMANHO_BLOCO_HASH), b''):
+                    sha.update(bloco)
+        return sha.hexdigest()
+
+    @staticmethod
+    def construir(operadoras: pd.DataFrame) -> pd.DataFrame:
+        """Acrescenta as colunas derivadas às operadoras carregadas.
+
+        Args:
+            operadoras: Ativas + canceladas com colunas em minúsculas, reg_ans e status
+
+        Returns:
+            Cópia com as colunas de COLUNAS_DERIVADAS
+        """
+        df = operadoras.copy()
+
+        digitos = df['cnpj'].astype(str).str.replace(r'\D', '', regex=True)
+        df['cnpj_limpo'] = digitos.where(digitos.str.len() == 14, None)
+        df['status_upper'] = df['status'].astype(str).str.upper().str.strip()
+
+        reg_ans = pd.to_numeric(df['reg_ans'], errors='coerce').astype('Int64')
+        ativa = (df['status'].astype(str).str.upper() == 'ATIVA').astype('int64')
+        cancelada = (df['status'].astype(str).str.upper() == 'CANCELADA').astype('int64')
+        # Linhas sem reg_ans ficam fora do groupby (contagem 0, resolucao None)
+        df['qtd_ativas'] = ativa.groupby(reg_ans).transform('sum').fillna(0).astype('int64')
+        df['qtd_canceladas'] = cancelada.groupby(reg_ans).transform('sum').fillna(0).astype('int64')
+
+        ativas, canceladas = df['qtd_ativas'], df['qtd_canceladas']
+        df['duplicidade'] = (ativas > 1) | ((ativas == 0) & (canceladas > 1))
+        resolucao = np.select(
+            [ativas == 1, ativas > 1, canceladas == 1, canceladas > 1],
+            ['ATIVO', 'DUPLICIDADE', 'CANCELADA', 'DUPLICIDADE'],
+            default='N/L'
+        )
+        df['resolucao'] = pd.Series(resolucao, index=df.index, dtype=object).where(reg_ans.notna(), None)
+        df['linha_resolvida'] = (
+            ((df['resolucao'] == 'ATIVO') & (ativa == 1))
+            | ((df['resolucao'] == 'CANCELADA') & (cancelada == 1))
+        )
+        return df
+
+    @staticmethod
+    def salvar(df: pd.DataFrame, caminho: str, fingerprint: str, fingerprint_csvs: str) -> None:
+        """Grava a dimensão em Arrow IPC (atômico: .tmp + os.replace).
+
+        Args:
+            df: Resultado de construir
+            caminho: Caminho do arquivo .arrow
+            fingerprint: fingerprint_fontes de todos os CSVs de origem
+            fingerprint_csvs: fingerprint_fontes de csvs_operadoras
+
+        Raises:
+            ImportError: pyarrow não instalado
+        """
+        import pyarrow as pa
+
+        tabela = pa.Table.from_pandas(df, preserve_index=False)
+        metadados = dict(tabela.schema.metadata or {})
+        metadados[DimensaoOperadoras.CHAVE_VERSAO] = DimensaoOperadoras.VERSAO_SCHEMA.encode()
+        metadados[DimensaoOperadoras.CHAVE_FINGERPRINT] = fingerprint.encode()
+        metadados[DimensaoOperadoras.CHAVE_FINGERPRINT_CSVS] = fingerprint_csvs.encode()
+        tabela = tabela.replace_schema_metadata(metadados)
+
+        os.makedirs(os.path.dirname(caminho), exist_ok=True)
+        caminho_tmp = f"{caminho}.tmp"
+        with pa.OSFile(caminho_tmp, 'wb') as sink:
+            with pa.ipc.new_file(sink, tabela.schema) as escritor:
+                escritor.write_table(tabela)
+        os.replace(caminho_tmp, caminho)
+
+    @staticmethod
+    def fingerprint_gravado(caminho: str) -> Optional[str]:
+        """Impressão digital das fontes gravada no arquivo (None se ausente/ilegível/outra versão)."""
+        try:
+            import pyarrow as pa
+            with pa.memory_map(caminho, 'r') as fonte:
+                metadados = pa.ipc.open_file(fonte).schema.metadata or {}
+        except (ImportError, OSError, ValueError):
+            return None
+        if metadados.get(DimensaoOperadoras.CHAVE_VERSAO, b'').decode() != DimensaoOperadoras.VERSAO_SCHEMA:
+            return None
+        return metadados.get(DimensaoOperadoras.CHAVE_FINGERPRINT, b'').decode() or None
+
+    @staticmethod
+    def carregar(caminho: str) -> pd.DataFrame:
+        """Lê a dimensão via memory map.
+
+        Textos nulos voltam como NaN, como no read_csv.
+
+        Raises:
+            ImportError: pyarrow não instalado
+            ValueError: versão de schema diferente de VERSAO_SCHEMA
+        """
+        import pyarrow as pa
+
+        with pa.memory_map(caminho, 'r') as fonte:
+            tabela = pa.ipc.open_file(fonte).read_all()
+
+        metadados = tabela.schema.metadata or {}
+        versao = metadados.get(DimensaoOperadoras.CHAVE_VERSAO, b'').decode()
+        if versao != DimensaoOperadoras.VERSAO_SCHEMA:
+            raise ValueError(
+                f"versão de schema {versao or '(ausente)'} não suportada "
+                f"(esperada {DimensaoOperadoras.VERSAO_SCHEMA})"
+            )
+
+        df = tabela.to_pandas()
+        for coluna in df.columns:
+            if df[coluna].dtype == object and coluna not in DimensaoOperadoras.COLUNAS_COM_NONE:
+                df[coluna] = df[coluna].where(df[coluna].notna(), np.nan)
+        return df
@@ -4,16 +4,20 @@ Contém toda a lógica de negócio relacionada a geração
 de arquivos consolidados e relatórios.
 """
 
+import multiprocessing
 import os
+import tempfile
+import threading
+import numpy as np
 import pandas as pd
-import zipfile
-import hashlib
-import json
-from typing import Dict
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from pathlib import Path
+from typing import Dict, Optional
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 
+from infraestrutura.cache_disco import CacheDisco
 from infraestrutura.logger import get_logger
+from domain.entidades import PoliticaCompressao
+from domain.servicos.conversor_numero_br import ConversorNumeroBR
+from domain.servicos.compactador_zip import CompactadorZIP
 
 logger = get_logger('GeradorConsolidados')
 
@@ -21,31 +25,54 @@ logger = get_logger('GeradorConsolidados')
 class GeradorConsolidados:
     """Lógica de negócio para gerar consolidados e relatórios."""
     
-    # Cache para armazenar hashes de DataFrames já processados
-    CACHE_DIR = Path(os.path.expanduser("~/.cache/teste_jessica"))
+    # Cache dos CSVs gerados (chave: hash do DataFrame + parâmetros), criado no primeiro uso
+    _cache: Optional[CacheDisco] = None
+    _lock_cache = threading.Lock()
+    
+    # Modos de execução de gerar_multiplos_consolidados_paralelo
+    MODOS_PARALELISMO = ('threads', 'processos')
     
     @staticmethod
-    def _calcular_hash_dataframe(df: pd.DataFrame) -> str:
-        """Calcula hash MD5 do DataFrame para cache."""
-        df_str = pd.util.hash_pandas_object(df, index=True).values.tobytes()
-        return hashlib.md5(df_str).hexdigest()
+    def contexto_processos():
+        """Contexto dos pools de processos do estágio: forkserver (ou spawn), nunca fork.
+        
+        Um fork com outras threads ativas (downloads, extração, logging) pode
+        herdar locks presos e travar o filho; com forkserver/spawn o filho parte
+        de um processo limpo e recebe o estado só pelos argumentos/initializer.
+        """
+        metodos = multiprocessing.get_all_start_methods()
+        return multiprocessing.get_context('forkserver' if 'forkserver' in metodos else 'spawn')
     
     @staticmethod
-    def _obter_cache_consolidado(nome_arquivo: str, df_hash: str) -> str | None:
-        """Verifica se há cache válido para este DataFrame."""
-        cache_file = GeradorConsolidados.CACHE_DIR / f"{nome_arquivo}_{df_hash}.json"
-        if cache_file.exists():
-            logger.debug(f"Cache encontrado para {nome_arquivo}")
-            return str(cache_file)
-        return None
+    def cache() -> CacheDisco:
+        """Cache dos CSVs gerados; o diretório só é criado na primeira gravação."""
+        with GeradorConsolidados._lock_cache:
+            if GeradorConsolidados._cache is None:
+                GeradorConsolidados._cache = CacheDisco()
+            return GeradorConsolidados._cache
     
     @staticmethod
-    def _salvar_cache_consolidado(nome_arquivo: str, df_hash: str, caminho_saida: str) -> None:
-        """Salva informação de cache após gerar consolidado."""
-        GeradorConsolidados.CACHE_DIR.mkdir(parents=True, exist_ok=True)
-        cache_file = GeradorConsolidados.CACHE_DIR / f"{nome_arquivo}_{df_hash}.json"
-        with open(cache_file, 'w') as f:
-            json.dump({"caminho": caminho_saida, "timestamp": os.path.getmtime(caminho_saida)}, f)
+    def _chave_cache(
+        caminho_saida: str,
+        df: pd.DataFrame,
+        aplicar_formatacao_br: bool,
+        aplicar_ordenacao: bool
+    ) -> str:
+        """Chave do CSV no cache: nome + hash do conteúdo do DataFrame + parâmetros."""
+        return CacheDisco.chave(
+            os.path.basename(caminho_saida),
+            CacheDisco.fingerprint_dataframe(df),
+            aplicar_formatacao_br,
+            aplicar_ordenacao
+        )
+    
+    @staticmethod
+    def _gravar_no_cache(chave_cache: str, caminho_saida: str) -> None:
+        """Guarda o CSV gerado no cache (falhas do cache não afetam a geração)."""
+        try:
+            GeradorConsolidados.cache().gravar(chave_cache, caminho_saida)
+        except OSError as e:
+            logger.warning(f"Não foi possível gravar {os.path.basename(caminho_saida)} no cache: {e}")
     
     @staticmethod
     def normalizar_para_br(df: pd.DataFrame) -> pd.DataFrame:
@@ -54,10 +81,7 @@ class GeradorConsolidados:
         
         for col in df_br.columns:
             if df_br[col].dtype in ['float64', 'float32']:
-                df_br[col] = df_br[col].apply(
-                    lambda x: f"{x:,.2f}".replace(',', '#').replace('.', ',').replace('#', '.')
-                    if pd.notna(x) else x
-                )
+                df_br[col] = ConversorNumeroBR.formatar_serie(df_br[col], valor_nulo=np.nan)
         
         return df_br
     
@@ -84,7 +108,8 @@ class GeradorConsolidados:
         """Gera um CSV consolidado com formatação, ordenação e cache opcional.
         
         Escreve em chunks para reduzir uso de memória durante serialização.
-        A opção usar_cache permite pular regeneração de consolidados já processados.
+        A opção usar_cache permite pular regeneração de consolidados já processados:
+        em um acerto o CSV é copiado do cache para caminho_saida.
         
         Args:
             df: DataFrame a processar
@@ -97,10 +122,13 @@ class GeradorConsolidados:
         try:
             # Verificar cache
             nome_arquivo = os.path.basename(caminho_saida)
+            chave_cache = None
             if usar_cache:
-                df_hash = GeradorConsolidados._calcular_hash_dataframe(df)
-                cache_path = GeradorConsolidados._obter_cache_consolidado(nome_arquivo, df_hash)
-                if cache_path:
+                chave_cache = GeradorConsolidados._chave_cache(
+                    caminho_saida, df, aplicar_formatacao_br, aplicar_ordenacao
+                )
+                os.makedirs(os.path.dirname(caminho_saida), exist_ok=True)
+                if GeradorConsolidados.cache().restaurar(chave_cache, caminho_saida):
                     logger.info(f"Usando cache para {nome_arquivo} (pulando regeneração)")
                     return True
             
@@ -129,9 +157,8 @@ class GeradorConsolidados:
                     )
             
             # Salvar cache
-            if usar_cache:
-                df_hash = GeradorConsolidados._calcular_hash_dataframe(df)
-                GeradorConsolidados._salvar_cache_consolidado(nome_arquivo, df_hash, caminho_saida)
+            if chave_cache:
+                GeradorConsolidados._gravar_no_cache(chave_cache, caminho_saida)
             
             logger.info(f"CSV consolidado gerado em {num_chunks} chunks: {caminho_saida}")
             return True
@@ -144,7 +171,8 @@ class GeradorConsolidados:
     def criar_zip_consolidado(
         arquivos: Dict[str, str],
         caminho_zip: str,
-        arquivos_logs: Dict[str, str] = None
+        arquivos_logs: Dict[str, str] = None,
+        politica: PoliticaCompressao = None
     ) -> bool:
         """Cria um arquivo ZIP com múltiplos CSVs e logs opcionais.
         
@@ -152,23 +180,24 @@ class GeradorConsolidados:
             arquivos: Dict com {nome_no_zip: caminho_arquivo}
             caminho_zip: Caminho onde o ZIP será salvo
             arquivos_logs: Dict opcional com {nome_no_zip: caminho_log}
+            politica: Compressão do ZIP (padrão: ZIP_DEFLATED, membros em paralelo)
         """
         try:
             os.makedirs(os.path.dirname(caminho_zip), exist_ok=True)
             
-            with zipfile.ZipFile(caminho_zip, 'w', zipfile.ZIP_DEFLATED) as zipf:
-                # Adicionar CSVs
-                for nome, caminho in arquivos.items():
-                    if os.path.exists(caminho):
-                        zipf.write(caminho, nome)
-                        logger.debug(f"Arquivo adicionado ao ZIP: {nome}")
-                
-                # Adicionar logs se fornecidos
-                if arquivos_logs:
-                    for nome, caminho in arquivos_logs.items():
-                        if os.path.exists(caminho):
-                            zipf.write(caminho, f"logs/{nome}")
-                            logger.debug(f"Log adicionado ao ZIP: logs/{nome}")
+            # Adicionar CSVs
+            membros = [(nome, caminho) for nome, caminho in arquivos.items() if os.path.exists(caminho)]
+            
+            # Adicionar logs se fornecidos
+            if arquivos_logs:
+                membros.extend(
+                    (f"logs/{nome}", caminho)
+                    for nome, caminho in arquivos_logs.items()
+                    if os.path.exists(caminho)
+                )
+            
+            CompactadorZIP.criar_zip(caminho_zip, membros, politica)
+            logger.debug(f"Arquivos adicionados ao ZIP: {[nome for nome, _ in membros]}")
             
             logger.info(f"ZIP consolidado criado: {caminho_zip}")
             return True
@@ -203,21 +232,39 @@ class GeradorConsolidados:
         aplicar_formatacao_br: bool = True,
         aplicar_ordenacao: bool = True,
         usar_cache: bool = True,
-        max_workers: int = 3
+        max_workers: int = 3,
+        modo: str = 'threads'
     ) -> Dict[str, bool]:
         """Gera múltiplos consolidados em paralelo para melhor performance.
         
+        Ordenação, formatação e to_csv seguram o GIL: com vários consolidados
+        grandes o modo 'processos' escala com os núcleos, ao custo de gravar
+        cada DataFrame uma vez em Arrow IPC (ver _gerar_em_processos).
+        
         Args:
             consolidados: Dict com {nome_arquivo: DataFrame}
             diretorio_saida: Diretório onde salvar
             aplicar_formatacao_br: Aplicar formatação brasileira
             aplicar_ordenacao: Aplicar ordenação padrão
             usar_cache: Usar cache para pular regenerações
-            max_workers: Máximo de threads paralelas (padrão 3)
+            max_workers: Máximo de threads/processos paralelos (padrão 3)
+            modo: 'threads' (padrão) ou 'processos' (requer pyarrow; sem ele usa threads)
         
         Returns:
             Dict com {nome_arquivo: sucesso_bool}
         """
+        if modo not in GeradorConsolidados.MODOS_PARALELISMO:
+            raise ValueError(
+                f"Modo de paralelismo inválido: {modo} (use {', '.join(GeradorConsolidados.MODOS_PARALELISMO)})"
+            )
+        
+        if modo == 'processos':
+            try:
+                import pyarrow  # noqa: F401
+            except ImportError as e:
+                logger.warning(f"Modo processos indisponível ({e}); usando threads")
+                modo = 'threads'
+        
         resultados = {}
         os.makedirs(diretorio_saida, exist_ok=True)
         
@@ -233,21 +280,139 @@ class GeradorConsolidados:
             )
         
         try:
-            with ThreadPoolExecutor(max_workers=max_workers) as executor:
-                futures = {
-                    executor.submit(gerar_consolidado, (nome, df)): nome 
-                    for nome, df in consolidados.items()
-                }
-                
-                for future in as_completed(futures):
-                    nome, sucesso = future.result()
-                    resultados[nome] = sucesso
-                    status = "[OK]" if sucesso else "[ERRO]"
-                    logger.info(f"{status} Consolidado '{nome}' processado")
+            if modo == 'processos':
+                resultados = GeradorConsolidados._gerar_em_processos(
+                    consolidados,
+                    diretorio_saida,
+                    aplicar_formatacao_br,
+                    aplicar_ordenacao,
+                    usar_cache,
+                    max_workers
+                )
+            else:
+                with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                    futures = {
+                        executor.submit(gerar_consolidado, (nome, df)): nome 
+                        for nome, df in consolidados.items()
+                    }
+                    
+                    for future in as_completed(futures):
+                        nome, sucesso = future.result()
+                        resultados[nome] = sucesso
+                        status = "[OK]" if sucesso else "[ERRO]"
+                        logger.info(f"{status} Consolidado '{nome}' processado")
             
-            logger.info(f"Todos os {len(resultados)} consolidados processados (paralelo)")
+            logger.info(f"Todos os {len(resultados)} consolidados processados (paralelo, {modo})")
+            if usar_cache:
+                logger.info(f"Cache de consolidados: {GeradorConsolidados.cache().estatisticas()}")
             return resultados
             
         except Exception as e:
             logger.error(f"Erro ao gerar consolidados em paralelo: {e}")
             return {nome: False for nome in consolidados.keys()}
+    
+    @staticmethod
+    def _gerar_em_processos(
+        consolidados: Dict[str, pd.DataFrame],
+        diretorio_saida: str,
+        aplicar_formatacao_br: bool,
+        aplicar_ordenacao: bool,
+        usar_cache: bool,
+        max_workers: int
+    ) -> Dict[str, bool]:
+        """Gera os consolidados em um pool de processos.
+        
+        Cada DataFrame é gravado uma única vez em um arquivo Arrow IPC temporário,
+        que o worker abre com memory map (o DataFrame não passa por pickle). O
+        cache é consultado antes de gravar o IPC e preenchido aqui, no processo
+        principal. DataFrames que o Arrow não converte (ex: coluna object com
+        tipos misturados) são gerados no próprio processo.
+        """
+        import pyarrow as pa
+        
+        resultados = {}
+        chaves_cache = {}
+        
+        def concluir(nome: str, caminho_saida: str, sucesso: bool) -> None:
+            if sucesso and nome in chaves_cache:
+                GeradorConsolidados._gravar_no_cache(chaves_cache[nome], caminho_saida)
+            resultados[nome] = sucesso
+            status = "[OK]" if sucesso else "[ERRO]"
+            logger.info(f"{status} Consolidado '{nome}' processado")
+        
+        with tempfile.TemporaryDirectory(prefix='consolidados_ipc_') as diretorio_ipc:
+            with ProcessPoolExecutor(
+                max_workers=max_workers,
+                mp_context=GeradorConsolidados.contexto_processos()
+            ) as executor:
+                futures = {}
+                for indice, (nome, df) in enumerate(consolidados.items()):
+                    caminho_saida = os.path.join(diretorio_saida, f"{nome}.csv")
+                    if usar_cache:
+                        chaves_cache[nome] = GeradorConsolidados._chave_cache(
+                            caminho_saida, df, aplicar_formatacao_br, aplicar_ordenacao
+                        )
+                        if GeradorConsolidados.cache().restaurar(chaves_cache[nome], caminho_saida):
+                            logger.info(f"Usando cache para {nome}.csv (pulando regeneração)")
+                            resultados[nome] = True
+                            continue
+                    
+                    try:
+                        tabela = pa.Table.from_pandas(df, preserve_index=False)
+                    except (pa.ArrowInvalid, pa.ArrowTypeError) as e:
+                        logger.debug(f"'{nome}' não convertido para Arrow ({e}); gerando no processo principal")
+                        concluir(nome, caminho_saida, GeradorConsolidados.gerar_csv_consolidado(
+                            df,
+                            caminho_saida,
+                            aplicar_formatacao_br=aplicar_formatacao_br,
+                            aplicar_ordenacao=aplicar_ordenacao,
+                            usar_cache=False
+                        ))
+                        continue
+                    
+                    # Os workers começam enquanto os próximos DataFrames são gravados
+                    caminho_ipc = os.path.join(diretorio_ipc, f"{indice}.arrow")
+                    with pa.OSFile(caminho_ipc, 'wb') as sink:
+                        with pa.ipc.new_file(sink, tabela.schema) as escritor:
+                            escritor.write_table(tabela)
+                    del tabela
+                    
+                    futuro = executor.submit(
+                        _gerar_consolidado_worker,
+                        caminho_ipc,
+                        caminho_saida,
+                        aplicar_formatacao_br,
+                        aplicar_ordenacao
+                    )
+                    futures[futuro] = (nome, caminho_saida)
+                
+                for future in as_completed(futures):
+                    nome, caminho_saida = futures[future]
+                    concluir(nome, caminho_saida, future.result())
+        
+        return resultados
+
+
+def _gerar_consolidado_worker(
+    caminho_ipc: str,
+    caminho_saida: str,
+    aplicar_formatacao_br: bool,
+    aplicar_ordenacao: bool
+) -> bool:
+    """Lê o DataFrame do arquivo Arrow IPC (memory map) e gera o CSV no processo do pool."""
+    import pyarrow as pa
+    
+    try:
+        with pa.memory_map(caminho_ipc, 'r') as fonte:
+            df = pa.ipc.open_file(fonte).read_pandas()
+    except Exception as e:
+        logger.error(f"Erro ao ler DataFrame do consolidado ({caminho_ipc}): {e}")
+        return False
+    
+    return GeradorConsolidados.gerar_csv_consolidado(
+        df,
+        caminho_saida,
+        aplicar_formatacao_br=aplicar_formatacao_br,
+        aplicar_ordenacao=aplicar_ordenacao,
+        usar_cache=False
+    )
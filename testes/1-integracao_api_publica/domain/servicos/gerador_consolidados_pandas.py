@@ -6,19 +6,29 @@ Responsável por:
 3. Carregar despesas/sinistros dos CSVs extraídos
 4. Fazer JOIN pandas entre despesas e operadoras
 5. Consolidar todos os trimestres
-6. Gerar arquivos finais (com/sem deduções) + ZIP
+6. Gerar arquivos finais (com/sem deduções) direto no ZIP
+7. Gravar o handoff tipado (Parquet) lido pelo estágio 2
 
 SEM uso de banco de dados - tudo em memória com pandas.
 """
 
+import io
 import os
-import zipfile
 import pandas as pd
-from typing import Dict
+from collections import deque
+from typing import BinaryIO, Dict, Iterable, Iterator, Tuple
 from datetime import datetime
+from functools import partial
+from concurrent.futures import ProcessPoolExecutor
 
 from infraestrutura.logger import get_logger
-from domain.servicos import ProcessadorDemonstracoes
+from infraestrutura.perfil_memoria import PerfilMemoria
+from infraestrutura.rastreador import Rastreador, rastrear, trecho
+from domain.entidades import PoliticaCompressao
+from domain.servicos import (
+    ProcessadorDemonstracoes, ConversorNumeroBR, CompactadorZIP, IntercambioParquet, ParticoesConsolidado,
+    DimensaoOperadoras, GeradorConsolidados
+)
 
 logger = get_logger("GeradorConsolidadosPandas")
 
@@ -26,11 +36,29 @@ logger = get_logger("GeradorConsolidadosPandas")
 class GeradorConsolidadosPandas:
     """Gera arquivos consolidados usando pandas JOIN (sem banco de dados)."""
     
+    # Colunas repetidas de baixa cardinalidade mantidas como category (dictionary-encoded)
+    # do JOIN até a escrita do CSV
+    COLUNAS_DIMENSAO_OPERADORAS = ['cnpj', 'razao_social', 'modalidade', 'uf']
+    TRIMESTRE_DTYPE = pd.CategoricalDtype(['1T', '2T', '3T', '4T'])
+    
+    # Linhas formatadas/codificadas por vez ao gravar os CSVs dentro do ZIP
+    TAMANHO_CHUNK_CSV = 50000
+    
+    # Partições por trimestre da consolidação incremental (dentro de diretorio_destino)
+    DIRETORIO_PARTICOES = 'particoes'
+    # Marca, no detalhe de uma partição, as deduções que dependem da partição anterior
+    COLUNA_DEDUCAO_INICIAL = '_deducao_inicial'
+    
     def gerar_consolidados_com_join(
         self, 
         diretorio_origem: str,
         diretorio_destino: str,
-        arquivo_log: str = None
+        arquivo_log: str = None,
+        max_workers: int = None,
+        politica: PoliticaCompressao = None,
+        incremental: bool = True,
+        operadoras_df: pd.DataFrame = None,
+        processados: Dict[str, pd.DataFrame] = None
     ) -> Dict:
         """Gera consolidados com JOIN pandas entre despesas e operadoras.
         
@@ -38,6 +66,15 @@ class GeradorConsolidadosPandas:
             diretorio_origem: Diretório com arquivos extraídos
             diretorio_destino: Diretório para salvar consolidados
             arquivo_log: Caminho do arquivo de log da sessão
+            max_workers: Processos para leitura+JOIN dos trimestres
+                         (padrão: um por trimestre, limitado a os.cpu_count())
+            politica: Compressão do ZIP de saída (padrão: ZIP_DEFLATED)
+            incremental: Reaproveitar as partições por trimestre em diretorio_destino/particoes
+                         e reprocessar só os trimestres cujas entradas mudaram
+            operadoras_df: Dimensão já carregada por carregar_dimensao_operadoras
+                           (padrão: carregar de diretorio_origem)
+            processados: Trimestres já lidos+JOIN pelo pipeline ({csv: DataFrame}),
+                         não reprocessados aqui
             
         Returns:
             Dict com resultado:
@@ -48,8 +85,10 @@ class GeradorConsolidadosPandas:
                 - arquivos_gerados: List[str]
         """
         try:
-            # 1. Carregar operadoras (ativas + canceladas)
-            operadoras_df = self._carregar_operadoras_dataframe(diretorio_origem)
+            # 1. Carregar operadoras (ativas + canceladas), codificadas uma única vez:
+            #    todos os trimestres compartilham as mesmas categorias
+            if operadoras_df is None:
+                operadoras_df = self.carregar_dimensao_operadoras(diretorio_origem)
             if operadoras_df is None or operadoras_df.empty:
                 return {
                     "sucesso": False,
@@ -64,7 +103,6 @@ class GeradorConsolidadosPandas:
             
             # 2. Carregar todos os CSVs de trimestres
             arquivos_intermediarios = []
-            todos_dados = []
             
             # Buscar todos os CSVs extraídos dos ZIPs
             csvs_encontrados = self._listar_csvs_extraidos(diretorio_origem)
@@ -81,21 +119,26 @@ class GeradorConsolidadosPandas:
             
             print(f"    [OK] {len(csvs_encontrados)} CSVs encontrados")
             
-            # Processar cada CSV de trimestre e fazer JOIN
-            for csv_path in csvs_encontrados:
-                nome_csv = os.path.basename(csv_path)
-                print(f"    Processando {nome_csv}...")
-                
-                despesas = self._carregar_despesas_do_caminho(csv_path)
-                if despesas is None or despesas.empty:
-                    print(f"      ⚠ Erro ao carregar {nome_csv}")
-                    continue
-                
-                # Fazer JOIN
-                resultado_join = self._fazer_join(despesas, operadoras_df)
-                todos_dados.append(resultado_join)
+            # Trimestres já processados pelo pipeline, casados pelo caminho absoluto
+            if processados:
+                por_caminho = {os.path.abspath(csv): df for csv, df in processados.items()}
+                processados = {
+                    csv: por_caminho[os.path.abspath(csv)]
+                    for csv in csvs_encontrados
+                    if os.path.abspath(csv) in por_caminho
+                }
             
-            if not todos_dados:
+            # Processar cada CSV de trimestre e fazer JOIN (um processo por trimestre);
+            # no modo incremental, só os trimestres cujas entradas mudaram
+            with trecho("Consolidar trimestres", incremental=incremental):
+                if incremental:
+                    consolidado = self._consolidar_incremental(
+                        csvs_encontrados, operadoras_df, diretorio_destino, max_workers, processados
+                    )
+                else:
+                    consolidado = self._consolidar_completo(csvs_encontrados, operadoras_df, max_workers, processados)
+            
+            if consolidado is None:
                 return {
                     "sucesso": False,
                     "erro": "Nenhum dado processado com sucesso",
@@ -105,82 +148,43 @@ class GeradorConsolidadosPandas:
                     "arquivos_gerados": []
                 }
             
-            # 3. Consolidar todos os trimestres em um único DataFrame
-            print("\n    Consolidando todos os trimestres...")
-            df_consolidado = pd.concat(todos_dados, ignore_index=True)
-            
-            total = len(df_consolidado)
-            com_operadora = (df_consolidado['RAZAO_SOCIAL'] != 'N/L').sum()
+            df_sinistros_formatado, df_sinistros_sem_deducoes_formatado, total, com_operadora = consolidado
             sem_operadora = total - com_operadora
             
-            print(f"    [OK] {total:,} registros consolidados ({com_operadora:,} com operadora)")
-            
-            # 4. Aplicar lógica de negócio do ProcessadorDemonstracoes
-            print("\n    Gerando arquivos finais...")
-            
-            # Normalizar nomes de colunas para o formato esperado pelo ProcessadorDemonstracoes
-            df_normalizado = self._normalizar_colunas_para_processador(df_consolidado)
-            
-            # 4.1. Sinistros COM deduções
-            print("      - Filtrando sinistros com deduções...")
-            df_sinistros_com_deducoes = ProcessadorDemonstracoes.filtrar_sinistros_com_deducoes(df_normalizado)
-            df_sinistros_com_deducoes = ProcessadorDemonstracoes.remover_valores_zero(df_sinistros_com_deducoes)
-            df_sinistros_formatado = ProcessadorDemonstracoes.preparar_csv_sinistros_com_deducoes(df_sinistros_com_deducoes)
-            
-            # 4.2. Sinistros SEM deduções (agregado)
-            print("      - Filtrando sinistros sem deduções...")
-            df_sinistros_sem_deducoes = ProcessadorDemonstracoes.filtrar_sinistros_sem_deducoes(df_normalizado)
-            df_sinistros_sem_deducoes = ProcessadorDemonstracoes.remover_valores_zero(df_sinistros_sem_deducoes)
-            
-            print("      - Agregando sinistros...")
-            colunas_agrupamento = ['reg_ans', 'cnpj', 'razao_social_operadora', 'trimestre', 'ano']
-            df_sinistros_agregado = ProcessadorDemonstracoes.agregar_sinistros_sem_deducoes(
-                df_sinistros_sem_deducoes, 
-                colunas_agrupamento
-            )
-            df_sinistros_sem_deducoes_formatado = ProcessadorDemonstracoes.preparar_csv_sinistros_sem_deducoes(df_sinistros_agregado)
-            
-            # 5. Salvar arquivos CSV
-            arquivo_com_deducoes = os.path.join(diretorio_destino, 'consolidado_despesas_sinistros_c_deducoes.csv')
-            arquivo_sem_deducoes = os.path.join(diretorio_destino, 'sinistro_sem_deducoes.csv')
-            
-            # Formatar valores numéricos para formato brasileiro antes de salvar
-            df_sinistros_formatado_br = self._formatar_valores_brasileiros(df_sinistros_formatado)
-            df_sinistros_sem_deducoes_formatado_br = self._formatar_valores_brasileiros(df_sinistros_sem_deducoes_formatado)
-            
-            df_sinistros_formatado_br.to_csv(arquivo_com_deducoes, sep=';', index=False, encoding='utf-8-sig')
-            print(f"      [OK] {os.path.basename(arquivo_com_deducoes)} ({len(df_sinistros_formatado):,} registros)")
-            
-            df_sinistros_sem_deducoes_formatado_br.to_csv(arquivo_sem_deducoes, sep=';', index=False, encoding='utf-8-sig')
-            print(f"      [OK] {os.path.basename(arquivo_sem_deducoes)} ({len(df_sinistros_sem_deducoes_formatado):,} registros)")
-            
-            # 6. Gerar ZIP com os 2 arquivos + log
+            # 5. Gravar os CSVs no ZIP (em chunks, comprimidos em paralelo) + log
             print("\n    Gerando arquivo ZIP...")
             arquivo_zip = os.path.join(diretorio_destino, 'consolidado_despesas.zip')
             
-            with zipfile.ZipFile(arquivo_zip, 'w', zipfile.ZIP_DEFLATED) as zipf:
-                zipf.write(arquivo_com_deducoes, os.path.basename(arquivo_com_deducoes))
-                zipf.write(arquivo_sem_deducoes, os.path.basename(arquivo_sem_deducoes))
-                
-                # Adicionar log se existir
-                if arquivo_log and os.path.exists(arquivo_log):
-                    zipf.write(arquivo_log, os.path.basename(arquivo_log))
+            membros = [
+                ('consolidado_despesas_sinistros_c_deducoes.csv', partial(self._escrever_csv, df=df_sinistros_formatado)),
+                ('sinistro_sem_deducoes.csv', partial(self._escrever_csv, df=df_sinistros_sem_deducoes_formatado)),
+            ]
+            # Adicionar log se existir
+            if arquivo_log and os.path.exists(arquivo_log):
+                membros.append((os.path.basename(arquivo_log), arquivo_log))
+            
+            # Resumo de memória antes do ZIP, para entrar no log da sessão gravado nele
+            PerfilMemoria.registrar_resumo()
+            with trecho("Gravar ZIP"):
+                CompactadorZIP.criar_zip(arquivo_zip, membros, politica)
+            print(f"      [OK] consolidado_despesas_sinistros_c_deducoes.csv ({len(df_sinistros_formatado):,} registros)")
+            print(f"      [OK] sinistro_sem_deducoes.csv ({len(df_sinistros_sem_deducoes_formatado):,} registros)")
             
             print(f"    [OK] {os.path.basename(arquivo_zip)}")
             
-            # 7. Remover CSVs individuais (manter apenas ZIP)
-            try:
-                os.remove(arquivo_com_deducoes)
-                os.remove(arquivo_sem_deducoes)
-            except Exception as e:
-                logger.warning(f"Falha ao remover CSVs temporários: {e}")
+            # 6. Handoff tipado (Parquet) para o estágio 2, depois do ZIP (nunca mais antigo que ele)
+            with trecho("Gravar handoff Parquet"):
+                arquivos_handoff = self._salvar_handoff(diretorio_destino, {
+                    'consolidado_despesas_sinistros_c_deducoes.csv': df_sinistros_formatado,
+                    'sinistro_sem_deducoes.csv': df_sinistros_sem_deducoes_formatado,
+                })
             
             return {
                 "sucesso": True,
                 "total_registros": total,
                 "com_operadora": com_operadora,
                 "sem_operadora": sem_operadora,
-                "arquivos_gerados": [arquivo_zip],
+                "arquivos_gerados": [arquivo_zip] + arquivos_handoff,
                 "registros_com_deducoes": len(df_sinistros_formatado),
                 "registros_sem_deducoes": len(df_sinistros_sem_deducoes_formatado)
             }
@@ -196,6 +200,336 @@ class GeradorConsolidadosPandas:
                 "arquivos_gerados": []
             }
     
+    def _consolidar_completo(
+        self,
+        csvs_encontrados: list,
+        operadoras_df: pd.DataFrame,
+        max_workers: int = None,
+        processados: Dict[str, pd.DataFrame] = None
+    ):
+        """Consolida todos os trimestres de uma vez (sem partições).
+        
+        Args:
+            csvs_encontrados: Caminhos dos CSVs de trimestres
+            operadoras_df: DataFrame com operadoras (dimensão já codificada)
+            max_workers: Número máximo de processos
+            processados: Trimestres já lidos+JOIN ({csv: DataFrame}), não reprocessados
+            
+        Returns:
+            Tupla (df com deduções, df sem deduções agregado, total, com_operadora) ou None
+        """
+        processados = dict(processados or {})
+        faltantes = [csv for csv in csvs_encontrados if csv not in processados]
+        processados.update(self._processar_trimestres(faltantes, operadoras_df, max_workers))
+        todos_dados = [processados[csv] for csv in csvs_encontrados if csv in processados]
+        
+        if not todos_dados:
+            return None
+        
+        # 3. Consolidar todos os trimestres em um único DataFrame
+        print("\n    Consolidando todos os trimestres...")
+        df_consolidado = pd.concat(todos_dados, ignore_index=True)
+        
+        total = len(df_consolidado)
+        com_operadora = (df_consolidado['RAZAO_SOCIAL'] != 'N/L').sum()
+        
+        print(f"    [OK] {total:,} registros consolidados ({com_operadora:,} com operadora)")
+        
+        # 4. Aplicar lógica de negócio do ProcessadorDemonstracoes
+        print("\n    Gerando arquivos finais...")
+        
+        # Normalizar nomes de colunas para o formato esperado pelo ProcessadorDemonstracoes
+        df_normalizado = self._normalizar_colunas_para_processador(df_consolidado)
+        
+        # 4.1. Sinistros COM deduções
+        print("      - Filtrando sinistros com deduções...")
+        df_sinistros_com_deducoes = ProcessadorDemonstracoes.filtrar_sinistros_com_deducoes(df_normalizado)
+        df_sinistros_com_deducoes = ProcessadorDemonstracoes.remover_valores_zero(df_sinistros_com_deducoes)
+        df_sinistros_formatado = ProcessadorDemonstracoes.preparar_csv_sinistros_com_deducoes(df_sinistros_com_deducoes)
+        
+        # 4.2. Sinistros SEM deduções (agregado)
+        print("      - Filtrando sinistros sem deduções...")
+        df_sinistros_sem_deducoes = ProcessadorDemonstracoes.filtrar_sinistros_sem_deducoes(df_normalizado)
+        df_sinistros_sem_deducoes = ProcessadorDemonstracoes.remover_valores_zero(df_sinistros_sem_deducoes)
+        
+        print("      - Agregando sinistros...")
+        colunas_agrupamento = ['reg_ans', 'cnpj', 'razao_social_operadora', 'trimestre', 'ano']
+        df_sinistros_agregado = ProcessadorDemonstracoes.agregar_sinistros_sem_deducoes(
+            df_sinistros_sem_deducoes, 
+            colunas_agrupamento
+        )
+        df_sinistros_sem_deducoes_formatado = ProcessadorDemonstracoes.preparar_csv_sinistros_sem_deducoes(df_sinistros_agregado)
+        
+        return df_sinistros_formatado, df_sinistros_sem_deducoes_formatado, total, com_operadora
+    
+    def _consolidar_incremental(
+        self,
+        csvs_encontrados: list,
+        operadoras_df: pd.DataFrame,
+        diretorio_destino: str,
+        max_workers: int = None,
+        processados: Dict[str, pd.DataFrame] = None
+    ):
+        """Consolida reaproveitando as partições por trimestre de execuções anteriores.
+        
+        Reprocessa (leitura + JOIN + filtros + agregação) só os trimestres cujo CSV
+        mudou, ou todos se o cadastro de operadoras mudou, e monta as saídas
+        concatenando as partições. Se os períodos dos trimestres se sobrepõem, a
+        concatenação não reproduz a ordenação global e tudo é consolidado de uma vez.
+        Trimestres em processados (já lidos+JOIN) não são lidos de novo.
+        
+        Returns:
+            Tupla (df com deduções, df sem deduções agregado, total, com_operadora) ou None
+        """
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError as e:
+            logger.warning(f"Partições indisponíveis ({e}); consolidando todos os trimestres")
+            return self._consolidar_completo(csvs_encontrados, operadoras_df, max_workers, processados)
+        
+        particoes = ParticoesConsolidado(os.path.join(diretorio_destino, self.DIRETORIO_PARTICOES))
+        particoes.validar_cadastro(ParticoesConsolidado.fingerprint_dataframe(operadoras_df))
+        dtypes_categoricos = self._dtypes_categoricos_saida(operadoras_df)
+        
+        nomes = {csv: os.path.basename(csv) for csv in csvs_encontrados}
+        fingerprints = {csv: ParticoesConsolidado.fingerprint_arquivo(csv) for csv in csvs_encontrados}
+        pendentes = [
+            csv for csv in csvs_encontrados
+            if not particoes.esta_atualizada(nomes[csv], fingerprints[csv])
+        ]
+        print(
+            f"    [OK] {len(csvs_encontrados) - len(pendentes)} trimestres reaproveitados das partições, "
+            f"{len(pendentes)} a processar"
+        )
+        
+        ja_processados = processados or {}
+        processados = {csv: ja_processados[csv] for csv in pendentes if csv in ja_processados}
+        processados.update(self._processar_trimestres(
+            [csv for csv in pendentes if csv not in processados], operadoras_df, max_workers
+        ))
+        tabelas_em_memoria = {}
+        for csv, df in processados.items():
+            tabelas, metadados = self._montar_particao(df)
+            particoes.salvar(nomes[csv], fingerprints[csv], tabelas, metadados, dtypes_categoricos)
+            tabelas_em_memoria[nomes[csv]] = tabelas
+        particoes.remover_ausentes(list(nomes.values()))
+        
+        # Trimestres que falharam agora ficam de fora, como na consolidação completa
+        validos = [nomes[csv] for csv in csvs_encontrados if csv in processados or csv not in pendentes]
+        if not validos:
+            return None
+        
+        if not self._particoes_combinaveis([particoes.metadados(nome) for nome in validos]):
+            print("    ⚠ Trimestres com períodos sobrepostos: consolidando todos de uma vez")
+            return self._consolidar_completo(csvs_encontrados, operadoras_df, max_workers, processados)
+        
+        return self._montar_saidas_de_particoes(particoes, validos, tabelas_em_memoria, dtypes_categoricos)
+    
+    def _montar_particao(self, df: pd.DataFrame):
+        """Aplica filtros e agregação a um único trimestre (resultado do JOIN).
+        
+        Returns:
+            Tupla (tabelas, metadados): tabelas 'detalhe' (com deduções, já no formato
+            de saída, com a coluna COLUNA_DEDUCAO_INICIAL) e 'agregado' (sem deduções);
+            metadados com contagens, chaves (ano, trimestre) e continuidade das deduções
+        """
+        total = len(df)
+        com_operadora = int((df['RAZAO_SOCIAL'] != 'N/L').sum())
+        
+        df_normalizado = self._normalizar_colunas_para_processador(df)
+        
+        detalhe, deducao_inicial, termina_em_cadeia, apenas_deducoes = \
+            ProcessadorDemonstracoes.filtrar_sinistros_com_deducoes_particao(df_normalizado)
+        detalhe = ProcessadorDemonstracoes.remover_valores_zero(detalhe)
+        deducao_inicial = deducao_inicial.loc[detalhe.index].to_numpy()
+        detalhe = ProcessadorDemonstracoes.preparar_csv_sinistros_com_deducoes(detalhe)
+        detalhe[self.COLUNA_DEDUCAO_INICIAL] = deducao_inicial
+        
+        sem_deducoes = ProcessadorDemonstracoes.filtrar_sinistros_sem_deducoes(df_normalizado)
+        sem_deducoes = ProcessadorDemonstracoes.remover_valores_zero(sem_deducoes)
+        agregado = ProcessadorDemonstracoes.agregar_sinistros_sem_deducoes(
+            sem_deducoes,
+            ['reg_ans', 'cnpj', 'razao_social_operadora', 'trimestre', 'ano']
+        )
+        agregado = ProcessadorDemonstracoes.preparar_csv_sinistros_sem_deducoes(agregado)
+        
+        periodos = df_normalizado[['ano', 'trimestre']]
+        chaves = periodos.dropna().drop_duplicates()
+        metadados = {
+            'total': total,
+            'com_operadora': com_operadora,
+            'chaves': [[int(ano), str(trimestre)] for ano, trimestre in chaves.itertuples(index=False)],
+            'chaves_nulas': bool(periodos.isna().any(axis=None)),
+            'termina_em_cadeia': bool(termina_em_cadeia),
+            'apenas_deducoes': bool(apenas_deducoes),
+        }
+        return {'detalhe': detalhe, 'agregado': agregado}, metadados
+    
+    def _chave_periodo(self, chave: list) -> tuple:
+        """(ano, trimestre) na mesma ordem usada na ordenação das demonstrações."""
+        ano, trimestre = chave
+        return ano, self.TRIMESTRE_DTYPE.categories.get_loc(trimestre)
+    
+    def _particoes_combinaveis(self, metadados: list) -> bool:
+        """Os períodos de cada partição formam blocos disjuntos na ordenação global?"""
+        intervalos = []
+        for meta in metadados:
+            if meta['chaves_nulas'] or not meta['chaves']:
+                return False
+            chaves = [self._chave_periodo(chave) for chave in meta['chaves']]
+            intervalos.append((min(chaves), max(chaves)))
+        
+        intervalos.sort()
+        return all(anterior[1] < seguinte[0] for anterior, seguinte in zip(intervalos, intervalos[1:]))
+    
+    def _montar_saidas_de_particoes(
+        self,
+        particoes: ParticoesConsolidado,
+        nomes: list,
+        tabelas_em_memoria: Dict[str, Dict[str, pd.DataFrame]],
+        dtypes_categoricos: Dict[str, pd.CategoricalDtype]
+    ):
+        """Concatena as partições na ordem dos períodos.
+        
+        As deduções iniciais de uma partição só entram se a anterior terminar em
+        uma linha selecionada (mesma cadeia da filtragem global).
+        
+        Returns:
+            Tupla (df com deduções, df sem deduções agregado, total, com_operadora)
+        """
+        print("\n    Consolidando partições dos trimestres...")
+        metadados = {nome: particoes.metadados(nome) for nome in nomes}
+        ordem = sorted(
+            nomes,
+            key=lambda nome: min(self._chave_periodo(chave) for chave in metadados[nome]['chaves'])
+        )
+        
+        detalhes, agregados = [], []
+        em_cadeia = False
+        for nome in ordem:
+            tabelas = tabelas_em_memoria.get(nome) or {
+                tipo: particoes.carregar(nome, tipo, dtypes_categoricos) for tipo in ('detalhe', 'agregado')
+            }
+            detalhe = tabelas['detalhe']
+            if not em_cadeia:
+                detalhe = detalhe[~detalhe[self.COLUNA_DEDUCAO_INICIAL]]
+            detalhes.append(detalhe.drop(columns=[self.COLUNA_DEDUCAO_INICIAL]))
+            agregados.append(tabelas['agregado'])
+            
+            meta = metadados[nome]
+            em_cadeia = meta['termina_em_cadeia'] or (em_cadeia and meta['apenas_deducoes'])
+        
+        total = sum(meta['total'] for meta in metadados.values())
+        com_operadora = sum(meta['com_operadora'] for meta in metadados.values())
+        print(f"    [OK] {total:,} registros consolidados ({com_operadora:,} com operadora)")
+        
+        return (
+            pd.concat(detalhes, ignore_index=True),
+            pd.concat(agregados, ignore_index=True),
+            total,
+            com_operadora
+        )
+    
+    def carregar_dimensao_operadoras(self, diretorio: str) -> pd.DataFrame:
+        """Carrega as operadoras (ativas + canceladas) já codificadas como category.
+        
+        Usa a dimensão gravada em <diretorio>/operadoras/operadoras_dimensao.arrow
+        quando os CSVs de origem não mudaram; senão carrega dos CSVs e a regrava
+        (com as colunas derivadas usadas pelo estágio 2).
+        
+        Returns:
+            DataFrame da dimensão ou None se nenhuma operadora foi encontrada
+        """
+        operadoras_df = self._ler_dimensao_gravada(diretorio)
+        if operadoras_df is None:
+            operadoras_df = self._carregar_operadoras_dataframe(diretorio)
+            if operadoras_df is None or operadoras_df.empty:
+                return None
+            self._gravar_dimensao(diretorio, operadoras_df)
+        return self._codificar_dimensao_operadoras(operadoras_df)
+    
+    def _fontes_operadoras(self, diretorio: str) -> list:
+        """CSVs dos quais a dimensão de operadoras é derivada (mesma busca do carregamento)."""
+        fontes = set()
+        for pasta in (os.path.join(diretorio, "arquivos_trimestres", "operadoras"), os.path.join(diretorio, "operadoras")):
+            if os.path.exists(pasta):
+                for raiz, _, arquivos in os.walk(pasta):
+                    fontes.update(
+                        os.path.join(raiz, arquivo) for arquivo in arquivos
+                        if arquivo in ('Relatorio_cadop.csv', 'Relatorio_cadop_canceladas.csv')
+                    )
+                break
+        
+        for base_dir in (os.path.join(diretorio, "operadoras"), os.path.join(diretorio, "downloads", "operadoras"), diretorio):
+            for nome in ("operadoras_ativas.csv", "operadoras_canceladas.csv"):
+                if os.path.exists(os.path.join(base_dir, nome)):
+                    fontes.add(os.path.join(base_dir, nome))
+        return sorted(fontes)
+    
+    def _ler_dimensao_gravada(self, diretorio: str):
+        """Dimensão gravada por uma execução anterior, se os CSVs de origem não mudaram.
+        
+        Returns:
+            Operadoras como _carregar_operadoras_dataframe as devolveria, ou None
+            (arquivo ausente, de outra versão, desatualizado ou pyarrow indisponível)
+        """
+        caminho = DimensaoOperadoras.caminho(diretorio)
+        fontes = self._fontes_operadoras(diretorio)
+        if not fontes or not os.path.exists(caminho):
+            return None
+        
+        try:
+            if DimensaoOperadoras.fingerprint_gravado(caminho) != DimensaoOperadoras.fingerprint_fontes(fontes):
+                return None
+            dimensao = DimensaoOperadoras.carregar(caminho)
+        except (ImportError, OSError, ValueError) as e:
+            logger.debug(f"Dimensão de operadoras gravada não utilizada: {e}")
+            return None
+        
+        logger.info(f"[OK] Dimensão de operadoras reaproveitada: {len(dimensao)} operadoras ({caminho})")
+        return dimensao.drop(columns=DimensaoOperadoras.COLUNAS_DERIVADAS)
+    
+    def _gravar_dimensao(self, diretorio: str, operadoras_df: pd.DataFrame) -> None:
+        """Grava a dimensão com as colunas derivadas para as próximas execuções e estágios."""
+        caminho = DimensaoOperadoras.caminho(diretorio)
+        try:
+            DimensaoOperadoras.salvar(
+                DimensaoOperadoras.construir(operadoras_df),
+                caminho,
+                DimensaoOperadoras.fingerprint_fontes(self._fontes_operadoras(diretorio)),
+                DimensaoOperadoras.fingerprint_fontes(DimensaoOperadoras.csvs_operadoras(diretorio))
+            )
+            logger.debug(f"Dimensão de operadoras gravada em: {caminho}")
+        except Exception as e:
+            logger.warning(f"Não foi possível gravar a dimensão de operadoras: {e}")
+    
+    def trimestre_pendente(self, csv_path: str, operadoras_df: pd.DataFrame, diretorio_destino: str) -> bool:
+        """Indica se o trimestre precisa ser lido+JOIN na consolidação incremental.
+        
+        False só quando a partição do CSV está atualizada (mesmo CSV e mesmo
+        cadastro); não altera as partições em disco.
+        """
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            return True
+        
+        particoes = ParticoesConsolidado(os.path.join(diretorio_destino, self.DIRETORIO_PARTICOES))
+        if not particoes.validar_cadastro(ParticoesConsolidado.fingerprint_dataframe(operadoras_df)):
+            return True
+        return not particoes.esta_atualizada(
+            os.path.basename(csv_path),
+            ParticoesConsolidado.fingerprint_arquivo(csv_path)
+        )
+    
+    def _dtypes_categoricos_saida(self, operadoras_df: pd.DataFrame) -> Dict[str, pd.CategoricalDtype]:
+        """Dtype das colunas category dos CSVs de saída (categorias da dimensão)."""
+        dtypes = {'TRIMESTRE': self.TRIMESTRE_DTYPE}
+        for coluna_saida, coluna in (('CNPJ', 'cnpj'), ('RAZAOSOCIAL', 'razao_social')):
+            if coluna in operadoras_df.columns and isinstance(operadoras_df[coluna].dtype, pd.CategoricalDtype):
+                dtypes[coluna_saida] = operadoras_df[coluna].dtype
+        return dtypes
+    
     def _carregar_operadoras_dataframe(self, diretorio: str) -> pd.DataFrame:
         """Carrega operadoras ativas e canceladas dos CSVs, priorizando ativas.
         
@@ -437,6 +771,7 @@ class GeradorConsolidadosPandas:
         
         return []
     
+    @rastrear()
     def _carregar_despesas_do_caminho(self, caminho: str) -> pd.DataFrame:
         """Carrega CSV de despesas de um caminho específico.
         
@@ -489,6 +824,9 @@ class GeradorConsolidadosPandas:
                 else:
                     logger.warning(f"Coluna DATA não encontrada. Não foi possível extrair TRIMESTRE/ANO do arquivo {nome_arquivo}")
             
+            if 'TRIMESTRE' in df.columns:
+                df['TRIMESTRE'] = df['TRIMESTRE'].astype(self.TRIMESTRE_DTYPE)
+            
             # Converter REG_ANS (ou REGISTROANS) para Int64 para match correto no JOIN
             coluna_reg = None
             if 'REGISTROANS' in df.columns:
@@ -512,6 +850,180 @@ class GeradorConsolidadosPandas:
             logger.error(f"Erro ao carregar {caminho}: {e}")
             return None
     
+    def _processar_trimestres(
+        self,
+        csvs_encontrados: list,
+        operadoras_df: pd.DataFrame,
+        max_workers: int = None
+    ) -> list:
+        """Lê, normaliza e faz o JOIN de cada trimestre em um pool de processos.
+        
+        A dimensão de operadoras é enviada uma única vez por processo (initializer)
+        e cada trimestre volta como buffer Arrow IPC em vez de DataFrame serializado
+        com pickle (ou como DataFrame, se pyarrow não estiver disponível ou não
+        converter o resultado). Com um único trimestre (ou max_workers=1) roda no
+        próprio processo.
+        
+        Args:
+            csvs_encontrados: Caminhos dos CSVs de trimestres
+            operadoras_df: DataFrame com operadoras (dimensão já codificada)
+            max_workers: Número máximo de processos
+            
+        Returns:
+            Lista de (caminho do CSV, DataFrame resultante do JOIN), na ordem de
+            csvs_encontrados (CSVs com erro de leitura ficam de fora)
+        """
+        if max_workers is None:
+            max_workers = min(len(csvs_encontrados), os.cpu_count() or 1)
+        
+        if max_workers <= 1 or len(csvs_encontrados) <= 1:
+            resultados = []
+            for csv_path in csvs_encontrados:
+                print(f"    Processando {os.path.basename(csv_path)}...")
+                with trecho(f"Trimestre {os.path.basename(csv_path)}") as args:
+                    despesas = self._carregar_despesas_do_caminho(csv_path)
+                    if despesas is None or despesas.empty:
+                        print(f"      ⚠ Erro ao carregar {os.path.basename(csv_path)}")
+                        continue
+                    resultados.append((csv_path, self._fazer_join(despesas, operadoras_df)))
+                    args["linhas"] = len(resultados[-1][1])
+            return resultados
+        
+        print(f"    Processando {len(csvs_encontrados)} trimestres em {max_workers} processos...")
+        resultados = []
+        with self._pool_trimestres(max_workers, operadoras_df) as executor:
+            for csv_path, resultado in zip(
+                csvs_encontrados,
+                executor.map(_processar_trimestre_worker, csvs_encontrados)
+            ):
+                nome_csv = os.path.basename(csv_path)
+                if resultado is None:
+                    print(f"      ⚠ Erro ao carregar {nome_csv}")
+                    continue
+                
+                print(f"      [OK] {nome_csv}")
+                resultados.append((csv_path, self._ler_resultado_worker(resultado, operadoras_df)))
+        
+        return resultados
+    
+    def processar_trimestres_em_fluxo(
+        self,
+        csvs: Iterable[str],
+        operadoras_df: pd.DataFrame,
+        max_workers: int = None
+    ) -> Iterator[Tuple[str, pd.DataFrame]]:
+        """Lê + JOIN dos trimestres à medida que os CSVs chegam (ex: de uma fila).
+        
+        Mesmo pool de _processar_trimestres, mas cada CSV é submetido assim que
+        o iterável o entrega, com no máximo 2 x max_workers trimestres em voo;
+        os resultados saem na ordem de chegada dos CSVs.
+        
+        Args:
+            csvs: Iterável (possivelmente bloqueante) de caminhos de CSVs
+            operadoras_df: DataFrame com operadoras (dimensão já codificada)
+            max_workers: Número máximo de processos (padrão: os.cpu_count())
+            
+        Yields:
+            (caminho do CSV, DataFrame resultante do JOIN); CSVs com erro ficam de fora
+        """
+        if max_workers is None:
+            max_workers = os.cpu_count() or 1
+        
+        if max_workers <= 1:
+            for csv_path in csvs:
+                yield from self._processar_trimestres([csv_path], operadoras_df, 1)
+            return
+        
+        em_voo = deque()
+        with self._pool_trimestres(max_workers, operadoras_df) as executor:
+            for csv_path in csvs:
+                em_voo.append((csv_path, executor.submit(_processar_trimestre_worker, csv_path)))
+                # Entregar os já concluídos (em ordem) e limitar os trimestres em voo
+                while em_voo and (em_voo[0][1].done() or len(em_voo) >= 2 * max_workers):
+                    yield from self._resultado_em_fluxo(*em_voo.popleft(), operadoras_df)
+            while em_voo:
+                yield from self._resultado_em_fluxo(*em_voo.popleft(), operadoras_df)
+    
+    @staticmethod
+    def _pool_trimestres(max_workers: int, operadoras_df: pd.DataFrame) -> ProcessPoolExecutor:
+        """Pool de processos da leitura + JOIN dos trimestres.
+        
+        Os processos não são criados por fork (GeradorConsolidados.contexto_processos):
+        processar_trimestres_em_fluxo roda com as threads de download/extração do
+        pipeline ativas. O estado vem só pelo initializer, inclusive o diretório
+        dos eventos parciais do rastreamento.
+        """
+        return ProcessPoolExecutor(
+            max_workers=max_workers,
+            mp_context=GeradorConsolidados.contexto_processos(),
+            initializer=_inicializar_worker_trimestre,
+            initargs=(operadoras_df, os.environ.get(Rastreador.VARIAVEL_PARCIAIS))
+        )
+    
+    def _resultado_em_fluxo(self, csv_path: str, futuro, operadoras_df: pd.DataFrame):
+        """Resultado de um trimestre submetido por processar_trimestres_em_fluxo."""
+        nome_csv = os.path.basename(csv_path)
+        resultado = futuro.result()
+        if resultado is None:
+            print(f"      ⚠ Erro ao carregar {nome_csv}")
+            return
+        print(f"      [OK] {nome_csv}")
+        yield csv_path, self._ler_resultado_worker(resultado, operadoras_df)
+    
+    def _ler_resultado_worker(self, resultado, operadoras_df: pd.DataFrame) -> pd.DataFrame:
+        """DataFrame de um trimestre devolvido por _processar_trimestre_worker."""
+        if isinstance(resultado, pd.DataFrame):
+            return resultado
+        return self._ler_buffer_arrow(resultado, operadoras_df)
+    
+    def _ler_buffer_arrow(self, buffer: bytes, operadoras_df: pd.DataFrame) -> pd.DataFrame:
+        """Reconstrói o DataFrame de um trimestre a partir do buffer Arrow IPC.
+        
+        As colunas de dimensão trafegam apenas como códigos e são remontadas com
+        as categorias da dimensão original, mantendo o dtype category no pd.concat.
+        """
+        import pyarrow as pa
+        
+        with pa.ipc.open_stream(buffer) as leitor:
+            df = leitor.read_pandas()
+        
+        for coluna in self.COLUNAS_DIMENSAO_OPERADORAS:
+            coluna_join = coluna.upper()
+            if coluna_join in df.columns and isinstance(operadoras_df[coluna].dtype, pd.CategoricalDtype):
+                df[coluna_join] = pd.Categorical.from_codes(
+                    df[coluna_join].to_numpy(),
+                    dtype=operadoras_df[coluna].dtype
+                )
+        if 'TRIMESTRE' in df.columns:
+            df['TRIMESTRE'] = df['TRIMESTRE'].astype(self.TRIMESTRE_DTYPE)
+        
+        return df
+    
+    def _codificar_dimensao_operadoras(self, operadoras_df: pd.DataFrame) -> pd.DataFrame:
+        """Converte as colunas da dimensão de operadoras para category.
+        
+        Inclui 'N/L' nas categorias para que o preenchimento pós-JOIN não
+        volte a materializar strings Python linha a linha.
+        
+        Args:
+            operadoras_df: DataFrame com operadoras
+            
+        Returns:
+            DataFrame com colunas da dimensão como category
+        """
+        operadoras_df = operadoras_df.copy()
+        
+        for coluna in self.COLUNAS_DIMENSAO_OPERADORAS:
+            if coluna not in operadoras_df.columns:
+                continue
+            
+            serie = operadoras_df[coluna].astype('category')
+            if 'N/L' not in serie.cat.categories:
+                serie = serie.cat.add_categories(['N/L'])
+            operadoras_df[coluna] = serie
+        
+        return operadoras_df
+    
     def _carregar_despesas(self, diretorio: str, nome_arquivo: str) -> pd.DataFrame:
         """Carrega arquivo de despesas/sinistros dos CSVs extraídos.
         
@@ -555,6 +1067,7 @@ class GeradorConsolidadosPandas:
         logger.warning(f"Arquivo {nome_arquivo} não encontrado em nenhum local")
         return None
     
+    @rastrear()
     def _fazer_join(
         self,
         despesas_df: pd.DataFrame,
@@ -589,7 +1102,7 @@ class GeradorConsolidadosPandas:
             'uf': 'UF'
         })
         
-        # Preencher valores ausentes com N/L
+        # Preencher valores ausentes com N/L ('N/L' já é categoria da dimensão)
         resultado['CNPJ'] = resultado['CNPJ'].fillna('N/L')
         resultado['RAZAO_SOCIAL'] = resultado['RAZAO_SOCIAL'].fillna('N/L')
         resultado['MODALIDADE'] = resultado['MODALIDADE'].fillna('N/L')
@@ -664,12 +1177,58 @@ class GeradorConsolidadosPandas:
         
         # Formatar APENAS a coluna de valores (não REGISTRO ANS, CONTA CONTÁBIL, etc.)
         if 'VALOR DE DESPESAS' in df_formatado.columns:
-            df_formatado['VALOR DE DESPESAS'] = df_formatado['VALOR DE DESPESAS'].apply(
-                lambda x: f"{x:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.') if pd.notnull(x) else ''
-            )
+            df_formatado['VALOR DE DESPESAS'] = ConversorNumeroBR.formatar_serie(df_formatado['VALOR DE DESPESAS'])
         
         return df_formatado
     
+    def _escrever_csv(
+        self,
+        destino: BinaryIO,
+        df: pd.DataFrame,
+        tamanho_chunk: int = None
+    ) -> None:
+        """Grava o DataFrame como CSV (';', UTF-8 com BOM) em um destino binário (membro do ZIP).
+        
+        Cada chunk é formatado (_formatar_valores_brasileiros), codificado e comprimido
+        em sequência, sem CSV intermediário em disco nem o arquivo inteiro em memória.
+        
+        Args:
+            destino: Destino binário fornecido pelo CompactadorZIP
+            df: DataFrame a gravar (valores ainda numéricos)
+            tamanho_chunk: Linhas por chunk (padrão: TAMANHO_CHUNK_CSV)
+        """
+        tamanho_chunk = tamanho_chunk or self.TAMANHO_CHUNK_CSV
+        
+        # utf-8-sig grava o BOM uma única vez, no início do membro
+        with io.TextIOWrapper(destino, encoding='utf-8-sig', newline='') as texto:
+            for inicio in range(0, max(len(df), 1), tamanho_chunk):
+                chunk = self._formatar_valores_brasileiros(df.iloc[inicio:inicio + tamanho_chunk])
+                chunk.to_csv(texto, sep=';', index=False, header=(inicio == 0))
+    
+    def _salvar_handoff(self, diretorio_destino: str, dataframes: Dict[str, pd.DataFrame]) -> list:
+        """Grava o handoff Parquet de cada CSV do ZIP (valores tipados, sem formatação).
+        
+        Sem pyarrow o estágio 2 continua lendo os CSVs do ZIP.
+        
+        Args:
+            diretorio_destino: Diretório do ZIP consolidado
+            dataframes: Dict {nome_csv: DataFrame com valores numéricos}
+            
+        Returns:
+            Lista com os caminhos gravados
+        """
+        arquivos = []
+        for nome_csv, df in dataframes.items():
+            caminho = IntercambioParquet.caminho(diretorio_destino, nome_csv)
+            try:
+                IntercambioParquet.salvar(df, caminho, colunas_valor=['VALOR DE DESPESAS'])
+            except ImportError as e:
+                logger.warning(f"Handoff Parquet não gerado ({e}); o estágio 2 usará o ZIP")
+                break
+            arquivos.append(caminho)
+            print(f"    [OK] {os.path.basename(caminho)}")
+        return arquivos
+    
     def _fazer_join_e_salvar(
         self,
         despesas_df: pd.DataFrame,
@@ -740,3 +1299,58 @@ class GeradorConsolidadosPandas:
             "com_operadora": com_operadora,
             "sem_operadora": sem_operadora
         }
+
+
+# Estado de cada processo do pool de trimestres (preenchido pelo initializer)
+_operadoras_worker = None
+
+
+def _inicializar_worker_trimestre(operadoras_df: pd.DataFrame, parciais_rastreamento: str = None) -> None:
+    """Recebe a dimensão de operadoras (e o rastreamento do pai) uma única vez por processo."""
+    global _operadoras_worker
+    _operadoras_worker = operadoras_df
+    # Com forkserver o ambiente é o do servidor, não o do processo que criou o pool
+    if parciais_rastreamento:
+        os.environ[Rastreador.VARIAVEL_PARCIAIS] = parciais_rastreamento
+    else:
+        os.environ.pop(Rastreador.VARIAVEL_PARCIAIS, None)
+
+
+def _processar_trimestre_worker(csv_path: str):
+    """Lê + JOIN de um trimestre no processo do pool.
+    
+    Returns:
+        Buffer Arrow IPC (bytes) com o resultado do JOIN, o próprio DataFrame
+        (enviado com pickle) se pyarrow não estiver disponível ou não converter
+        o resultado, ou None se erro
+    """
+    gerador = GeradorConsolidadosPandas()
+    with trecho(f"Trimestre {os.path.basename(csv_path)}") as args:
+        despesas = gerador._carregar_despesas_do_caminho(csv_path)
+        if despesas is None or despesas.empty:
+            return None
+        
+        resultado = gerador._fazer_join(despesas, _operadoras_worker)
+        args["linhas"] = len(resultado)
+    
+    try:
+        import pyarrow as pa
+    except ImportError as e:
+        logger.debug(f"pyarrow indisponível ({e}); trimestre enviado como DataFrame")
+        return resultado
+    
+    # Categorias da dimensão já estão no processo principal: enviar só os códigos
+    codigos = {
+        coluna.upper(): resultado[coluna.upper()].cat.codes
+        for coluna in GeradorConsolidadosPandas.COLUNAS_DIMENSAO_OPERADORAS
+        if coluna.upper() in resultado.columns and isinstance(resultado[coluna.upper()].dtype, pd.CategoricalDtype)
+    }
+    try:
+        tabela = pa.Table.from_pandas(resultado.assign(**codigos), preserve_index=False)
+        sink = pa.BufferOutputStream()
+        with pa.ipc.new_stream(sink, tabela.schema) as escritor:
+            escritor.write_table(tabela)
+    except (pa.ArrowException, TypeError, ValueError) as e:
+        logger.warning(f"Trimestre {os.path.basename(csv_path)} enviado como DataFrame (Arrow falhou: {e})")
+        return resultado
+    return sink.getvalue().to_pybytes()
@@ -0,0 +1,110 @@
+"""Serviço de Domínio: Handoff tipado entre estágios em Parquet.
+
+O estágio 1 grava, ao lado do ZIP (formato para pessoas), um Parquet por CSV
+com os mesmos dados já tipados; o estágio 2 lê esse arquivo em vez de
+descompactar e reinterpretar o CSV.
+
+- Valores monetários são gravados já arredondados para centavos, iguais ao
+  que o parse do CSV formatado devolveria
+- Textos (inclusive category) viram string; inteiros, int64
+- A versão do schema vai nos metadados: versões desconhecidas não são lidas
+
+O estágio 2 lê com uma cópia deste módulo; VERSAO_SCHEMA e as conversões de
+tipo devem mudar nas duas ao mesmo tempo (tests/test_modulos_espelhados.py
+compara).
+"""
+
+import os
+
+import numpy as np
+import pandas as pd
+
+from domain.servicos.conversor_numero_br import ConversorNumeroBR
+
+
+class IntercambioParquet:
+    """Grava e lê o handoff Parquet (versionado) entre os estágios."""
+
+    # Incrementar quando nomes/tipos das colunas mudarem
+    VERSAO_SCHEMA = '1'
+    CHAVE_VERSAO = b'versao_schema'
+    EXTENSAO = '.parquet'
+
+    @staticmethod
+    def caminho(diretorio: str, nome_csv: str) -> str:
+        """Caminho do handoff de um CSV (ex: sinistro_sem_deducoes.csv -> .parquet)."""
+        return os.path.join(diretorio, os.path.splitext(nome_csv)[0] + IntercambioParquet.EXTENSAO)
+
+    @staticmethod
+    def salvar(df: pd.DataFrame, caminho: str, colunas_valor=()) -> None:
+        """Grava o DataFrame como handoff Parquet (atômico: .tmp + os.replace).
+
+        Um handoff anterior é removido antes, para nunca sobrar um arquivo de
+        outra execução caso a gravação falhe (ex: pyarrow indisponível).
+
+        Args:
+            df: DataFrame com os valores ainda numéricos
+            caminho: Caminho do arquivo .parquet
+            colunas_valor: Colunas monetárias (arredondadas para centavos)
+
+        Raises:
+            ImportError: pyarrow não instalado
+        """
+        if os.path.exists(caminho):
+            os.remove(caminho)
+
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        colunas = {}
+        for coluna in df.columns:
+            serie = df[coluna]
+            if coluna in colunas_valor:
+                colunas[coluna] = pa.array(ConversorNumeroBR.arredondar_centavos(serie), type=pa.float64())
+            elif pd.api.types.is_integer_dtype(serie.dtype):
+                colunas[coluna] = pa.array(serie, type=pa.int64(), from_pandas=True)
+            elif pd.api.types.is_float_dtype(serie.dtype):
+                colunas[coluna] = pa.array(serie, type=pa.float64(), from_pandas=True)
+            else:
+                # Mesmo texto que o to_csv escreveria (str de cada valor); nulos ficam nulos
+                valores = serie.to_numpy(dtype=object)
+                nulos = pd.isna(valores)
+                textos = valores.astype(str).astype(object)
+                textos[nulos] = None
+                colunas[coluna] = pa.array(textos, type=pa.string())
+
+        tabela = pa.table(colunas).replace_schema_metadata(
+            {IntercambioParquet.CHAVE_VERSAO: IntercambioParquet.VERSAO_SCHEMA}
+        )
+
+        caminho_tmp = f"{caminho}.tmp"
+        pq.write_table(tabela, caminho_tmp)
+        os.replace(caminho_tmp, caminho)
+
+    @staticmethod
+    def carregar(caminho: str) -> pd.DataFrame:
+        """Lê um handoff Parquet.
+
+        Inteiros voltam como Int64 (aceitam nulos sem virar float); textos nulos
+        voltam como NaN, como no read_csv.
+
+        Raises:
+            ImportError: pyarrow não instalado
+            ValueError: versão de schema diferente de VERSAO_SCHEMA
+        """
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        metadados = pq.read_schema(caminho).metadata or {}
+        versao = metadados.get(IntercambioParquet.CHAVE_VERSAO, b'').decode()
+        if versao != IntercambioParquet.VERSAO_SCHEMA:
+            raise ValueError(
+                f"versão de schema {versao or '(ausente)'} não suportada "
+                f"(esperada {IntercambioParquet.VERSAO_SCHEMA})"
+            )
+
+        df = pq.read_table(caminho).to_pandas(types_mapper={pa.int64(): pd.Int64Dtype()}.get)
+        for coluna in df.columns:
+            if df[coluna].dtype == object:
+                df[coluna] = df[coluna].where(df[coluna].notna(), np.nan)
+        return df
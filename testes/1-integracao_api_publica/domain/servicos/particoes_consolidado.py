@@ -0,0 +1,186 @@
+"""Serviço de Domínio: Partições por trimestre da consolidação incremental.
+
+Cada trimestre consolidado fica em disco (Arrow IPC) junto de um manifesto de
+linhagem com as impressões digitais das entradas que o produziram:
+- o CSV do trimestre (sha256 do conteúdo)
+- o snapshot do cadastro de operadoras (hash da dimensão já codificada)
+
+Uma nova execução reprocessa apenas os trimestres cujo CSV mudou (ou todos,
+se o cadastro mudou) e monta as saídas finais concatenando as partições.
+"""
+
+import hashlib
+import json
+import os
+from typing import Dict, List
+
+import pandas as pd
+
+from infraestrutura.logger import get_logger
+
+logger = get_logger('ParticoesConsolidado')
+
+
+class ParticoesConsolidado:
+    """Lê e grava as partições por trimestre e o manifesto de linhagem."""
+
+    # Incrementar quando o conteúdo/formato das partições mudar (invalida todas)
+    VERSAO = 1
+    NOME_MANIFESTO = 'manifesto.json'
+    EXTENSAO = '.arrow'
+    TAMANHO_BLOCO_HASH = 1024 * 1024
+
+    def __init__(self, diretorio: str):
+        self.diretorio = diretorio
+        os.makedirs(diretorio, exist_ok=True)
+        self.manifesto = self._ler_manifesto()
+
+    @staticmethod
+    def fingerprint_arquivo(caminho: str) -> str:
+        """sha256 do conteúdo do arquivo (lido em blocos)."""
+        sha = hashlib.sha256()
+        with open(caminho, 'rb') as f:
+            for bloco in iter(lambda: f.read(ParticoesConsolidado.TAMANHO_BLOCO_HASH), b''):
+                sha.update(bloco)
+        return sha.hexdigest()
+
+    @staticmethod
+    def fingerprint_dataframe(df: pd.DataFrame) -> str:
+        """Hash do conteúdo, das colunas e dos dtypes (inclusive categorias) do DataFrame."""
+        sha = hashlib.sha256()
+        for coluna in df.columns:
+            dtype = df[coluna].dtype
+            descricao = f"{coluna}:{dtype}"
+            if isinstance(dtype, pd.CategoricalDtype):
+                # A ordem das categorias define os códigos gravados nas partições
+                descricao += ':' + repr(dtype.categories.tolist())
+            sha.update(descricao.encode('utf-8'))
+        sha.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+        return sha.hexdigest()
+
+    def validar_cadastro(self, fingerprint_operadoras: str) -> bool:
+        """Invalida todas as partições se o cadastro (ou a versão) mudou.
+
+        Returns:
+            True se as partições existentes continuam válidas
+        """
+        valido = (
+            self.manifesto.get('versao') == self.VERSAO
+            and self.manifesto.get('operadoras') == fingerprint_operadoras
+        )
+        if not valido:
+            if self.manifesto.get('trimestres'):
+                logger.info("Cadastro de operadoras mudou: todas as partições serão refeitas")
+            self.manifesto = {'versao': self.VERSAO, 'operadoras': fingerprint_operadoras, 'trimestres': {}}
+        return valido
+
+    def esta_atualizada(self, nome: str, fingerprint: str) -> bool:
+        """A partição do trimestre existe e foi gerada a partir deste mesmo CSV."""
+        entrada = self.manifesto['trimestres'].get(nome)
+        if entrada is None or entrada.get('fingerprint') != fingerprint:
+            return False
+        return all(
+            os.path.exists(os.path.join(self.diretorio, arquivo))
+            for arquivo in entrada.get('arquivos', {}).values()
+        )
+
+    def metadados(self, nome: str) -> Dict:
+        """Metadados gravados com a partição (contagens, chaves, continuidade)."""
+        return self.manifesto['trimestres'][nome]['metadados']
+
+    def nomes(self) -> List[str]:
+        return list(self.manifesto['trimestres'])
+
+    def salvar(
+        self,
+        nome: str,
+        fingerprint: str,
+        tabelas: Dict[str, pd.DataFrame],
+        metadados: Dict,
+        dtypes_categoricos: Dict[str, pd.CategoricalDtype]
+    ) -> None:
+        """Grava as tabelas da partição e registra a linhagem no manifesto.
+
+        Colunas category são gravadas como códigos (as categorias vêm da dimensão,
+        cuja impressão digital está no manifesto) e remontadas em carregar().
+
+        Args:
+            nome: Nome do CSV do trimestre
+            fingerprint: Impressão digital do CSV
+            tabelas: Dict {tipo: DataFrame} (ex: 'detalhe', 'agregado')
+            metadados: Dados da partição usados na montagem final
+            dtypes_categoricos: Dtype esperado de cada coluna category
+        """
+        import pyarrow as pa
+
+        arquivos = {}
+        for tipo, df in tabelas.items():
+            df = df.reset_index(drop=True)
+            for coluna in df.columns:
+                if isinstance(df[coluna].dtype, pd.CategoricalDtype):
+                    if df[coluna].dtype != dtypes_categoricos.get(coluna):
+                        raise ValueError(f"Coluna category sem dtype de referência: {coluna}")
+                    df[coluna] = df[coluna].cat.codes
+
+            arquivo = f"{os.path.splitext(nome)[0]}.{tipo}{self.EXTENSAO}"
+            caminho = os.path.join(self.diretorio, arquivo)
+            tabela = pa.Table.from_pandas(df, preserve_index=False)
+            with pa.OSFile(f"{caminho}.tmp", 'wb') as sink:
+                with pa.ipc.new_file(sink, tabela.schema) as escritor:
+                    escritor.write_table(tabela)
+            os.replace(f"{caminho}.tmp", caminho)
+            arquivos[tipo] = arquivo
+
+        self.manifesto['trimestres'][nome] = {
+            'fingerprint': fingerprint,
+            'arquivos': arquivos,
+            'metadados': metadados,
+        }
+        self._gravar_manifesto()
+
+    def carregar(
+        self,
+        nome: str,
+        tipo: str,
+        dtypes_categoricos: Dict[str, pd.CategoricalDtype]
+    ) -> pd.DataFrame:
+        """Lê uma tabela da partição, remontando as colunas category."""
+        import pyarrow as pa
+
+        caminho = os.path.join(self.diretorio, self.manifesto['trimestres'][nome]['arquivos'][tipo])
+        with pa.memory_map(caminho, 'r') as fonte:
+            df = pa.ipc.open_file(fonte).read_pandas()
+
+        for coluna, dtype in dtypes_categoricos.items():
+            if coluna in df.columns:
+                df[coluna] = pd.Categorical.from_codes(df[coluna].to_numpy(), dtype=dtype)
+        return df
+
+    def remover_ausentes(self, nomes_atuais: List[str]) -> None:
+        """Remove partições de trimestres cujo CSV não existe mais."""
+        for nome in set(self.manifesto['trimestres']) - set(nomes_atuais):
+            for arquivo in self.manifesto['trimestres'].pop(nome).get('arquivos', {}).values():
+                caminho = os.path.join(self.diretorio, arquivo)
+                if os.path.exists(caminho):
+                    os.remove(caminho)
+            logger.info(f"Partição removida (CSV ausente): {nome}")
+        self._gravar_manifesto()
+
+    def _ler_manifesto(self) -> Dict:
+        caminho = os.path.join(self.diretorio, self.NOME_MANIFESTO)
+        if not os.path.exists(caminho):
+            return {'trimestres': {}}
+        try:
+            with open(caminho, 'r', encoding='utf-8') as f:
+                manifesto = json.load(f)
+            manifesto.setdefault('trimestres', {})
+            return manifesto
+        except (OSError, ValueError) as e:
+            logger.warning(f"Manifesto de partições ilegível, reprocessando tudo: {e}")
+            return {'trimestres': {}}
+
+    def _gravar_manifesto(self) -> None:
+        caminho = os.path.join(self.diretorio, self.NOME_MANIFESTO)
+        with open(f"{caminho}.tmp", 'w', encoding='utf-8') as f:
+            json.dump(self.manifesto, f, ensure_ascii=False, indent=2)
+        os.replace(f"{caminho}.tmp", caminho)
@@ -6,7 +6,7 @@ extração e transformação de arquivos de dados.
 
 import os
 import pandas as pd
-from typing import List, Dict, Optional, Tuple
+from typing import List, Optional, Tuple
 
 from infraestrutura.logger import get_logger
 from .validador_normalizador import ValidadorNormalizador
@@ -20,6 +20,9 @@ class ProcessadorArquivos:
     PALAVRAS_CHAVE = ["Despesas com Eventos/Sinistros"]
     ENCODINGS = ['utf-8', 'latin-1', 'iso-8859-1', 'cp1252']
     
+    # Registros por lote devolvido por extrair_dados_arquivo
+    TAMANHO_LOTE = 5000
+    
     @staticmethod
     def ler_arquivo_com_encoding(
         caminho: str,
@@ -87,12 +90,17 @@ class ProcessadorArquivos:
     def extrair_dados_arquivo(
         caminho_arquivo: str,
         ano: int,
-        trimestre: int
-    ) -> Tuple[List[Dict], float, int]:
-        """Extrai dados de um arquivo.
+        trimestre: int,
+        tamanho_lote: int = None
+    ) -> Tuple[List[pd.DataFrame], float, int]:
+        """Extrai dados de um arquivo em lotes colunares.
+        
+        Os lotes são fatias do DataFrame lido (sem um dict por linha), já com as
+        colunas ANO e TRIMESTRE; validação e valor do arquivo são calculados
+        sobre as colunas inteiras.
         
         Retorna:
-            (dados, valor_arquivo, registros_rejeitados)
+            (lotes, valor_arquivo, registros_rejeitados)
         """
         try:
             if caminho_arquivo.endswith('.csv'):
@@ -119,25 +127,19 @@ class ProcessadorArquivos:
             
             df.columns = df.columns.str.upper().str.strip().str.replace(' ', '_')
             
-            dados = []
-            registros_rejeitados = 0
-            
-            # Usar itertuples() para melhor performance
-            colunas = list(df.columns)
-            for idx, linha in enumerate(df.itertuples(index=False, name=None)):
-                registro = dict(zip(colunas, linha))
-                
-                # Validar dados mínimos
-                if ValidadorNormalizador.validar_registro(registro):
-                    registro['ANO'] = ano
-                    registro['TRIMESTRE'] = trimestre
-                    dados.append(registro)
-                else:
-                    registros_rejeitados += 1
+            # Validar dados mínimos (só depende das colunas: vale para todas as linhas)
+            if not ValidadorNormalizador.validar_colunas_obrigatorias(df.columns):
+                return [], 0.0, len(df)
+            
+            df['ANO'] = ano
+            df['TRIMESTRE'] = trimestre
+            
+            valor_arquivo = ValidadorNormalizador.calcular_valor_dataframe(df)
             
-            valor_arquivo = ValidadorNormalizador.calcular_valor_arquivo(dados)
+            tamanho_lote = tamanho_lote or ProcessadorArquivos.TAMANHO_LOTE
+            lotes = [df.iloc[inicio:inicio + tamanho_lote] for inicio in range(0, len(df), tamanho_lote)]
             
-            return dados, valor_arquivo, registros_rejeitados
+            return lotes, valor_arquivo, 0
             
         except Exception as e:
             logger.error(f"Erro ao extrair dados do arquivo {caminho_arquivo}: {e}")
@@ -9,10 +9,12 @@ Contém regras de negócio para:
 - Detecção de erros de JOIN
 """
 
+import os
 import pandas as pd
 import numpy as np
-from typing import Dict, Set, List
+from typing import Dict, Set, List, Tuple
 from infraestrutura.logger import get_logger
+from infraestrutura.rastreador import rastrear
 
 logger = get_logger("ProcessadorDemonstracoes")
 
@@ -20,6 +22,34 @@ logger = get_logger("ProcessadorDemonstracoes")
 class ProcessadorDemonstracoes:
     """Processa demonstrações contábeis aplicando regras de negócio."""
     
+    # Casos de duplicidade resolvidos uma única vez por linha (coluna 'caso_duplicidade')
+    CASO_UNICO = 0
+    CASO_NAO_LOCALIZADO = 1
+    CASO_DUPLICADO_UMA_ATIVA = 2
+    CASO_DUPLICIDADE = 3
+    CASO_SEM_CADASTRO = 4
+    
+    VALOR_DUPLICIDADE = 'REGISTRO DE OPERADORA EM DUPLICIDADE'
+    
+    # Relatório de erros de JOIN (detectar_erros_join)
+    MOTIVO_OPERADORA_DUPLICADA = 'OPERADORA_DUPLICADA'
+    MOTIVO_OPERADORA_NAO_LOCALIZADA = 'OPERADORA_NAO_LOCALIZADA'
+    COLUNAS_ERRO_JOIN = [
+        'reg_ans', 'cd_conta_contabil', 'descricao', 'vl_saldo_inicial',
+        'vl_saldo_final', 'trimestre', 'ano'
+    ]
+    TAMANHO_CHUNK_ERROS = 100000
+    
+    # coluna de saída: (origem no caso único, origem com 1 ativa, valor se não localizado,
+    #                   valor se duplicidade, nulo no caso único, nulo com 1 ativa)
+    REGRAS_DUPLICIDADE = {
+        'cnpj': ('cnpj', 'cnpj_ativo', 'N/L', VALOR_DUPLICIDADE, 'N/L', 'N/L'),
+        'razao_social_operadora': ('razao_social', 'razao_social_ativa', 'N/L', VALOR_DUPLICIDADE, 'N/L', 'N/L'),
+        'modalidade': ('modalidade', 'modalidade_ativa', 'N/L', 'N/L', 'N/L', 'N/L'),
+        'uf': ('uf', 'uf_ativo', 'N/L', 'N/L', 'N/L', 'N/L'),
+        'status_operadora': ('status', 'status_ativo', 'NAO_LOCALIZADO', VALOR_DUPLICIDADE, 'DESCONHECIDO', 'ATIVO'),
+    }
+    
     @staticmethod
     def agregar_operadoras(df_operadoras: pd.DataFrame) -> pd.DataFrame:
         """Agrega operadoras tratando duplicidade e priorizando ativas.
@@ -48,30 +78,43 @@ class ProcessadorDemonstracoes:
         # Normalizar STATUS para uppercase
         df_operadoras['STATUS'] = df_operadoras['STATUS'].str.upper()
         
-        # Agregar contando duplicatas e separando dados de ativas
-        df_agg = df_operadoras.groupby('REG_ANS').agg(
-            qtd_operadoras=('REG_ANS', 'count'),
-            qtd_ativas=('STATUS', lambda x: (x == 'ATIVA').sum()),
-            
-            # Dados da operadora ATIVA (quando houver exatamente 1 ativa)
-            cnpj_ativo=('CNPJ', lambda x: x[df_operadoras.loc[x.index, 'STATUS'] == 'ATIVA'].iloc[0] 
-                        if any(df_operadoras.loc[x.index, 'STATUS'] == 'ATIVA') else None),
-            razao_social_ativa=('RAZAO_SOCIAL', lambda x: x[df_operadoras.loc[x.index, 'STATUS'] == 'ATIVA'].iloc[0] 
-                                if any(df_operadoras.loc[x.index, 'STATUS'] == 'ATIVA') else None),
-            modalidade_ativa=('MODALIDADE', lambda x: x[df_operadoras.loc[x.index, 'STATUS'] == 'ATIVA'].iloc[0] 
-                              if any(df_operadoras.loc[x.index, 'STATUS'] == 'ATIVA') else None),
-            uf_ativo=('UF', lambda x: x[df_operadoras.loc[x.index, 'STATUS'] == 'ATIVA'].iloc[0] 
-                      if any(df_operadoras.loc[x.index, 'STATUS'] == 'ATIVA') else None),
-            status_ativo=('STATUS', lambda x: x[df_operadoras.loc[x.index, 'STATUS'] == 'ATIVA'].iloc[0] 
-                          if any(df_operadoras.loc[x.index, 'STATUS'] == 'ATIVA') else None),
-            
-            # Dados do primeiro registro (fallback)
-            cnpj=('CNPJ', 'first'),
-            razao_social=('RAZAO_SOCIAL', 'first'),
-            modalidade=('MODALIDADE', 'first'),
-            uf=('UF', 'first'),
-            status=('STATUS', 'first'),
-        ).reset_index()
+        # Agregação vetorizada: nenhuma lambda por grupo
+        eh_ativa = df_operadoras['STATUS'] == 'ATIVA'
+        chave = df_operadoras['REG_ANS']
+        
+        contagens = pd.DataFrame({
+            'qtd_operadoras': chave.groupby(chave).size(),
+            'qtd_ativas': eh_ativa.groupby(chave).sum(),
+        })
+        
+        colunas_dados = ['CNPJ', 'RAZAO_SOCIAL', 'MODALIDADE', 'UF', 'STATUS']
+        
+        # Dados da operadora ATIVA (primeira linha ativa de cada REG_ANS)
+        dados_ativos = (
+            df_operadoras.loc[eh_ativa & chave.notna(), ['REG_ANS'] + colunas_dados]
+            .drop_duplicates(subset='REG_ANS', keep='first')
+            .set_index('REG_ANS')
+            .rename(columns={
+                'CNPJ': 'cnpj_ativo',
+                'RAZAO_SOCIAL': 'razao_social_ativa',
+                'MODALIDADE': 'modalidade_ativa',
+                'UF': 'uf_ativo',
+                'STATUS': 'status_ativo',
+            })
+        )
+        
+        # Dados do primeiro registro (fallback; 'first' ignora nulos como no agg original)
+        dados_primeiros = df_operadoras.groupby('REG_ANS')[colunas_dados].first().rename(columns={
+            'CNPJ': 'cnpj',
+            'RAZAO_SOCIAL': 'razao_social',
+            'MODALIDADE': 'modalidade',
+            'UF': 'uf',
+            'STATUS': 'status',
+        })
+        
+        df_agg = contagens.join(dados_ativos).join(dados_primeiros)
+        df_agg.index.name = 'REG_ANS'
+        df_agg = df_agg.reset_index()
         
         logger.info(f"Operadoras agregadas: {len(df_agg)} registros únicos")
         logger.info(f"  - Com duplicatas: {(df_agg['qtd_operadoras'] > 1).sum()}")
@@ -79,6 +122,38 @@ class ProcessadorDemonstracoes:
         
         return df_agg
     
+    @staticmethod
+    def classificar_casos_duplicidade(df_merged: pd.DataFrame) -> np.ndarray:
+        """Resolve, em uma única passada, o caso de duplicidade de cada linha.
+        
+        Precedência (igual às regras de aplicar_regras_duplicidade):
+        - REG_ANS ausente: CASO_NAO_LOCALIZADO
+        - Duplicado com exatamente 1 ativa: CASO_DUPLICADO_UMA_ATIVA
+        - Duplicado com 0 ou múltiplas ativas: CASO_DUPLICIDADE
+        - REG_ANS sem correspondência no cadastro: CASO_SEM_CADASTRO
+        - Demais: CASO_UNICO
+        
+        Args:
+            df_merged: DataFrame após merge com operadoras agregadas
+        
+        Returns:
+            Array int8 com o caso de cada linha
+        """
+        P = ProcessadorDemonstracoes
+        qtd_operadoras = df_merged['qtd_operadoras']
+        
+        dup = (qtd_operadoras > 1).fillna(False).to_numpy(dtype=bool)
+        uma_ativa = (df_merged['qtd_ativas'] == 1).fillna(False).to_numpy(dtype=bool)
+        
+        # Atribuições em ordem crescente de precedência
+        caso = np.full(len(df_merged), P.CASO_UNICO, dtype=np.int8)
+        caso[qtd_operadoras.isna().to_numpy()] = P.CASO_SEM_CADASTRO
+        caso[dup & ~uma_ativa] = P.CASO_DUPLICIDADE
+        caso[dup & uma_ativa] = P.CASO_DUPLICADO_UMA_ATIVA
+        caso[df_merged['REG_ANS'].isna().to_numpy()] = P.CASO_NAO_LOCALIZADO
+        
+        return caso
+    
     @staticmethod
     def aplicar_regras_duplicidade(df_merged: pd.DataFrame) -> pd.DataFrame:
         """Aplica regras de negócio para tratar duplicidade de operadoras após JOIN.
@@ -89,6 +164,13 @@ class ProcessadorDemonstracoes:
         - Se duplicado com 0 ou múltiplas ativas: marcar como 'DUPLICIDADE'
         - Se único: usar dados normais
         
+        Os casos são resolvidos uma vez (classificar_casos_duplicidade) e cada
+        coluna de saída é produzida com um único np.select sobre esse array.
+        Se as colunas de origem são category, o np.select roda sobre os códigos
+        (em um conjunto único de categorias que inclui as constantes) e a saída
+        continua category, sem materializar strings por linha.
+        O array fica disponível na coluna 'caso_duplicidade' para detectar_erros_join.
+        
         Args:
             df_merged: DataFrame após merge com operadoras agregadas
                        (deve ter colunas: REG_ANS, qtd_operadoras, qtd_ativas, 
@@ -97,121 +179,186 @@ class ProcessadorDemonstracoes:
         Returns:
             DataFrame com colunas finais aplicando as regras de duplicidade
         """
-        # Criar máscaras para diferentes cenários
-        reg_ans_missing = df_merged['REG_ANS'].isna()
-        dup = df_merged['qtd_operadoras'] > 1
-        dup_one_active = dup & (df_merged['qtd_ativas'] == 1)
-        dup_other = dup & ~dup_one_active
-        
-        # Aplicar regras vetorizadas usando np.where
-        df_merged['cnpj'] = np.where(
-            reg_ans_missing,
-            'N/L',
-            np.where(
-                dup_one_active,
-                df_merged['cnpj_ativo'].fillna('N/L'),
-                np.where(
-                    dup_other,
-                    'REGISTRO DE OPERADORA EM DUPLICIDADE',
-                    df_merged['cnpj'].fillna('N/L')
-                )
-            )
-        )
+        P = ProcessadorDemonstracoes
+        caso = P.classificar_casos_duplicidade(df_merged)
+        
+        eh_uma_ativa = caso == P.CASO_DUPLICADO_UMA_ATIVA
+        condicoes = [
+            caso == P.CASO_NAO_LOCALIZADO,
+            caso == P.CASO_SEM_CADASTRO,
+            eh_uma_ativa,
+            caso == P.CASO_DUPLICIDADE,
+        ]
         
-        df_merged['razao_social_operadora'] = np.where(
-            reg_ans_missing,
-            'N/L',
-            np.where(
-                dup_one_active,
-                df_merged['razao_social_ativa'].fillna('N/L'),
-                np.where(
-                    dup_other,
-                    'REGISTRO DE OPERADORA EM DUPLICIDADE',
-                    df_merged['razao_social'].fillna('N/L')
-                )
+        # Calcular todas as saídas antes de atribuir (algumas sobrescrevem colunas de origem)
+        saidas = {}
+        for coluna_saida, regra in P.REGRAS_DUPLICIDADE.items():
+            origem_unico, origem_ativa, valor_nao_localizado, valor_duplicidade, nulo_unico, nulo_ativa = regra
+            
+            unico, ativa = df_merged[origem_unico], df_merged[origem_ativa]
+            constantes = [valor_nao_localizado, valor_duplicidade, nulo_unico, nulo_ativa]
+            
+            # Origem category: seleção sobre os códigos e a saída continua category
+            categorica = isinstance(unico.dtype, pd.CategoricalDtype) or isinstance(ativa.dtype, pd.CategoricalDtype)
+            if categorica:
+                fonte_unico, fonte_ativa, categorias = P._codificar_origens(unico, ativa, constantes)
+                valor = {constante: categorias.get_loc(constante) for constante in constantes}
+            else:
+                fonte_unico, fonte_ativa = unico.to_numpy(dtype=object), ativa.to_numpy(dtype=object)
+                valor = {constante: np.asarray(constante, dtype=object) for constante in constantes}
+            
+            valores = np.select(
+                condicoes,
+                [
+                    valor[valor_nao_localizado],
+                    valor[nulo_unico],
+                    fonte_ativa,
+                    valor[valor_duplicidade],
+                ],
+                default=fonte_unico
             )
-        )
+            
+            # Nulos (código -1 nas category) só podem vir das colunas de origem (caso único ou 1 ativa)
+            nulos = valores == -1 if categorica else pd.isna(valores)
+            if nulos.any():
+                valores[nulos] = np.where(eh_uma_ativa[nulos], valor[nulo_ativa], valor[nulo_unico])
+            
+            saidas[coluna_saida] = pd.Categorical.from_codes(valores, categories=categorias) if categorica else valores
         
-        df_merged['modalidade'] = np.where(
-            reg_ans_missing,
-            'N/L',
-            np.where(
-                dup_one_active,
-                df_merged['modalidade_ativa'].fillna('N/L'),
-                np.where(
-                    dup_other,
-                    'N/L',
-                    df_merged['modalidade'].fillna('N/L')
-                )
-            )
-        )
+        for coluna_saida, valores in saidas.items():
+            df_merged[coluna_saida] = valores
+        df_merged['caso_duplicidade'] = caso
         
-        df_merged['uf'] = np.where(
-            reg_ans_missing,
-            'N/L',
-            np.where(
-                dup_one_active,
-                df_merged['uf_ativo'].fillna('N/L'),
-                np.where(
-                    dup_other,
-                    'N/L',
-                    df_merged['uf'].fillna('N/L')
-                )
-            )
-        )
+        logger.info("Regras de duplicidade aplicadas")
+        return df_merged
+    
+    @staticmethod
+    def _codificar_origens(unico: pd.Series, ativa: pd.Series, constantes: list) -> Tuple[np.ndarray, np.ndarray, pd.Index]:
+        """Códigos das duas colunas de origem em um único conjunto de categorias (que inclui as constantes).
         
-        df_merged['status_operadora'] = np.where(
-            reg_ans_missing,
-            'NAO_LOCALIZADO',
-            np.where(
-                dup_one_active,
-                df_merged['status_ativo'].fillna('ATIVO'),
-                np.where(
-                    dup_other,
-                    'REGISTRO DE OPERADORA EM DUPLICIDADE',
-                    df_merged['status'].fillna('DESCONHECIDO')
-                )
+        Colunas category só têm os códigos remapeados; as demais passam por um
+        único factorize das duas juntas. Nulos ficam com código -1.
+        """
+        if isinstance(unico.dtype, pd.CategoricalDtype) and isinstance(ativa.dtype, pd.CategoricalDtype):
+            categorias = unico.cat.categories.append(ativa.cat.categories).append(pd.Index(constantes)).unique()
+            return (
+                unico.array.set_categories(categorias).codes,
+                ativa.array.set_categories(categorias).codes,
+                categorias,
             )
-        )
         
-        logger.info("Regras de duplicidade aplicadas")
-        return df_merged
+        n = len(unico)
+        codigos, categorias = pd.factorize(np.concatenate([
+            unico.to_numpy(dtype=object), ativa.to_numpy(dtype=object), np.asarray(constantes, dtype=object)
+        ]))
+        return codigos[:n], codigos[n:2 * n], pd.Index(categorias)
     
     @staticmethod
-    def detectar_erros_join(df: pd.DataFrame) -> List[Dict]:
+    def detectar_erros_join(
+        df: pd.DataFrame,
+        diretorio_erros: str = None,
+        formato: str = 'csv',
+        tamanho_chunk: int = None
+    ) -> Dict[str, int]:
         """Detecta registros com problemas no JOIN (operadora não localizada ou duplicada).
         
+        O relatório é montado por seleção de colunas e gravado em chunks em
+        diretorio_erros (CSV ';' ou Parquet); em memória ficam apenas as contagens.
+        
         Args:
-            df: DataFrame com coluna 'razao_social_operadora'
+            df: DataFrame com coluna 'razao_social_operadora' (e 'caso_duplicidade', se houver)
+            diretorio_erros: Diretório de saída (padrão: config.DIRETORIO_ERROS)
+            formato: 'csv' ou 'parquet'
+            tamanho_chunk: Linhas por chunk gravado (padrão: TAMANHO_CHUNK_ERROS)
             
         Returns:
-            Lista de dicionários com informações dos erros
+            Dicionário {motivo_erro: quantidade}
         """
-        erros_join = []
-        mascara_erro = df['razao_social_operadora'].isin(['N/L', 'REGISTRO DE OPERADORA EM DUPLICIDADE'])
-        
-        if mascara_erro.any():
-            df_erros = df.loc[mascara_erro]
-            for _, linha in df_erros.iterrows():
-                motivo = 'OPERADORA_NAO_LOCALIZADA' if linha['razao_social_operadora'] == 'N/L' else 'OPERADORA_DUPLICADA'
-                erros_join.append({
-                    'arquivo_origem': 'JOIN_CONSOLIDADO',
-                    'linha_arquivo': None,
-                    'reg_ans': linha.get('reg_ans'),
-                    'cd_conta_contabil': linha.get('cd_conta_contabil'),
-                    'descricao': linha.get('descricao'),
-                    'vl_saldo_inicial': linha.get('vl_saldo_inicial'),
-                    'vl_saldo_final': linha.get('vl_saldo_final'),
-                    'trimestre': linha.get('trimestre'),
-                    'ano': linha.get('ano'),
-                    'motivo_erro': motivo,
-                    'tipo_erro': 'JOIN_OPERADORA',
-                    'origem': 'Consolidação via JOIN (Python)'
-                })
+        P = ProcessadorDemonstracoes
+        if formato not in ('csv', 'parquet'):
+            raise ValueError(f"Formato de relatório de erros inválido: {formato}")
+        tamanho_chunk = tamanho_chunk or P.TAMANHO_CHUNK_ERROS
+        
+        razao = df['razao_social_operadora']
+        # Duplicidade: reaproveitar os casos resolvidos em aplicar_regras_duplicidade quando disponíveis
+        if 'caso_duplicidade' in df.columns:
+            mascara_duplicada = df['caso_duplicidade'].to_numpy() == P.CASO_DUPLICIDADE
+        else:
+            mascara_duplicada = (razao == P.VALOR_DUPLICIDADE).to_numpy(dtype=bool)
+        # N/L vem da coluna final: além dos não localizados, inclui operadoras
+        # localizadas cuja razão social está vazia no cadastro
+        mascara_nao_localizada = (razao == 'N/L').to_numpy(dtype=bool)
+        
+        contagens = {
+            P.MOTIVO_OPERADORA_DUPLICADA: int(np.count_nonzero(mascara_duplicada)),
+            P.MOTIVO_OPERADORA_NAO_LOCALIZADA: int(np.count_nonzero(mascara_nao_localizada & ~mascara_duplicada)),
+        }
+        
+        posicoes = np.flatnonzero(mascara_duplicada | mascara_nao_localizada)
+        if len(posicoes) == 0:
+            return contagens
+        
+        if diretorio_erros is None:
+            from config import DIRETORIO_ERROS
+            diretorio_erros = DIRETORIO_ERROS
+        os.makedirs(diretorio_erros, exist_ok=True)
+        caminho_saida = os.path.join(diretorio_erros, f"erros_join.{formato}")
+        
+        chunks = (
+            P._montar_chunk_erros_join(df, posicoes[inicio:inicio + tamanho_chunk], mascara_duplicada)
+            for inicio in range(0, len(posicoes), tamanho_chunk)
+        )
+        
+        if formato == 'parquet':
+            import pyarrow as pa
+            import pyarrow.parquet as pq
             
-            logger.warning(f"JOIN com {len(erros_join)} registros com operadora N/L ou DUPLICIDADE")
+            escritor = None
+            try:
+                for chunk in chunks:
+                    if escritor is None:
+                        tabela = pa.Table.from_pandas(chunk, preserve_index=False)
+                        escritor = pq.ParquetWriter(caminho_saida, tabela.schema)
+                    else:
+                        # Schema fixado pelo primeiro chunk (colunas totalmente nulas variam de tipo)
+                        tabela = pa.Table.from_pandas(chunk, schema=escritor.schema, preserve_index=False)
+                    escritor.write_table(tabela)
+            finally:
+                if escritor is not None:
+                    escritor.close()
+        else:
+            with open(caminho_saida, 'w', encoding='utf-8-sig', newline='') as f:
+                for i, chunk in enumerate(chunks):
+                    chunk.to_csv(f, sep=';', index=False, header=(i == 0))
         
-        return erros_join
+        logger.warning(
+            f"JOIN com {len(posicoes)} registros com operadora N/L ou DUPLICIDADE "
+            f"({contagens}) - relatório: {caminho_saida}"
+        )
+        return contagens
+    
+    @staticmethod
+    def _montar_chunk_erros_join(
+        df: pd.DataFrame,
+        posicoes: np.ndarray,
+        mascara_duplicada: np.ndarray
+    ) -> pd.DataFrame:
+        """Monta um chunk do relatório de erros de JOIN por seleção de colunas."""
+        P = ProcessadorDemonstracoes
+        colunas_presentes = [c for c in P.COLUNAS_ERRO_JOIN if c in df.columns]
+        
+        chunk = df.iloc[posicoes][colunas_presentes].reset_index(drop=True)
+        chunk = chunk.reindex(columns=P.COLUNAS_ERRO_JOIN)
+        chunk.insert(0, 'arquivo_origem', 'JOIN_CONSOLIDADO')
+        chunk.insert(1, 'linha_arquivo', None)
+        chunk['motivo_erro'] = np.where(
+            mascara_duplicada[posicoes],
+            P.MOTIVO_OPERADORA_DUPLICADA,
+            P.MOTIVO_OPERADORA_NAO_LOCALIZADA
+        )
+        chunk['tipo_erro'] = 'JOIN_OPERADORA'
+        chunk['origem'] = 'Consolidação via JOIN (Python)'
+        return chunk
     
     @staticmethod
     def agregar_sinistros_sem_deducoes(
@@ -240,9 +387,12 @@ class ProcessadorDemonstracoes:
             logger.warning("Nenhuma coluna de agrupamento encontrada")
             return df
         
+        # observed=True: colunas category (cnpj, razao_social_operadora, trimestre)
+        # não geram o produto cartesiano das categorias
         df_agrupado = df.groupby(
             colunas_existentes,
-            as_index=False
+            as_index=False,
+            observed=True
         ).agg({
             'valor_trimestre': 'sum'
         })
@@ -342,6 +492,7 @@ class ProcessadorDemonstracoes:
         return df_saida
     
     @staticmethod
+    @rastrear()
     def filtrar_sinistros_com_deducoes(df: pd.DataFrame) -> pd.DataFrame:
         """Filtra despesas com sinistros INCLUINDO deduções.
         
@@ -361,6 +512,61 @@ class ProcessadorDemonstracoes:
         Returns:
             DataFrame filtrado com sinistros e deduções
         """
+        df, mascara_principal, mascara_deducao = ProcessadorDemonstracoes._ordenar_e_marcar_sinistros(df)
+        indices_selecionados = ProcessadorDemonstracoes._selecionar_com_deducoes(mascara_principal, mascara_deducao)
+        
+        df_resultado = df.loc[sorted(indices_selecionados)]
+        logger.info(f"Sinistros com deduções: {len(df_resultado)} registros")
+        return df_resultado
+    
+    @staticmethod
+    @rastrear()
+    def filtrar_sinistros_com_deducoes_particao(df: pd.DataFrame) -> Tuple[pd.DataFrame, pd.Series, bool, bool]:
+        """Filtra sinistros com deduções de uma partição (um trimestre) da consolidação.
+        
+        Como as deduções são as linhas *seguintes* à principal na ordenação global,
+        uma cadeia pode atravessar o limite entre partições: as deduções iniciais de
+        uma partição pertencem ao resultado quando a partição anterior termina em
+        uma linha selecionada. Por isso elas também são devolvidas, marcadas.
+        
+        Args:
+            df: DataFrame da partição (deve ter: descricao, cd_conta_contabil)
+            
+        Returns:
+            Tupla (df_resultado, deducao_inicial, termina_em_cadeia, apenas_deducoes):
+            - df_resultado: linhas selecionadas + deduções iniciais não selecionadas, em ordem
+            - deducao_inicial: máscara (alinhada a df_resultado) das deduções iniciais
+              que só entram se a partição anterior terminar em cadeia
+            - termina_em_cadeia: a última linha da partição está selecionada
+            - apenas_deducoes: todas as linhas são deduções (a cadeia da partição
+              anterior atravessa a partição inteira)
+        """
+        df, mascara_principal, mascara_deducao = ProcessadorDemonstracoes._ordenar_e_marcar_sinistros(df)
+        indices_selecionados = ProcessadorDemonstracoes._selecionar_com_deducoes(mascara_principal, mascara_deducao)
+        
+        # Deduções do início da partição que nenhuma principal da própria partição alcançou
+        nao_deducao = np.flatnonzero(~mascara_deducao.to_numpy())
+        qtd_iniciais = int(nao_deducao[0]) if len(nao_deducao) else len(df)
+        deducoes_iniciais = set(range(qtd_iniciais)) - indices_selecionados
+        
+        indices = sorted(indices_selecionados | deducoes_iniciais)
+        df_resultado = df.loc[indices]
+        deducao_inicial = pd.Series([i in deducoes_iniciais for i in indices], index=df_resultado.index, dtype=bool)
+        termina_em_cadeia = (len(df) - 1) in indices_selecionados
+        
+        logger.info(
+            f"Sinistros com deduções (partição): {len(indices_selecionados)} registros "
+            f"+ {len(deducoes_iniciais)} deduções iniciais"
+        )
+        return df_resultado, deducao_inicial, termina_em_cadeia, qtd_iniciais == len(df)
+    
+    @staticmethod
+    def _ordenar_e_marcar_sinistros(df: pd.DataFrame):
+        """Ordena por ano, trimestre, reg_ans, cd_conta_contabil e marca linhas principais/deduções.
+        
+        Returns:
+            Tupla (df ordenado com índice 0..n-1, máscara principal, máscara dedução)
+        """
         # ORDENAR por ano, trimestre, reg_ans e cd_conta_contabil (CRÍTICO!)
         colunas_ordenacao = []
         if 'ano' in df.columns:
@@ -394,14 +600,19 @@ class ProcessadorDemonstracoes:
                          (cd_conta_str.str.len() == 9) & \
                          (cd_conta_str.str.startswith('4'))
         
+        return df, mascara_principal, mascara_deducao
+    
+    @staticmethod
+    def _selecionar_com_deducoes(mascara_principal: pd.Series, mascara_deducao: pd.Series) -> Set[int]:
+        """Índices das linhas principais e das deduções que as seguem imediatamente."""
         # Encontrar índices das linhas principais
-        indices_principais = df[mascara_principal].index.tolist()
+        indices_principais = mascara_principal[mascara_principal].index.tolist()
         indices_selecionados = set(indices_principais)
         
         # Para cada linha principal, adicionar deduções subsequentes
         for idx_principal in indices_principais:
             # Procurar deduções nas próximas linhas (parar quando encontrar linha que não é dedução)
-            for offset in range(1, len(df) - idx_principal):
+            for offset in range(1, len(mascara_deducao) - idx_principal):
                 idx_prox = idx_principal + offset
                 
                 # Se for dedução, adicionar
@@ -411,11 +622,10 @@ class ProcessadorDemonstracoes:
                     # Parar quando encontrar linha que não é dedução
                     break
         
-        df_resultado = df.loc[sorted(indices_selecionados)]
-        logger.info(f"Sinistros com deduções: {len(df_resultado)} registros")
-        return df_resultado
+        return indices_selecionados
     
     @staticmethod
+    @rastrear()
     def filtrar_sinistros_sem_deducoes(df: pd.DataFrame) -> pd.DataFrame:
         """Filtra despesas com sinistros SEM deduções (apenas linhas principais).
         
@@ -5,7 +5,12 @@ antes do processamento em lotes ou consolidação.
 """
 
 from typing import Dict, Tuple, List
+
+import numpy as np
+import pandas as pd
+
 from infraestrutura.logger import get_logger
+from domain.servicos.conversor_numero_br import ConversorNumeroBR
 
 logger = get_logger('ValidadorNormalizador')
 
@@ -13,6 +18,8 @@ logger = get_logger('ValidadorNormalizador')
 class ValidadorNormalizador:
     """Valida e normaliza dados para processamento."""
     
+    CAMPOS_OBRIGATORIOS = ['CD_CONTA_CONTABIL', 'VL_SALDO_FINAL', 'VL_SALDO_INICIAL']
+    
     @staticmethod
     def normalizar_numero(valor, campo: str = None, contexto: str = None) -> float:
         """Normaliza valores numéricos de string para float.
@@ -109,7 +116,7 @@ class ValidadorNormalizador:
         Returns:
             bool indicando se o registro é válido
         """
-        campos_obrigatorios = ['CD_CONTA_CONTABIL', 'VL_SALDO_FINAL', 'VL_SALDO_INICIAL']
+        campos_obrigatorios = ValidadorNormalizador.CAMPOS_OBRIGATORIOS
         campos_encontrados = [campo for campo in campos_obrigatorios if campo in registro]
         eh_valido = all(campo in registro for campo in campos_obrigatorios)
         
@@ -119,6 +126,24 @@ class ValidadorNormalizador:
         
         return eh_valido
     
+    @staticmethod
+    def validar_colunas_obrigatorias(colunas) -> bool:
+        """Versão colunar de validar_registro: checa as colunas uma única vez.
+        
+        Como validar_registro só verifica a presença dos campos, todos os
+        registros de um DataFrame são válidos ou inválidos juntos.
+        
+        Args:
+            colunas: Colunas do DataFrame
+        
+        Returns:
+            bool indicando se os registros do DataFrame são válidos
+        """
+        campos_faltantes = [campo for campo in ValidadorNormalizador.CAMPOS_OBRIGATORIOS if campo not in colunas]
+        if campos_faltantes:
+            logger.warning(f"Registros inválidos: campos faltantes {campos_faltantes}")
+        return not campos_faltantes
+    
     @staticmethod
     def calcular_valor_arquivo(dados: List[Dict]) -> float:
         """Calcula o valor total (VL_SALDO_FINAL - VL_SALDO_INICIAL).
@@ -126,28 +151,73 @@ class ValidadorNormalizador:
         Args:
             dados: Lista de dicionários com dados dos registros
         
+        Returns:
+            Float com valor total calculado
+        """
+        if not dados:
+            return 0.0
+        # dtype object preserva None (conta como 0) separado de NaN (propaga)
+        saldos = [
+            (registro.get('VL_SALDO_FINAL', 0), registro.get('VL_SALDO_INICIAL', 0))
+            for registro in dados
+        ]
+        return ValidadorNormalizador.calcular_valor_dataframe(
+            pd.DataFrame(saldos, columns=['VL_SALDO_FINAL', 'VL_SALDO_INICIAL'], dtype=object)
+        )
+    
+    @staticmethod
+    def converter_saldo(valor) -> float:
+        """Converte um saldo como o cálculo por registro (levanta exceção se inválido).
+        
+        Vazios (None, '', 0) contam como 0 e NaN é mantido, propagando para o total.
+        """
+        if isinstance(valor, str):
+            valor = float(valor.replace('.', '').replace(',', '.')) if valor else 0
+        return float(valor or 0)
+    
+    @staticmethod
+    def calcular_valor_dataframe(df: pd.DataFrame) -> float:
+        """Calcula o valor total (VL_SALDO_FINAL - VL_SALDO_INICIAL) de um DataFrame.
+        
+        Mesmo resultado da soma por registro: colunas ausentes contam como 0,
+        registros com valor inválido são ignorados e um saldo NaN torna o total NaN.
+        
+        Args:
+            df: DataFrame com os registros
+        
         Returns:
             Float com valor total calculado
         """
         try:
-            valor_total = 0.0
-            for registro in dados:
-                try:
-                    vl_final = registro.get('VL_SALDO_FINAL', 0)
-                    vl_inicial = registro.get('VL_SALDO_INICIAL', 0)
-                    
-                    # Converter para numérico se necessário
-                    if isinstance(vl_final, str):
-                        vl_final = float(vl_final.replace('.', '').replace(',', '.')) if vl_final else 0
-                    if isinstance(vl_inicial, str):
-                        vl_inicial = float(vl_inicial.replace('.', '').replace(',', '.')) if vl_inicial else 0
-                    
-                    valor_total += (float(vl_final or 0) - float(vl_inicial or 0))
-                except Exception as e:
-                    logger.debug(f"Erro ao calcular valor de registro: {e}")
+            if df.empty:
+                return 0.0
+            
+            colunas = {}
+            invalidos = np.zeros(len(df), dtype=bool)
+            for coluna in ['VL_SALDO_FINAL', 'VL_SALDO_INICIAL']:
+                if coluna not in df.columns:
+                    colunas[coluna] = np.zeros(len(df))
                     continue
+                
+                serie = df[coluna]
+                valores = ConversorNumeroBR.parse_serie(serie).to_numpy(dtype='float64', copy=True)
+                # Fora das colunas numéricas do numpy (onde NaN só pode vir de NaN), nulos e
+                # textos não convertidos (poucos) passam pela conversão por registro, que
+                # separa vazio (0), NaN e valor inválido
+                if not (isinstance(serie.dtype, np.dtype) and serie.dtype.kind in 'biuf'):
+                    for posicao in np.flatnonzero(np.isnan(valores)):
+                        try:
+                            valores[posicao] = ValidadorNormalizador.converter_saldo(serie.iat[posicao])
+                        except Exception:
+                            invalidos[posicao] = True
+                colunas[coluna] = valores
+            
+            if invalidos.any():
+                logger.debug(f"Erro ao calcular valor de {int(invalidos.sum())} registro(s): valor inválido")
             
-            return valor_total
+            diferencas = (colunas['VL_SALDO_FINAL'] - colunas['VL_SALDO_INICIAL'])[~invalidos]
+            # Soma sequencial (mesma ordem de arredondamento do acumulador por registro)
+            return sum(diferencas.tolist(), 0.0)
         except Exception as e:
             logger.error(f"Erro ao calcular valor do arquivo: {e}")
             return 0.0
@@ -169,9 +239,13 @@ class ValidadorNormalizador:
         resultado = {}
         for col in colunas_numericas:
             if col in df.columns:
-                resultado[col] = df[col].apply(
-                    lambda x: ValidadorNormalizador.normalizar_numero(x)
-                    if x is not None else None
-                )
+                resultado[col] = ConversorNumeroBR.parse_serie(df[col])
+                
+                invalidos = resultado[col].isna() & df[col].notna()
+                if invalidos.any():
+                    logger.warning(
+                        f"Erro na normalização numérica (campo={col}): "
+                        f"{int(invalidos.sum())} valor(es) inválido(s)"
+                    )
         
         return resultado
@@ -0,0 +1,228 @@
+"""Cache em disco de arquivos derivados, com limite de tamanho e remoção LRU.
+
+Usado para os CSVs gerados por GeradorConsolidados (GeradorConsolidados.cache()),
+que podem ser recriados a qualquer momento a partir das entradas:
+- Chaves montadas a partir do hash do DataFrame de entrada (bytes das colunas,
+  xxh3/blake2b) e dos parâmetros da geração
+- Gravação atômica (.tmp no próprio diretório + os.replace)
+- Limite total em bytes: ao passar do limite, as entradas usadas há mais tempo
+  (mtime, atualizado a cada acerto) são removidas
+- Contadores de acertos/falhas/gravações/remoções
+
+Os demais arquivos persistentes do estágio não passam por aqui porque não são
+descartáveis, e a remoção LRU (ou o nome derivado da chave) os quebraria:
+- Partições por trimestre (ParticoesConsolidado): estado da consolidação
+  incremental, referenciado pelo manifesto de linhagem em diretorio_destino
+- Dimensão de operadoras (DimensaoOperadoras): handoff lido pelo estágio 2 em
+  um caminho fixo, com as impressões digitais das fontes nos metadados
+- Índice de cobertura (IndiceCobertura): um único JSON atualizado a cada
+  extração, por arquivo, e não uma entrada por chave
+Todos já gravam de forma atômica (.tmp + os.replace), como este cache.
+"""
+
+import hashlib
+import os
+import shutil
+import tempfile
+import threading
+import time
+from typing import BinaryIO, Callable, Dict, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+from config import DIRETORIO_CACHE, CACHE_LIMITE_MB
+from infraestrutura.logger import get_logger
+
+logger = get_logger('CacheDisco')
+
+
+def _novo_hash():
+    """xxhash (se instalado) ou blake2b: ambos bem mais rápidos que md5/sha256."""
+    try:
+        import xxhash
+        return xxhash.xxh3_128()
+    except ImportError:
+        return hashlib.blake2b(digest_size=16)
+
+
+class CacheDisco:
+    """Cache em disco com chave por impressão digital, limite de tamanho e LRU."""
+
+    EXTENSAO = '.cache'
+    # Temporários órfãos (processo interrompido no meio da gravação) mais velhos que isso são apagados
+    IDADE_MAXIMA_TMP = 3600
+
+    def __init__(self, diretorio: str = DIRETORIO_CACHE, limite_bytes: int = CACHE_LIMITE_MB * 1024 * 1024):
+        self.diretorio = diretorio
+        self.limite_bytes = limite_bytes
+        self.acertos = 0
+        self.falhas = 0
+        self.gravacoes = 0
+        self.remocoes = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def fingerprint_bytes(dados: bytes) -> str:
+        """Hash do conteúdo (xxh3/blake2b)."""
+        h = _novo_hash()
+        h.update(dados)
+        return h.hexdigest()
+
+    @staticmethod
+    def fingerprint_dataframe(df: pd.DataFrame) -> str:
+        """Hash do conteúdo do DataFrame, coluna a coluna (sem o índice).
+
+        Colunas numéricas entram pelos bytes do array (sem hash linha a linha);
+        category pelos códigos + categorias; só colunas de texto/objeto passam
+        por hash_pandas_object.
+        """
+        h = _novo_hash()
+        h.update(f"{len(df)}|{list(df.columns)}".encode('utf-8'))
+        for coluna in df.columns:
+            serie = df[coluna]
+            h.update(f"|{coluna}:{serie.dtype}".encode('utf-8'))
+            if isinstance(serie.dtype, pd.CategoricalDtype):
+                h.update(pd.util.hash_pandas_object(serie.cat.categories, index=False).to_numpy().tobytes())
+                h.update(np.ascontiguousarray(serie.cat.codes.to_numpy()).tobytes())
+            elif isinstance(serie.dtype, np.dtype) and serie.dtype.kind in 'biufcmM':
+                h.update(np.ascontiguousarray(serie.to_numpy()).tobytes())
+            else:
+                h.update(pd.util.hash_pandas_object(serie, index=False).to_numpy().tobytes())
+        return h.hexdigest()
+
+    @staticmethod
+    def chave(*partes) -> str:
+        """Chave do cache a partir de impressões digitais e parâmetros."""
+        return CacheDisco.fingerprint_bytes('|'.join(map(str, partes)).encode('utf-8'))
+
+    def caminho(self, chave: str) -> str:
+        return os.path.join(self.diretorio, chave + self.EXTENSAO)
+
+    def obter(self, chave: str) -> Optional[str]:
+        """Caminho da entrada em cache (None se ausente); marca a entrada como usada."""
+        caminho = self.caminho(chave)
+        try:
+            os.utime(caminho)
+        except FileNotFoundError:
+            self._contar('falhas')
+            return None
+        self._contar('acertos')
+        return caminho
+
+    def restaurar(self, chave: str, destino: str) -> bool:
+        """Copia a entrada em cache para o destino.
+
+        Returns:
+            True em caso de acerto; False se a entrada não existe (ou foi removida)
+        """
+        caminho = self.obter(chave)
+        if caminho is None:
+            return False
+        try:
+            shutil.copyfile(caminho, destino)
+            return True
+        except FileNotFoundError:
+            # Removida por outro processo entre obter() e a cópia
+            with self._lock:
+                self.acertos -= 1
+                self.falhas += 1
+            return False
+
+    def gravar(self, chave: str, fonte: Union[str, Callable[[BinaryIO], None]]) -> Optional[str]:
+        """Grava uma entrada (atômica) e aplica o limite de tamanho.
+
+        Args:
+            chave: Chave da entrada
+            fonte: Caminho de um arquivo a copiar ou função que escreve os bytes
+
+        Returns:
+            Caminho da entrada, ou None se ela sozinha excede o limite
+        """
+        os.makedirs(self.diretorio, exist_ok=True)
+        descritor, caminho_tmp = tempfile.mkstemp(dir=self.diretorio, suffix='.tmp')
+        try:
+            with os.fdopen(descritor, 'wb') as destino:
+                if isinstance(fonte, str):
+                    with open(fonte, 'rb') as origem:
+                        shutil.copyfileobj(origem, destino, 1024 * 1024)
+                else:
+                    fonte(destino)
+            caminho = self.caminho(chave)
+            os.replace(caminho_tmp, caminho)
+        except BaseException:
+            if os.path.exists(caminho_tmp):
+                os.remove(caminho_tmp)
+            raise
+
+        self._contar('gravacoes')
+        if os.path.getsize(caminho) > self.limite_bytes:
+            logger.debug(f"Entrada maior que o limite do cache, descartada: {chave}")
+            self._remover(caminho)
+            return None
+
+        self._aplicar_limite()
+        return caminho
+
+    def estatisticas(self) -> Dict:
+        """Contadores da instância e ocupação atual do diretório."""
+        entradas = self._listar_entradas()
+        return {
+            'acertos': self.acertos,
+            'falhas': self.falhas,
+            'gravacoes': self.gravacoes,
+            'remocoes': self.remocoes,
+            'entradas': len(entradas),
+            'bytes': sum(tamanho for _, tamanho, _ in entradas),
+            'limite_bytes': self.limite_bytes,
+        }
+
+    def limpar(self) -> None:
+        """Remove todas as entradas do cache."""
+        for caminho, _, _ in self._listar_entradas():
+            self._remover(caminho)
+
+    def _listar_entradas(self):
+        """Lista (caminho, tamanho, mtime) das entradas; apaga temporários órfãos."""
+        entradas = []
+        try:
+            itens = list(os.scandir(self.diretorio))
+        except FileNotFoundError:
+            return entradas
+
+        agora = time.time()
+        for item in itens:
+            try:
+                info = item.stat()
+                if item.name.endswith(self.EXTENSAO):
+                    entradas.append((item.path, info.st_size, info.st_mtime))
+                elif item.name.endswith('.tmp') and agora - info.st_mtime > self.IDADE_MAXIMA_TMP:
+                    os.remove(item.path)
+            except FileNotFoundError:
+                # Removida por outro processo durante a listagem
+                continue
+        return entradas
+
+    def _aplicar_limite(self) -> None:
+        """Remove as entradas usadas há mais tempo até caber no limite."""
+        entradas = self._listar_entradas()
+        total = sum(tamanho for _, tamanho, _ in entradas)
+        if total <= self.limite_bytes:
+            return
+
+        for caminho, tamanho, _ in sorted(entradas, key=lambda entrada: entrada[2]):
+            if total <= self.limite_bytes:
+                break
+            self._remover(caminho)
+            total -= tamanho
+
+    def _remover(self, caminho: str) -> None:
+        try:
+            os.remove(caminho)
+        except FileNotFoundError:
+            return
+        self._contar('remocoes')
+
+    def _contar(self, contador: str) -> None:
+        with self._lock:
+            setattr(self, contador, getattr(self, contador) + 1)
@@ -5,10 +5,19 @@ import zipfile
 import shutil
 from typing import List
 
+from infraestrutura.indice_cobertura import IndiceCobertura
+
 
 class GerenciadorArquivos:
     """Gerencia operações com arquivos locais (extração, listagem, etc)."""
     
+    def __init__(self, indice_cobertura: IndiceCobertura = None):
+        """
+        Args:
+            indice_cobertura: Se informado, os CSVs extraídos são registrados nele
+        """
+        self.indice_cobertura = indice_cobertura
+    
     def extrair_zips(self, diretorio: str) -> None:
         """Extrai todos os arquivos ZIP em um diretório.
         
@@ -24,7 +33,7 @@ class GerenciadorArquivos:
             return
         
         # Primeiro, copiar CSVs de operadoras
-        self._copiar_csvs_operadoras(diretorio)
+        self.copiar_csvs_operadoras(diretorio)
         
         # Depois, extrair ZIPs
         arquivos_zip = [f for f in os.listdir(diretorio) if f.endswith('.zip')]
@@ -37,17 +46,40 @@ class GerenciadorArquivos:
         print(f"  Extraindo {len(arquivos_zip)} arquivos ZIP...")
         
         for arquivo_zip in arquivos_zip:
-            caminho_zip = os.path.join(diretorio, arquivo_zip)
-            diretorio_extracao = os.path.join(diretorio, 'extracted')
-            
             try:
-                with zipfile.ZipFile(caminho_zip, 'r') as zip_ref:
-                    zip_ref.extractall(diretorio_extracao)
+                self.extrair_zip(os.path.join(diretorio, arquivo_zip))
                 print(f"    [OK] {arquivo_zip}")
             except Exception as e:
                 print(f"    [ERRO] Erro ao extrair {arquivo_zip}: {e}")
     
-    def _copiar_csvs_operadoras(self, diretorio: str) -> None:
+    def extrair_zip(self, caminho_zip: str) -> List[str]:
+        """Extrai um único ZIP para a pasta /extracted ao lado dele.
+        
+        Args:
+            caminho_zip: Caminho do arquivo ZIP
+            
+        Returns:
+            Caminhos dos CSVs extraídos na raiz de /extracted (os que a
+            consolidação lê)
+        """
+        diretorio_extracao = os.path.join(os.path.dirname(caminho_zip), 'extracted')
+        
+        with zipfile.ZipFile(caminho_zip, 'r') as zip_ref:
+            zip_ref.extractall(diretorio_extracao)
+            nomes = zip_ref.namelist()
+        
+        if self.indice_cobertura is not None:
+            self.indice_cobertura.registrar(
+                os.path.join(diretorio_extracao, nome) for nome in nomes if nome.lower().endswith('.csv')
+            )
+        
+        return [
+            os.path.join(diretorio_extracao, nome)
+            for nome in nomes
+            if nome.endswith('.csv') and '/' not in nome
+        ]
+    
+    def copiar_csvs_operadoras(self, diretorio: str) -> None:
         """Copia CSVs de operadoras para a pasta /operadoras.
         
         Args:
@@ -0,0 +1,163 @@
+"""Gerenciador de checkpoints das cargas em lotes.
+
+Os checkpoints ficam em um journal append-only (uma linha JSON por
+atualização) em DIRETORIO_CHECKPOINTS:
+- Cada atualização é só um append (sem reescrever o arquivo inteiro)
+- fsync a cada N atualizações e sempre ao concluir/falhar um arquivo: após
+  uma queda a carga retoma do último fsync, então até N lotes podem ser
+  reinseridos (a inserção deve tolerar isso, ex: ON CONFLICT)
+- Na leitura vale a última entrada de cada arquivo; uma linha final truncada
+  (queda no meio do append) é ignorada
+- Ao abrir, o journal é compactado (uma entrada por arquivo) quando cresce demais
+"""
+
+import json
+import os
+import threading
+from typing import Dict, Optional
+
+from config import DIRETORIO_CHECKPOINTS
+from infraestrutura.logger import get_logger
+
+logger = get_logger('GerenciadorCheckpoint')
+
+
+class GerenciadorCheckpoint:
+    """Registra e recupera o progresso (último registro concluído) de cada arquivo."""
+
+    NOME_JOURNAL = 'checkpoints.jsonl'
+    # Status que encerram um arquivo: sempre gravados com fsync
+    STATUS_FINAIS = ('concluido', 'erro')
+    # Compactar ao abrir quando o journal tiver mais linhas que isso
+    LIMITE_LINHAS_COMPACTACAO = 10000
+
+    def __init__(self, diretorio: str = DIRETORIO_CHECKPOINTS, fsync_a_cada: int = 10):
+        self.diretorio = diretorio
+        self.caminho = os.path.join(diretorio, self.NOME_JOURNAL)
+        self.fsync_a_cada = max(1, fsync_a_cada)
+        self._pendentes_fsync = 0
+        self._lock = threading.Lock()
+
+        os.makedirs(diretorio, exist_ok=True)
+        self._descartar_linha_truncada()
+        self.checkpoints, linhas = self._ler_journal()
+        if linhas > self.LIMITE_LINHAS_COMPACTACAO:
+            self._compactar()
+        self._arquivo = open(self.caminho, 'a', encoding='utf-8')
+
+    def obter_checkpoint(self, arquivo: str) -> Optional[Dict]:
+        """Último checkpoint registrado para o arquivo (None se nunca processado)."""
+        return self.checkpoints.get(arquivo)
+
+    def registro_inicial(self, arquivo: str) -> int:
+        """Registro a partir do qual retomar o arquivo (0 se nunca processado)."""
+        checkpoint = self.obter_checkpoint(arquivo)
+        return checkpoint['registro'] if checkpoint else 0
+
+    def atualizar_checkpoint(
+        self,
+        arquivo: str,
+        registro: int,
+        status: str,
+        registros_processados: int = 0,
+        registros_erro: int = 0
+    ) -> None:
+        """Acrescenta uma entrada ao journal.
+
+        Args:
+            arquivo: Arquivo de origem da carga
+            registro: Registros [0, registro) já tratados
+            status: 'em_progresso', 'concluido' ou 'erro'
+            registros_processados: Registros inseridos até aqui
+            registros_erro: Registros com erro até aqui
+        """
+        entrada = {
+            'arquivo': arquivo,
+            'registro': registro,
+            'status': status,
+            'registros_processados': registros_processados,
+            'registros_erro': registros_erro,
+        }
+        with self._lock:
+            self._arquivo.write(json.dumps(entrada, ensure_ascii=False) + '\n')
+            self.checkpoints[arquivo] = entrada
+            self._pendentes_fsync += 1
+            if status in self.STATUS_FINAIS or self._pendentes_fsync >= self.fsync_a_cada:
+                self._sincronizar()
+
+    def sincronizar(self) -> None:
+        """Força o fsync das entradas pendentes."""
+        with self._lock:
+            self._sincronizar()
+
+    def fechar(self) -> None:
+        with self._lock:
+            if not self._arquivo.closed:
+                self._sincronizar()
+                self._arquivo.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        self.fechar()
+
+    def _sincronizar(self) -> None:
+        self._arquivo.flush()
+        os.fsync(self._arquivo.fileno())
+        self._pendentes_fsync = 0
+
+    def _descartar_linha_truncada(self) -> None:
+        """Remove a linha final sem quebra (append interrompido) antes de novos appends."""
+        if not os.path.exists(self.caminho):
+            return
+        with open(self.caminho, 'rb+') as f:
+            tamanho = f.seek(0, os.SEEK_END)
+            if tamanho == 0:
+                return
+            f.seek(tamanho - 1)
+            if f.read(1) == b'\n':
+                return
+            # Procurar o último '\n' de trás para frente, em blocos
+            fim = tamanho
+            while fim > 0:
+                inicio = max(0, fim - 65536)
+                f.seek(inicio)
+                bloco = f.read(fim - inicio)
+                posicao = bloco.rfind(b'\n')
+                if posicao >= 0:
+                    f.truncate(inicio + posicao + 1)
+                    break
+                fim = inicio
+            else:
+                f.truncate(0)
+        logger.warning("Última entrada do journal de checkpoints estava incompleta e foi descartada")
+
+    def _ler_journal(self):
+        """Reaplica o journal: (último checkpoint por arquivo, nº de linhas)."""
+        checkpoints = {}
+        linhas = 0
+        if not os.path.exists(self.caminho):
+            return checkpoints, linhas
+
+        with open(self.caminho, 'r', encoding='utf-8') as f:
+            for linha in f:
+                linhas += 1
+                try:
+                    entrada = json.loads(linha)
+                    checkpoints[entrada['arquivo']] = entrada
+                except (ValueError, KeyError):
+                    # Não deveria acontecer: a linha final truncada já foi descartada
+                    logger.warning(f"Entrada inválida no journal de checkpoints (linha {linhas}), ignorada")
+        return checkpoints, linhas
+
+    def _compactar(self) -> None:
+        """Reescreve o journal com uma entrada por arquivo (atômico: .tmp + os.replace)."""
+        caminho_tmp = f"{self.caminho}.tmp"
+        with open(caminho_tmp, 'w', encoding='utf-8') as f:
+            for entrada in self.checkpoints.values():
+                f.write(json.dumps(entrada, ensure_ascii=False) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(caminho_tmp, self.caminho)
+        logger.debug(f"Journal de checkpoints compactado: {len(self.checkpoints)} arquivos")
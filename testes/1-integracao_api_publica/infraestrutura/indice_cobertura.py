@@ -0,0 +1,172 @@
+"""Índice de cobertura trimestral dos CSVs baixados/extraídos.
+
+Para cada CSV guarda as datas mínima e máxima da coluna DATA, o número de
+linhas e quantas linhas caem em cada trimestre. O índice é atualizado à
+medida que os ZIPs são extraídos, e a verificação de lacunas consulta o
+índice em vez de reler todos os CSVs:
+- Um arquivo só é lido (apenas a coluna DATA) quando é novo ou mudou
+  (tamanho/mtime diferentes do registrado)
+- Arquivos sem coluna DATA ou ilegíveis também ficam registrados (sem
+  trimestres), para não serem relidos a cada consulta
+- Gravação atômica em JSON (.tmp + os.replace)
+"""
+
+import json
+import os
+import threading
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+import pandas as pd
+
+from config import DIRETORIO_DOWNLOADS
+from infraestrutura.logger import get_logger
+
+logger = get_logger('IndiceCobertura')
+
+
+class IndiceCobertura:
+    """Registra, por arquivo, quais trimestres a coluna DATA cobre."""
+
+    NOME_ARQUIVO = 'indice_cobertura.json'
+    VERSAO = 1
+    # Formatos aceitos na coluna DATA (o segundo só para o que o primeiro não reconheceu)
+    FORMATOS_DATA = ('%d/%m/%Y', '%Y-%m-%d')
+
+    def __init__(self, diretorio: str = DIRETORIO_DOWNLOADS):
+        self.caminho = os.path.join(diretorio, self.NOME_ARQUIVO)
+        self._lock = threading.Lock()
+        self.arquivos = self._ler()
+
+    def registrar(self, caminhos: Iterable[str]) -> None:
+        """Indexa os CSVs novos ou alterados (os demais só passam por um stat)."""
+        alterado = False
+        for caminho in caminhos:
+            caminho = os.path.abspath(caminho)
+            try:
+                info = os.stat(caminho)
+            except FileNotFoundError:
+                continue
+
+            with self._lock:
+                entrada = self.arquivos.get(caminho)
+            if entrada and entrada['tamanho'] == info.st_size and entrada['mtime_ns'] == info.st_mtime_ns:
+                continue
+
+            entrada = self._indexar(caminho)
+            entrada.update({'tamanho': info.st_size, 'mtime_ns': info.st_mtime_ns})
+            with self._lock:
+                self.arquivos[caminho] = entrada
+            alterado = True
+
+        if alterado:
+            self._gravar()
+
+    def atualizar(self, diretorio: str) -> None:
+        """Sincroniza o índice com os CSVs do diretório (recursivo).
+
+        Indexa os arquivos novos/alterados e remove do índice os que não
+        existem mais dentro do diretório.
+        """
+        base = os.path.abspath(diretorio)
+        existentes = set()
+        for raiz, _, nomes in os.walk(base):
+            existentes.update(os.path.join(raiz, nome) for nome in nomes if nome.lower().endswith('.csv'))
+
+        with self._lock:
+            removidos = [
+                caminho for caminho in self.arquivos
+                if caminho.startswith(base + os.sep) and caminho not in existentes
+            ]
+            for caminho in removidos:
+                del self.arquivos[caminho]
+        if removidos:
+            self._gravar()
+
+        self.registrar(sorted(existentes))
+
+    def trimestres_cobertos(self) -> Set[Tuple[int, int]]:
+        """Trimestres (ano, número) com ao menos uma linha em algum arquivo indexado."""
+        with self._lock:
+            entradas = list(self.arquivos.values())
+        return {
+            self._chave_para_trimestre(chave)
+            for entrada in entradas
+            for chave in entrada['trimestres']
+        }
+
+    def arquivos_do_trimestre(self, ano: int, numero: int) -> List[str]:
+        """Arquivos indexados com linhas do trimestre."""
+        chave = f"{ano}/{numero}T"
+        with self._lock:
+            return sorted(caminho for caminho, entrada in self.arquivos.items() if chave in entrada['trimestres'])
+
+    def entrada(self, caminho: str) -> Optional[Dict]:
+        """Registro de um arquivo: data_min, data_max, linhas e {trimestre: linhas}."""
+        with self._lock:
+            return self.arquivos.get(os.path.abspath(caminho))
+
+    def _indexar(self, caminho: str) -> Dict:
+        """Lê só a coluna DATA do CSV e resume a cobertura por trimestre."""
+        entrada = {'linhas': 0, 'data_min': None, 'data_max': None, 'trimestres': {}}
+        try:
+            df = pd.read_csv(
+                caminho,
+                sep=';',
+                encoding='utf-8-sig',
+                usecols=lambda coluna: coluna.strip().upper() == 'DATA',
+                dtype=str
+            )
+        except Exception as e:
+            logger.debug(f"Erro ao indexar {caminho}: {e}")
+            return entrada
+
+        entrada['linhas'] = len(df)
+        if df.columns.empty:
+            return entrada
+
+        datas = self._converter_datas(df.iloc[:, 0])
+        datas = datas[datas.notna()]
+        if datas.empty:
+            return entrada
+
+        entrada['data_min'] = datas.min().strftime('%Y-%m-%d')
+        entrada['data_max'] = datas.max().strftime('%Y-%m-%d')
+        contagens = (datas.dt.year * 10 + datas.dt.quarter).value_counts().sort_index()
+        entrada['trimestres'] = {f"{chave // 10}/{chave % 10}T": int(linhas) for chave, linhas in contagens.items()}
+        return entrada
+
+    def _converter_datas(self, serie: pd.Series) -> pd.Series:
+        datas = pd.to_datetime(serie, format=self.FORMATOS_DATA[0], errors='coerce')
+        for formato in self.FORMATOS_DATA[1:]:
+            faltantes = datas.isna() & serie.notna()
+            if not faltantes.any():
+                break
+            datas[faltantes] = pd.to_datetime(serie[faltantes], format=formato, errors='coerce')
+        return datas
+
+    @staticmethod
+    def _chave_para_trimestre(chave: str) -> Tuple[int, int]:
+        ano, trimestre = chave.split('/')
+        return int(ano), int(trimestre[0])
+
+    def _ler(self) -> Dict:
+        if not os.path.exists(self.caminho):
+            return {}
+        try:
+            with open(self.caminho, 'r', encoding='utf-8') as f:
+                dados = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Índice de cobertura ilegível, será refeito: {e}")
+            return {}
+        if dados.get('versao') != self.VERSAO:
+            return {}
+        return dados.get('arquivos', {})
+
+    def _gravar(self) -> None:
+        """Grava o índice (atômico: .tmp + os.replace)."""
+        os.makedirs(os.path.dirname(self.caminho), exist_ok=True)
+        caminho_tmp = f"{self.caminho}.tmp"
+        with self._lock:
+            with open(caminho_tmp, 'w', encoding='utf-8') as f:
+                json.dump({'versao': self.VERSAO, 'arquivos': self.arquivos}, f, ensure_ascii=False)
+            os.replace(caminho_tmp, self.caminho)
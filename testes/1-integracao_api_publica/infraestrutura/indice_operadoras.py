@@ -0,0 +1,154 @@
+"""Índice em memória das operadoras (ativas + canceladas) por REG_ANS.
+
+Carrega os dois CSVs uma única vez e resolve cada registro com as mesmas
+regras da busca por arquivo:
+- Um único registro em uma das tabelas: LOCALIZADO_ATIVA / LOCALIZADO_CANCELADA
+- Mais de um registro (nas duas tabelas ou repetido em uma): CONFLITO
+- Nenhum: NAO_LOCALIZADO
+
+A consulta é um acesso a dicionário (O(1)), ou um único reindex para um
+lote de registros; antes dela só o tamanho/mtime dos CSVs é conferido, e o
+índice é refeito apenas quando um deles mudou. O novo índice é montado à
+parte e publicado com uma única atribuição sob o lock; as consultas leem uma
+vez essa referência e nunca misturam tabelas de carregamentos diferentes.
+"""
+
+import os
+import threading
+from typing import Dict, Iterable, Optional, Tuple, Union
+
+import pandas as pd
+
+from infraestrutura.logger import get_logger
+
+logger = get_logger('IndiceOperadoras')
+
+
+class IndiceOperadoras:
+    """Consulta de operadoras por REG_ANS com recarga quando os CSVs mudam."""
+
+    CAMPOS = ['cnpj', 'razao_social', 'modalidade', 'uf']
+    # Coluna do CSV normalizado -> campo do resultado
+    COLUNAS_CSV = {'CNPJ': 'cnpj', 'RAZAO_SOCIAL': 'razao_social', 'MODALIDADE': 'modalidade', 'UF': 'uf'}
+
+    def __init__(self, arquivo_ativas: str, arquivo_canceladas: str):
+        self.arquivos = (('ATIVA', arquivo_ativas), ('CANCELADA', arquivo_canceladas))
+        self._lock = threading.Lock()
+        self._assinatura = None
+        # (tabela resolvida, dados por registro, total de linhas dos registros em conflito)
+        self._dados: Tuple[pd.DataFrame, Dict[str, Dict], Dict[str, int]] = (self._tabela_vazia(), {}, {})
+
+    @classmethod
+    def _tabela_vazia(cls) -> pd.DataFrame:
+        return pd.DataFrame(columns=cls.CAMPOS + ['status'], index=pd.Index([], name='registro', dtype=object))
+
+    @staticmethod
+    def normalizar_registro(registro) -> str:
+        return str(registro).strip()
+
+    def obter(self, registro) -> Dict:
+        """Dados da operadora pelo registro (mesmo contrato de RepositorioOperadoras.obter_operadora)."""
+        registro = self.normalizar_registro(registro)
+        self._recarregar_se_mudou()
+        _, por_registro, total_registros = self._dados
+
+        resultado = {'registro': registro}
+        encontrada = por_registro.get(registro)
+        if encontrada is not None:
+            resultado.update(encontrada)
+            if encontrada['status'] == 'CONFLITO':
+                logger.warning(
+                    f"Múltiplos registros encontrados para operadora - "
+                    f"Registro: {registro}, Total: {total_registros[registro]}"
+                )
+            return resultado
+
+        resultado.update(dict.fromkeys(self.CAMPOS, 'N/L'))
+        resultado['status'] = 'NAO_LOCALIZADO'
+        logger.warning(f"Operadora não localizada - Registro: {registro}")
+        return resultado
+
+    def obter_varios(self, registros: Union[pd.Series, Iterable]) -> pd.DataFrame:
+        """Resolve um lote de registros de uma vez (mesmas regras de obter).
+
+        Args:
+            registros: Series, array ou lista de registros (repetições permitidas)
+
+        Returns:
+            DataFrame com registro, cnpj, razao_social, modalidade, uf e status,
+            uma linha por registro de entrada (mesma ordem e, para Series, mesmo índice)
+        """
+        self._recarregar_se_mudou()
+
+        serie = registros if isinstance(registros, pd.Series) else pd.Series(list(registros), dtype=object)
+        chaves = serie.astype(str).str.strip()
+
+        resultado = self._dados[0].reindex(chaves.to_numpy())
+        nao_localizados = resultado['status'].isna().to_numpy()
+        if nao_localizados.any():
+            resultado.loc[nao_localizados, self.CAMPOS] = 'N/L'
+            resultado.loc[nao_localizados, 'status'] = 'NAO_LOCALIZADO'
+
+        resultado = resultado.reset_index()
+        resultado.index = serie.index
+
+        # Um aviso por lote (e não por linha) para registros não localizados/em conflito
+        conflitos = (resultado['status'] == 'CONFLITO').to_numpy()
+        if nao_localizados.any() or conflitos.any():
+            logger.warning(
+                f"Operadoras não localizadas: {resultado.loc[nao_localizados, 'registro'].nunique()} registros; "
+                f"em conflito: {resultado.loc[conflitos, 'registro'].nunique()} registros"
+            )
+        return resultado
+
+    def _recarregar_se_mudou(self) -> None:
+        assinatura = tuple(self._assinatura_arquivo(caminho) for _, caminho in self.arquivos)
+        if assinatura == self._assinatura:
+            return
+        with self._lock:
+            if assinatura != self._assinatura:
+                self._dados = self._carregar()
+                self._assinatura = assinatura
+
+    @staticmethod
+    def _assinatura_arquivo(caminho: str) -> Optional[Tuple[int, int]]:
+        try:
+            info = os.stat(caminho)
+        except FileNotFoundError:
+            return None
+        return info.st_mtime_ns, info.st_size
+
+    def _carregar(self) -> Tuple[pd.DataFrame, Dict[str, Dict], Dict[str, int]]:
+        """Lê os dois CSVs e monta a tabela resolvida (uma linha por registro) e os dicionários de consulta."""
+        partes = []
+        for tipo, caminho in self.arquivos:
+            if not os.path.exists(caminho):
+                continue
+            try:
+                df = pd.read_csv(caminho, sep=';', encoding='utf-8', dtype=str, keep_default_na=False)
+                parte = pd.DataFrame({'registro': df['REG_ANS'].str.strip()})
+                for coluna, campo in self.COLUNAS_CSV.items():
+                    parte[campo] = df[coluna] if coluna in df.columns else ''
+                parte['status'] = f"LOCALIZADO_{tipo}"
+                partes.append(parte)
+            except Exception as e:
+                logger.error(f"Erro ao carregar operadoras {tipo.lower()}s: {str(e)}")
+
+        if not partes:
+            return self._tabela_vazia(), {}, {}
+
+        tabela = pd.concat(partes, ignore_index=True)
+        totais = tabela['registro'].value_counts()
+        conflitos = totais[totais > 1]
+
+        unicas = tabela[~tabela['registro'].isin(conflitos.index)].set_index('registro')
+        em_conflito = pd.DataFrame('CONFLITO', index=conflitos.index, columns=self.CAMPOS + ['status'])
+        resolvidas = pd.concat([unicas, em_conflito])
+        resolvidas.index.name = 'registro'
+        por_registro = resolvidas.to_dict('index')
+
+        logger.debug(
+            f"Índice de operadoras carregado: {len(por_registro)} registros "
+            f"({len(conflitos)} em conflito)"
+        )
+        return resolvidas, por_registro, conflitos.to_dict()
@@ -0,0 +1,225 @@
+"""Perfil de memória por etapa (opcional: PERFIL_MEMORIA=True).
+
+Mede cada etapa demarcada por rastreador.trecho (categoria 'etapa') com:
+- tracemalloc: pico e variação da memória alocada pelo Python na etapa e
+  os pontos do código que mais alocaram (diferença entre snapshots)
+- RSS do processo, amostrado por uma thread a cada INTERVALO_AMOSTRAGEM
+  (inclui buffers nativos de numpy/pyarrow, que o tracemalloc não vê)
+
+Ao fim de cada etapa uma linha vai para o log (e portanto para o log da
+sessão gravado no ZIP de saída, para as etapas que terminam antes dele);
+registrar_resumo(), chamado antes de gravar o ZIP, registra o resumo das
+etapas concluídas até ali.
+
+Limitações:
+- Só as etapas da thread que chamou iniciar() são medidas (as threads do
+  pipeline rodam em paralelo e embaralhariam a atribuição)
+- Processos filhos (ProcessPoolExecutor) não entram nas medidas
+- tracemalloc deixa a execução bem mais lenta: usar só para investigar
+
+O estágio 2 tem uma cópia (domain/servicos/perfil_memoria.py) que recebe o
+logger em iniciar(); tests/test_modulos_espelhados.py compara as duas.
+"""
+
+import os
+import threading
+import time
+import tracemalloc
+from typing import Dict, List, Optional
+
+from infraestrutura.logger import get_logger
+
+logger = get_logger('PerfilMemoria')
+
+MB = 1024 * 1024
+
+
+def _rss_atual() -> Optional[int]:
+    """RSS do processo em bytes (psutil, /proc ou None se indisponível)."""
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss
+    except ImportError:
+        pass
+    try:
+        with open('/proc/self/statm', 'r') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+class _AmostradorRSS(threading.Thread):
+    """Lê o RSS periodicamente e guarda o maior valor desde o último reinício."""
+
+    def __init__(self, intervalo: float):
+        super().__init__(name='perfil-memoria-rss', daemon=True)
+        self.intervalo = intervalo
+        self.parar = threading.Event()
+        self._lock = threading.Lock()
+        self.pico = _rss_atual() or 0
+
+    def run(self) -> None:
+        while not self.parar.wait(self.intervalo):
+            self.amostrar()
+
+    def amostrar(self) -> int:
+        rss = _rss_atual() or 0
+        with self._lock:
+            self.pico = max(self.pico, rss)
+        return rss
+
+    def reiniciar_pico(self) -> int:
+        """Zera o pico (passa a ser o RSS atual) e devolve o pico anterior."""
+        rss = _rss_atual() or 0
+        with self._lock:
+            anterior, self.pico = max(self.pico, rss), rss
+        return anterior
+
+
+class PerfilMemoria:
+    """Pico/variação de memória por etapa e pontos que mais alocaram."""
+
+    INTERVALO_AMOSTRAGEM = 0.05
+    TOP_ALOCACOES = 5
+    # Não contar as alocações do próprio perfil/tracemalloc
+    FILTROS = (
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, __file__),
+    )
+
+    _thread = None
+    _pid = None
+    _amostrador = None
+    _pilha: List[Dict] = []
+    _etapas: List[Dict] = []
+    _iniciadas = 0
+
+    @classmethod
+    def iniciar(cls) -> None:
+        """Liga o tracemalloc e a amostragem de RSS para a thread atual."""
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+        cls._thread = threading.get_ident()
+        cls._pid = os.getpid()
+        cls._pilha = []
+        cls._etapas = []
+        cls._iniciadas = 0
+        cls._amostrador = _AmostradorRSS(cls.INTERVALO_AMOSTRAGEM)
+        cls._amostrador.start()
+
+    @classmethod
+    def medindo(cls) -> bool:
+        return cls._thread == threading.get_ident() and cls._pid == os.getpid()
+
+    @classmethod
+    def iniciar_etapa(cls, nome: str) -> None:
+        # O pico de uma etapa também é pico das etapas que a contêm
+        if cls._pilha:
+            pai = cls._pilha[-1]
+            pai['pico_heap'] = max(pai['pico_heap'], tracemalloc.get_traced_memory()[1])
+            pai['pico_rss'] = max(pai['pico_rss'], cls._amostrador.amostrar(), cls._amostrador.pico)
+        tracemalloc.reset_peak()
+        atual = tracemalloc.get_traced_memory()[0]
+        rss = cls._amostrador.reiniciar_pico()
+        cls._pilha.append({
+            'nome': nome,
+            'nivel': len(cls._pilha),
+            'ordem': cls._iniciadas,
+            'inicio_heap': atual,
+            'pico_heap': atual,
+            'inicio_rss': _rss_atual() or rss,
+            'pico_rss': 0,
+            'snapshot': tracemalloc.take_snapshot().filter_traces(cls.FILTROS),
+            'inicio': time.perf_counter(),
+        })
+        cls._iniciadas += 1
+
+    @classmethod
+    def encerrar_etapa(cls, nome: str) -> Dict:
+        """Fecha a etapa, registra a linha no log e devolve os valores (MB)."""
+        if not cls._pilha or cls._pilha[-1]['nome'] != nome:
+            return {}
+        etapa = cls._pilha.pop()
+
+        atual, pico = tracemalloc.get_traced_memory()
+        rss_fim = cls._amostrador.amostrar()
+        pico_heap = max(etapa['pico_heap'], pico)
+        pico_rss = max(etapa['pico_rss'], cls._amostrador.pico, rss_fim)
+        snapshot = tracemalloc.take_snapshot().filter_traces(cls.FILTROS)
+        alocacoes = [
+            (str(estatistica.traceback), estatistica.size_diff)
+            for estatistica in snapshot.compare_to(etapa['snapshot'], 'lineno')[:cls.TOP_ALOCACOES]
+            if estatistica.size_diff > 0
+        ]
+
+        resultado = {
+            'nome': nome,
+            'nivel': etapa['nivel'],
+            'ordem': etapa['ordem'],
+            'duracao_s': round(time.perf_counter() - etapa['inicio'], 3),
+            'heap_pico_mb': round((pico_heap - etapa['inicio_heap']) / MB, 1),
+            'heap_delta_mb': round((atual - etapa['inicio_heap']) / MB, 1),
+            'rss_pico_mb': round(pico_rss / MB, 1),
+            'rss_delta_mb': round((rss_fim - etapa['inicio_rss']) / MB, 1),
+            'alocacoes': alocacoes,
+        }
+        cls._etapas.append(resultado)
+
+        # A etapa que contém esta herda o pico (o reset_peak acima o perdeu)
+        if cls._pilha:
+            pai = cls._pilha[-1]
+            pai['pico_heap'] = max(pai['pico_heap'], pico_heap)
+            pai['pico_rss'] = max(pai['pico_rss'], pico_rss)
+
+        logger.info(f"[MEMORIA] {cls._formatar(resultado)}")
+        for local, tamanho in alocacoes:
+            logger.debug(f"[MEMORIA]     +{tamanho / 1024:,.0f} KB em {local}")
+        return {chave: resultado[chave] for chave in ('heap_pico_mb', 'heap_delta_mb', 'rss_pico_mb', 'rss_delta_mb')}
+
+    @classmethod
+    def registrar_resumo(cls) -> Optional[str]:
+        """Registra no log o resumo das etapas concluídas até aqui.
+
+        Chamado logo antes de gravar o ZIP de saída, para que o resumo entre no
+        log gravado nele; as etapas ainda abertas são listadas como em andamento.
+
+        Returns:
+            Texto do resumo ou None se o perfil não está ativo
+        """
+        if cls._amostrador is None:
+            return None
+
+        # Ordem de início (as etapas são registradas ao terminar)
+        linhas = ['Resumo de memória por etapa (heap = tracemalloc, acima do início da etapa):']
+        for etapa in sorted(cls._etapas, key=lambda e: e['ordem']):
+            linhas.append(f"  {'  ' * etapa['nivel']}{cls._formatar(etapa)}")
+        if cls._pilha:
+            linhas.append(f"  Em andamento: {', '.join(etapa['nome'] for etapa in cls._pilha)}")
+        if cls._etapas:
+            # A etapa mais interna com o maior pico (as externas o herdam)
+            maior = max(cls._etapas, key=lambda e: (e['rss_pico_mb'], e['nivel']))
+            linhas.append(f"  Pico de RSS: {maior['rss_pico_mb']} MB em '{maior['nome']}'")
+            for local, tamanho in maior['alocacoes']:
+                linhas.append(f"    +{tamanho / 1024:,.0f} KB em {local}")
+        resumo = '\n'.join(linhas)
+        logger.info(resumo)
+        return resumo
+
+    @classmethod
+    def encerrar(cls) -> None:
+        """Desliga o perfil (tracemalloc e amostragem de RSS) e descarta as etapas."""
+        if cls._amostrador is None:
+            return
+        cls._amostrador.parar.set()
+        cls._amostrador.join()
+        tracemalloc.stop()
+        cls._etapas, cls._pilha = [], []
+        cls._amostrador, cls._thread, cls._pid = None, None, None
+
+    @staticmethod
+    def _formatar(etapa: Dict) -> str:
+        return (
+            f"{etapa['nome']}: {etapa['duracao_s']}s | heap pico +{etapa['heap_pico_mb']} MB, "
+            f"delta {etapa['heap_delta_mb']:+} MB | RSS pico {etapa['rss_pico_mb']} MB, "
+            f"delta {etapa['rss_delta_mb']:+} MB"
+        )
@@ -1,12 +1,90 @@
-from typing import List, Dict, Callable
+import itertools
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Callable, Iterable, Iterator, Optional, Tuple
 from infraestrutura.logger import get_logger
 
 logger = get_logger('ProcessadorEmLotes')
 
+
+class MetricasLotes:
+    """Vazão (registros/s) e histograma de latência por lote de uma carga."""
+
+    # Limites superiores (ms) dos baldes do histograma de latência
+    LIMITES_LATENCIA_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+    def __init__(self):
+        self.inicio = time.perf_counter()
+        self.lotes = 0
+        self.registros = 0
+        self.latencia_total_ms = 0.0
+        self.latencia_max_ms = 0.0
+        # Um balde por limite + um para o que passar do último
+        self.baldes = [0] * (len(self.LIMITES_LATENCIA_MS) + 1)
+
+    def registrar_lote(self, registros: int, latencia_s: float) -> None:
+        latencia_ms = latencia_s * 1000
+        self.lotes += 1
+        self.registros += registros
+        self.latencia_total_ms += latencia_ms
+        self.latencia_max_ms = max(self.latencia_max_ms, latencia_ms)
+        indice = next(
+            (i for i, limite in enumerate(self.LIMITES_LATENCIA_MS) if latencia_ms <= limite),
+            len(self.LIMITES_LATENCIA_MS)
+        )
+        self.baldes[indice] += 1
+
+    def histograma(self) -> Dict[str, int]:
+        """Contagem de lotes por faixa de latência ('<=10ms', ..., '>10000ms')."""
+        rotulos = [f"<={limite}ms" for limite in self.LIMITES_LATENCIA_MS]
+        rotulos.append(f">{self.LIMITES_LATENCIA_MS[-1]}ms")
+        return dict(zip(rotulos, self.baldes))
+
+    def percentil_ms(self, percentil: float) -> Optional[float]:
+        """Percentil aproximado da latência (limite superior do balde que o contém)."""
+        if self.lotes == 0:
+            return None
+        alvo = self.lotes * percentil / 100
+        acumulado = 0
+        for limite, quantidade in zip(self.LIMITES_LATENCIA_MS, self.baldes):
+            acumulado += quantidade
+            if acumulado >= alvo:
+                return float(limite)
+        return self.latencia_max_ms
+
+    def resumo(self) -> Dict:
+        duracao = time.perf_counter() - self.inicio
+        return {
+            'lotes': self.lotes,
+            'registros': self.registros,
+            'duracao_s': round(duracao, 3),
+            'registros_por_segundo': round(self.registros / duracao, 1) if duracao > 0 else None,
+            'latencia_media_ms': round(self.latencia_total_ms / self.lotes, 2) if self.lotes else None,
+            'latencia_p50_ms': self.percentil_ms(50),
+            'latencia_p95_ms': self.percentil_ms(95),
+            'latencia_max_ms': round(self.latencia_max_ms, 2),
+            'histograma_latencia': self.histograma(),
+        }
+
+
 class ProcessadorEmLotes:
-    def __init__(self, tamanho_lote: int = 100):
+    # Sem total conhecido, o progresso é impresso a cada N lotes
+    INTERVALO_PROGRESSO_LOTES = 100
+
+    def __init__(self, tamanho_lote: int = 100, max_workers: int = 1, max_lotes_em_voo: int = None):
+        """
+        Args:
+            tamanho_lote: Registros por chamada de funcao_inserir
+            max_workers: Chamadas de funcao_inserir simultâneas (threads); com mais
+                de 1, funcao_inserir precisa ser thread-safe (ex: uma conexão por thread)
+            max_lotes_em_voo: Lotes lidos e ainda não concluídos (padrão 2 * max_workers);
+                limita a memória quando a origem é mais rápida que a inserção
+        """
         self.tamanho_lote = tamanho_lote
-    
+        self.max_workers = max(1, max_workers)
+        self.max_lotes_em_voo = max(self.max_workers, max_lotes_em_voo or 2 * self.max_workers)
+
     def processar_em_lotes(
         self,
         registros: List[Dict],
@@ -16,63 +94,215 @@ class ProcessadorEmLotes:
         registro_inicial: int = 0,
         atualizar_checkpoint: bool = False  # Novo parâmetro para controlar checkpoint (melhor performance)
     ) -> Dict:
-        
-        registros_processados = 0
-        registros_com_erro = 0
-        total_registros = len(registros)
-        ultimo_percentual = 0
-        if total_registros > 0:
+        """Versão para uma lista já em memória (ver processar_stream)."""
+        return self.processar_stream(
+            registros,
+            funcao_inserir,
+            gerenciador_checkpoint,
+            arquivo_atual,
+            registro_inicial=registro_inicial,
+            atualizar_checkpoint=atualizar_checkpoint,
+            total_registros=len(registros)
+        )
+
+    def processar_stream(
+        self,
+        registros: Iterable[Dict],
+        funcao_inserir: Callable,
+        gerenciador_checkpoint,
+        arquivo_atual: str,
+        registro_inicial: Optional[int] = None,
+        atualizar_checkpoint: bool = True,
+        total_registros: Optional[int] = None
+    ) -> Dict:
+        """Insere registros de qualquer iterável em lotes, sem materializar a origem.
+
+        Os lotes são montados sob demanda a partir do iterador (ex: um gerador que
+        lê o CSV em chunks): no máximo max_lotes_em_voo lotes ficam em memória. Os
+        lotes são concluídos na ordem de leitura, então o checkpoint (registros
+        [0, registro) tratados) avança sempre de forma contígua, mesmo com várias
+        threads inserindo. Depois de um lote com falha o checkpoint não avança
+        mais nesta execução (a próxima retoma a partir desse lote, reinserindo os
+        seguintes) e o arquivo não é marcado como concluído.
+
+        Args:
+            registros: Iterável de registros (lista, gerador...)
+            funcao_inserir: funcao_inserir(lote, arquivo_origem=...) -> int | bool | None
+            gerenciador_checkpoint: GerenciadorCheckpoint (ou None)
+            arquivo_atual: Arquivo de origem (chave do checkpoint)
+            registro_inicial: Registros iniciais a pular; None retoma do checkpoint
+            atualizar_checkpoint: Registrar o progresso a cada lote (append no journal)
+            total_registros: Total esperado, se conhecido (só para o progresso em %)
+
+        Returns:
+            Dict com registros_processados, registros_com_erro, registro_final e metricas
+        """
+        if registro_inicial is None:
+            registro_inicial = gerenciador_checkpoint.registro_inicial(arquivo_atual) if gerenciador_checkpoint else 0
+
+        iterador = iter(registros)
+        if registro_inicial > 0:
+            # Consumir (sem inserir) o que já foi tratado em execuções anteriores
+            next(itertools.islice(iterador, registro_inicial, registro_inicial), None)
+            logger.info(f"Retomando {arquivo_atual} a partir do registro {registro_inicial}")
+
+        registrar = atualizar_checkpoint and gerenciador_checkpoint is not None
+        estado = {
+            'registros_processados': 0,
+            'registros_com_erro': 0,
+            'registro_checkpoint': registro_inicial,
+            'lote_com_falha': False,
+            'ultimo_percentual': 0,
+        }
+        metricas = MetricasLotes()
+        if total_registros is None or total_registros > 0:
             print(f"    Processando em lotes de {self.tamanho_lote} registros...", flush=True)
-        
-        numero_lote = 0
-        for i in range(registro_inicial, total_registros, self.tamanho_lote):
-            lote = registros[i:i + self.tamanho_lote]
-            numero_lote += 1
-            
-            fim = min(i + self.tamanho_lote, total_registros)
-            
-            try:
-                resultado = funcao_inserir(lote, arquivo_origem=arquivo_atual)
-
-                if resultado is None or resultado is False:
-                    registros_com_erro += len(lote)
-                    logger.error(f"[FALHA] FALHA ao inserir {len(lote)} registros do arquivo {arquivo_atual} no lote {numero_lote} (resultado=False)")
-                    print(f"      [FALHA] ERRO ao inserir {len(lote)} registros (resultado=False)")
-
-                    # AVISO: NÃO atualiza checkpoint para permitir reprocessamento
-                else:
-                    if isinstance(resultado, int):
-                        registros_processados += resultado
-                    else:
-                        registros_processados += len(lote)
-
-                    # Atualizar checkpoint APENAS se solicitado (reduz I/O de disco)
-                    if atualizar_checkpoint:
-                        gerenciador_checkpoint.atualizar_checkpoint(
-                            arquivo=arquivo_atual,
-                            registro=fim,
-                            status="em_progresso",
-                            registros_processados=registros_processados,
-                            registros_erro=registros_com_erro
-                        )
-            
-            except Exception as e:
-                logger.error(f"[FALHA] EXCEÇÃO ao processar lote {numero_lote} do arquivo {arquivo_atual}: {str(e)} - Registros não serão contabilizados como erro para permitir reprocessamento")
-                print(f"      [FALHA] EXCEÇÃO no lote: {str(e)}")
-                # AVISO: NÃO incrementa registros_com_erro para permitir reprocessamento na próxima execução
-                # Os registros deste lote permanecerão no checkpoint anterior
-
-            if total_registros > 0:
-                percentual = int((fim / total_registros) * 100)
-                percentual_atual = (percentual // 5) * 5
-                if percentual_atual >= 5 and percentual_atual > ultimo_percentual:
-                    ultimo_percentual = percentual_atual
-                    print(
-                        f"    Progresso do arquivo {arquivo_atual}: {percentual_atual}% ({fim}/{total_registros})",
-                        flush=True,
-                    )
-        
+
+        def concluir(numero_lote: int, fim: int, tamanho: int, resultado, excecao, latencia: float) -> None:
+            metricas.registrar_lote(tamanho, latencia)
+            self._concluir_lote(
+                numero_lote, fim, tamanho, resultado, excecao,
+                estado, arquivo_atual, gerenciador_checkpoint if registrar else None
+            )
+            self._exibir_progresso(numero_lote, fim, total_registros, estado, arquivo_atual)
+
+        fim = registro_inicial
+        executor = ThreadPoolExecutor(max_workers=self.max_workers) if self.max_workers > 1 else None
+        try:
+            em_voo = deque()
+            for numero_lote, (fim, lote) in enumerate(self._gerar_lotes(iterador, registro_inicial), start=1):
+                if executor is None:
+                    concluir(numero_lote, fim, len(lote), *self._inserir_lote(funcao_inserir, lote, arquivo_atual))
+                    continue
+
+                em_voo.append((numero_lote, fim, len(lote), executor.submit(
+                    self._inserir_lote, funcao_inserir, lote, arquivo_atual
+                )))
+                # Limitar lotes em memória: esperar o mais antigo (mantém a ordem do checkpoint)
+                while len(em_voo) >= self.max_lotes_em_voo:
+                    numero, fim_lote, tamanho, futuro = em_voo.popleft()
+                    concluir(numero, fim_lote, tamanho, *futuro.result())
+
+            while em_voo:
+                numero, fim_lote, tamanho, futuro = em_voo.popleft()
+                concluir(numero, fim_lote, tamanho, *futuro.result())
+        finally:
+            if executor is not None:
+                executor.shutdown(wait=True)
+
+        if registrar:
+            # Concluído só se nenhum lote falhou (senão o checkpoint parou no primeiro que falhou)
+            status = "em_progresso" if estado['lote_com_falha'] else "concluido"
+            gerenciador_checkpoint.atualizar_checkpoint(
+                arquivo=arquivo_atual,
+                registro=estado['registro_checkpoint'],
+                status=status,
+                registros_processados=estado['registros_processados'],
+                registros_erro=estado['registros_com_erro']
+            )
+            gerenciador_checkpoint.sincronizar()
+
+        resumo = metricas.resumo()
+        logger.info(
+            f"Carga de {arquivo_atual}: {resumo['registros']} registros em {resumo['lotes']} lotes, "
+            f"{resumo['registros_por_segundo']} registros/s, latência p50/p95 "
+            f"{resumo['latencia_p50_ms']}/{resumo['latencia_p95_ms']} ms"
+        )
+
         return {
-            "registros_processados": registros_processados,
-            "registros_com_erro": registros_com_erro
+            "registros_processados": estado['registros_processados'],
+            "registros_com_erro": estado['registros_com_erro'],
+            "registro_final": fim,
+            "metricas": resumo
         }
+
+    def _gerar_lotes(self, iterador: Iterator[Dict], inicio: int) -> Iterator[Tuple[int, List[Dict]]]:
+        """Gera (fim, lote) lendo tamanho_lote registros por vez do iterador."""
+        while True:
+            lote = list(itertools.islice(iterador, self.tamanho_lote))
+            if not lote:
+                return
+            inicio += len(lote)
+            yield inicio, lote
+
+    @staticmethod
+    def _inserir_lote(funcao_inserir: Callable, lote: List[Dict], arquivo_atual: str):
+        """Chama funcao_inserir (na thread do pool) e devolve (resultado, exceção, latência)."""
+        inicio = time.perf_counter()
+        try:
+            resultado = funcao_inserir(lote, arquivo_origem=arquivo_atual)
+            return resultado, None, time.perf_counter() - inicio
+        except Exception as e:
+            return None, e, time.perf_counter() - inicio
+
+    def _concluir_lote(
+        self,
+        numero_lote: int,
+        fim: int,
+        tamanho: int,
+        resultado,
+        excecao: Optional[Exception],
+        estado: Dict,
+        arquivo_atual: str,
+        gerenciador_checkpoint
+    ) -> None:
+        """Contabiliza um lote (na ordem de leitura) e registra o checkpoint."""
+        if excecao is not None:
+            logger.error(f"[FALHA] EXCEÇÃO ao processar lote {numero_lote} do arquivo {arquivo_atual}: {str(excecao)} - Registros não serão contabilizados como erro para permitir reprocessamento")
+            print(f"      [FALHA] EXCEÇÃO no lote: {str(excecao)}")
+            # AVISO: NÃO incrementa registros_com_erro para permitir reprocessamento na próxima execução
+            # Os registros deste lote permanecerão no checkpoint anterior
+            estado['lote_com_falha'] = True
+            return
+
+        if resultado is None or resultado is False:
+            estado['registros_com_erro'] += tamanho
+            logger.error(f"[FALHA] FALHA ao inserir {tamanho} registros do arquivo {arquivo_atual} no lote {numero_lote} (resultado=False)")
+            print(f"      [FALHA] ERRO ao inserir {tamanho} registros (resultado=False)")
+
+            # AVISO: NÃO atualiza checkpoint para permitir reprocessamento
+            estado['lote_com_falha'] = True
+            return
+
+        if isinstance(resultado, int):
+            estado['registros_processados'] += resultado
+        else:
+            estado['registros_processados'] += tamanho
+
+        # Após uma falha o checkpoint fica parado no início do lote que falhou
+        if estado['lote_com_falha']:
+            return
+
+        estado['registro_checkpoint'] = fim
+        # Um append no journal por lote; o fsync é feito a cada N lotes pelo gerenciador
+        if gerenciador_checkpoint is not None:
+            gerenciador_checkpoint.atualizar_checkpoint(
+                arquivo=arquivo_atual,
+                registro=fim,
+                status="em_progresso",
+                registros_processados=estado['registros_processados'],
+                registros_erro=estado['registros_com_erro']
+            )
+
+    def _exibir_progresso(
+        self,
+        numero_lote: int,
+        fim: int,
+        total_registros: Optional[int],
+        estado: Dict,
+        arquivo_atual: str
+    ) -> None:
+        if total_registros is None:
+            if numero_lote % self.INTERVALO_PROGRESSO_LOTES == 0:
+                print(f"    Progresso do arquivo {arquivo_atual}: {fim} registros", flush=True)
+            return
+
+        if total_registros > 0:
+            percentual = int((fim / total_registros) * 100)
+            percentual_atual = (percentual // 5) * 5
+            if percentual_atual >= 5 and percentual_atual > estado['ultimo_percentual']:
+                estado['ultimo_percentual'] = percentual_atual
+                print(
+                    f"    Progresso do arquivo {arquivo_atual}: {percentual_atual}% ({fim}/{total_registros})",
+                    flush=True,
+                )
@@ -0,0 +1,204 @@
+"""Rastreamento por etapa no formato Chrome trace (chrome://tracing, Perfetto).
+
+Cada etapa medida vira um evento "X" (início + duração) com o processo e a
+thread em que rodou e argumentos livres (ex: linhas de entrada/saída):
+
+    with trecho('Baixar trimestres', trimestres=3) as args:
+        arquivos = baixar(...)
+        args['arquivos'] = len(arquivos)
+
+    @rastrear()
+    def _fazer_join(self, despesas, operadoras): ...
+
+Desativado (padrão fora de uma execução iniciada), trecho/rastrear só
+conferem um atributo. Com PerfilMemoria iniciado, os trechos da categoria
+'etapa' também medem o pico de memória (args heap_pico_mb, rss_pico_mb...).
+Com o rastreamento iniciado:
+- No processo que o iniciou, os eventos ficam em memória até gravar()
+- Em processos filhos (ProcessPoolExecutor) cada evento é acrescentado a um
+  arquivo parcial por processo (<trace>.parciais/<pid>.jsonl), juntado ao
+  trace principal por gravar()
+
+Os tempos vêm de time.time_ns(), o relógio comum a todos os processos, para
+que os eventos dos filhos fiquem alinhados aos do processo principal. O
+estágio 2 tem uma cópia com a mesma API, sem os arquivos parciais
+(2-transformacao_validacao/domain/servicos/rastreador.py), comparada por
+tests/test_modulos_espelhados.py.
+"""
+
+import functools
+import glob
+import json
+import os
+import shutil
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional
+
+import pandas as pd
+
+from infraestrutura.logger import get_logger
+from infraestrutura.perfil_memoria import PerfilMemoria
+
+logger = get_logger('Rastreador')
+
+
+class Rastreador:
+    """Coleta os eventos da execução e grava o trace JSON."""
+
+    # Diretório dos arquivos parciais, herdado pelos processos filhos
+    VARIAVEL_PARCIAIS = 'RASTREAMENTO_PARCIAIS'
+
+    _lock = threading.Lock()
+    _eventos = []
+    _caminho = None
+    _pid = None
+
+    @classmethod
+    def iniciar(cls, caminho: str) -> None:
+        """Ativa o rastreamento; o trace será gravado em caminho."""
+        with cls._lock:
+            cls._eventos = []
+            cls._caminho = caminho
+            cls._pid = os.getpid()
+        parciais = f"{caminho}.parciais"
+        shutil.rmtree(parciais, ignore_errors=True)
+        os.environ[cls.VARIAVEL_PARCIAIS] = parciais
+
+    @classmethod
+    def ativo(cls) -> bool:
+        return cls._pid is not None or cls.VARIAVEL_PARCIAIS in os.environ
+
+    @classmethod
+    def registrar(cls, nome: str, categoria: str, inicio_ns: int, fim_ns: int, args: Dict) -> None:
+        """Acrescenta um evento completo (ph 'X'); tempos em ns de time.time_ns()."""
+        evento = {
+            'name': nome,
+            'cat': categoria,
+            'ph': 'X',
+            'ts': inicio_ns / 1000,
+            'dur': (fim_ns - inicio_ns) / 1000,
+            'pid': os.getpid(),
+            'tid': threading.get_ident(),
+            'args': dict(args, thread=threading.current_thread().name),
+        }
+        if os.getpid() == cls._pid:
+            with cls._lock:
+                cls._eventos.append(evento)
+            return
+
+        parciais = os.environ.get(cls.VARIAVEL_PARCIAIS)
+        if not parciais:
+            return
+        try:
+            os.makedirs(parciais, exist_ok=True)
+            with cls._lock:
+                with open(os.path.join(parciais, f"{os.getpid()}.jsonl"), 'a', encoding='utf-8') as f:
+                    f.write(json.dumps(evento, ensure_ascii=False, default=str) + '\n')
+        except OSError as e:
+            logger.debug(f"Evento de rastreamento descartado: {e}")
+
+    @classmethod
+    def gravar(cls) -> Optional[str]:
+        """Junta os eventos (deste processo e dos filhos) e grava o trace.
+
+        Desativa o rastreamento.
+
+        Returns:
+            Caminho do trace gravado ou None se o rastreamento não estava ativo
+        """
+        with cls._lock:
+            caminho, eventos = cls._caminho, cls._eventos
+            cls._caminho, cls._eventos, cls._pid = None, [], None
+        parciais = os.environ.pop(cls.VARIAVEL_PARCIAIS, None)
+        if caminho is None:
+            return None
+
+        eventos = list(eventos)
+        for parcial in sorted(glob.glob(os.path.join(parciais or '', '*.jsonl'))):
+            with open(parcial, 'r', encoding='utf-8') as f:
+                for linha in f:
+                    try:
+                        eventos.append(json.loads(linha))
+                    except ValueError:
+                        continue
+        if parciais:
+            shutil.rmtree(parciais, ignore_errors=True)
+
+        # Tempos relativos ao primeiro evento e nomes das threads para o visualizador
+        inicio = min((evento['ts'] for evento in eventos), default=0)
+        threads = {}
+        for evento in eventos:
+            evento['ts'] -= inicio
+            threads[(evento['pid'], evento['tid'])] = evento['args'].pop('thread', None)
+        metadados = [
+            {'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': tid, 'args': {'name': nome}}
+            for (pid, tid), nome in threads.items() if nome
+        ]
+
+        os.makedirs(os.path.dirname(caminho) or '.', exist_ok=True)
+        caminho_tmp = f"{caminho}.tmp"
+        with open(caminho_tmp, 'w', encoding='utf-8') as f:
+            json.dump(
+                {'traceEvents': metadados + eventos, 'displayTimeUnit': 'ms'},
+                f, ensure_ascii=False, default=str
+            )
+        os.replace(caminho_tmp, caminho)
+        logger.info(f"Rastreamento gravado em: {caminho} ({len(eventos)} eventos)")
+        return caminho
+
+
+@contextmanager
+def trecho(nome: str, categoria: str = 'etapa', **args) -> Iterator[Dict]:
+    """Mede o bloco como um evento; o dict devolvido aceita argumentos extras."""
+    rastreando = Rastreador.ativo()
+    medindo_memoria = categoria == 'etapa' and PerfilMemoria.medindo()
+    if not (rastreando or medindo_memoria):
+        yield args
+        return
+
+    if medindo_memoria:
+        PerfilMemoria.iniciar_etapa(nome)
+    inicio = time.time_ns()
+    try:
+        yield args
+    finally:
+        fim = time.time_ns()
+        if medindo_memoria:
+            args.update(PerfilMemoria.encerrar_etapa(nome))
+        if rastreando:
+            Rastreador.registrar(nome, categoria, inicio, fim, args)
+
+
+def _linhas(valor) -> Optional[int]:
+    if isinstance(valor, pd.DataFrame):
+        return len(valor)
+    if isinstance(valor, tuple) and valor and isinstance(valor[0], pd.DataFrame):
+        return len(valor[0])
+    return None
+
+
+def rastrear(nome: str = None, categoria: str = 'funcao'):
+    """Decorator: mede cada chamada com as linhas do primeiro DataFrame
+    recebido (linhas_entrada) e do DataFrame devolvido (linhas_saida)."""
+    def decorador(funcao):
+        nome_evento = nome or funcao.__qualname__
+
+        @functools.wraps(funcao)
+        def envolvida(*args, **kwargs):
+            if not Rastreador.ativo():
+                return funcao(*args, **kwargs)
+
+            argumentos = {}
+            entrada = next((_linhas(a) for a in args if isinstance(a, pd.DataFrame)), None)
+            if entrada is not None:
+                argumentos['linhas_entrada'] = entrada
+            with trecho(nome_evento, categoria, **argumentos) as span:
+                resultado = funcao(*args, **kwargs)
+                saida = _linhas(resultado)
+                if saida is not None:
+                    span['linhas_saida'] = saida
+                return resultado
+        return envolvida
+    return decorador
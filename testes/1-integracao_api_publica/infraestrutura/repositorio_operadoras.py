@@ -2,15 +2,21 @@
 
 Realiza download das tabelas de operadoras ativas e canceladas,
 extrai e armazena em arquivos CSV para enriquecimento de dados.
+
+O cadastro é baixado em streaming para um temporário, normalizado em chunks
+e só então trocado pelo arquivo anterior (os.replace): até a nova versão
+estar completa, a anterior continua disponível para consulta.
 """
 
+import codecs
 import os
+import tempfile
 import pandas as pd
 import requests
 from typing import Dict, Tuple
-from io import BytesIO
 
 from config import DIRETORIO_OPERADORAS
+from infraestrutura.indice_operadoras import IndiceOperadoras
 from infraestrutura.logger import get_logger
 
 logger = get_logger('RepositorioOperadoras')
@@ -25,33 +31,19 @@ class RepositorioOperadoras:
     ARQUIVOS_CANCELADAS = ["Relatorio_cadop_canceladas.csv"]
     
     TIMEOUT = 30
+    # Bytes por leitura do download e linhas por chunk na normalização
+    TAMANHO_BLOCO_DOWNLOAD = 1024 * 1024
+    TAMANHO_CHUNK_NORMALIZACAO = 50000
     
     def __init__(self):
         self.diretorio = DIRETORIO_OPERADORAS
-        
-        # Garantir que o diretório existe e está acessível
-        if os.path.exists(self.diretorio):
-            # Tentar limpar arquivos antigos
-            for arquivo in ["operadoras_ativas.csv", "operadoras_canceladas.csv"]:
-                caminho = os.path.join(self.diretorio, arquivo)
-                if os.path.exists(caminho):
-                    try:
-                        os.remove(caminho)
-                        logger.debug(f"Arquivo antigo removido: {arquivo}")
-                    except:
-                        # Se não conseguir remover, usar timestamp
-                        import time
-                        timestamp = int(time.time())
-                        try:
-                            os.rename(caminho, f"{caminho}.{timestamp}")
-                            logger.debug(f"Arquivo antigo renomeado: {arquivo}")
-                        except:
-                            pass
-        
         os.makedirs(self.diretorio, exist_ok=True)
         
         self.arquivo_ativas = os.path.join(self.diretorio, "operadoras_ativas.csv")
         self.arquivo_canceladas = os.path.join(self.diretorio, "operadoras_canceladas.csv")
+        
+        # Consulta por REG_ANS em memória, refeita só quando os CSVs mudam
+        self.indice = IndiceOperadoras(self.arquivo_ativas, self.arquivo_canceladas)
     
     def carregar(self) -> Dict:
         """Carrega as tabelas de operadoras ativas e canceladas.
@@ -100,24 +92,15 @@ class RepositorioOperadoras:
         """
         print("\n  📥 Buscando operadoras ativas...")
         
-        # Deletar arquivo existente se houver
-        if os.path.exists(self.arquivo_ativas):
-            try:
-                os.remove(self.arquivo_ativas)
-            except Exception as e:
-                logger.warning(f"Não foi possível deletar arquivo existente: {e}")
-        
-        # Tentar nomes conhecidos
+        # Tentar nomes conhecidos (o arquivo anterior só é substituído se o novo ficar completo)
         for nome_arquivo in self.ARQUIVOS_ATIVAS:
             url = f"{self.BASE_URL_ATIVAS}{nome_arquivo}"
             try:
-                df = self._baixar_arquivo(url, 'csv')
-                if df is not None and not df.empty:
-                    df = self._normalizar_colunas_operadoras(df)
-                    df.to_csv(self.arquivo_ativas, index=False, encoding='utf-8', sep=';')
-                    logger.info(f"Operadoras ativas carregadas: {len(df)} registros")
-                    print(f"     [OK] {len(df)} operadoras ativas carregadas")
-                    return True, len(df)
+                total = self._baixar_e_normalizar(url, self.arquivo_ativas)
+                if total:
+                    logger.info(f"Operadoras ativas carregadas: {total} registros")
+                    print(f"     [OK] {total} operadoras ativas carregadas")
+                    return True, total
             except Exception as e:
                 logger.debug(f"Falha ao baixar {nome_arquivo}: {str(e)}")
                 continue
@@ -132,68 +115,92 @@ class RepositorioOperadoras:
         """
         print("  S Buscando operadoras canceladas...")
         
-        # Deletar arquivo existente se houver
-        if os.path.exists(self.arquivo_canceladas):
-            try:
-                os.remove(self.arquivo_canceladas)
-            except Exception as e:
-                logger.warning(f"Não foi possível deletar arquivo existente: {e}")
-        
-        # Tentar nomes conhecidos
+        # Tentar nomes conhecidos (o arquivo anterior só é substituído se o novo ficar completo)
         for nome_arquivo in self.ARQUIVOS_CANCELADAS:
             url = f"{self.BASE_URL_CANCELADAS}{nome_arquivo}"
             try:
-                df = self._baixar_arquivo(url, 'csv')
-                if df is not None and not df.empty:
-                    df = self._normalizar_colunas_operadoras(df)
-                    df.to_csv(self.arquivo_canceladas, index=False, encoding='utf-8', sep=';')
-                    logger.info(f"Operadoras canceladas carregadas: {len(df)} registros")
-                    print(f"     [OK] {len(df)} operadoras canceladas carregadas")
-                    return True, len(df)
+                total = self._baixar_e_normalizar(url, self.arquivo_canceladas)
+                if total:
+                    logger.info(f"Operadoras canceladas carregadas: {total} registros")
+                    print(f"     [OK] {total} operadoras canceladas carregadas")
+                    return True, total
             except Exception as e:
                 logger.debug(f"Falha ao baixar {nome_arquivo}: {str(e)}")
                 continue
         
         raise Exception("Não foi possível baixar operadoras canceladas em nenhum formato")
     
-    def _baixar_arquivo(self, url: str, extensao: str) -> pd.DataFrame:
-        """Baixa e carrega arquivo da URL.
+    def _baixar_e_normalizar(self, url: str, destino: str) -> int:
+        """Baixa o cadastro em streaming, normaliza em chunks e troca o destino atomicamente.
         
         Args:
-            url: URL do arquivo
-            extensao: Extensão do arquivo (xlsx, csv, xls)
+            url: URL do CSV de operadoras
+            destino: CSV normalizado (substituído só ao final, com os.replace)
         
         Returns:
-            DataFrame com os dados ou None se falhar
+            Número de registros gravados (0 se o arquivo veio vazio; destino intacto)
         """
-        response = requests.get(url, timeout=self.TIMEOUT)
-        response.raise_for_status()
-        
-        if extensao == 'csv':
-            # Tentar com múltiplos encodings para garantir leitura correta
-            encodings = ['utf-8', 'latin-1', 'iso-8859-1', 'cp1252']
-            for encoding in encodings:
-                try:
-                    return pd.read_csv(
-                        BytesIO(response.content),
-                        sep=';',
-                        encoding=encoding,
-                        on_bad_lines='skip'
-                    )
-                except:
-                    continue
-            
-            # Se nenhum encoding funcionou, tentar com response.text
-            return pd.read_csv(
-                pd.io.common.StringIO(response.text),
+        caminho_download, encoding = self._baixar_para_temporario(url)
+        descritor, caminho_normalizado = tempfile.mkstemp(dir=self.diretorio, suffix='.csv.tmp')
+        os.close(descritor)
+        try:
+            total = 0
+            leitor = pd.read_csv(
+                caminho_download,
                 sep=';',
-                encoding='utf-8',
-                on_bad_lines='skip'
+                encoding=encoding,
+                dtype=str,
+                on_bad_lines='skip',
+                chunksize=self.TAMANHO_CHUNK_NORMALIZACAO
             )
-        elif extensao in ['xlsx', 'xls']:
-            return pd.read_excel(BytesIO(response.content))
+            with open(caminho_normalizado, 'w', encoding='utf-8', newline='') as saida:
+                for chunk in leitor:
+                    chunk = self._normalizar_colunas_operadoras(chunk)
+                    chunk.to_csv(saida, index=False, sep=';', header=(total == 0))
+                    total += len(chunk)
+            
+            if total:
+                os.replace(caminho_normalizado, destino)
+            return total
+        finally:
+            for caminho in (caminho_download, caminho_normalizado):
+                if os.path.exists(caminho):
+                    os.remove(caminho)
+    
+    def _baixar_para_temporario(self, url: str) -> Tuple[str, str]:
+        """Grava a resposta em um temporário, detectando o encoding durante o download.
         
-        return None
+        O conteúdo passa por um decodificador UTF-8 incremental enquanto é gravado:
+        se for UTF-8 válido usa utf-8-sig (ignora BOM), senão latin-1.
+        
+        Returns:
+            (caminho do temporário, encoding)
+        """
+        descritor, caminho = tempfile.mkstemp(dir=self.diretorio, suffix='.download')
+        decodificador = codecs.getincrementaldecoder('utf-8')()
+        utf8_valido = True
+        try:
+            with requests.get(url, timeout=self.TIMEOUT, stream=True) as response:
+                response.raise_for_status()
+                with os.fdopen(descritor, 'wb') as arquivo:
+                    for bloco in response.iter_content(chunk_size=self.TAMANHO_BLOCO_DOWNLOAD):
+                        arquivo.write(bloco)
+                        if utf8_valido:
+                            try:
+                                decodificador.decode(bloco)
+                            except UnicodeDecodeError:
+                                utf8_valido = False
+            if utf8_valido:
+                try:
+                    decodificador.decode(b'', final=True)
+                except UnicodeDecodeError:
+                    utf8_valido = False
+        except BaseException:
+            if os.path.exists(caminho):
+                os.remove(caminho)
+            raise
+        
+        return caminho, 'utf-8-sig' if utf8_valido else 'latin-1'
     
     def _normalizar_colunas_operadoras(self, df: pd.DataFrame) -> pd.DataFrame:
         """Normaliza os nomes e conteúdo das colunas da tabela de operadoras.
@@ -247,81 +254,26 @@ class RepositorioOperadoras:
     def obter_operadora(self, registro: str) -> Dict:
         """Busca dados da operadora pelo registro em ambas as tabelas.
         
+        Consulta o índice em memória (IndiceOperadoras): os CSVs só são relidos
+        quando mudam em disco, então a busca pode ser chamada em loop.
+        
         Args:
             registro: Número do registro da operadora
         
         Returns:
             Dict com dados da operadora ou indicação de N/L ou CONFLITO
         """
-        registro = str(registro).strip()
-        
-        resultado = {
-            'registro': registro,
-            'cnpj': 'N/L',
-            'razao_social': 'N/L',
-            'modalidade': 'N/L',
-            'uf': 'N/L',
-            'status': 'NAO_LOCALIZADO'
-        }
-        
-        matches = []
-        
-        # Buscar em operadoras ativas
-        if os.path.exists(self.arquivo_ativas):
-            try:
-                df_ativas = pd.read_csv(self.arquivo_ativas, sep=';', encoding='utf-8')
-                match = df_ativas[df_ativas['REG_ANS'].astype(str).str.strip() == registro]
-                if not match.empty:
-                    for _, row in match.iterrows():
-                        matches.append({
-                            'cnpj': row.get('CNPJ', ''),
-                            'razao_social': row.get('RAZAO_SOCIAL', ''),
-                            'modalidade': row.get('MODALIDADE', ''),
-                            'uf': row.get('UF', ''),
-                            'tipo': 'ATIVA'
-                        })
-            except Exception as e:
-                logger.error(f"Erro ao buscar em operadoras ativas: {str(e)}")
+        return self.indice.obter(registro)
+    
+    def obter_operadoras(self, registros) -> pd.DataFrame:
+        """Busca um lote de operadoras de uma vez (sem loop de obter_operadora).
         
-        # Buscar em operadoras canceladas
-        if os.path.exists(self.arquivo_canceladas):
-            try:
-                df_canceladas = pd.read_csv(self.arquivo_canceladas, sep=';', encoding='utf-8')
-                match = df_canceladas[df_canceladas['REG_ANS'].astype(str).str.strip() == registro]
-                if not match.empty:
-                    for _, row in match.iterrows():
-                        matches.append({
-                            'cnpj': row.get('CNPJ', ''),
-                            'razao_social': row.get('RAZAO_SOCIAL', ''),
-                            'modalidade': row.get('MODALIDADE', ''),
-                            'uf': row.get('UF', ''),
-                            'tipo': 'CANCELADA'
-                        })
-            except Exception as e:
-                logger.error(f"Erro ao buscar em operadoras canceladas: {str(e)}")
-        
-        # Processar resultados
-        if len(matches) == 0:
-            resultado['status'] = 'NAO_LOCALIZADO'
-            logger.warning(f"Operadora não localizada - Registro: {registro}")
-        
-        elif len(matches) == 1:
-            match = matches[0]
-            resultado['cnpj'] = match['cnpj']
-            resultado['razao_social'] = match['razao_social']
-            resultado['modalidade'] = match['modalidade']
-            resultado['uf'] = match['uf']
-            resultado['status'] = f"LOCALIZADO_{match['tipo']}"
-        
-        else:
-            resultado['cnpj'] = 'CONFLITO'
-            resultado['razao_social'] = 'CONFLITO'
-            resultado['modalidade'] = 'CONFLITO'
-            resultado['uf'] = 'CONFLITO'
-            resultado['status'] = 'CONFLITO'
-            logger.warning(
-                f"Múltiplos registros encontrados para operadora - "
-                f"Registro: {registro}, Total: {len(matches)}"
-            )
+        Args:
+            registros: Series, array ou lista de registros
         
-        return resultado
+        Returns:
+            DataFrame com registro, cnpj, razao_social, modalidade, uf e status
+            (LOCALIZADO_ATIVA, LOCALIZADO_CANCELADA, CONFLITO ou NAO_LOCALIZADO),
+            uma linha por registro, na ordem de entrada
+        """
+        return self.indice.obter_varios(registros)
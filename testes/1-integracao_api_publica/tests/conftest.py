@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Os módulos do estágio são importados a partir da raiz dele (como no main.py)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
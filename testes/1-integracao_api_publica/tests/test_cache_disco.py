@@ -0,0 +1,75 @@
+import os
+
+import pandas as pd
+
+from domain.servicos.gerador_consolidados import GeradorConsolidados
+from infraestrutura.cache_disco import CacheDisco
+
+
+def _gravar_bytes(dados: bytes):
+    return lambda destino: destino.write(dados)
+
+
+def test_acerto_falha_e_remocao_lru(tmp_path):
+    cache = CacheDisco(str(tmp_path / 'cache'), limite_bytes=250)
+
+    assert cache.obter('a') is None
+    cache.gravar('a', _gravar_bytes(b'a' * 100))
+    cache.gravar('b', _gravar_bytes(b'b' * 100))
+    # Acerto em 'a' a torna a mais recente: 'b' é a usada há mais tempo
+    os.utime(cache.caminho('a'), (1, 1))
+    os.utime(cache.caminho('b'), (1, 1))
+    destino = str(tmp_path / 'restaurado')
+    assert cache.restaurar('a', destino)
+    with open(destino, 'rb') as f:
+        assert f.read() == b'a' * 100
+
+    cache.gravar('c', _gravar_bytes(b'c' * 100))
+
+    assert cache.obter('b') is None
+    assert cache.obter('a') is not None
+    assert cache.obter('c') is not None
+    estatisticas = cache.estatisticas()
+    assert (estatisticas['acertos'], estatisticas['falhas']) == (3, 2)
+    assert (estatisticas['gravacoes'], estatisticas['remocoes']) == (3, 1)
+    assert (estatisticas['entradas'], estatisticas['bytes']) == (2, 200)
+
+
+def test_entrada_maior_que_o_limite_nao_fica_no_cache(tmp_path):
+    cache = CacheDisco(str(tmp_path / 'cache'), limite_bytes=10)
+
+    assert cache.gravar('grande', _gravar_bytes(b'x' * 11)) is None
+    assert cache.estatisticas()['entradas'] == 0
+
+
+def test_diretorio_criado_so_na_primeira_gravacao(tmp_path):
+    diretorio = str(tmp_path / 'cache')
+    cache = CacheDisco(diretorio)
+
+    assert cache.obter('a') is None
+    assert not cache.restaurar('a', str(tmp_path / 'destino'))
+    assert not os.path.exists(diretorio)
+    cache.gravar('a', _gravar_bytes(b'a'))
+    assert os.path.isdir(diretorio)
+
+
+def test_gerador_restaura_do_cache_e_regera_quando_o_dataframe_muda(tmp_path, monkeypatch):
+    cache = CacheDisco(str(tmp_path / 'cache'))
+    monkeypatch.setattr(GeradorConsolidados, '_cache', cache)
+    df = pd.DataFrame({'ano': [2024, 2024], 'reg_ans': [2, 1], 'vl_saldo_final': [1234.5, -0.5]})
+    caminho = str(tmp_path / 'saida' / 'consolidado.csv')
+
+    assert GeradorConsolidados.gerar_csv_consolidado(df, caminho)
+    with open(caminho, 'rb') as f:
+        gerado = f.read()
+    os.remove(caminho)
+    assert GeradorConsolidados.gerar_csv_consolidado(df, caminho)
+    with open(caminho, 'rb') as f:
+        assert f.read() == gerado
+    assert (cache.acertos, cache.falhas, cache.gravacoes) == (1, 1, 1)
+
+    df.loc[0, 'vl_saldo_final'] = 1.0
+    assert GeradorConsolidados.gerar_csv_consolidado(df, caminho)
+    with open(caminho, 'rb') as f:
+        assert f.read() != gerado
+    assert (cache.acertos, cache.falhas, cache.gravacoes) == (1, 2, 2)
@@ -0,0 +1,153 @@
+import io
+import os
+import threading
+import zipfile
+
+import pytest
+
+from domain.entidades import PoliticaCompressao
+from domain.servicos.compactador_zip import CompactadorZIP, _MontadorZIP
+
+CONTEUDO_CSV = ''.join(f'{i};REG{i:06d};{i * 1.5:.2f}\n' for i in range(20000)).encode()
+
+
+def _membros(tmp_path):
+    log = tmp_path / 'sessao.log'
+    log.write_bytes(b'linha de log\n' * 100)
+    return [
+        ('dados.csv', lambda destino: destino.write(CONTEUDO_CSV)),
+        ('logs/sessao.log', str(log)),
+    ]
+
+
+@pytest.mark.parametrize('max_threads', [1, 2])
+@pytest.mark.parametrize('metodo', ['deflated', 'stored', 'bzip2', 'lzma'])
+def test_membros_na_ordem_com_o_metodo_da_politica(tmp_path, metodo, max_threads):
+    caminho_zip = str(tmp_path / 'saida.zip')
+
+    CompactadorZIP.criar_zip(
+        caminho_zip, _membros(tmp_path), PoliticaCompressao(metodo=metodo, max_threads=max_threads)
+    )
+
+    with zipfile.ZipFile(caminho_zip) as zipf:
+        assert zipf.testzip() is None
+        assert zipf.namelist() == ['dados.csv', 'logs/sessao.log']
+        assert zipf.read('dados.csv') == CONTEUDO_CSV
+        assert zipf.read('logs/sessao.log') == b'linha de log\n' * 100
+        assert {info.compress_type for info in zipf.infolist()} == {CompactadorZIP.METODOS[metodo]}
+    # Nem temporários dos membros nem o .tmp do ZIP ficam no diretório
+    assert sorted(os.listdir(tmp_path)) == ['saida.zip', 'sessao.log']
+
+
+def test_nivel_da_politica_e_aplicado(tmp_path):
+    tamanhos = {}
+    for nivel in (0, 9):
+        caminho_zip = str(tmp_path / f'nivel_{nivel}.zip')
+        CompactadorZIP.criar_zip(caminho_zip, _membros(tmp_path)[:1], PoliticaCompressao(nivel=nivel))
+        with zipfile.ZipFile(caminho_zip) as zipf:
+            tamanhos[nivel] = zipf.getinfo('dados.csv').compress_size
+
+    assert tamanhos[9] < tamanhos[0]
+
+
+@pytest.mark.parametrize('max_threads', [1, 2])
+def test_falha_em_um_membro_preserva_o_zip_anterior(tmp_path, max_threads):
+    caminho_zip = tmp_path / 'saida.zip'
+    caminho_zip.write_bytes(b'zip anterior')
+
+    def falhar(destino):
+        destino.write(b'parcial')
+        raise RuntimeError('falha simulada')
+
+    membros = _membros(tmp_path) + [('falha.csv', falhar)]
+    with pytest.raises(RuntimeError):
+        CompactadorZIP.criar_zip(str(caminho_zip), membros, PoliticaCompressao(max_threads=max_threads))
+
+    assert caminho_zip.read_bytes() == b'zip anterior'
+    assert sorted(os.listdir(tmp_path)) == ['saida.zip', 'sessao.log']
+
+
+def test_membro_gerado_vai_direto_para_o_zip(tmp_path):
+    caminho_zip = str(tmp_path / 'saida.zip')
+    arquivos_durante_gravacao = []
+
+    def gerar(destino):
+        destino.write(CONTEUDO_CSV)
+        arquivos_durante_gravacao.append(sorted(os.listdir(tmp_path)))
+
+    CompactadorZIP.criar_zip(caminho_zip, [('dados.csv', gerar)])
+
+    # Nenhum arquivo temporário além do próprio ZIP em construção
+    assert arquivos_durante_gravacao == [['saida.zip.tmp']]
+    with zipfile.ZipFile(caminho_zip) as zipf:
+        assert zipf.read('dados.csv') == CONTEUDO_CSV
+
+
+@pytest.mark.parametrize('max_threads', [1, 2])
+def test_intermediario_zstd_ao_lado_do_zip(tmp_path, max_threads):
+    zstandard = pytest.importorskip('zstandard')
+    caminho_zip = str(tmp_path / 'saida.zip')
+
+    CompactadorZIP.criar_zip(
+        caminho_zip, _membros(tmp_path), PoliticaCompressao(formato_intermediario='zstd', max_threads=max_threads)
+    )
+
+    with open(tmp_path / 'dados.csv.zst', 'rb') as f:
+        assert zstandard.ZstdDecompressor().stream_reader(f).read() == CONTEUDO_CSV
+    assert not (tmp_path / 'logs' / 'sessao.log.zst').exists()
+
+
+@pytest.mark.parametrize('max_threads', [1, 2])
+def test_falha_nao_publica_intermediario_parcial(tmp_path, max_threads):
+    pytest.importorskip('zstandard')
+
+    def falhar(destino):
+        # Como os geradores de CSV: o wrapper de texto fecha o destino ao sair
+        with io.TextIOWrapper(destino, encoding='utf-8') as texto:
+            texto.write(CONTEUDO_CSV.decode())
+            raise RuntimeError('falha simulada')
+
+    membros = [('dados.csv', falhar), ('outros.csv', lambda destino: destino.write(CONTEUDO_CSV))]
+    with pytest.raises(RuntimeError):
+        CompactadorZIP.criar_zip(
+            str(tmp_path / 'saida.zip'), membros, PoliticaCompressao(formato_intermediario='zstd', max_threads=max_threads)
+        )
+
+    # outros.csv pode ter terminado antes da falha: seu intermediário completo é publicado
+    assert set(os.listdir(tmp_path)) <= {'outros.csv.zst'}
+
+
+def test_membros_comprimidos_ao_mesmo_tempo(tmp_path):
+    caminho_zip = str(tmp_path / 'saida.zip')
+    # Só passa quando as duas entradas estão abertas e recebendo dados ao mesmo tempo
+    encontro = threading.Barrier(2, timeout=10)
+
+    def gerar(destino):
+        destino.write(CONTEUDO_CSV[:len(CONTEUDO_CSV) // 2])
+        destino.flush()
+        encontro.wait()
+        destino.write(CONTEUDO_CSV[len(CONTEUDO_CSV) // 2:])
+
+    membros = [('a.csv', gerar), ('b.csv', gerar)]
+    CompactadorZIP.criar_zip(caminho_zip, membros, PoliticaCompressao(max_threads=2))
+
+    with zipfile.ZipFile(caminho_zip) as zipf:
+        assert zipf.testzip() is None
+        assert zipf.namelist() == ['a.csv', 'b.csv']
+        assert zipf.read('a.csv') == zipf.read('b.csv') == CONTEUDO_CSV
+
+
+def test_montagem_paralela_com_zip64_e_nome_unicode(tmp_path, monkeypatch):
+    # Limites baixos forçam os campos ZIP64 do diretório central e do registro de fim
+    monkeypatch.setattr(_MontadorZIP, 'LIMITE_ZIP64', 0)
+    monkeypatch.setattr(_MontadorZIP, 'LIMITE_QUANTIDADE', 0)
+    caminho_zip = str(tmp_path / 'saida.zip')
+    membros = _membros(tmp_path) + [('relatório.csv', lambda destino: destino.write(b'a;b\n'))]
+
+    CompactadorZIP.criar_zip(caminho_zip, membros, PoliticaCompressao(max_threads=3))
+
+    with zipfile.ZipFile(caminho_zip) as zipf:
+        assert zipf.testzip() is None
+        assert zipf.namelist() == ['dados.csv', 'logs/sessao.log', 'relatório.csv']
+        assert zipf.read('dados.csv') == CONTEUDO_CSV
+        assert zipf.read('relatório.csv') == b'a;b\n'
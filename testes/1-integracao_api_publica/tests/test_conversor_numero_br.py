@@ -0,0 +1,98 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from domain.servicos.conversor_numero_br import ConversorNumeroBR
+
+C = ConversorNumeroBR
+
+# Empates de meio centavo (e vizinhos), zeros com sinal, não finitos e valores
+# acima de 2**53 (centavos não exatos em float64)
+VALORES_ESPECIAIS = [
+    0.0, -0.0, 0.005, -0.005, 0.015, 0.125, 0.135, 1.005, 1.115, 2.675, -2.675, 999.995, 999999.995,
+    0.004999999, 0.0050000001, 5e-324, -1e-9, 1234567.89, -1234567.891, 123456789012.345,
+    1e13, 4.5e13, 1e15, 2.0 ** 52, 2.0 ** 53, 2.0 ** 53 + 2, -(2.0 ** 60), 1e20, -1e20, 1.7976931348623157e308,
+    np.nan, np.inf, -np.inf,
+]
+
+# Textos válidos com milhar, sinais e decimais variados, e textos fora do padrão
+TEXTOS = [
+    '1.234,56', '1.234.567,89', '-1.234,5', '+3,2', '-0,00', '0,00', '12,5', ',5', '5,', '1.000', '1.2.3',
+    ' 12,5 ', '\t7,25\n', '123456789012345', '1234567890123456', '12345678901234567890', '1' * 400,
+    '', '  ', 'abc', '1,2,3', '--1', '1-', '+-1', '1e5', '1,5e3', 'inf', '-inf', 'nan', 'Infinity',
+    '1_000', '0x10', '١٢٣', 'R$ 1,00', '1 234,56', '.', ',', '-', '+',
+]
+
+
+def _valores_aleatorios(semente: int) -> np.ndarray:
+    r = np.random.default_rng(semente)
+    return np.concatenate([
+        r.normal(0, 1e6, 5000),
+        r.integers(-10 ** 9, 10 ** 9, 5000) / 1000,
+        r.integers(-10 ** 6, 10 ** 6, 5000) / 200,
+        r.uniform(-1, 1, 5000) * 10.0 ** r.integers(-3, 20, 5000),
+    ])
+
+
+def _formatar_escalar(valores) -> list:
+    return ['' if pd.isna(valor) else C.formatar_valor(valor) for valor in valores]
+
+
+def _parse_escalar(textos) -> np.ndarray:
+    return np.array([C.parse_valor(texto) for texto in textos], dtype='float64')
+
+
+def _assert_floats_identicos(obtido: np.ndarray, esperado: np.ndarray) -> None:
+    """Igualdade bit a bit de floats: NaN com NaN e o sinal de -0.0."""
+    np.testing.assert_array_equal(obtido, esperado)
+    assert np.array_equal(np.signbit(obtido), np.signbit(esperado))
+
+
+@pytest.mark.parametrize('semente', range(5))
+def test_formatar_serie_igual_ao_escalar(semente):
+    valores = np.concatenate([_valores_aleatorios(semente), VALORES_ESPECIAIS])
+    serie = pd.Series(valores)
+
+    assert C.formatar_serie(serie).tolist() == _formatar_escalar(valores)
+
+
+def test_formatar_serie_nulos_e_tipos():
+    assert C.formatar_serie(pd.Series([1, None, 3], dtype=object)).tolist() == ['1,00', '', '3,00']
+    assert C.formatar_serie(pd.Series([2, 1000000], dtype='int64')).tolist() == ['2,00', '1.000.000,00']
+    assert C.formatar_serie(pd.Series([np.nan, 1.5]), valor_nulo=np.nan).isna().tolist() == [True, False]
+    assert C.formatar_serie(pd.Series([], dtype=float)).empty
+    assert C.formatar_serie(pd.Series(VALORES_ESPECIAIS[:2])).tolist() == ['0,00', '-0,00']
+
+
+@pytest.mark.parametrize('semente', range(5))
+def test_parse_serie_desfaz_formatar_como_o_escalar(semente):
+    valores = np.concatenate([_valores_aleatorios(semente), VALORES_ESPECIAIS])
+    textos = C.formatar_serie(pd.Series(valores))
+
+    _assert_floats_identicos(C.parse_serie(textos).to_numpy(), _parse_escalar(textos))
+
+
+def test_parse_serie_textos_fora_do_padrao_iguais_ao_escalar():
+    textos = pd.Series(TEXTOS + [None, np.nan])
+
+    _assert_floats_identicos(C.parse_serie(textos).to_numpy(), _parse_escalar(textos))
+
+
+def test_parse_serie_numeros_e_misturados_iguais_ao_escalar():
+    for serie in [
+        pd.Series([1.5, None, -0.0, np.inf], dtype=object),
+        pd.Series(['1,5', 2, None, 3.25, 'x', True]),
+        pd.Series(['1.234,5', '1,5'], dtype='category'),
+        pd.Series([1, 2, 3], dtype='int64'),
+    ]:
+        _assert_floats_identicos(C.parse_serie(serie).to_numpy(), _parse_escalar(serie))
+
+
+@pytest.mark.parametrize('semente', range(5))
+def test_arredondar_centavos_igual_ao_ciclo_pelo_texto(semente):
+    valores = np.concatenate([_valores_aleatorios(semente), VALORES_ESPECIAIS])
+    serie = pd.Series(valores)
+
+    esperado = _parse_escalar(_formatar_escalar(valores))
+    _assert_floats_identicos(C.arredondar_centavos(serie).to_numpy(), esperado)
+    _assert_floats_identicos(C.parse_serie(C.formatar_serie(serie)).to_numpy(), esperado)
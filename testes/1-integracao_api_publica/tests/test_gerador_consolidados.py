@@ -0,0 +1,56 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from domain.servicos.gerador_consolidados import GeradorConsolidados
+
+
+def _consolidado(linhas: int, semente: int) -> pd.DataFrame:
+    rng = np.random.default_rng(semente)
+    valores = rng.normal(0, 1e6, linhas).round(2)
+    valores[::17] = np.nan
+    return pd.DataFrame({
+        'ano': rng.integers(2023, 2025, linhas),
+        'trimestre': rng.choice(['1T', '2T', '3T', '4T'], linhas),
+        'reg_ans': rng.integers(300000, 300100, linhas),
+        'cd_conta_contabil': rng.integers(411000000, 411000100, linhas).astype(str),
+        'descricao': rng.choice(['Eventos / Sinistros', '(-) Glosas', None], linhas),
+        'vl_saldo_inicial': rng.normal(0, 1e6, linhas).round(2),
+        'vl_saldo_final': valores,
+    })
+
+
+def _gerar(consolidados: dict, diretorio: str, modo: str) -> dict:
+    resultados = GeradorConsolidados.gerar_multiplos_consolidados_paralelo(
+        consolidados, diretorio, usar_cache=False, max_workers=2, modo=modo
+    )
+    assert resultados == {nome: True for nome in consolidados}
+    conteudos = {}
+    for nome in consolidados:
+        with open(os.path.join(diretorio, f"{nome}.csv"), 'rb') as f:
+            conteudos[nome] = f.read()
+    return conteudos
+
+
+def test_pool_de_processos_nao_usa_fork():
+    assert GeradorConsolidados.contexto_processos().get_start_method() in ('forkserver', 'spawn')
+
+
+def test_modo_processos_gera_os_mesmos_csvs_que_threads(tmp_path):
+    pytest.importorskip('pyarrow')
+    misturado = _consolidado(50, 3)
+    # Coluna object com tipos misturados: o Arrow não converte e o CSV é gerado no processo principal
+    misturado['descricao'] = misturado['descricao'].astype(object)
+    misturado.loc[::2, 'descricao'] = 7
+    consolidados = {
+        'consolidado_a': _consolidado(3000, 1),
+        'consolidado_b': _consolidado(1000, 2),
+        'consolidado_misturado': misturado,
+    }
+
+    em_threads = _gerar(consolidados, str(tmp_path / 'threads'), 'threads')
+    em_processos = _gerar(consolidados, str(tmp_path / 'processos'), 'processos')
+
+    assert em_processos == em_threads
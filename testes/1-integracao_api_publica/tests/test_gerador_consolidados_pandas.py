@@ -0,0 +1,37 @@
+import io
+import zipfile
+
+import pandas as pd
+
+from domain.servicos.gerador_consolidados_pandas import GeradorConsolidadosPandas
+
+CADOP = (
+    'REGISTRO_OPERADORA;CNPJ;Razao_Social;Modalidade;UF\n'
+    '300001;45490888000126;OPERADORA A;Autogestão;SP\n'
+    '300002;01234567000189;OPERADORA B;Autogestão;RJ\n'
+)
+TRIMESTRE = (
+    'DATA;REG_ANS;CD_CONTA_CONTABIL;DESCRICAO;VL_SALDO_INICIAL;VL_SALDO_FINAL\n'
+    '01/01/2025;300001;411111111;Despesas com Eventos / Sinistros;1.000,00;2.500,50\n'
+    '01/01/2025;300002;411111111;Despesas com Eventos / Sinistros;0,00;10,00\n'
+    '01/01/2025;399999;411111111;Despesas com Eventos / Sinistros;0,00;7,00\n'
+)
+
+
+def test_cnpj_sai_como_inteiro_sem_casa_decimal(tmp_path):
+    origem = tmp_path / 'origem' / 'arquivos_trimestres'
+    (origem / 'operadoras').mkdir(parents=True)
+    (origem / 'extracted').mkdir()
+    (origem / 'operadoras' / 'Relatorio_cadop.csv').write_text(CADOP, encoding='utf-8-sig')
+    (origem / 'extracted' / '1T2025.csv').write_text(TRIMESTRE, encoding='utf-8-sig')
+    destino = tmp_path / 'destino'
+
+    resultado = GeradorConsolidadosPandas().gerar_consolidados_com_join(str(tmp_path / 'origem'), str(destino))
+
+    assert resultado['sucesso']
+    with zipfile.ZipFile(destino / 'consolidado_despesas.zip') as zipf:
+        for nome in ('consolidado_despesas_sinistros_c_deducoes.csv', 'sinistro_sem_deducoes.csv'):
+            csv = pd.read_csv(io.BytesIO(zipf.read(nome)), sep=';', encoding='utf-8-sig', dtype=str)
+            # A dimensão category preserva o inteiro lido do cadastro (antes: '45490888000126.0');
+            # o zero à esquerda já se perde na leitura numérica do cadastro
+            assert csv['CNPJ'].tolist() == ['45490888000126', '1234567000189', 'N/L']
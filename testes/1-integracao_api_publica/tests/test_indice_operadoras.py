@@ -0,0 +1,64 @@
+import os
+import threading
+
+from infraestrutura.indice_operadoras import IndiceOperadoras
+
+CABECALHO = 'REG_ANS;CNPJ;RAZAO_SOCIAL;MODALIDADE;UF\n'
+
+
+def _gravar(caminho, registros, sufixo=''):
+    with open(caminho, 'w', encoding='utf-8') as f:
+        f.write(CABECALHO)
+        for registro in registros:
+            f.write(f'{registro};{registro:014d};OPERADORA {registro}{sufixo};Cooperativa;SP\n')
+    # mtime distinto mesmo em sistemas de arquivos com resolução grossa
+    info = os.stat(caminho)
+    os.utime(caminho, ns=(info.st_atime_ns, info.st_mtime_ns + 10 ** 9))
+
+
+def test_resolve_ativa_cancelada_conflito_e_ausente(tmp_path):
+    ativas, canceladas = str(tmp_path / 'ativas.csv'), str(tmp_path / 'canceladas.csv')
+    _gravar(ativas, [1, 2])
+    _gravar(canceladas, [2, 3])
+    indice = IndiceOperadoras(ativas, canceladas)
+
+    assert indice.obter(1)['status'] == 'LOCALIZADO_ATIVA'
+    assert indice.obter(' 3 ')['status'] == 'LOCALIZADO_CANCELADA'
+    assert indice.obter(2)['status'] == 'CONFLITO'
+    assert indice.obter(4)['status'] == 'NAO_LOCALIZADO'
+    assert indice.obter_varios(['1', '2', '3', '4'])['status'].tolist() == [
+        'LOCALIZADO_ATIVA', 'CONFLITO', 'LOCALIZADO_CANCELADA', 'NAO_LOCALIZADO'
+    ]
+
+
+def test_recarga_nao_mistura_indices_durante_consultas(tmp_path):
+    ativas, canceladas = str(tmp_path / 'ativas.csv'), str(tmp_path / 'canceladas.csv')
+    _gravar(ativas, range(200))
+    _gravar(canceladas, [])
+    indice = IndiceOperadoras(ativas, canceladas)
+    indice.obter(0)
+
+    erros = []
+    parar = threading.Event()
+
+    def consultar():
+        while not parar.is_set():
+            try:
+                razoes = set(indice.obter_varios([str(i) for i in range(0, 200, 7)])['razao_social'].str[-2:])
+                # Cada lote vem inteiro de um único carregamento
+                if len({razao if razao in ('-a', '-b') else '' for razao in razoes}) != 1:
+                    erros.append(razoes)
+            except Exception as e:
+                erros.append(e)
+
+    leitores = [threading.Thread(target=consultar) for _ in range(3)]
+    for leitor in leitores:
+        leitor.start()
+    for versao in ['-a', '-b'] * 5:
+        _gravar(ativas, range(200), versao)
+        assert indice.obter(7)['razao_social'] == f'OPERADORA 7{versao}'
+    parar.set()
+    for leitor in leitores:
+        leitor.join()
+
+    assert erros == []
@@ -0,0 +1,142 @@
+"""Módulos com cópia no estágio 2 não podem divergir da cópia do estágio 1.
+
+Cada estágio roda a partir da própria raiz (cwd do subprocesso, imagem
+própria do estágio 1), por isso os módulos compartilhados são copiados em vez
+de importados de um pacote comum. As duas cópias são comparadas membro a
+membro pela árvore sintática, ignorando o que difere por convenção de cada
+estágio: docstrings, imports, aspas e o log (logger no estágio 1, print com
+"⚠" ou o logger recebido no estágio 2). Diferenças de projeto ficam listadas
+por módulo em MEMBROS_DIFERENTES.
+"""
+
+import ast
+import os
+
+import pytest
+
+RAIZ_ESTAGIO_1 = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RAIZ_ESTAGIO_2 = os.path.join(os.path.dirname(RAIZ_ESTAGIO_1), '2-transformacao_validacao')
+
+# módulo -> (caminho no estágio 1, caminho no estágio 2)
+MODULOS_ESPELHADOS = {
+    'compactador_zip': ('domain/servicos/compactador_zip.py', 'domain/servicos/compactador_zip.py'),
+    'conversor_numero_br': ('domain/servicos/conversor_numero_br.py', 'domain/servicos/conversor_numero_br.py'),
+    'intercambio_parquet': ('domain/servicos/intercambio_parquet.py', 'domain/servicos/intercambio_parquet.py'),
+    'perfil_memoria': ('infraestrutura/perfil_memoria.py', 'domain/servicos/perfil_memoria.py'),
+    'rastreador': ('infraestrutura/rastreador.py', 'domain/servicos/rastreador.py'),
+}
+
+# Membros que podem diferir (ou existir em só uma cópia), com o motivo
+MEMBROS_DIFERENTES = {
+    # O estágio 2 recebe o logger em iniciar() em vez de um logger do módulo
+    'perfil_memoria': {'PerfilMemoria._logger', 'PerfilMemoria.iniciar', 'PerfilMemoria.encerrar'},
+    # O estágio 2 não cria processos filhos: sem os arquivos parciais por processo
+    # e com o nome da thread guardado ao lado do evento
+    'rastreador': {
+        'Rastreador.VARIAVEL_PARCIAIS', 'Rastreador._pid',
+        'Rastreador.iniciar', 'Rastreador.ativo', 'Rastreador.registrar', 'Rastreador.gravar',
+    },
+}
+
+NIVEIS_LOG = {'debug', 'info', 'warning', 'error', 'exception'}
+
+
+class _NormalizarLog(ast.NodeTransformer):
+    """Troca as chamadas de log das duas convenções por uma chamada _log(...)."""
+
+    def visit_Call(self, no):
+        self.generic_visit(no)
+        funcao = no.func
+        eh_logger = (
+            isinstance(funcao, ast.Attribute) and funcao.attr in NIVEIS_LOG
+            and ast.unparse(funcao.value) in ('logger', 'cls._logger')
+        )
+        if isinstance(funcao, ast.Name) and funcao.id == 'print' and no.args:
+            mensagem = no.args[0]
+            if isinstance(mensagem, ast.JoinedStr) and mensagem.values and isinstance(mensagem.values[0], ast.Constant):
+                mensagem.values[0].value = mensagem.values[0].value.removeprefix('⚠ ')
+            eh_logger = True
+        if eh_logger:
+            no.func = ast.Name(id='_log', ctx=ast.Load())
+        return no
+
+
+def _sem_docstrings(arvore):
+    for no in ast.walk(arvore):
+        corpo = getattr(no, 'body', None)
+        if isinstance(corpo, list) and corpo and _eh_docstring(corpo[0]):
+            no.body = corpo[1:] or [ast.Pass()]
+    return arvore
+
+
+def _eh_docstring(no) -> bool:
+    return isinstance(no, ast.Expr) and isinstance(no.value, ast.Constant) and isinstance(no.value.value, str)
+
+
+def _eh_logger_do_modulo(no) -> bool:
+    return (
+        isinstance(no, ast.Assign) and isinstance(no.value, ast.Call)
+        and isinstance(no.value.func, ast.Name) and no.value.func.id == 'get_logger'
+    )
+
+
+def _nome(no) -> str:
+    if isinstance(no, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+        return no.name
+    if isinstance(no, (ast.Assign, ast.AnnAssign)):
+        alvos = no.targets if isinstance(no, ast.Assign) else [no.target]
+        return ', '.join(ast.unparse(alvo) for alvo in alvos)
+    return ast.unparse(no)
+
+
+def _membros(caminho: str) -> dict:
+    """Membros do módulo (e das classes, como Classe.membro) normalizados."""
+    with open(caminho, 'r', encoding='utf-8') as f:
+        arvore = _NormalizarLog().visit(_sem_docstrings(ast.parse(f.read())))
+
+    membros = {}
+    for no in arvore.body:
+        if isinstance(no, (ast.Import, ast.ImportFrom)) or _eh_logger_do_modulo(no):
+            continue
+        if isinstance(no, ast.ClassDef):
+            corpo, no.body = no.body, []
+            membros[no.name] = ast.dump(no)
+            for membro in corpo:
+                if not isinstance(membro, ast.Pass):
+                    membros[f'{no.name}.{_nome(membro)}'] = ast.dump(membro)
+        elif not isinstance(no, ast.Pass):
+            membros[_nome(no)] = ast.dump(no)
+    return membros
+
+
+@pytest.mark.parametrize('modulo', sorted(MODULOS_ESPELHADOS))
+def test_copia_do_estagio_2_igual_a_do_estagio_1(modulo):
+    caminho_1, caminho_2 = MODULOS_ESPELHADOS[modulo]
+    caminho_2 = os.path.join(RAIZ_ESTAGIO_2, caminho_2)
+    if not os.path.exists(caminho_2):
+        pytest.skip('estágio 2 fora desta cópia do repositório')
+
+    membros_1 = _membros(os.path.join(RAIZ_ESTAGIO_1, caminho_1))
+    membros_2 = _membros(caminho_2)
+    permitidos = MEMBROS_DIFERENTES.get(modulo, {})
+
+    divergentes = sorted(
+        nome for nome in set(membros_1) | set(membros_2)
+        if membros_1.get(nome) != membros_2.get(nome) and nome not in permitidos
+    )
+    assert divergentes == [], f'{modulo}: cópias divergentes em {divergentes}'
+    # Diferença listada que deixou de existir: a lista tem que acompanhar o código
+    assert sorted(nome for nome in permitidos if membros_1.get(nome) == membros_2.get(nome)) == []
+
+
+def test_normalizacao_detecta_divergencia(tmp_path):
+    caminho_1, caminho_2 = str(tmp_path / 'a.py'), str(tmp_path / 'b.py')
+    with open(caminho_1, 'w', encoding='utf-8') as f:
+        f.write("class A:\n    X = 'a'\n\n    def f(self, v):\n        logger.warning(f'Falhou {v}')\n        return v\n")
+    with open(caminho_2, 'w', encoding='utf-8') as f:
+        f.write('class A:\n    """Doc."""\n    X = "a"\n\n    def f(self, v):\n        print(f"⚠ Falhou {v}")\n        return v\n')
+
+    assert _membros(caminho_1) == _membros(caminho_2)
+    with open(caminho_2, 'a', encoding='utf-8') as f:
+        f.write('\n\ndef g():\n    return 1\n')
+    assert set(_membros(caminho_2)) - set(_membros(caminho_1)) == {'g'}
@@ -0,0 +1,119 @@
+import math
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from domain.servicos.processador_arquivos import ProcessadorArquivos
+from domain.servicos.validador_normalizador import ValidadorNormalizador
+
+CABECALHO = 'REG_ANS;CD_CONTA_CONTABIL;DESCRICAO;VL_SALDO_INICIAL;VL_SALDO_FINAL\n'
+
+
+def _valor_por_registro(dados) -> float:
+    """Cálculo por registro anterior à versão colunar (referência)."""
+    valor_total = 0.0
+    for registro in dados:
+        try:
+            vl_final = registro.get('VL_SALDO_FINAL', 0)
+            vl_inicial = registro.get('VL_SALDO_INICIAL', 0)
+            if isinstance(vl_final, str):
+                vl_final = float(vl_final.replace('.', '').replace(',', '.')) if vl_final else 0
+            if isinstance(vl_inicial, str):
+                vl_inicial = float(vl_inicial.replace('.', '').replace(',', '.')) if vl_inicial else 0
+            valor_total += (float(vl_final or 0) - float(vl_inicial or 0))
+        except Exception:
+            continue
+    return valor_total
+
+
+def _extrair_por_registro(caminho: str, ano: int, trimestre: int):
+    """Extração por registro anterior aos lotes colunares (referência)."""
+    df = ProcessadorArquivos.ler_arquivo_com_encoding(caminho, sep=';')
+    df.columns = df.columns.str.upper().str.strip().str.replace(' ', '_')
+    dados, rejeitados = [], 0
+    colunas = list(df.columns)
+    for linha in df.itertuples(index=False, name=None):
+        registro = dict(zip(colunas, linha))
+        if all(campo in registro for campo in ValidadorNormalizador.CAMPOS_OBRIGATORIOS):
+            registro['ANO'] = ano
+            registro['TRIMESTRE'] = trimestre
+            dados.append(registro)
+        else:
+            rejeitados += 1
+    return dados, _valor_por_registro(dados), rejeitados
+
+
+def _mesmo_valor(obtido: float, esperado: float) -> bool:
+    return obtido == esperado or (math.isnan(obtido) and math.isnan(esperado))
+
+
+def _gravar(caminho, saldos):
+    with open(caminho, 'w', encoding='utf-8') as f:
+        f.write(CABECALHO)
+        for i, (inicial, final) in enumerate(saldos):
+            f.write(f'{300000 + i};41111;Despesas com Eventos/Sinistros;{inicial};{final}\n')
+
+
+SALDOS_VALIDOS_E_INVALIDOS = [
+    ('1.234,56', '2.000,00'), ('0,00', '-15,5'), ('abc', '10,00'), ('1,2,3', '1,00'),
+    ('1.000.000,01', '999.999,99'), ('12,5', '--1'), ('nan', '1,00'), ('7,25', ' 8,75 '),
+]
+
+
+@pytest.mark.parametrize('saldos, tamanho_lote', [
+    (SALDOS_VALIDOS_E_INVALIDOS, 3),
+    # Célula vazia vira NaN na leitura: o total propaga NaN, como no cálculo por registro
+    (SALDOS_VALIDOS_E_INVALIDOS + [('', '3,00')], 4),
+    ([('100', '250'), ('-3', '4')], None),
+])
+def test_extrair_dados_arquivo_igual_a_extracao_por_registro(tmp_path, saldos, tamanho_lote):
+    caminho = str(tmp_path / '1T2025.csv')
+    _gravar(caminho, saldos)
+
+    lotes, valor, rejeitados = ProcessadorArquivos.extrair_dados_arquivo(caminho, 2025, 1, tamanho_lote)
+    dados, valor_esperado, rejeitados_esperados = _extrair_por_registro(caminho, 2025, 1)
+
+    assert all(len(lote) <= (tamanho_lote or ProcessadorArquivos.TAMANHO_LOTE) for lote in lotes)
+    pd.testing.assert_frame_equal(
+        pd.concat(lotes).reset_index(drop=True), pd.DataFrame(dados), check_dtype=False
+    )
+    assert _mesmo_valor(valor, valor_esperado)
+    assert rejeitados == rejeitados_esperados
+
+
+def test_extrair_dados_arquivo_sem_colunas_obrigatorias_rejeita_todos(tmp_path):
+    caminho = str(tmp_path / '1T2025.csv')
+    with open(caminho, 'w', encoding='utf-8') as f:
+        f.write('REG_ANS;DESCRICAO;VL_SALDO_FINAL\n')
+        f.write('1;Despesas com Eventos/Sinistros;1,00\n2;Despesas com Eventos/Sinistros;2,00\n')
+
+    assert ProcessadorArquivos.extrair_dados_arquivo(caminho, 2025, 1) == ([], 0.0, 2)
+
+
+@pytest.mark.parametrize('dados', [
+    [
+        {'VL_SALDO_FINAL': '1.234,56', 'VL_SALDO_INICIAL': '34,56'},
+        {'VL_SALDO_FINAL': None, 'VL_SALDO_INICIAL': '10,00'},
+        {'VL_SALDO_FINAL': '', 'VL_SALDO_INICIAL': 0},
+        {'VL_SALDO_FINAL': 'abc', 'VL_SALDO_INICIAL': '1,00'},
+        {'VL_SALDO_INICIAL': '2,5'},
+        {'VL_SALDO_FINAL': 7, 'VL_SALDO_INICIAL': True},
+        {'VL_SALDO_FINAL': pd.NA, 'VL_SALDO_INICIAL': '1,00'},
+        {'VL_SALDO_FINAL': '  ', 'VL_SALDO_INICIAL': '1,00'},
+        {'VL_SALDO_FINAL': 0.1, 'VL_SALDO_INICIAL': 0.3},
+    ],
+    [{'VL_SALDO_FINAL': '5,00', 'VL_SALDO_INICIAL': np.nan}, {'VL_SALDO_FINAL': '1,00', 'VL_SALDO_INICIAL': None}],
+    [{'VL_SALDO_FINAL': 'nan', 'VL_SALDO_INICIAL': '1,00'}, {'VL_SALDO_FINAL': 'inf', 'VL_SALDO_INICIAL': 'x'}],
+    [{'VL_SALDO_FINAL': 1.5, 'VL_SALDO_INICIAL': None}, {'VL_SALDO_FINAL': 2.0, 'VL_SALDO_INICIAL': 0.5}],
+    [],
+])
+def test_calcular_valor_arquivo_igual_ao_calculo_por_registro(dados):
+    assert _mesmo_valor(ValidadorNormalizador.calcular_valor_arquivo(dados), _valor_por_registro(dados))
+
+
+def test_calcular_valor_dataframe_colunas_numericas_e_ausentes():
+    df = pd.DataFrame({'VL_SALDO_FINAL': [1.5, 2.0], 'VL_SALDO_INICIAL': [0.5, np.nan]})
+
+    assert math.isnan(ValidadorNormalizador.calcular_valor_dataframe(df))
+    assert ValidadorNormalizador.calcular_valor_dataframe(df[['VL_SALDO_FINAL']]) == 3.5
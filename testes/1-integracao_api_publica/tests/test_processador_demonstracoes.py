@@ -0,0 +1,137 @@
+import random
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from domain.servicos.processador_demonstracoes import ProcessadorDemonstracoes
+
+
+def _agregar_operadoras_legado(df_operadoras: pd.DataFrame) -> pd.DataFrame:
+    """Implementação anterior de agregar_operadoras (groupby com lambdas), referência da paridade."""
+    df_operadoras['REG_ANS'] = pd.to_numeric(df_operadoras['REG_ANS'], errors='coerce').astype('Int64')
+    df_operadoras['STATUS'] = df_operadoras['STATUS'].str.upper()
+
+    def primeira_ativa(x):
+        ativas = df_operadoras.loc[x.index, 'STATUS'] == 'ATIVA'
+        return x[ativas].iloc[0] if any(ativas) else None
+
+    return df_operadoras.groupby('REG_ANS').agg(
+        qtd_operadoras=('REG_ANS', 'count'),
+        qtd_ativas=('STATUS', lambda x: (x == 'ATIVA').sum()),
+        cnpj_ativo=('CNPJ', primeira_ativa),
+        razao_social_ativa=('RAZAO_SOCIAL', primeira_ativa),
+        modalidade_ativa=('MODALIDADE', primeira_ativa),
+        uf_ativo=('UF', primeira_ativa),
+        status_ativo=('STATUS', primeira_ativa),
+        cnpj=('CNPJ', 'first'),
+        razao_social=('RAZAO_SOCIAL', 'first'),
+        modalidade=('MODALIDADE', 'first'),
+        uf=('UF', 'first'),
+        status=('STATUS', 'first'),
+    ).reset_index()
+
+
+def _cadastro(linhas: int, semente: int) -> pd.DataFrame:
+    """Cadastro com REG_ANS repetidos/inválidos/nulos, STATUS em caixas variadas e campos nulos."""
+    r = random.Random(semente)
+    return pd.DataFrame({
+        'REG_ANS': [r.choice([None, 'x'] + [str(r.randint(1, linhas // 3 + 1))] * 8) for _ in range(linhas)],
+        'STATUS': [r.choice(['ativa', 'ATIVA', 'CANCELADA', None, 'cancelada']) for _ in range(linhas)],
+        'CNPJ': [r.choice([None, r.randint(1, 10 ** 13)]) for _ in range(linhas)],
+        'RAZAO_SOCIAL': [r.choice([None, f'R{r.randint(1, 50)}']) for _ in range(linhas)],
+        'MODALIDADE': [r.choice([np.nan, 'M1', 'M2']) for _ in range(linhas)],
+        'UF': [r.choice(['SP', 'RJ', None]) for _ in range(linhas)],
+    })
+
+
+def _nulos_como_nan(df: pd.DataFrame) -> pd.DataFrame:
+    """None e NaN se equivalem a jusante (isna); a paridade compara só os valores."""
+    return df.astype(object).where(df.notna(), np.nan).astype(df.dtypes.to_dict())
+
+
+@pytest.mark.parametrize('semente', range(100))
+def test_agregar_operadoras_igual_a_implementacao_anterior(semente):
+    df = _cadastro(random.Random(semente).randint(1, 400), semente)
+
+    # Dtypes não são comparados: colunas sem nenhum valor saíam do agg antigo ora
+    # float64, ora object, conforme o tipo dos nulos; os valores são os mesmos
+    pd.testing.assert_frame_equal(
+        _nulos_como_nan(ProcessadorDemonstracoes.agregar_operadoras(df.copy())),
+        _nulos_como_nan(_agregar_operadoras_legado(df.copy())),
+        check_dtype=False
+    )
+
+
+def _regras_duplicidade_legado(df_merged: pd.DataFrame) -> pd.DataFrame:
+    """Implementação anterior de aplicar_regras_duplicidade (np.select sobre arrays object)."""
+    P = ProcessadorDemonstracoes
+    caso = P.classificar_casos_duplicidade(df_merged)
+    eh_uma_ativa = caso == P.CASO_DUPLICADO_UMA_ATIVA
+    condicoes = [caso == P.CASO_NAO_LOCALIZADO, caso == P.CASO_SEM_CADASTRO, eh_uma_ativa, caso == P.CASO_DUPLICIDADE]
+    saidas = {}
+    for coluna_saida, regra in P.REGRAS_DUPLICIDADE.items():
+        origem_unico, origem_ativa, valor_nao_localizado, valor_duplicidade, nulo_unico, nulo_ativa = regra
+        valores = np.select(
+            condicoes,
+            [np.asarray(valor_nao_localizado, dtype=object), np.asarray(nulo_unico, dtype=object),
+             df_merged[origem_ativa].to_numpy(dtype=object), np.asarray(valor_duplicidade, dtype=object)],
+            default=df_merged[origem_unico].to_numpy(dtype=object)
+        )
+        nulos = pd.isna(valores)
+        valores[nulos] = np.where(eh_uma_ativa[nulos], nulo_ativa, nulo_unico)
+        saidas[coluna_saida] = valores
+    return pd.DataFrame(saidas, index=df_merged.index)
+
+
+@pytest.mark.parametrize('semente', range(20))
+@pytest.mark.parametrize('como_category', [False, True])
+def test_aplicar_regras_duplicidade_igual_a_implementacao_anterior(semente, como_category):
+    r = random.Random(semente)
+    linhas = r.randint(1, 300)
+    agregadas = ProcessadorDemonstracoes.agregar_operadoras(_cadastro(linhas, semente))
+    despesas = pd.DataFrame({'REG_ANS': pd.array(
+        [r.choice([None, r.randint(1, linhas // 3 + 10)]) for _ in range(linhas * 2)], dtype='Int64'
+    )})
+    merged = despesas.merge(agregadas, on='REG_ANS', how='left')
+    if como_category:
+        for regra in ProcessadorDemonstracoes.REGRAS_DUPLICIDADE.values():
+            merged[regra[0]] = merged[regra[0]].astype('category')
+            merged[regra[1]] = merged[regra[1]].astype('category')
+
+    esperado = _regras_duplicidade_legado(merged.copy())
+    resultado = ProcessadorDemonstracoes.aplicar_regras_duplicidade(merged.copy())
+
+    for coluna in ProcessadorDemonstracoes.REGRAS_DUPLICIDADE:
+        # Origem category continua category; origem object continua object
+        assert isinstance(resultado[coluna].dtype, pd.CategoricalDtype) == como_category
+        assert resultado[coluna].notna().all()
+        assert resultado[coluna].astype(object).tolist() == esperado[coluna].tolist()
+
+
+def test_detectar_erros_join_inclui_razao_social_vazia_no_cadastro(tmp_path):
+    P = ProcessadorDemonstracoes
+    cadastro = pd.DataFrame({
+        'REG_ANS': ['1', '2', '3', '3'],
+        'STATUS': ['ATIVA', 'ATIVA', 'CANCELADA', 'CANCELADA'],
+        'CNPJ': [11, 22, 33, 34],
+        # REG_ANS 2 é localizado, mas sem razão social: sai como N/L
+        'RAZAO_SOCIAL': ['OPERADORA 1', None, 'OPERADORA 3', 'OPERADORA 3B'],
+        'MODALIDADE': ['M1', 'M1', 'M2', 'M2'],
+        'UF': ['SP', 'RJ', 'MG', 'MG'],
+    })
+    despesas = pd.DataFrame({'REG_ANS': pd.array([1, 2, 3, 4, None], dtype='Int64')})
+    merged = despesas.merge(P.agregar_operadoras(cadastro), on='REG_ANS', how='left')
+    df = P.aplicar_regras_duplicidade(merged)
+
+    contagens = P.detectar_erros_join(df, diretorio_erros=str(tmp_path))
+
+    assert contagens == {P.MOTIVO_OPERADORA_DUPLICADA: 1, P.MOTIVO_OPERADORA_NAO_LOCALIZADA: 3}
+    # Mesmo resultado da detecção pela coluna final, sem os casos resolvidos
+    sem_casos = P.detectar_erros_join(df.drop(columns='caso_duplicidade'), diretorio_erros=str(tmp_path / 'sem_casos'))
+    assert sem_casos == contagens
+    relatorio = pd.read_csv(tmp_path / 'erros_join.csv', sep=';', encoding='utf-8-sig')
+    assert relatorio['motivo_erro'].tolist() == [
+        P.MOTIVO_OPERADORA_NAO_LOCALIZADA, P.MOTIVO_OPERADORA_DUPLICADA,
+        P.MOTIVO_OPERADORA_NAO_LOCALIZADA, P.MOTIVO_OPERADORA_NAO_LOCALIZADA,
+    ]
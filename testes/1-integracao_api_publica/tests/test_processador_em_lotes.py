@@ -0,0 +1,67 @@
+import pytest
+
+from infraestrutura.gerenciador_checkpoint import GerenciadorCheckpoint
+from infraestrutura.processador_em_lotes import ProcessadorEmLotes
+
+ARQUIVO = 'despesas.csv'
+
+
+def _inserir_falhando_no_lote(lote_com_falha: int, modo: str):
+    """funcao_inserir que falha (exceção ou False) no lote que começa em lote_com_falha (None: nunca)."""
+    inseridos = []
+
+    def inserir(lote, arquivo_origem=None):
+        if lote[0]['id'] == lote_com_falha:
+            if modo == 'excecao':
+                raise RuntimeError('falha simulada')
+            return False
+        inseridos.extend(registro['id'] for registro in lote)
+        return len(lote)
+
+    return inserir, inseridos
+
+
+@pytest.mark.parametrize('max_workers', [1, 3])
+@pytest.mark.parametrize('modo', ['excecao', 'false'])
+def test_lote_do_meio_com_falha_congela_o_checkpoint(tmp_path, max_workers, modo):
+    registros = [{'id': i} for i in range(50)]
+    inserir, inseridos = _inserir_falhando_no_lote(10, modo)
+
+    with GerenciadorCheckpoint(str(tmp_path), fsync_a_cada=1) as checkpoint:
+        resultado = ProcessadorEmLotes(tamanho_lote=10, max_workers=max_workers).processar_stream(
+            registros, inserir, checkpoint, ARQUIVO, registro_inicial=0
+        )
+        final = checkpoint.obter_checkpoint(ARQUIVO)
+
+    assert resultado['registros_processados'] == 40
+    assert sorted(inseridos) == list(range(0, 10)) + list(range(20, 50))
+    assert final['registro'] == 10
+    assert final['status'] == 'em_progresso'
+
+    # A próxima execução retoma do lote que falhou (lido do journal)
+    with GerenciadorCheckpoint(str(tmp_path)) as checkpoint:
+        assert checkpoint.registro_inicial(ARQUIVO) == 10
+        reinserir, reinseridos = _inserir_falhando_no_lote(None, modo)
+        ProcessadorEmLotes(tamanho_lote=10, max_workers=max_workers).processar_stream(
+            registros, reinserir, checkpoint, ARQUIVO
+        )
+        assert reinseridos == list(range(10, 50))
+        assert checkpoint.obter_checkpoint(ARQUIVO)['status'] == 'concluido'
+        assert checkpoint.obter_checkpoint(ARQUIVO)['registro'] == 50
+
+
+@pytest.mark.parametrize('max_workers', [1, 3])
+def test_sem_falhas_conclui_o_arquivo(tmp_path, max_workers):
+    registros = [{'id': i} for i in range(45)]
+
+    with GerenciadorCheckpoint(str(tmp_path)) as checkpoint:
+        resultado = ProcessadorEmLotes(tamanho_lote=10, max_workers=max_workers).processar_stream(
+            iter(registros), lambda lote, arquivo_origem=None: len(lote), checkpoint, ARQUIVO, registro_inicial=0
+        )
+        final = checkpoint.obter_checkpoint(ARQUIVO)
+
+    assert resultado['registros_processados'] == 45
+    assert final == {
+        'arquivo': ARQUIVO, 'registro': 45, 'status': 'concluido',
+        'registros_processados': 45, 'registros_erro': 0,
+    }
@@ -0,0 +1 @@
+"""Benchmarks de desempenho do estágio de transformação e validação."""
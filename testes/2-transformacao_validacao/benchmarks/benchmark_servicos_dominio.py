@@ -0,0 +1,280 @@
+"""
+Micro-benchmarks das funções de domínio mais quentes do estágio 2.
+
+Para cada tamanho, monta despesas no formato do CSV consolidado do estágio 1
+(consolidado_despesas_sinistros_c_deducoes.csv) e um cadastro de operadoras
+(ativas + canceladas, com registros duplicados e CNPJs inválidos) carregado
+por CarregadorDados.carregar_operadoras_de_csvs, e mede isoladamente:
+- ValidadorDespesas.validar_e_enriquecer
+- EnriquecedorOperadoras.criar_mapa_por_registro_ans / enriquecer_com_modalidade_uf
+- ValidadorCNPJ.validar (uma chamada por linha, como em _validar_cnpjs)
+- AgregadorDespesas.agregar_por_operadora_uf
+
+Vale o melhor tempo entre as repetições. Os resultados vão para um JSON
+(--saida) e são comparados com a linha de base
+(linha_de_base_servicos_dominio.json, versionada): o script termina com código
+1 se alguma medição ficar mais lenta que a tolerância. --atualizar-linha-de-base
+grava a execução atual como nova linha de base (medir na mesma máquina em que
+será comparada).
+
+Uso (a partir de testes/2-transformacao_validacao):
+    python -m benchmarks.benchmark_servicos_dominio --linhas 10000 100000 1000000
+    python -m benchmarks.benchmark_servicos_dominio --linha-de-base benchmarks/resultados/anterior.json
+    python -m benchmarks.benchmark_servicos_dominio --atualizar-linha-de-base
+"""
+import argparse
+import contextlib
+import io
+import json
+import logging
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime
+from typing import Callable, Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+from domain.servicos import (
+    AgregadorDespesas,
+    CarregadorDados,
+    EnriquecedorOperadoras,
+    NormalizadorDados,
+    ValidadorCNPJ,
+    ValidadorDespesas,
+)
+
+DIRETORIO_RESULTADOS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "resultados")
+LINHA_DE_BASE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "linha_de_base_servicos_dominio.json")
+# Variações absolutas abaixo desta não contam como regressão (ruído em medições curtas)
+FOLGA_SEGUNDOS = 0.01
+MODALIDADES = ["Medicina de Grupo", "Cooperativa Médica", "Autogestão", "Odontologia de Grupo", "Filantropia"]
+UFS = ["SP", "RJ", "MG", "RS", "PR", "BA", "SC", "PE", "GO", "DF"]
+DESCRICOES = [
+    ("411000100", "Despesas com Eventos / Sinistros"),
+    ("411000101", "(-) Glosas"),
+    ("411000200", "Despesas com Eventos / Sinistros - Internações"),
+    ("411000201", "(-) Recuperação por Co-Participação"),
+    ("411000202", "- Recuperação de Eventos"),
+]
+
+
+def _cnpjs(rng: np.random.Generator, quantidade: int, fracao_invalidos: float = 0.01) -> List[str]:
+    """CNPJs de 14 dígitos com dígitos verificadores válidos (exceto a fração pedida)"""
+    base = np.column_stack([rng.integers(0, 10, size=(quantidade, 8)), np.tile([0, 0, 0, 1], (quantidade, 1))])
+    for pesos in ([5, 4, 3, 2, 9, 8, 7, 6, 5, 4, 3, 2], [6, 5, 4, 3, 2, 9, 8, 7, 6, 5, 4, 3, 2]):
+        resto = (base * pesos).sum(axis=1) % 11
+        base = np.column_stack([base, np.where(resto < 2, 0, 11 - resto)])
+    invalidos = rng.random(quantidade) < fracao_invalidos
+    base[invalidos, -1] = (base[invalidos, -1] + 1) % 10
+    return ["".join(map(str, linha)) for linha in base]
+
+
+def gravar_operadoras(diretorio: str, quantidade: int, semente: int) -> np.ndarray:
+    """
+    Grava operadoras/operadoras_ativas.csv e operadoras_canceladas.csv como o
+    estágio 1 deixa (cópias de Relatorio_cadop*); 2% dos registros ativos
+    reaparecem nas canceladas. Devolve os REG_ANS gravados.
+    """
+    rng = np.random.default_rng(semente)
+    registros = rng.choice(np.arange(300000, 1000000), quantidade, replace=False)
+    canceladas = int(quantidade * 0.2)
+    ativas, so_canceladas = registros[canceladas:], registros[:canceladas]
+    duplicadas = rng.choice(ativas, max(1, int(len(ativas) * 0.02)), replace=False)
+
+    pasta = os.path.join(diretorio, "operadoras")
+    os.makedirs(pasta, exist_ok=True)
+    for nome, regs in (("operadoras_ativas.csv", ativas), ("operadoras_canceladas.csv", np.concatenate([so_canceladas, duplicadas]))):
+        pd.DataFrame({
+            "REGISTRO_OPERADORA": regs,
+            "CNPJ": _cnpjs(rng, len(regs)),
+            "Razao_Social": [f"OPERADORA {registro} LTDA" for registro in regs],
+            "Modalidade": rng.choice(MODALIDADES, len(regs)),
+            "UF": rng.choice(UFS, len(regs)),
+        }).to_csv(os.path.join(pasta, nome), sep=";", index=False, encoding="utf-8-sig")
+    return registros
+
+
+def montar_despesas(linhas: int, registros: np.ndarray, cnpj_por_registro: Dict, semente: int) -> pd.DataFrame:
+    """Despesas como o CSV consolidado do estágio 1 é lido (pd.read_csv, valores em texto BR)"""
+    rng = np.random.default_rng(semente)
+    # 1% dos REG_ANS sem cadastro, como nos consolidados reais
+    desconhecidos = rng.integers(100000, 200000, max(1, len(registros) // 100))
+    regs = rng.choice(np.concatenate([registros, desconhecidos]), linhas)
+    contas = rng.integers(0, len(DESCRICOES), linhas)
+    valores = rng.lognormal(11, 2, linhas).round(2)
+    eh_deducao = np.array([descricao.startswith(("-", "(-)")) for _, descricao in DESCRICOES])[contas]
+    valores[eh_deducao] *= -1
+    valores[rng.random(linhas) < 0.01] = 0
+
+    texto = pd.DataFrame({
+        "CNPJ": [cnpj_por_registro.get(registro, "N/L") for registro in regs],
+        "RAZAOSOCIAL": [f"OPERADORA {registro} LTDA" if registro in cnpj_por_registro else "N/L" for registro in regs],
+        "TRIMESTRE": rng.choice(["1T", "2T", "3T", "4T"], linhas),
+        "ANO": rng.choice([2024, 2025], linhas),
+        "VALOR DE DESPESAS": pd.Series(valores).map(
+            lambda valor: f"{valor:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
+        ),
+        "REGISTRO ANS": regs,
+        "CONTA CONTÁBIL": [DESCRICOES[i][0] for i in contas],
+        "DESCRICAO": [DESCRICOES[i][1] for i in contas],
+    }).to_csv(sep=";", index=False)
+    return pd.read_csv(io.StringIO(texto), sep=";")
+
+
+def montar_entradas(diretorio: str, linhas: int, operadoras: int, logger: logging.Logger) -> Dict:
+    """Entradas de cada função, obtidas pelos mesmos passos de GerarDespesasAgregadas"""
+    registros = gravar_operadoras(diretorio, operadoras, semente=1)
+    df_operadoras = CarregadorDados.carregar_operadoras_de_csvs(diretorio, logger)
+    cnpj_por_registro = dict(zip(df_operadoras["reg_ans"], df_operadoras["cnpj"].astype(str)))
+    despesas = montar_despesas(linhas, registros, cnpj_por_registro, semente=2)
+    validado = ValidadorDespesas.validar_e_enriquecer(despesas, df_operadoras, "benchmark", logger)
+    return {
+        "operadoras": df_operadoras,
+        "despesas": despesas,
+        "normalizado": NormalizadorDados.normalizar_colunas(despesas.copy()),
+        "mapa": EnriquecedorOperadoras.criar_mapa_por_registro_ans(df_operadoras, logger=logger),
+        "validado": validado,
+    }
+
+
+def casos(entradas: Dict, logger: logging.Logger) -> List[Tuple[str, Callable, Callable[[], tuple]]]:
+    """(nome, função, preparar) de cada medição; preparar devolve os argumentos"""
+    return [
+        ("ValidadorDespesas.validar_e_enriquecer", ValidadorDespesas.validar_e_enriquecer,
+         lambda: (entradas["despesas"], entradas["operadoras"], "benchmark", logger)),
+        ("EnriquecedorOperadoras.criar_mapa_por_registro_ans", EnriquecedorOperadoras.criar_mapa_por_registro_ans,
+         lambda: (entradas["operadoras"], logger)),
+        ("EnriquecedorOperadoras.enriquecer_com_modalidade_uf", EnriquecedorOperadoras.enriquecer_com_modalidade_uf,
+         lambda: (entradas["normalizado"], entradas["mapa"], logger, "benchmark")),
+        ("ValidadorCNPJ.validar", lambda cnpjs: [ValidadorCNPJ.validar(valor) for valor in cnpjs],
+         lambda: (entradas["despesas"]["CNPJ"].astype(str),)),
+        ("AgregadorDespesas.agregar_por_operadora_uf", AgregadorDespesas.agregar_por_operadora_uf,
+         lambda: (entradas["validado"],)),
+    ]
+
+
+def medir(funcao: Callable, preparar: Callable[[], tuple], repeticoes: int) -> float:
+    """Melhor tempo (s) entre as repetições"""
+    tempos = []
+    for _ in range(repeticoes):
+        argumentos = preparar()
+        inicio = time.perf_counter()
+        funcao(*argumentos)
+        tempos.append(time.perf_counter() - inicio)
+    return min(tempos)
+
+
+def comparar(resultados: List[Dict], linha_de_base: Dict, tolerancia: float) -> List[str]:
+    """Medições mais lentas que (1 + tolerancia) x a da linha de base (e além da folga absoluta)"""
+    anteriores = {(r["funcao"], r["linhas"]): r["segundos"] for r in linha_de_base["resultados"]}
+
+    regressoes = []
+    for resultado in resultados:
+        anterior = anteriores.get((resultado["funcao"], resultado["linhas"]))
+        if (anterior and resultado["segundos"] > anterior * (1 + tolerancia)
+                and resultado["segundos"] - anterior > FOLGA_SEGUNDOS):
+            regressoes.append(
+                f"{resultado['funcao']} ({resultado['linhas']:,} linhas): "
+                f"{anterior:.4f}s -> {resultado['segundos']:.4f}s ({resultado['segundos'] / anterior:.2f}x)"
+            )
+    return regressoes
+
+
+def principal():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--linhas", type=int, nargs="+", default=[10000, 100000], help="Linhas de despesas")
+    parser.add_argument("--operadoras", type=int, default=1500, help="Operadoras no cadastro (ativas + canceladas)")
+    parser.add_argument("--repeticoes", type=int, default=3, help="Repetições por medição (vale o melhor tempo)")
+    parser.add_argument("--filtro", default=None, help="Só as funções cujo nome contém este texto")
+    parser.add_argument("--saida", default=None, help="JSON de resultados (padrão: benchmarks/resultados/...)")
+    parser.add_argument("--linha-de-base", default=LINHA_DE_BASE, help="JSON de referência")
+    parser.add_argument("--atualizar-linha-de-base", action="store_true",
+                        help="Gravar esta execução como linha de base em vez de comparar")
+    # Medições de décimos de segundo variam mais entre execuções que as etapas do pipeline
+    parser.add_argument("--tolerancia", type=float, default=0.5, help="Aumento de tempo aceito (0.5 = 50%%)")
+    args = parser.parse_args()
+
+    # Os avisos por linha continuam sendo formatados (custo real), mas não são gravados
+    logger = logging.getLogger("benchmark_servicos_dominio")
+    logger.addHandler(logging.NullHandler())
+    logger.propagate = False
+
+    print(f"CPUs: {os.cpu_count()} | pandas {pd.__version__} | numpy {np.__version__} | operadoras: {args.operadoras:,}")
+    print(f"{'função':<52} {'linhas':>10} {'melhor (s)':>11} {'linhas/s':>12}")
+
+    resultados = []
+    for linhas in args.linhas:
+        diretorio = tempfile.mkdtemp(prefix=f"bench_dominio_{linhas}_")
+        try:
+            with contextlib.redirect_stdout(io.StringIO()):
+                entradas = montar_entradas(diretorio, linhas, args.operadoras, logger)
+
+            for nome, funcao, preparar in casos(entradas, logger):
+                if args.filtro and args.filtro not in nome:
+                    continue
+                linhas_entrada = len(preparar()[0])
+                with contextlib.redirect_stdout(io.StringIO()):
+                    segundos = medir(funcao, preparar, args.repeticoes)
+                resultados.append({
+                    "funcao": nome,
+                    "linhas": linhas,
+                    "linhas_entrada": linhas_entrada,
+                    "segundos": round(segundos, 6),
+                    "linhas_por_s": round(linhas_entrada / segundos) if segundos else None,
+                })
+                print(f"{nome:<52} {linhas_entrada:>10,} {segundos:>11.4f} {linhas_entrada / segundos:>12,.0f}")
+        finally:
+            shutil.rmtree(diretorio, ignore_errors=True)
+
+    execucao = {
+        "data": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "numpy": np.__version__,
+        "cpus": os.cpu_count(),
+        "operadoras": args.operadoras,
+        "repeticoes": args.repeticoes,
+        "resultados": resultados,
+    }
+
+    if args.atualizar_linha_de_base:
+        with open(args.linha_de_base, "w", encoding="utf-8") as f:
+            json.dump(execucao, f, ensure_ascii=False, indent=2)
+            f.write("\n")
+        print(f"\nLinha de base atualizada: {args.linha_de_base}")
+        return
+
+    saida = args.saida or os.path.join(
+        DIRETORIO_RESULTADOS, f"servicos_dominio_{datetime.now():%Y%m%d_%H%M%S}.json"
+    )
+    os.makedirs(os.path.dirname(saida) or ".", exist_ok=True)
+    with open(saida, "w", encoding="utf-8") as f:
+        json.dump(execucao, f, ensure_ascii=False, indent=2)
+    print(f"\nResultados gravados em: {saida}")
+
+    if not os.path.exists(args.linha_de_base):
+        print(f"Sem linha de base em {args.linha_de_base} (use --atualizar-linha-de-base)")
+        return
+    with open(args.linha_de_base, "r", encoding="utf-8") as f:
+        linha_de_base = json.load(f)
+    # O tamanho do cadastro muda o custo dos joins: medições com outro --operadoras não são comparáveis
+    if linha_de_base.get("operadoras") != args.operadoras:
+        print(f"Linha de base medida com {linha_de_base.get('operadoras')} operadoras; comparação ignorada")
+        return
+    regressoes = comparar(resultados, linha_de_base, args.tolerancia)
+    if regressoes:
+        print(f"\nRegressões acima de {args.tolerancia:.0%} em relação a {args.linha_de_base}:")
+        for regressao in regressoes:
+            print(f"  {regressao}")
+        sys.exit(1)
+    print(f"Sem regressões acima de {args.tolerancia:.0%} em relação a {args.linha_de_base} "
+          f"({linha_de_base['data']}, {linha_de_base['cpus']} CPUs)")
+
+
+if __name__ == "__main__":
+    principal()
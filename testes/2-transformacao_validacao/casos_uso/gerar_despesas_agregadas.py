@@ -1,17 +1,37 @@
 """
 Caso de Uso: Gerar Despesas Agregadas
 Orquestra o processamento de arquivos consolidados, validação, enriquecimento e agregação.
+
+Com RASTREAMENTO, cada etapa é medida e a execução grava um trace (formato
+Chrome trace) em <saída>/logs/rastreamento_<data>.json. Com PERFIL_MEMORIA,
+o log da execução recebe o pico de memória de cada etapa e um resumo antes
+da gravação do ZIP.
 """
 import os
 import zipfile
+from datetime import datetime
 
-from config import DATABASE_URL, DIRETORIO_CONSOLIDADOS, DIRETORIO_TRANSFORMACAO
+from config import (
+    DATABASE_URL,
+    DIRETORIO_CONSOLIDADOS,
+    DIRETORIO_TRANSFORMACAO,
+    ZIP_COMPRESSAO,
+    ZIP_NIVEL,
+    ZIP_THREADS,
+    FORMATO_INTERMEDIARIO,
+    RASTREAMENTO,
+    PERFIL_MEMORIA,
+)
+from domain.entidades import PoliticaCompressao
 from domain.servicos import (
     GerenciadorZIP,
     GerenciadorLog,
     CarregadorDados,
     ValidadorDespesas,
     AgregadorDespesas,
+    PerfilMemoria,
+    Rastreador,
+    trecho,
 )
 
 
@@ -50,58 +70,91 @@ class GerarDespesasAgregadas:
 
     def executar(self):
         """Executa o processamento completo de validação e agregação"""
+        if RASTREAMENTO:
+            Rastreador.iniciar(os.path.join(
+                self.diretorio_saida, "logs", f"rastreamento_{datetime.now():%Y%m%d_%H%M%S}.json"
+            ))
+        if PERFIL_MEMORIA:
+            PerfilMemoria.iniciar(self.logger)
+        try:
+            with trecho("GerarDespesasAgregadas.executar"):
+                self._executar()
+        finally:
+            PerfilMemoria.encerrar()
+            caminho_rastreamento = Rastreador.gravar()
+            if caminho_rastreamento:
+                self.logger.info(f"Rastreamento gravado em: {caminho_rastreamento}")
+
+    def _executar(self):
+        """Etapas de executar (medidas uma a uma no rastreamento)"""
         print("=" * 60)
         print("VALIDAÇÃO E AGREGAÇÃO DE DESPESAS")
         print("=" * 60)
 
         # Carregar operadoras DOS CSVs (ativas + canceladas)
         diretorio_downloads = os.path.dirname(self.diretorio_dados)  # ../downloads/1-trimestres_consolidados -> ../downloads
-        operadoras = CarregadorDados.carregar_operadoras_de_csvs(diretorio_downloads, self.logger)
+        with trecho("Carregar operadoras") as args:
+            operadoras = CarregadorDados.carregar_operadoras_de_csvs(diretorio_downloads, self.logger)
+            args["linhas"] = len(operadoras)
 
         # Processar arquivo sem deduções
         agreg_sem = None
-        df_sem = CarregadorDados.carregar_despesas(
-            self.arquivo_sinistros_sem_deducoes,
-            self.zip_path,
-            self.diretorio_dados,
-            self.logger,
-        )
-        
-        if df_sem is not None:
-            df_sem_validado = ValidadorDespesas.validar_e_enriquecer(
-                df_sem, 
-                operadoras, 
-                "sinistro_sem_deducoes", 
-                self.logger
+        with trecho("Processar sinistro_sem_deducoes") as args:
+            df_sem = CarregadorDados.carregar_despesas(
+                self.arquivo_sinistros_sem_deducoes,
+                self.zip_path,
+                self.diretorio_dados,
+                self.logger,
             )
             
-            agreg_sem = AgregadorDespesas.agregar_por_operadora_uf(df_sem_validado)
+            if df_sem is not None:
+                df_sem_validado = ValidadorDespesas.validar_e_enriquecer(
+                    df_sem, 
+                    operadoras, 
+                    "sinistro_sem_deducoes", 
+                    self.logger
+                )
+                
+                agreg_sem = AgregadorDespesas.agregar_por_operadora_uf(df_sem_validado)
+                args["linhas"] = len(df_sem_validado)
 
         # Processar arquivo com deduções
         agreg_c_deducoes = None
-        df_c_deducoes = CarregadorDados.carregar_despesas(
-            self.arquivo_sinistros_c_deducoes,
-            self.zip_path,
-            self.diretorio_dados,
-            self.logger,
-        )
-        if df_c_deducoes is not None:
-            df_c_deducoes = ValidadorDespesas.validar_e_enriquecer(
-                df_c_deducoes,
-                operadoras,
-                "consolidado_c_deducoes",
+        with trecho("Processar consolidado_c_deducoes") as args:
+            df_c_deducoes = CarregadorDados.carregar_despesas(
+                self.arquivo_sinistros_c_deducoes,
+                self.zip_path,
+                self.diretorio_dados,
                 self.logger,
             )
-            agreg_c_deducoes = AgregadorDespesas.agregar_por_operadora_uf(df_c_deducoes)
+            if df_c_deducoes is not None:
+                df_c_deducoes = ValidadorDespesas.validar_e_enriquecer(
+                    df_c_deducoes,
+                    operadoras,
+                    "consolidado_c_deducoes",
+                    self.logger,
+                )
+                agreg_c_deducoes = AgregadorDespesas.agregar_por_operadora_uf(df_c_deducoes)
+                args["linhas"] = len(df_c_deducoes)
+
 
+        # Resumo de memória antes do ZIP, para entrar no log gravado nele
+        PerfilMemoria.registrar_resumo()
 
         # Criar novo ZIP com os arquivos agregados
-        GerenciadorZIP.criar_zip_com_dataframes(
-            self.diretorio_saida,
-            agreg_sem,
-            agreg_c_deducoes,
-            self.log_file_path,
-        )
+        with trecho("Criar ZIP de saída"):
+            GerenciadorZIP.criar_zip_com_dataframes(
+                self.diretorio_saida,
+                agreg_sem,
+                agreg_c_deducoes,
+                self.log_file_path,
+                politica=PoliticaCompressao(
+                    metodo=ZIP_COMPRESSAO,
+                    nivel=ZIP_NIVEL,
+                    max_threads=ZIP_THREADS,
+                    formato_intermediario=FORMATO_INTERMEDIARIO,
+                ),
+            )
 
         print("=" * 60)
         print("PROCESSAMENTO CONCLUÍDO")
@@ -14,3 +14,15 @@ DEBUG = os.getenv('DEBUG', 'True') == 'True'
 DIRETORIO_INTEGRACAO = os.getenv('DIRETORIO_INTEGRACAO', '/app/downloads')
 DIRETORIO_CONSOLIDADOS = os.path.join(DIRETORIO_INTEGRACAO, '1-trimestres_consolidados')
 DIRETORIO_TRANSFORMACAO = os.path.join(DIRETORIO_INTEGRACAO, '2-tranformacao_validacao')
+
+# Compressão dos ZIPs de saída (ZIP_COMPRESSAO: deflated | stored | bzip2 | lzma)
+ZIP_COMPRESSAO = os.getenv('ZIP_COMPRESSAO', 'deflated')
+ZIP_NIVEL = int(os.getenv('ZIP_NIVEL')) if os.getenv('ZIP_NIVEL') else None
+ZIP_THREADS = int(os.getenv('ZIP_THREADS')) if os.getenv('ZIP_THREADS') else None
+# Cópia zstd/lz4 dos CSVs ao lado do ZIP para o próximo estágio (vazio = desativado)
+FORMATO_INTERMEDIARIO = os.getenv('FORMATO_INTERMEDIARIO') or None
+
+# Trace por etapa (formato Chrome trace, abrir em ui.perfetto.dev) gravado em <saída>/logs
+RASTREAMENTO = os.getenv('RASTREAMENTO', 'True') == 'True'
+# Pico de memória por etapa (tracemalloc + RSS) no log da execução; deixa a execução mais lenta
+PERFIL_MEMORIA = os.getenv('PERFIL_MEMORIA', 'False') == 'True'
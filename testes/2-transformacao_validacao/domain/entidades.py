@@ -42,3 +42,12 @@ class ResultadoImportacao:
     registros_com_erro: int
     erros: list[str]
     tempo_execucao: float
+
+@dataclass
+class PoliticaCompressao:
+    """Como os ZIPs de saída são comprimidos (padrão: ZIP_DEFLATED, nível padrão do zlib)."""
+    metodo: str = "deflated"                    # deflated | stored | bzip2 | lzma
+    nivel: Optional[int] = None                 # nível do método (None = padrão)
+    max_threads: Optional[int] = None           # threads que comprimem os membros (None = automático)
+    formato_intermediario: Optional[str] = None  # zstd | lz4: cópia dos CSVs para o próximo estágio
+    nivel_intermediario: Optional[int] = None
@@ -1,5 +1,11 @@
 """Inicializa módulo de serviços de domínio."""
 
+from .conversor_numero_br import ConversorNumeroBR
+from .compactador_zip import CompactadorZIP
+from .intercambio_parquet import IntercambioParquet
+from .dimensao_operadoras import DimensaoOperadoras
+from .perfil_memoria import PerfilMemoria
+from .rastreador import Rastreador, trecho, rastrear
 from .validador_cnpj import ValidadorCNPJ
 from .enriquecedor_operadoras import EnriquecedorOperadoras
 from .enriquecedor_operadoras_carregadas import EnriquecedorOperadorasCarregadas
@@ -11,6 +17,14 @@ from .validador_despesas import ValidadorDespesas
 from .agregador_despesas import AgregadorDespesas
 
 __all__ = [
+    'ConversorNumeroBR',
+    'CompactadorZIP',
+    'IntercambioParquet',
+    'DimensaoOperadoras',
+    'PerfilMemoria',
+    'Rastreador',
+    'trecho',
+    'rastrear',
     'ValidadorCNPJ',
     'EnriquecedorOperadoras',
     'EnriquecedorOperadorasCarregadas',
@@ -5,11 +5,15 @@ Centraliza a lógica de agrupamento e cálculo de estatísticas.
 from typing import Optional
 import pandas as pd
 
+from .conversor_numero_br import ConversorNumeroBR
+from .rastreador import rastrear
+
 
 class AgregadorDespesas:
     """Agrega e calcula estatísticas de despesas"""
 
     @staticmethod
+    @rastrear()
     def agregar_por_operadora_uf(df: pd.DataFrame) -> Optional[pd.DataFrame]:
         """
         Agrega despesas por operadora e UF, calculando estatísticas.
@@ -30,12 +34,15 @@ class AgregadorDespesas:
         if "CNPJ" not in df_valid.columns:
             df_valid["CNPJ"] = "N/L"
 
+        # UF pode chegar como category: 'N/L' precisa existir nas categorias antes do fillna
+        if isinstance(df_valid["UF"].dtype, pd.CategoricalDtype) and "N/L" not in df_valid["UF"].cat.categories:
+            df_valid["UF"] = df_valid["UF"].cat.add_categories(["N/L"])
         df_valid["UF"] = df_valid["UF"].fillna("N/L")
         if "REGISTROANS" not in df_valid.columns:
             df_valid["REGISTROANS"] = "N/L"
 
-        # Agregação base
-        base = df_valid.groupby(["CNPJ", "RAZAO_SOCIAL", "UF", "REGISTROANS"], dropna=False).agg(
+        # Agregação base (observed=True: chaves category não geram produto cartesiano)
+        base = df_valid.groupby(["CNPJ", "RAZAO_SOCIAL", "UF", "REGISTROANS"], dropna=False, observed=True).agg(
             total_despesas=("VALOR_NUM", "sum"),
             qtd_registros=("VALOR_NUM", "size"),
             qtd_trimestres=("TRIMESTRE", "nunique"),
@@ -45,11 +52,12 @@ class AgregadorDespesas:
         # Estatísticas por trimestre
         por_trimestre = df_valid.groupby(
             ["CNPJ", "RAZAO_SOCIAL", "UF", "REGISTROANS", "TRIMESTRE"], 
-            dropna=False
+            dropna=False,
+            observed=True
         )["VALOR_NUM"].sum().reset_index()
         
         # Calcular desvio padrão dos valores dos trimestres com dados
-        stats = por_trimestre.groupby(["CNPJ", "RAZAO_SOCIAL", "UF", "REGISTROANS"], dropna=False)["VALOR_NUM"].agg(
+        stats = por_trimestre.groupby(["CNPJ", "RAZAO_SOCIAL", "UF", "REGISTROANS"], dropna=False, observed=True)["VALOR_NUM"].agg(
             desvio_padrao_despesas="std",
         ).reset_index()
 
@@ -102,16 +110,8 @@ class AgregadorDespesas:
         # Colunas numéricas que devem ser formatadas para o padrão brasileiro
         colunas_numericas = ["total_despesas", "media_despesas_trimestre", "desvio_padrao_despesas"]
         
-        def formatar_moeda_brasileira(valor):
-            """Formata valor como moeda brasileira: 1234567.89 -> 1.234.567,89"""
-            if pd.isna(valor):
-                return ""
-            # Formata com 2 casas decimais e separador de milhares (,)
-            # Depois inverte pontos e vírgulas para padrão brasileiro
-            return f"{valor:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
-        
         for col in colunas_numericas:
             if col in df_formato.columns:
-                df_formato[col] = df_formato[col].apply(formatar_moeda_brasileira)
+                df_formato[col] = ConversorNumeroBR.formatar_serie(df_formato[col])
         
         df_formato.to_csv(caminho_saida, index=False, encoding="utf-8-sig", sep=";")
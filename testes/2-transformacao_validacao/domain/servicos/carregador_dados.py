@@ -8,13 +8,17 @@ from typing import Optional
 import pandas as pd
 
 from .gerenciador_zip import GerenciadorZIP
+from .intercambio_parquet import IntercambioParquet
+from .dimensao_operadoras import DimensaoOperadoras
 from .enriquecedor_operadoras_carregadas import EnriquecedorOperadorasCarregadas
+from .rastreador import rastrear
 
 
 class CarregadorDados:
     """Gerencia o carregamento de dados de CSV e banco de dados"""
 
     @staticmethod
+    @rastrear()
     def carregar_despesas(
         nome_arquivo,
         zip_path: Optional[str],
@@ -41,8 +45,19 @@ class CarregadorDados:
                     return df
             return None
 
-        # Tentar carregar do ZIP
+        # Preferir o handoff tipado (Parquet) do estágio 1: sem descompactar nem reinterpretar texto
+        df = CarregadorDados._carregar_handoff(nome_arquivo, zip_path, diretorio_dados)
+        if df is not None:
+            print(f"✓ Carregado do handoff Parquet: {nome_arquivo} ({len(df)} registros)")
+            return df
+
+        # Tentar carregar do ZIP (a cópia zstd/lz4 ao lado dele, se houver, é mais rápida)
         if zip_path:
+            df = GerenciadorZIP.ler_csv_intermediario(zip_path, nome_arquivo)
+            if df is not None:
+                print(f"✓ Carregado da cópia intermediária: {nome_arquivo} ({len(df)} registros)")
+                return df
+
             df = GerenciadorZIP.ler_csv_do_zip(zip_path, nome_arquivo)
             if df is not None:
                 print(f"✓ Carregado do ZIP: {nome_arquivo} ({len(df)} registros)")
@@ -62,6 +77,42 @@ class CarregadorDados:
         logger.error(f"Arquivo não encontrado: {nome_arquivo}")
         return None
 
+    @staticmethod
+    def _carregar_handoff(
+        nome_arquivo: str,
+        zip_path: Optional[str],
+        diretorio_dados: str,
+    ) -> Optional[pd.DataFrame]:
+        """
+        Carrega o handoff Parquet de um CSV, gravado pelo estágio 1 ao lado do ZIP.
+        Ignorado se não existir, se for mais antigo que o ZIP, se a versão do
+        schema não for suportada ou se o pyarrow não estiver instalado.
+        
+        Args:
+            nome_arquivo: Nome do arquivo CSV
+            zip_path: Caminho do ZIP (pode ser None)
+            diretorio_dados: Diretório usado quando não há ZIP
+        
+        Returns:
+            DataFrame tipado ou None
+        """
+        diretorio = os.path.dirname(zip_path) if zip_path else diretorio_dados
+        caminho = IntercambioParquet.caminho(diretorio, nome_arquivo)
+        if not os.path.exists(caminho):
+            return None
+
+        if zip_path and os.path.getmtime(caminho) < os.path.getmtime(zip_path):
+            print(f"⚠ Handoff Parquet mais antigo que o ZIP, ignorado: {os.path.basename(caminho)}")
+            return None
+
+        try:
+            return IntercambioParquet.carregar(caminho)
+        except ImportError:
+            return None
+        except Exception as e:
+            print(f"⚠ Handoff Parquet ignorado ({os.path.basename(caminho)}): {e}")
+            return None
+
     @staticmethod
     def carregar_operadoras(database_url: str, logger: logging.Logger) -> pd.DataFrame:
         """
@@ -87,10 +138,14 @@ class CarregadorDados:
         return df
     
     @staticmethod
+    @rastrear()
     def carregar_operadoras_de_csvs(diretorio_downloads: str, logger: logging.Logger) -> pd.DataFrame:
         """
         Carrega operadoras ATIVAS e CANCELADAS dos CSVs gerados pelo Teste 1.
         
+        Se o Teste 1 gravou a dimensão de operadoras (operadoras_dimensao.arrow)
+        depois dos CSVs, ela é lida no lugar deles, já com as colunas derivadas.
+        
         Args:
             diretorio_downloads: Diretório raiz dos downloads
             logger: Logger para registrar erros
@@ -105,6 +160,12 @@ class CarregadorDados:
         ativas_path = os.path.join(pasta_operadoras, "operadoras_ativas.csv")
         canceladas_path = os.path.join(pasta_operadoras, "operadoras_canceladas.csv")
         
+        # Dimensão gravada pelo Teste 1 (já enriquecida), se não estiver desatualizada
+        dimensao = DimensaoOperadoras.tentar_carregar(diretorio_downloads, (ativas_path, canceladas_path), logger)
+        if dimensao is not None:
+            logger.info(f"✓ Total: {len(dimensao)} operadoras carregadas da dimensão {DimensaoOperadoras.NOME_ARQUIVO}")
+            return dimensao
+        
         dfs = []
         
         # Carregar ativas
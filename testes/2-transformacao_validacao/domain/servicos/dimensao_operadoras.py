@@ -0,0 +1,105 @@
+"""Serviço de Domínio: Leitura da dimensão de operadoras gravada pelo estágio 1.
+
+O estágio 1 grava em <downloads>/operadoras/operadoras_dimensao.arrow (Arrow
+IPC, lido com memory map) as operadoras ativas + canceladas já com as colunas
+derivadas que este estágio calculava a cada execução:
+- cnpj_limpo e status_upper (antes em EnriquecedorOperadorasCarregadas)
+- qtd_ativas, qtd_canceladas, duplicidade, resolucao e linha_resolvida
+  (antes no groupby de EnriquecedorOperadoras.criar_mapa_por_registro_ans)
+
+Só é usada quando a versão do schema é a esperada e a impressão digital dos
+CSVs de operadoras gravada nos metadados confere com os CSVs atuais; senão o
+carregamento volta aos CSVs.
+"""
+
+import hashlib
+import os
+from typing import Iterable, Optional
+
+import numpy as np
+import pandas as pd
+
+
+class DimensaoOperadoras:
+    """Lê a dimensão versionada de operadoras (mesmo formato do estágio 1)."""
+
+    # Deve acompanhar DimensaoOperadoras.VERSAO_SCHEMA do estágio 1
+    VERSAO_SCHEMA = "1"
+    CHAVE_VERSAO = b"versao_schema"
+    CHAVE_FINGERPRINT_CSVS = b"fingerprint_csvs"
+    NOME_ARQUIVO = "operadoras_dimensao.arrow"
+    COLUNAS_DERIVADAS = [
+        "cnpj_limpo", "status_upper", "qtd_ativas", "qtd_canceladas",
+        "duplicidade", "resolucao", "linha_resolvida",
+    ]
+    # Colunas de texto em que None significa "sem valor" (não NaN)
+    COLUNAS_COM_NONE = ("cnpj_limpo", "resolucao")
+    TAMANHO_BLOCO_HASH = 1024 * 1024
+
+    @staticmethod
+    def caminho(diretorio_downloads: str) -> str:
+        return os.path.join(diretorio_downloads, "operadoras", DimensaoOperadoras.NOME_ARQUIVO)
+
+    @staticmethod
+    def fingerprint_fontes(caminhos: Iterable[str]) -> str:
+        """sha256 do nome e do conteúdo dos CSVs (mesmo cálculo do estágio 1)."""
+        sha = hashlib.sha256()
+        for caminho in sorted(caminhos):
+            sha.update(f"{os.path.basename(caminho)}\n".encode("utf-8"))
+            with open(caminho, "rb") as f:
+                for bloco in iter(lambda: f.read(DimensaoOperadoras.TAMANHO_BLOCO_HASH), b""):
+                    sha.update(bloco)
+        return sha.hexdigest()
+
+    @staticmethod
+    def carregar(caminho: str, fingerprint_csvs: Optional[str] = None) -> pd.DataFrame:
+        """Lê a dimensão via memory map.
+
+        Textos nulos voltam como NaN, como no read_csv.
+
+        Raises:
+            ImportError: pyarrow não instalado
+            ValueError: versão de schema diferente de VERSAO_SCHEMA ou, se
+                        fingerprint_csvs for informado, CSVs de origem diferentes
+        """
+        import pyarrow as pa
+
+        with pa.memory_map(caminho, "r") as fonte:
+            tabela = pa.ipc.open_file(fonte).read_all()
+
+        metadados = tabela.schema.metadata or {}
+        versao = metadados.get(DimensaoOperadoras.CHAVE_VERSAO, b"").decode()
+        if versao != DimensaoOperadoras.VERSAO_SCHEMA:
+            raise ValueError(
+                f"versão de schema {versao or '(ausente)'} não suportada "
+                f"(esperada {DimensaoOperadoras.VERSAO_SCHEMA})"
+            )
+        gravado = metadados.get(DimensaoOperadoras.CHAVE_FINGERPRINT_CSVS, b"").decode()
+        if fingerprint_csvs is not None and gravado != fingerprint_csvs:
+            raise ValueError("gerada a partir de outros CSVs de operadoras")
+
+        df = tabela.to_pandas()
+        for coluna in df.columns:
+            if df[coluna].dtype == object and coluna not in DimensaoOperadoras.COLUNAS_COM_NONE:
+                df[coluna] = df[coluna].where(df[coluna].notna(), np.nan)
+        return df
+
+    @staticmethod
+    def tentar_carregar(diretorio_downloads: str, csvs: Iterable[str], logger=None) -> Optional[pd.DataFrame]:
+        """Dimensão gravada, ou None se ausente, desatualizada ou ilegível.
+
+        Args:
+            diretorio_downloads: Diretório raiz dos downloads
+            csvs: CSVs de operadoras que seriam lidos sem a dimensão
+            logger: Logger opcional para registrar por que a dimensão foi ignorada
+        """
+        caminho = DimensaoOperadoras.caminho(diretorio_downloads)
+        if not os.path.exists(caminho):
+            return None
+        try:
+            fingerprint = DimensaoOperadoras.fingerprint_fontes(c for c in csvs if os.path.exists(c))
+            return DimensaoOperadoras.carregar(caminho, fingerprint)
+        except (ImportError, OSError, ValueError) as e:
+            if logger:
+                logger.warning(f"Dimensão de operadoras ignorada ({caminho}): {e}")
+            return None
@@ -3,11 +3,14 @@
 import pandas as pd
 from typing import Dict
 
+from .rastreador import rastrear
+
 
 class EnriquecedorOperadoras:
     """Enriquece dados com informações de operadoras."""
     
     @staticmethod
+    @rastrear()
     def criar_mapa_por_registro_ans(operadoras: pd.DataFrame, logger=None) -> Dict[str, Dict]:
         """Cria mapa indexado por REG_ANS para enriquecimento.
         
@@ -23,6 +26,10 @@ class EnriquecedorOperadoras:
         if operadoras.empty:
             return mapa
         
+        # Dimensão do Teste 1: a resolução por reg_ans já vem calculada
+        if "resolucao" in operadoras.columns:
+            return EnriquecedorOperadoras._mapa_da_dimensao(operadoras, logger)
+        
         # Garantir que reg_ans seja inteiro para match correto
         operadoras_copy = operadoras.copy()
         operadoras_copy["reg_ans"] = pd.to_numeric(operadoras_copy["reg_ans"], errors='coerce').astype('Int64')
@@ -91,6 +98,62 @@ class EnriquecedorOperadoras:
         return mapa
 
     @staticmethod
+    def _mapa_da_dimensao(operadoras: pd.DataFrame, logger=None) -> Dict[str, Dict]:
+        """Mesmo mapa de criar_mapa_por_registro_ans, a partir das colunas
+        resolucao/linha_resolvida da dimensão (sem groupby por reg_ans)."""
+        reg_ans = pd.to_numeric(operadoras["reg_ans"], errors='coerce').astype('Int64')
+        validas = operadoras[reg_ans.notna()].assign(reg_ans=reg_ans[reg_ans.notna()])
+        
+        # Uma linha por reg_ans, em ordem crescente (a ordem do groupby)
+        por_registro = validas.drop_duplicates("reg_ans").sort_values("reg_ans")
+        resolvidas = validas[validas["linha_resolvida"]].set_index("reg_ans")
+        campos = {}
+        for campo in ("modalidade", "uf"):
+            if campo in resolvidas.columns:
+                campos[campo] = resolvidas[campo].astype(str).str.strip().to_dict()
+            else:
+                campos[campo] = dict.fromkeys(resolvidas.index, "N/L")
+        
+        mapa = {}
+        for reg_ans, resolucao, qtd_ativas, qtd_canceladas in zip(
+            por_registro["reg_ans"], por_registro["resolucao"],
+            por_registro["qtd_ativas"], por_registro["qtd_canceladas"]
+        ):
+            reg_ans_str = str(int(reg_ans))
+            if resolucao in ("ATIVO", "CANCELADA"):
+                mapa[reg_ans_str] = {
+                    "tipo": resolucao,
+                    "modalidade": campos["modalidade"][reg_ans],
+                    "uf": campos["uf"][reg_ans],
+                }
+            elif resolucao == "DUPLICIDADE":
+                if logger:
+                    if qtd_ativas > 1:
+                        logger.error(
+                            f"REGISTROANS com múltiplas operadoras ativas: {reg_ans_str} "
+                            f"({qtd_ativas} registros encontrados)"
+                        )
+                    else:
+                        logger.error(
+                            f"REGISTROANS com múltiplas operadoras canceladas: {reg_ans_str} "
+                            f"({qtd_canceladas} registros encontrados)"
+                        )
+                mapa[reg_ans_str] = {
+                    "tipo": "DUPLICIDADE",
+                    "modalidade": None,
+                    "uf": None,
+                }
+            else:
+                mapa[reg_ans_str] = {
+                    "tipo": "N/L",
+                    "modalidade": "N/L",
+                    "uf": "N/L",
+                }
+        
+        return mapa
+
+    @staticmethod
+    @rastrear()
     def enriquecer_com_modalidade_uf(
         df: pd.DataFrame, 
         mapa_reg_ans: Dict[str, Dict],
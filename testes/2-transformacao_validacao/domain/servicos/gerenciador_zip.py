@@ -6,13 +6,56 @@ import os
 import re
 import io
 import zipfile
-from typing import Optional, List
+from functools import partial
+from typing import BinaryIO, Optional, List
 import pandas as pd
 
+from ..entidades import PoliticaCompressao
+from .conversor_numero_br import ConversorNumeroBR
+from .compactador_zip import CompactadorZIP
+
 
 class GerenciadorZIP:
     """Gerencia operações de arquivos ZIP"""
 
+    # Colunas monetárias dos CSVs agregados (formato brasileiro)
+    COLUNAS_MOEDA = ["total_despesas", "media_despesas_trimestre", "desvio_padrao_despesas"]
+
+    # Linhas formatadas/codificadas por vez ao gravar CSV dentro do ZIP
+    TAMANHO_CHUNK_CSV = 50000
+
+    @staticmethod
+    def escrever_csv(
+        destino: BinaryIO,
+        df: pd.DataFrame,
+        colunas_moeda: Optional[List[str]] = None,
+        tamanho_chunk: Optional[int] = None,
+    ) -> None:
+        """
+        Grava um DataFrame como CSV (';', UTF-8 com BOM) em um destino binário
+        (membro do ZIP fornecido pelo CompactadorZIP).
+        Cada chunk é formatado, codificado e comprimido em sequência: a memória
+        fica limitada ao chunk e cada byte é escrito uma única vez.
+        
+        Args:
+            destino: Destino binário onde o CSV é escrito
+            df: DataFrame a gravar
+            colunas_moeda: Colunas formatadas no padrão brasileiro (1.234,56)
+            tamanho_chunk: Linhas por chunk (padrão: TAMANHO_CHUNK_CSV)
+        """
+        tamanho_chunk = tamanho_chunk or GerenciadorZIP.TAMANHO_CHUNK_CSV
+        colunas_moeda = [col for col in (colunas_moeda or []) if col in df.columns]
+
+        # utf-8-sig grava o BOM uma vez, no início do membro (Excel detecta o encoding)
+        with io.TextIOWrapper(destino, encoding="utf-8-sig", newline="") as texto:
+            for inicio in range(0, max(len(df), 1), tamanho_chunk):
+                chunk = df.iloc[inicio:inicio + tamanho_chunk]
+                if colunas_moeda:
+                    chunk = chunk.copy()
+                    for col in colunas_moeda:
+                        chunk[col] = ConversorNumeroBR.formatar_serie(chunk[col])
+                chunk.to_csv(texto, sep=";", index=False, header=(inicio == 0))
+
     @staticmethod
     def localizar_zip(diretorio: str, nome_base: str) -> Optional[str]:
         """
@@ -56,6 +99,40 @@ class GerenciadorZIP:
         except Exception:
             return None
 
+    @staticmethod
+    def ler_csv_intermediario(caminho_zip: str, nome_arquivo: str) -> Optional[pd.DataFrame]:
+        """
+        Lê a cópia zstd/lz4 de um CSV gravada ao lado do ZIP pelo estágio anterior
+        (ex: consolidado_despesas.zip -> sinistro_sem_deducoes.csv.zst).
+        Descomprime mais rápido que o membro deflate do ZIP.
+        
+        Args:
+            caminho_zip: Caminho completo do arquivo ZIP
+            nome_arquivo: Nome do arquivo CSV dentro do ZIP
+        
+        Returns:
+            DataFrame com o conteúdo do CSV ou None se não houver cópia legível
+        """
+        base = os.path.join(os.path.dirname(caminho_zip), nome_arquivo)
+        for formato, extensao in CompactadorZIP.EXTENSOES_INTERMEDIARIO.items():
+            caminho = base + extensao
+            if not os.path.exists(caminho):
+                continue
+            try:
+                if formato == "zstd":
+                    import zstandard
+                    with open(caminho, "rb") as bruto:
+                        with zstandard.ZstdDecompressor().stream_reader(bruto) as arquivo:
+                            return pd.read_csv(arquivo, sep=";", encoding="utf-8-sig")
+                import lz4.frame
+                with lz4.frame.open(caminho, "rb") as arquivo:
+                    return pd.read_csv(arquivo, sep=";", encoding="utf-8-sig")
+            except ImportError:
+                continue
+            except Exception as e:
+                print(f"⚠ Cópia intermediária ilegível, usando o ZIP: {caminho} ({e})")
+        return None
+
     @staticmethod
     def encontrar_log_zip(nomes: List[str]) -> Optional[str]:
         """
@@ -80,10 +157,12 @@ class GerenciadorZIP:
         agreg_sem_deducoes,
         agreg_c_deducoes,
         log_file_path: str,
+        politica: Optional[PoliticaCompressao] = None,
     ) -> bool:
         """
         Cria um novo ZIP com os DataFrames agregados e log.
-        Os DataFrames são convertidos em CSV em memória e adicionados ao ZIP.
+        Os DataFrames são gravados em CSV direto nas entradas do ZIP, em chunks,
+        e os membros são comprimidos em paralelo segundo a política.
         Os valores monetários são formatados para o padrão brasileiro.
         
         Args:
@@ -91,56 +170,33 @@ class GerenciadorZIP:
             agreg_sem_deducoes: DataFrame agregado sem deduções
             agreg_c_deducoes: DataFrame agregado com deduções
             log_file_path: Caminho do arquivo de log
+            politica: Compressão do ZIP (padrão: ZIP_DEFLATED)
         
         Returns:
             True se criado com sucesso, False caso contrário
         """
-        import pandas as pd
-        
-        def formatar_moeda_brasileira(valor):
-            """Formata valor como moeda brasileira: 1234567.89 -> 1.234.567,89"""
-            if pd.isna(valor):
-                return ""
-            # Formata com 2 casas decimais e separador de milhares (,)
-            # Depois inverte pontos e vírgulas para padrão brasileiro
-            return f"{valor:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
-        
         caminho_zip = os.path.join(caminho_destino, "Teste_Jessica_Jabes.zip")
-        try:
-            with zipfile.ZipFile(caminho_zip, "w", zipfile.ZIP_DEFLATED) as zipf:
-                # Adicionar CSV sem deduções se existir
-                if agreg_sem_deducoes is not None:
-                    df_formato = agreg_sem_deducoes.copy()
-                    # Formatar colunas numéricas
-                    colunas_numericas = ["total_despesas", "media_despesas_trimestre", "desvio_padrao_despesas"]
-                    for col in colunas_numericas:
-                        if col in df_formato.columns:
-                            df_formato[col] = df_formato[col].apply(formatar_moeda_brasileira)
-                    
-                    csv_content = df_formato.to_csv(sep=";", index=False)
-                    # Adicionar BOM UTF-8 para Excel detectar encoding automaticamente
-                    csv_bytes = b'\xef\xbb\xbf' + csv_content.encode('utf-8')
-                    zipf.writestr("despesas_agregadas.csv", csv_bytes)
-
-                # Adicionar CSV com deduções se existir
-                if agreg_c_deducoes is not None:
-                    df_formato = agreg_c_deducoes.copy()
-                    # Formatar colunas numéricas
-                    colunas_numericas = ["total_despesas", "media_despesas_trimestre", "desvio_padrao_despesas"]
-                    for col in colunas_numericas:
-                        if col in df_formato.columns:
-                            df_formato[col] = df_formato[col].apply(formatar_moeda_brasileira)
-                    
-                    csv_content = df_formato.to_csv(sep=";", index=False)
-                    # Adicionar BOM UTF-8 para Excel detectar encoding automaticamente
-                    csv_bytes = b'\xef\xbb\xbf' + csv_content.encode('utf-8')
-                    zipf.writestr("despesas_agregadas_c_deducoes.csv", csv_bytes)
+        membros = []
+        # Adicionar CSV sem deduções se existir
+        if agreg_sem_deducoes is not None:
+            membros.append((
+                "despesas_agregadas.csv",
+                partial(GerenciadorZIP.escrever_csv, df=agreg_sem_deducoes, colunas_moeda=GerenciadorZIP.COLUNAS_MOEDA),
+            ))
 
-                # Adicionar o log se existir
-                if os.path.exists(log_file_path):
-                    with open(log_file_path, 'r', encoding='utf-8') as f:
-                        conteudo = f.read()
-                    zipf.writestr(os.path.join("logs", os.path.basename(log_file_path)), conteudo)
+        # Adicionar CSV com deduções se existir
+        if agreg_c_deducoes is not None:
+            membros.append((
+                "despesas_agregadas_c_deducoes.csv",
+                partial(GerenciadorZIP.escrever_csv, df=agreg_c_deducoes, colunas_moeda=GerenciadorZIP.COLUNAS_MOEDA),
+            ))
+
+        # Adicionar o log se existir (copiado em blocos, sem carregar em memória)
+        if os.path.exists(log_file_path):
+            membros.append((os.path.join("logs", os.path.basename(log_file_path)), log_file_path))
+
+        try:
+            CompactadorZIP.criar_zip(caminho_zip, membros, politica)
 
             print(f"✓ ZIP gerado: {caminho_zip}")
             return True
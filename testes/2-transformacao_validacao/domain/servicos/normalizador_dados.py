@@ -4,6 +4,8 @@ import re
 import pandas as pd
 from typing import Optional
 
+from .conversor_numero_br import ConversorNumeroBR
+
 
 class NormalizadorDados:
     """Normaliza dados de despesas e valores."""
@@ -55,17 +57,4 @@ class NormalizadorDados:
         Returns:
             Float ou None se inválido
         """
-        if pd.isna(valor):
-            return None
-        
-        try:
-            if isinstance(valor, str):
-                valor = valor.strip()
-                if valor == "":
-                    return None
-                # Remove separador de milhares (.) e converte , em .
-                valor = valor.replace(".", "").replace(",", ".")
-                return float(valor)
-            return float(valor)
-        except Exception:
-            return None
+        return ConversorNumeroBR.parse_valor(valor)
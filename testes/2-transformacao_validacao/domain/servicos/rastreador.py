@@ -0,0 +1,162 @@
+"""
+Rastreamento por etapa no formato Chrome trace (chrome://tracing, Perfetto).
+
+Cada etapa medida vira um evento "X" (início + duração) com a thread em que
+rodou e argumentos livres (ex: linhas de entrada/saída):
+
+    with trecho("Carregar operadoras") as args:
+        operadoras = carregar(...)
+        args["linhas"] = len(operadoras)
+
+    @staticmethod
+    @rastrear()
+    def agregar_por_operadora_uf(df): ...
+
+Sem Rastreador.iniciar(), trecho/rastrear só conferem um atributo. Com
+PerfilMemoria iniciado, os trechos da categoria "etapa" também medem o pico
+de memória (argumentos heap_pico_mb, rss_pico_mb...).
+
+Cópia do rastreador do estágio 1 (infraestrutura/rastreador.py), com a
+mesma API e o mesmo relógio (time.time_ns()); lá ele também junta os eventos
+de processos filhos, que este estágio não cria. Os testes do estágio 1
+comparam as cópias.
+"""
+import functools
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional
+
+import pandas as pd
+
+from .perfil_memoria import PerfilMemoria
+
+
+class Rastreador:
+    """Coleta os eventos da execução e grava o trace JSON"""
+
+    _lock = threading.Lock()
+    _eventos = []
+    _caminho = None
+
+    @classmethod
+    def iniciar(cls, caminho: str) -> None:
+        """Ativa o rastreamento; o trace será gravado em caminho"""
+        with cls._lock:
+            cls._eventos = []
+            cls._caminho = caminho
+
+    @classmethod
+    def ativo(cls) -> bool:
+        return cls._caminho is not None
+
+    @classmethod
+    def registrar(cls, nome: str, categoria: str, inicio_ns: int, fim_ns: int, args: Dict) -> None:
+        """Acrescenta um evento completo (ph "X"); tempos em ns de time.time_ns()"""
+        evento = {
+            "name": nome,
+            "cat": categoria,
+            "ph": "X",
+            "ts": inicio_ns / 1000,
+            "dur": (fim_ns - inicio_ns) / 1000,
+            "pid": os.getpid(),
+            "tid": threading.get_ident(),
+            "args": dict(args),
+        }
+        with cls._lock:
+            if cls._caminho is not None:
+                cls._eventos.append((evento, threading.current_thread().name))
+
+    @classmethod
+    def gravar(cls) -> Optional[str]:
+        """
+        Grava o trace e desativa o rastreamento.
+
+        Returns:
+            Caminho do trace gravado ou None se o rastreamento não estava ativo
+        """
+        with cls._lock:
+            caminho, eventos = cls._caminho, cls._eventos
+            cls._caminho, cls._eventos = None, []
+        if caminho is None:
+            return None
+
+        # Tempos relativos ao primeiro evento e nomes das threads para o visualizador
+        inicio = min((evento["ts"] for evento, _ in eventos), default=0)
+        threads = {}
+        for evento, nome_thread in eventos:
+            evento["ts"] -= inicio
+            threads[(evento["pid"], evento["tid"])] = nome_thread
+        metadados = [
+            {"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": nome}}
+            for (pid, tid), nome in threads.items()
+        ]
+
+        os.makedirs(os.path.dirname(caminho) or ".", exist_ok=True)
+        caminho_tmp = f"{caminho}.tmp"
+        with open(caminho_tmp, "w", encoding="utf-8") as f:
+            json.dump(
+                {"traceEvents": metadados + [evento for evento, _ in eventos], "displayTimeUnit": "ms"},
+                f, ensure_ascii=False, default=str
+            )
+        os.replace(caminho_tmp, caminho)
+        return caminho
+
+
+@contextmanager
+def trecho(nome: str, categoria: str = "etapa", **args) -> Iterator[Dict]:
+    """Mede o bloco como um evento; o dict devolvido aceita argumentos extras"""
+    rastreando = Rastreador.ativo()
+    medindo_memoria = categoria == "etapa" and PerfilMemoria.medindo()
+    if not (rastreando or medindo_memoria):
+        yield args
+        return
+
+    if medindo_memoria:
+        PerfilMemoria.iniciar_etapa(nome)
+    inicio = time.time_ns()
+    try:
+        yield args
+    finally:
+        fim = time.time_ns()
+        if medindo_memoria:
+            args.update(PerfilMemoria.encerrar_etapa(nome))
+        if rastreando:
+            Rastreador.registrar(nome, categoria, inicio, fim, args)
+
+
+def _linhas(valor) -> Optional[int]:
+    if isinstance(valor, pd.DataFrame):
+        return len(valor)
+    if isinstance(valor, tuple) and valor and isinstance(valor[0], pd.DataFrame):
+        return len(valor[0])
+    return None
+
+
+def rastrear(nome: str = None, categoria: str = "funcao"):
+    """
+    Decorator: mede cada chamada com as linhas do primeiro DataFrame recebido
+    (linhas_entrada) e do DataFrame devolvido (linhas_saida).
+    """
+    def decorador(funcao):
+        nome_evento = nome or funcao.__qualname__
+
+        @functools.wraps(funcao)
+        def envolvida(*args, **kwargs):
+            if not Rastreador.ativo():
+                return funcao(*args, **kwargs)
+
+            argumentos = {}
+            entrada = next((_linhas(a) for a in args if isinstance(a, pd.DataFrame)), None)
+            if entrada is not None:
+                argumentos["linhas_entrada"] = entrada
+            with trecho(nome_evento, categoria, **argumentos) as span:
+                resultado = funcao(*args, **kwargs)
+                saida = _linhas(resultado)
+                if saida is not None:
+                    span["linhas_saida"] = saida
+                return resultado
+        return envolvida
+    return decorador
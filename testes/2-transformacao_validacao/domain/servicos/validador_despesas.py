@@ -9,12 +9,17 @@ import pandas as pd
 from .validador_cnpj import ValidadorCNPJ
 from .enriquecedor_operadoras import EnriquecedorOperadoras
 from .normalizador_dados import NormalizadorDados
+from .conversor_numero_br import ConversorNumeroBR
+from .rastreador import rastrear
 
 
 class ValidadorDespesas:
     """Valida e enriquece dados de despesas"""
 
+    COLUNAS_CATEGORICAS = ["RAZAO_SOCIAL", "UF", "MODALIDADE"]
+
     @staticmethod
+    @rastrear()
     def validar_e_enriquecer(
         df: pd.DataFrame,
         operadoras: pd.DataFrame,
@@ -59,6 +64,17 @@ class ValidadorDespesas:
             nome_base=nome_base
         )
 
+        df = ValidadorDespesas._codificar_colunas_categoricas(df)
+
+        return df
+
+    @staticmethod
+    def _codificar_colunas_categoricas(df: pd.DataFrame) -> pd.DataFrame:
+        """Mantém colunas repetidas de baixa cardinalidade como category até a escrita do CSV"""
+        for coluna in ValidadorDespesas.COLUNAS_CATEGORICAS:
+            if coluna in df.columns:
+                df[coluna] = df[coluna].astype("category")
+        
         return df
 
     @staticmethod
@@ -98,13 +114,14 @@ class ValidadorDespesas:
         return df
 
     @staticmethod
+    @rastrear()
     def _validar_valores_numericos(
         df: pd.DataFrame,
         nome_base: str,
         logger: logging.Logger,
     ) -> pd.DataFrame:
         """Valida valores numéricos de despesas"""
-        df["VALOR_NUM"] = df["VALOR_DE_DESPESAS"].apply(NormalizadorDados.parse_valor)
+        df["VALOR_NUM"] = ConversorNumeroBR.parse_serie(df["VALOR_DE_DESPESAS"])
         
         # Validar valores inválidos
         mascara_valor_invalido = df["VALOR_NUM"].isna()
@@ -140,6 +157,7 @@ class ValidadorDespesas:
         return df
 
     @staticmethod
+    @rastrear()
     def _validar_cnpjs(
         df: pd.DataFrame,
         nome_base: str,
@@ -0,0 +1 @@
+"""Benchmarks do pipeline completo (estágios 1, 2 e carga no banco)."""